@@ -25,6 +25,11 @@ import sys
 # Agregar directorio de scripts al path para importar sistema de validación
 sys.path.append('scripts')
 
+# Capa compartida de acceso a SQLite (08_Gestion_Datos/scripts)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             '08_Gestion_Datos', 'scripts'))
+from acceso_datos_sqlite import obtener_pool
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -138,20 +143,17 @@ class GestorDatosMeteorologicos:
         for db_path in archivos_db:
             if os.path.exists(db_path):
                 try:
-                    conn = sqlite3.connect(db_path)
+                    # Conexión reutilizada entre recargas del dashboard
+                    pool = obtener_pool(db_path)
                     
                     # Verificar tablas disponibles
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-                    tablas = [row[0] for row in cursor.fetchall()]
+                    tablas = [row[0] for row in pool.consultar("SELECT name FROM sqlite_master WHERE type='table';")]
                     
                     if 'datos_meteorologicos' in tablas:
-                        df = pd.read_sql_query("SELECT * FROM datos_meteorologicos ORDER BY fecha DESC LIMIT 100", conn)
-                        conn.close()
+                        df = pool.leer_dataframe("SELECT * FROM datos_meteorologicos ORDER BY fecha DESC LIMIT 100")
                         return df.to_dict('records')
                     elif 'pronosticos' in tablas:
-                        df = pd.read_sql_query("SELECT * FROM pronosticos ORDER BY fecha DESC LIMIT 100", conn)
-                        conn.close()
+                        df = pool.leer_dataframe("SELECT * FROM pronosticos ORDER BY fecha DESC LIMIT 100")
                         return df.to_dict('records')
                         
                 except Exception as e:
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ALMACENAMIENTO IDEMPOTENTE DE DATOS METEOROLÓGICOS - METGO 3D QUILLOTA
+Capa de persistencia con clave única e inserciones UPSERT en bloque
+"""
+
+import argparse
+import logging
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Clave natural de una observación: una fila por estación, fecha y fuente
+CLAVE_DATOS_METEOROLOGICOS = ("estacion", "fecha", "fuente_api")
+
+FORMATO_FECHA_BD = "%Y-%m-%d %H:%M:%S"
+
+
+def _nombre_indice_unico(tabla: str, claves: Sequence[str]) -> str:
+    """Nombre estable del índice único para una tabla y sus claves"""
+    return f"ux_{tabla}_{'_'.join(claves)}"
+
+
+def _columnas_tabla(conn: sqlite3.Connection, tabla: str) -> List[str]:
+    """Columnas existentes de una tabla SQLite"""
+    return [fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})")]
+
+
+def _tiene_indice_unico(conn: sqlite3.Connection, tabla: str, claves: Sequence[str]) -> bool:
+    """Verificar si la tabla ya tiene una restricción única exactamente sobre las claves"""
+    for indice in conn.execute(f"PRAGMA index_list({tabla})").fetchall():
+        nombre, es_unico = indice[1], indice[2]
+        if not es_unico:
+            continue
+        columnas = [c[2] for c in conn.execute(f"PRAGMA index_info({nombre})")]
+        if tuple(columnas) == tuple(claves):
+            return True
+    return False
+
+
+def compactar_duplicados(conn: sqlite3.Connection, tabla: str = "datos_meteorologicos",
+                         claves: Sequence[str] = CLAVE_DATOS_METEOROLOGICOS) -> int:
+    """Eliminar filas duplicadas por clave conservando la más reciente (mayor rowid)"""
+    claves_sql = ", ".join(claves)
+    with conn:
+        cursor = conn.execute(f"""
+            DELETE FROM {tabla}
+            WHERE rowid NOT IN (
+                SELECT MAX(rowid) FROM {tabla} GROUP BY {claves_sql}
+            )
+        """)
+    eliminados = cursor.rowcount
+    logger.info(f"Compactación de {tabla}: {eliminados} duplicados eliminados")
+    return eliminados
+
+
+def asegurar_clave_unica(conn: sqlite3.Connection, tabla: str = "datos_meteorologicos",
+                         claves: Sequence[str] = CLAVE_DATOS_METEOROLOGICOS) -> None:
+    """Crear el índice único sobre las claves, compactando antes si hay duplicados"""
+    if _tiene_indice_unico(conn, tabla, claves):
+        return
+
+    compactar_duplicados(conn, tabla, claves)
+    with conn:
+        conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {_nombre_indice_unico(tabla, claves)} "
+            f"ON {tabla}({', '.join(claves)})"
+        )
+
+
+def _normalizar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Convertir fechas a texto canónico y NaN a None para SQLite"""
+    df = df.copy()
+    for columna in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[columna]):
+            df[columna] = df[columna].dt.strftime(FORMATO_FECHA_BD)
+    df = df.astype(object)
+    return df.where(pd.notna(df), None)
+
+
+def upsert_dataframe(conn: sqlite3.Connection, df: pd.DataFrame,
+                     tabla: str = "datos_meteorologicos",
+                     claves: Sequence[str] = CLAVE_DATOS_METEOROLOGICOS,
+                     tamano_bloque: int = 5000) -> int:
+    """Insertar o actualizar filas en bloque dentro de una única transacción
+
+    Usa INSERT ... ON CONFLICT(claves) DO UPDATE, por lo que volver a guardar una
+    ventana solapada actualiza las filas existentes en lugar de duplicarlas.
+    Las columnas que no existen en la tabla se ignoran.
+    """
+    if df is None or df.empty:
+        return 0
+
+    columnas_tabla = set(_columnas_tabla(conn, tabla))
+    columnas = [c for c in df.columns if c in columnas_tabla and c != "id"]
+    faltantes = [c for c in claves if c not in columnas]
+    if faltantes:
+        raise ValueError(f"Faltan columnas de la clave única en los datos: {faltantes}")
+
+    df_bd = _normalizar_dataframe(df[columnas]).drop_duplicates(subset=list(claves), keep="last")
+
+    actualizables = [c for c in columnas if c not in claves]
+    if actualizables:
+        accion = "DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in actualizables)
+    else:
+        accion = "DO NOTHING"
+
+    sql = (
+        f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+        f"VALUES ({', '.join('?' for _ in columnas)}) "
+        f"ON CONFLICT({', '.join(claves)}) {accion}"
+    )
+
+    filas = list(df_bd.itertuples(index=False, name=None))
+    with conn:
+        for inicio in range(0, len(filas), tamano_bloque):
+            conn.executemany(sql, filas[inicio:inicio + tamano_bloque])
+
+    return len(filas)
+
+
+def upsert_registros(conn: sqlite3.Connection, registros: Iterable[Dict],
+                     tabla: str = "datos_meteorologicos",
+                     claves: Sequence[str] = CLAVE_DATOS_METEOROLOGICOS) -> int:
+    """Variante de upsert_dataframe para listas de diccionarios"""
+    return upsert_dataframe(conn, pd.DataFrame(list(registros)), tabla, claves)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Comando de compactación única para bases existentes"""
+    parser = argparse.ArgumentParser(description="Compactar duplicados y crear clave única en datos meteorológicos")
+    parser.add_argument("base_datos", help="Ruta al archivo SQLite")
+    parser.add_argument("--tabla", default="datos_meteorologicos")
+    parser.add_argument("--claves", default=",".join(CLAVE_DATOS_METEOROLOGICOS),
+                        help="Columnas de la clave única separadas por coma")
+    parser.add_argument("--vacuum", action="store_true", help="Ejecutar VACUUM al terminar")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    claves = tuple(c.strip() for c in args.claves.split(",") if c.strip())
+
+    conn = sqlite3.connect(args.base_datos)
+    try:
+        total_antes = conn.execute(f"SELECT COUNT(*) FROM {args.tabla}").fetchone()[0]
+        eliminados = compactar_duplicados(conn, args.tabla, claves)
+        asegurar_clave_unica(conn, args.tabla, claves)
+        if args.vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    print(f"Registros antes: {total_antes}")
+    print(f"Duplicados eliminados: {eliminados}")
+    print(f"Registros después: {total_antes - eliminados}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,6 +4,9 @@ Sistema para obtener datos meteorológicos en tiempo real de múltiples fuentes
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -13,15 +16,47 @@ import logging
 from typing import Dict, List, Optional, Tuple
 import sqlite3
 import os
+import sys
+
+from almacenamiento_datos_meteorologicos import asegurar_clave_unica, upsert_dataframe
+
+# Capa compartida de acceso a SQLite (08_Gestion_Datos/scripts)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             '08_Gestion_Datos', 'scripts'))
+from acceso_datos_sqlite import obtener_pool
 
 class ConectorAPIsMeteorologicas:
+    VARIABLES_DIARIAS_OPENMETEO = [
+        "temperature_2m_max",
+        "temperature_2m_min",
+        "precipitation_sum",
+        "relative_humidity_2m_mean",
+        "pressure_msl_mean",
+        "wind_speed_10m_max",
+        "wind_direction_10m_dominant",
+        "cloud_cover_mean",
+        "shortwave_radiation_sum",
+        "dew_point_2m_mean"
+    ]
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.api_keys = self._cargar_api_keys()
         self.estaciones_quillota = self._configurar_estaciones_quillota()
         self.base_datos = "datos_meteorologicos_reales.db"
+        self.pool = obtener_pool(self.base_datos)
+        self.session = self._crear_sesion_http()
         self._inicializar_base_datos()
         
+    def _crear_sesion_http(self, max_conexiones: int = 10) -> requests.Session:
+        """Crear sesión HTTP con pool de conexiones y reintentos compartida por todas las APIs"""
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=max_conexiones, pool_maxsize=max_conexiones, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+        
     def _cargar_api_keys(self) -> Dict:
         """Cargar claves API desde archivo de configuración"""
         api_keys_file = "api_keys_meteorologicas.json"
@@ -117,7 +152,7 @@ class ConectorAPIsMeteorologicas:
     def _inicializar_base_datos(self):
         """Inicializar base de datos SQLite para almacenar datos meteorológicos"""
         try:
-            conn = sqlite3.connect(self.base_datos)
+            conn = self.pool.conexion()
             cursor = conn.cursor()
             
             # Crear tabla para datos meteorológicos
@@ -148,7 +183,9 @@ class ConectorAPIsMeteorologicas:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_fecha ON datos_meteorologicos(fecha)')
             
             conn.commit()
-            conn.close()
+            
+            # Clave única (estacion, fecha, fuente_api); compacta duplicados previos si los hay
+            asegurar_clave_unica(conn)
             
             self.logger.info("Base de datos meteorológica inicializada")
             
@@ -168,24 +205,13 @@ class ConectorAPIsMeteorologicas:
             params = {
                 "latitude": estacion["lat"],
                 "longitude": estacion["lon"],
-                "daily": [
-                    "temperature_2m_max",
-                    "temperature_2m_min", 
-                    "precipitation_sum",
-                    "relative_humidity_2m_mean",
-                    "pressure_msl_mean",
-                    "wind_speed_10m_max",
-                    "wind_direction_10m_dominant",
-                    "cloud_cover_mean",
-                    "shortwave_radiation_sum",
-                    "dew_point_2m_mean"
-                ],
+                "daily": self.VARIABLES_DIARIAS_OPENMETEO,
                 "timezone": "America/Santiago",
                 "past_days": dias
             }
             
             # Hacer petición a la API
-            response = requests.get(api_config["base_url"] + "/forecast", params=params, timeout=30)
+            response = self.session.get(api_config["base_url"] + "/forecast", params=params, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -243,7 +269,7 @@ class ConectorAPIsMeteorologicas:
             }
             
             # Hacer petición a la API
-            response = requests.get(api_config["base_url"] + "/forecast", params=params, timeout=30)
+            response = self.session.get(api_config["base_url"] + "/forecast", params=params, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -442,7 +468,7 @@ class ConectorAPIsMeteorologicas:
                 "lang": "es"
             }
             
-            response = requests.get(
+            response = self.session.get(
                 api_config["base_url"] + "/weather", 
                 params=params, 
                 timeout=30
@@ -513,8 +539,117 @@ class ConectorAPIsMeteorologicas:
             self.logger.error(f"Error procesando datos de OpenWeatherMap: {e}")
             return {"error": str(e)}
     
-    def obtener_datos_todas_estaciones(self, dias: int = 7) -> Dict:
-        """Obtener datos de todas las estaciones usando APIs disponibles"""
+    def obtener_datos_openmeteo_lote(self, estaciones_ids: List[str], dias: int = 7,
+                                     tamano_lote: int = 50) -> Dict[str, Dict]:
+        """Obtener datos de OpenMeteo para varias estaciones en una sola petición por lote"""
+        resultados = {}
+        api_config = self.api_keys["openmeteo"]
+        
+        if not api_config["activa"] or not estaciones_ids:
+            return resultados
+        
+        # OpenMeteo acepta listas de coordenadas separadas por coma y responde una lista
+        for inicio in range(0, len(estaciones_ids), tamano_lote):
+            lote = estaciones_ids[inicio:inicio + tamano_lote]
+            
+            try:
+                params = {
+                    "latitude": ",".join(str(self.estaciones_quillota[e]["lat"]) for e in lote),
+                    "longitude": ",".join(str(self.estaciones_quillota[e]["lon"]) for e in lote),
+                    "daily": self.VARIABLES_DIARIAS_OPENMETEO,
+                    "timezone": "America/Santiago",
+                    "past_days": dias
+                }
+                
+                response = self.session.get(api_config["base_url"] + "/forecast", params=params, timeout=30)
+                response.raise_for_status()
+                
+                data = response.json()
+                if isinstance(data, dict):
+                    data = [data]
+                
+                if len(data) != len(lote):
+                    # Sin correspondencia fiable respuesta-estación: pedir cada estación por separado
+                    self.logger.warning(f"OpenMeteo devolvió {len(data)} ubicaciones para un lote de {len(lote)}; "
+                                        f"se consulta por estación")
+                    for estacion_id in lote:
+                        datos_procesados = self.obtener_datos_openmeteo(estacion_id, dias)
+                        if datos_procesados and "error" not in datos_procesados:
+                            resultados[estacion_id] = datos_procesados
+                    continue
+                
+                for estacion_id, data_estacion in zip(lote, data):
+                    datos_procesados = self._procesar_datos_openmeteo(data_estacion, estacion_id)
+                    if "error" not in datos_procesados:
+                        resultados[estacion_id] = datos_procesados
+                
+                self.logger.info(f"Datos obtenidos de OpenMeteo en lote para {len(lote)} estaciones")
+                
+            except requests.exceptions.RequestException as e:
+                self.logger.error(f"Error de conexión con OpenMeteo (lote): {e}")
+            except Exception as e:
+                self.logger.error(f"Error procesando datos de OpenMeteo (lote): {e}")
+        
+        return resultados
+    
+    def obtener_datos_todas_estaciones(self, dias: int = 7, modo_lote: bool = True,
+                                       max_workers: int = 6) -> Dict:
+        """Obtener datos de todas las estaciones usando APIs disponibles
+        
+        En modo lote todas las coordenadas se piden a OpenMeteo en una sola petición,
+        los respaldos de OpenWeatherMap se ejecutan concurrentemente sobre la sesión
+        compartida y todas las estaciones se guardan en una única transacción.
+        """
+        if not modo_lote:
+            return self._obtener_datos_todas_estaciones_secuencial(dias)
+        
+        estaciones_ids = list(self.estaciones_quillota.keys())
+        resultados = self.obtener_datos_openmeteo_lote(estaciones_ids, dias)
+        
+        # Respaldo concurrente con OpenWeatherMap para las estaciones que fallaron
+        pendientes = [e for e in estaciones_ids if e not in resultados]
+        if pendientes:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pendientes))) as executor:
+                futuros = {
+                    executor.submit(self.obtener_datos_openweathermap, estacion_id): estacion_id
+                    for estacion_id in pendientes
+                }
+                for futuro in as_completed(futuros):
+                    estacion_id = futuros[futuro]
+                    datos = futuro.result()
+                    if datos and "error" not in datos:
+                        resultados[estacion_id] = datos
+                    else:
+                        self.logger.warning(f"No se pudieron obtener datos para {estacion_id}")
+        
+        # Mantener el orden de configuración de las estaciones
+        resultados = {
+            estacion_id: resultados.get(estacion_id, {"error": "No hay datos disponibles"})
+            for estacion_id in estaciones_ids
+        }
+        datos_combinados = [r["datos"] for r in resultados.values() if "error" not in r]
+        
+        if datos_combinados:
+            df_combinado = pd.concat(datos_combinados, ignore_index=True)
+            
+            # Guardar todas las estaciones en una sola transacción
+            self._guardar_datos_base_datos(df_combinado)
+            
+            return {
+                "estaciones": resultados,
+                "datos_combinados": df_combinado,
+                "total_estaciones": len(self.estaciones_quillota),
+                "estaciones_exitosas": len(datos_combinados),
+                "fecha_actualizacion": datetime.now().isoformat()
+            }
+        else:
+            return {
+                "estaciones": resultados,
+                "error": "No se pudieron obtener datos de ninguna estación"
+            }
+    
+    def _obtener_datos_todas_estaciones_secuencial(self, dias: int = 7) -> Dict:
+        """Obtener datos estación por estación (modo original, una petición por estación)"""
         resultados = {}
         datos_combinados = []
         
@@ -564,19 +699,15 @@ class ConectorAPIsMeteorologicas:
     def _guardar_datos_base_datos(self, df: pd.DataFrame):
         """Guardar datos en la base de datos SQLite"""
         try:
-            conn = sqlite3.connect(self.base_datos)
-            
             # Preparar datos para inserción
             df_to_insert = df.copy()
             df_to_insert["created_at"] = datetime.now()
             
-            # Insertar datos
-            df_to_insert.to_sql("datos_meteorologicos", conn, if_exists="append", index=False)
+            # Insertar o actualizar por (estacion, fecha, fuente_api); el upsert es idempotente,
+            # así que se puede reintentar completo si otro proceso tiene la base bloqueada
+            registros = self.pool.ejecutar_con_reintento(lambda conn: upsert_dataframe(conn, df_to_insert))
             
-            conn.commit()
-            conn.close()
-            
-            self.logger.info(f"Datos guardados en base de datos: {len(df)} registros")
+            self.logger.info(f"Datos guardados en base de datos: {registros} registros")
             
         except Exception as e:
             self.logger.error(f"Error guardando datos en base de datos: {e}")
@@ -584,8 +715,6 @@ class ConectorAPIsMeteorologicas:
     def obtener_datos_historicos(self, estacion_id: str, dias: int = 30) -> pd.DataFrame:
         """Obtener datos históricos de la base de datos"""
         try:
-            conn = sqlite3.connect(self.base_datos)
-            
             # Consultar datos históricos
             query = '''
                 SELECT * FROM datos_meteorologicos 
@@ -594,8 +723,7 @@ class ConectorAPIsMeteorologicas:
                 ORDER BY fecha DESC
             '''.format(dias)
             
-            df = pd.read_sql_query(query, conn, params=[estacion_id])
-            conn.close()
+            df = self.pool.leer_dataframe(query, [estacion_id])
             
             if not df.empty:
                 df["fecha"] = pd.to_datetime(df["fecha"])
@@ -17,6 +17,8 @@ from typing import Dict, List, Optional, Tuple
 import threading
 import time
 
+from almacenamiento_datos_meteorologicos import upsert_registros
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -400,34 +402,9 @@ class GestorDatosMeteorologicos:
         """Guardar datos en base de datos"""
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
             
-            registros_agregados = 0
-            
-            for dato in datos:
-                try:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO datos_meteorologicos 
-                        (fecha, temperatura_max, temperatura_min, temperatura_promedio,
-                         precipitacion, humedad_relativa, presion_atmosferica,
-                         viento_velocidad, viento_direccion, cobertura_nubosa,
-                         indice_uv, punto_rocio, visibilidad, fuente)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        dato['fecha'], dato['temperatura_max'], dato['temperatura_min'],
-                        dato['temperatura_promedio'], dato['precipitacion'],
-                        dato['humedad_relativa'], dato['presion_atmosferica'],
-                        dato['viento_velocidad'], dato['viento_direccion'],
-                        dato['cobertura_nubosa'], dato['indice_uv'],
-                        dato['punto_rocio'], dato['visibilidad'], dato['fuente']
-                    ))
-                    registros_agregados += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error insertando registro: {e}")
-                    continue
-            
-            conn.commit()
+            # UPSERT en bloque sobre la restricción UNIQUE(fecha) en una sola transacción
+            registros_agregados = upsert_registros(conn, datos, claves=("fecha",))
             conn.close()
             
             # Log de actualización
@@ -16,8 +16,14 @@ import logging
 import threading
 from dataclasses import dataclass, asdict
 import os
+import sys
 from pathlib import Path
 
+# Capa compartida de acceso a SQLite (08_Gestion_Datos/scripts)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             '08_Gestion_Datos', 'scripts'))
+from acceso_datos_sqlite import obtener_pool
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -166,8 +172,8 @@ class MonitorCalidadDatos:
         timestamp = datetime.now()
         
         try:
-            # Conectar a base de datos
-            conn = sqlite3.connect(self.config['base_datos'])
+            # Conexión reutilizada del hilo de monitoreo
+            pool = obtener_pool(self.config['base_datos'])
             
             # Obtener datos recientes (últimas 24 horas)
             fecha_limite = timestamp - timedelta(hours=24)
@@ -178,8 +184,7 @@ class MonitorCalidadDatos:
                 LIMIT 1000
             """
             
-            df = pd.read_sql_query(query, conn, params=[fecha_limite.isoformat()])
-            conn.close()
+            df = pool.leer_dataframe(query, [fecha_limite.isoformat()])
             
             if df.empty:
                 logger.warning("No hay datos recientes para monitorear")
@@ -0,0 +1,279 @@
+"""
+ACUMULADORES TÉRMICOS - METGO 3D QUILLOTA
+Grados-día, horas de frío y temperatura activa acumulados por estación y temporada
+Incluye: Tabla persistente de sumas prefijo, actualización incremental con datos diarios u horarios
+         y consulta del acumulado a cualquier fecha en O(1)
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS_ACUMULADAS = ['grado_dias_acumulados', 'horas_frio_acumuladas', 'temperatura_activa_acumulada']
+
+
+def estimar_horas_frio(temperatura_min, temperatura_max, umbral: float = 7.0) -> np.ndarray:
+    """Horas del día bajo el umbral suponiendo variación lineal entre mínima y máxima"""
+    t_min = np.asarray(temperatura_min, dtype=float)
+    t_max = np.asarray(temperatura_max, dtype=float)
+    amplitud = t_max - t_min
+    fraccion = np.divide(umbral - t_min, amplitud, out=(t_min < umbral).astype(float), where=amplitud > 0)
+    return 24 * np.clip(fraccion, 0, 1)
+
+
+def inicio_temporada(fechas, mes_inicio: int = 6) -> pd.DatetimeIndex:
+    """Primer día de la temporada a la que pertenece cada fecha"""
+    fechas = pd.DatetimeIndex(fechas)
+    años = fechas.year - (fechas.month < mes_inicio).astype(int)
+    return pd.DatetimeIndex(pd.to_datetime({'year': años, 'month': mes_inicio, 'day': 1}))
+
+
+class AcumuladoresTermicos:
+    """Sumas prefijo diarias por (estación, temporada) en SQLite
+
+    Cada día guarda sus aportes (grados-día sobre la temperatura base, horas
+    bajo el umbral de frío y temperatura activa) y los acumulados desde el
+    inicio de la temporada. Al llegar datos nuevos solo se recalculan los
+    días desde el primero afectado, y las consultas por fecha indexan un
+    arreglo denso por día de temporada.
+    """
+
+    def __init__(self, base_datos: str, temperatura_base: float = 10.0, umbral_frio: float = 7.0,
+                 mes_inicio_temporada: int = 6):
+        self.base_datos = base_datos
+        self.temperatura_base = temperatura_base
+        self.umbral_frio = umbral_frio
+        self.mes_inicio_temporada = mes_inicio_temporada
+        # (estacion_id, temporada) -> (inicio, acumulados densos por día)
+        self._series: Dict[Tuple[str, str], Tuple[pd.Timestamp, np.ndarray]] = {}
+        self._crear_tabla()
+
+    def _crear_tabla(self):
+        conn = sqlite3.connect(self.base_datos)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS acumulados_termicos (
+                estacion_id TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                temporada TEXT NOT NULL,
+                fuente TEXT NOT NULL,
+                grado_dias REAL NOT NULL,
+                horas_frio REAL NOT NULL,
+                temperatura_activa REAL NOT NULL,
+                grado_dias_acumulados REAL,
+                horas_frio_acumuladas REAL,
+                temperatura_activa_acumulada REAL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (estacion_id, fecha)
+            )
+        ''')
+        # Aporte de cada hora: repetir una hora reemplaza su aporte en vez de sumarlo otra vez
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS aportes_horarios_termicos (
+                estacion_id TEXT NOT NULL,
+                hora TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                grado_dias REAL NOT NULL,
+                horas_frio REAL NOT NULL,
+                temperatura_activa REAL NOT NULL,
+                PRIMARY KEY (estacion_id, hora)
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _temporadas(self, dias: pd.DatetimeIndex) -> np.ndarray:
+        return inicio_temporada(dias, self.mes_inicio_temporada).strftime('%Y-%m-%d').to_numpy()
+
+    def registrar_dias(self, estacion_id: str, fechas, temperatura_min, temperatura_max,
+                       temperatura_promedio=None) -> int:
+        """Registrar datos diarios; no reemplaza días que ya tienen datos horarios
+
+        Returns:
+            int: Número de días registrados
+        """
+        datos = pd.DataFrame({
+            'dia': pd.DatetimeIndex(fechas).normalize(),
+            't_min': np.asarray(temperatura_min, dtype=float),
+            't_max': np.asarray(temperatura_max, dtype=float)
+        })
+        datos['t_prom'] = (np.asarray(temperatura_promedio, dtype=float) if temperatura_promedio is not None
+                           else (datos['t_min'] + datos['t_max']) / 2)
+        datos = datos.dropna().drop_duplicates('dia', keep='first')
+        if datos.empty:
+            return 0
+
+        t_prom = datos['t_prom'].to_numpy()
+        aportes = pd.DataFrame({
+            'dia': datos['dia'].to_numpy(),
+            'grado_dias': np.maximum(t_prom - self.temperatura_base, 0.0),
+            'horas_frio': estimar_horas_frio(datos['t_min'], datos['t_max'], self.umbral_frio),
+            'temperatura_activa': np.where(t_prom > self.temperatura_base, t_prom, 0.0)
+        })
+        return self._guardar_aportes(estacion_id, aportes, '''
+            ON CONFLICT (estacion_id, fecha) DO UPDATE SET
+                grado_dias = excluded.grado_dias,
+                horas_frio = excluded.horas_frio,
+                temperatura_activa = excluded.temperatura_activa
+            WHERE fuente = 'diaria'
+        ''', 'diaria')
+
+    def registrar_horas(self, estacion_id: str, fechas_horas, temperaturas) -> int:
+        """Registrar lecturas horarias
+
+        Cada hora guarda su propio aporte, y el día suma las horas
+        guardadas, así que un día puede llegar en varios lotes y volver a
+        recibir una hora reemplaza su aporte en vez de contarla dos veces.
+        El primer lote horario de un día reemplaza la estimación diaria.
+
+        Returns:
+            int: Número de días afectados
+        """
+        temperaturas = np.asarray(temperaturas, dtype=float)
+        horas = pd.DataFrame({
+            'hora': pd.DatetimeIndex(fechas_horas).floor('h'),
+            'grado_dias': np.maximum(temperaturas - self.temperatura_base, 0.0) / 24,
+            'horas_frio': (temperaturas < self.umbral_frio).astype(float),
+            'temperatura_activa': np.where(temperaturas > self.temperatura_base, temperaturas, 0.0) / 24
+        }).dropna().drop_duplicates('hora', keep='last')
+        if horas.empty:
+            return 0
+
+        marcas = pd.DatetimeIndex(horas['hora'])
+        dias = marcas.strftime('%Y-%m-%d')
+        conn = sqlite3.connect(self.base_datos)
+        conn.executemany('''
+            INSERT INTO aportes_horarios_termicos
+            (estacion_id, hora, fecha, grado_dias, horas_frio, temperatura_activa)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (estacion_id, hora) DO UPDATE SET
+                grado_dias = excluded.grado_dias,
+                horas_frio = excluded.horas_frio,
+                temperatura_activa = excluded.temperatura_activa
+        ''', list(zip(
+            [estacion_id] * len(horas), marcas.strftime('%Y-%m-%d %H:%M:%S'), dias,
+            horas['grado_dias'].to_numpy().tolist(), horas['horas_frio'].to_numpy().tolist(),
+            horas['temperatura_activa'].to_numpy().tolist()
+        )))
+
+        # Totales de los días afectados con todas sus horas guardadas
+        aportes = pd.read_sql_query('''
+            SELECT fecha AS dia, SUM(grado_dias) AS grado_dias, SUM(horas_frio) AS horas_frio,
+                   SUM(temperatura_activa) AS temperatura_activa
+            FROM aportes_horarios_termicos
+            WHERE estacion_id = ? AND fecha BETWEEN ? AND ?
+            GROUP BY fecha
+        ''', conn, params=(estacion_id, dias.min(), dias.max()))
+        aportes['dia'] = pd.to_datetime(aportes['dia'])
+        aportes = aportes[aportes['dia'].isin(marcas.normalize())]
+
+        filas = self._escribir_aportes(conn, estacion_id, aportes, '''
+            ON CONFLICT (estacion_id, fecha) DO UPDATE SET
+                grado_dias = excluded.grado_dias,
+                horas_frio = excluded.horas_frio,
+                temperatura_activa = excluded.temperatura_activa,
+                fuente = 'horaria'
+        ''', 'horaria')
+        conn.commit()
+        conn.close()
+        return filas
+
+    def _guardar_aportes(self, estacion_id: str, aportes: pd.DataFrame, conflicto: str, fuente: str) -> int:
+        """Guardar aportes diarios y recalcular acumulados desde el primer día afectado"""
+        conn = sqlite3.connect(self.base_datos)
+        filas = self._escribir_aportes(conn, estacion_id, aportes, conflicto, fuente)
+        conn.commit()
+        conn.close()
+        return filas
+
+    def _escribir_aportes(self, conn: sqlite3.Connection, estacion_id: str, aportes: pd.DataFrame,
+                          conflicto: str, fuente: str) -> int:
+        """Insertar aportes diarios y recalcular acumulados sin confirmar la transacción"""
+        dias = pd.DatetimeIndex(aportes['dia'])
+        filas = list(zip(
+            [estacion_id] * len(aportes), dias.strftime('%Y-%m-%d'), self._temporadas(dias), [fuente] * len(aportes),
+            aportes['grado_dias'].to_numpy().tolist(), aportes['horas_frio'].to_numpy().tolist(),
+            aportes['temperatura_activa'].to_numpy().tolist()
+        ))
+
+        conn.executemany('''
+            INSERT INTO acumulados_termicos
+            (estacion_id, fecha, temporada, fuente, grado_dias, horas_frio, temperatura_activa)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''' + conflicto, filas)
+        self._recalcular(conn, estacion_id, dias.min().strftime('%Y-%m-%d'))
+        return len(filas)
+
+    def _recalcular(self, conn: sqlite3.Connection, estacion_id: str, desde: str):
+        """Sumas prefijo desde `desde`: partiendo del acumulado del día anterior en su temporada"""
+        temporada = self._temporadas(pd.DatetimeIndex([desde]))[0]
+        previo = conn.execute(f'''
+            SELECT {', '.join(COLUMNAS_ACUMULADAS)} FROM acumulados_termicos
+            WHERE estacion_id = ? AND temporada = ? AND fecha < ?
+            ORDER BY fecha DESC LIMIT 1
+        ''', (estacion_id, temporada, desde)).fetchone()
+
+        aportes = pd.read_sql_query('''
+            SELECT fecha, temporada, grado_dias, horas_frio, temperatura_activa
+            FROM acumulados_termicos
+            WHERE estacion_id = ? AND fecha >= ?
+            ORDER BY fecha
+        ''', conn, params=(estacion_id, desde))
+
+        columnas = ['grado_dias', 'horas_frio', 'temperatura_activa']
+        acumulados = aportes.groupby('temporada', sort=False)[columnas].cumsum().to_numpy(dtype=float, copy=True)
+        if previo is not None:
+            # Solo la temporada de `desde` continúa un acumulado anterior
+            acumulados[(aportes['temporada'] == temporada).to_numpy()] += np.array(previo, dtype=float)
+
+        conn.executemany(f'''
+            UPDATE acumulados_termicos
+            SET {', '.join(f'{columna} = ?' for columna in COLUMNAS_ACUMULADAS)}, updated_at = CURRENT_TIMESTAMP
+            WHERE estacion_id = ? AND fecha = ?
+        ''', [(*valores, estacion_id, fecha) for valores, fecha in zip(acumulados.tolist(), aportes['fecha'])])
+
+        self._series = {clave: serie for clave, serie in self._series.items()
+                        if clave[0] != estacion_id or clave[1] < temporada}
+
+    def _serie(self, estacion_id: str, temporada: str) -> Tuple[pd.Timestamp, np.ndarray]:
+        """Acumulados densos de la temporada: fila k = acumulado al día inicio + k"""
+        clave = (estacion_id, temporada)
+        if clave not in self._series:
+            conn = sqlite3.connect(self.base_datos)
+            filas = pd.read_sql_query(f'''
+                SELECT fecha, {', '.join(COLUMNAS_ACUMULADAS)} FROM acumulados_termicos
+                WHERE estacion_id = ? AND temporada = ?
+                ORDER BY fecha
+            ''', conn, params=(estacion_id, temporada))
+            conn.close()
+
+            inicio = pd.Timestamp(temporada)
+            desplazamientos = (pd.to_datetime(filas['fecha']) - inicio).dt.days.to_numpy()
+            largo = int(desplazamientos[-1]) + 1 if len(filas) else 1
+            # Días sin datos conservan el último acumulado conocido (0 antes del primero)
+            posicion = np.full(largo, -1)
+            posicion[desplazamientos] = np.arange(len(filas))
+            posicion = np.maximum.accumulate(posicion)
+            valores = np.vstack([np.zeros((1, len(COLUMNAS_ACUMULADAS))), filas[COLUMNAS_ACUMULADAS].to_numpy(dtype=float)])
+            self._series[clave] = (inicio, valores[posicion + 1])
+        return self._series[clave]
+
+    def acumulados_en_fechas(self, estacion_id: str, fechas) -> pd.DataFrame:
+        """Acumulados de temporada al día de cada fecha (una fila por fecha, en el mismo orden)"""
+        dias = pd.DatetimeIndex(fechas).normalize()
+        temporadas = self._temporadas(dias)
+        resultado = np.zeros((len(dias), len(COLUMNAS_ACUMULADAS)))
+        for temporada in np.unique(temporadas):
+            seleccion = temporadas == temporada
+            inicio, serie = self._serie(estacion_id, temporada)
+            # Fechas posteriores al último dato toman el último acumulado
+            desplazamientos = np.minimum((dias[seleccion] - inicio).days.to_numpy(), len(serie) - 1)
+            resultado[seleccion] = serie[desplazamientos]
+        return pd.DataFrame(resultado, index=dias, columns=COLUMNAS_ACUMULADAS)
+
+    def acumulado(self, estacion_id: str, fecha: datetime) -> Dict[str, float]:
+        """Acumulados de temporada al día de `fecha`"""
+        return self.acumulados_en_fechas(estacion_id, [fecha]).iloc[0].to_dict()
+
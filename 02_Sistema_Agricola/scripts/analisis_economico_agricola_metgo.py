@@ -24,6 +24,8 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import r2_score, mean_squared_error
 import joblib
 import warnings
+
+from motor_economico_agricola import MotorEconomicoAgricola, calcular_payback, calcular_tir
 warnings.filterwarnings('ignore')
 
 class AnalisisEconomicoAgricolaMetgo:
@@ -146,6 +148,9 @@ class AnalisisEconomicoAgricolaMetgo:
             }
         }
         
+        # Motor vectorizado: flujos de caja de muchos escenarios como una matriz
+        self.motor_economico = MotorEconomicoAgricola(self.configuracion_cultivos_economicos)
+        
         self.logger.info("Sistema de Análisis Económico Agrícola METGO 3D inicializado")
     
     def _crear_directorios(self):
@@ -312,48 +317,18 @@ class AnalisisEconomicoAgricolaMetgo:
             if not config_cultivo:
                 raise ValueError(f"Cultivo {cultivo_id} no encontrado")
             
-            # Calcular flujos de caja anuales
-            flujos_caja = []
-            costos_totales = 0
-            ingresos_totales = 0
-            
-            for año in range(1, horizonte_anos + 1):
-                # Costos
-                if año <= config_cultivo['tiempo_inicio_produccion']:
-                    # Período de establecimiento
-                    costo_año = config_cultivo['costo_plantacion'] * area_hectareas / config_cultivo['tiempo_inicio_produccion']
-                    costo_año += config_cultivo['costo_mantenimiento_anual'] * area_hectareas
-                    ingreso_año = 0
-                else:
-                    # Período productivo
-                    año_produccion = año - config_cultivo['tiempo_inicio_produccion']
-                    
-                    # Calcular rendimiento con incremento anual
-                    if año_produccion <= config_cultivo['estabilizacion_rendimiento']:
-                        factor_rendimiento = 1 + (config_cultivo['incremento_rendimiento_anual'] * año_produccion)
-                    else:
-                        factor_rendimiento = 1 + (config_cultivo['incremento_rendimiento_anual'] * config_cultivo['estabilizacion_rendimiento'])
-                    
-                    rendimiento_año = config_cultivo['rendimiento_hectarea'] * factor_rendimiento
-                    ingreso_año = rendimiento_año * config_cultivo['precio_kg'] * area_hectareas
-                    costo_año = config_cultivo['costo_produccion_hectarea'] * area_hectareas
-                
-                flujo_año = ingreso_año - costo_año
-                flujos_caja.append(flujo_año)
-                costos_totales += costo_año
-                ingresos_totales += ingreso_año
-            
-            # Calcular métricas financieras
-            roi = (ingresos_totales - costos_totales) / costos_totales * 100 if costos_totales > 0 else 0
-            
-            # Calcular VAN
-            van = sum([flujo / (1 + tasa_descuento) ** (i + 1) for i, flujo in enumerate(flujos_caja)])
-            
-            # Calcular TIR (simplificado)
-            tir = self._calcular_tir_simplificado(flujos_caja)
+            # Flujos de caja anuales y métricas del escenario (una fila del motor vectorizado)
+            ingresos, costos, flujos = self.motor_economico.flujos_caja([cultivo_id], area_hectareas, horizonte_anos)
+            metricas = {nombre: valores[0] for nombre, valores in
+                        self.motor_economico.metricas(ingresos, costos, flujos, tasa_descuento).items()}
+            flujos_caja = flujos[0].tolist()
             
-            # Calcular período de recuperación
-            payback = self._calcular_payback_period(flujos_caja)
+            roi = float(metricas['roi'])
+            van = float(metricas['van'])
+            tir = None if np.isnan(metricas['tir']) else float(metricas['tir'])
+            payback = float(metricas['payback'])
+            ingresos_totales = float(metricas['ingresos_totales'])
+            costos_totales = float(metricas['costos_totales'])
             
             # Guardar análisis
             analisis_id = f"roi_{uuid.uuid4().hex[:8]}"
@@ -367,7 +342,7 @@ class AnalisisEconomicoAgricolaMetgo:
                 'horizonte_anos': horizonte_anos,
                 'roi_proyectado': round(roi, 2),
                 'van_proyectado': round(van, 0),
-                'tir_proyectada': round(tir * 100, 2),
+                'tir_proyectada': round(tir * 100, 2) if tir is not None else None,
                 'payback_period': round(payback, 1),
                 'ingresos_totales': round(ingresos_totales, 0),
                 'costos_totales': round(costos_totales, 0),
@@ -375,47 +350,75 @@ class AnalisisEconomicoAgricolaMetgo:
                 'flujos_caja': [round(flujo, 0) for flujo in flujos_caja]
             }
             
-            print(f"[OK] ROI calculado: {roi:.2f}%, VAN: ${van:,.0f}, TIR: {tir*100:.2f}%")
+            texto_tir = f"{tir*100:.2f}%" if tir is not None else "no definida"
+            print(f"[OK] ROI calculado: {roi:.2f}%, VAN: ${van:,.0f}, TIR: {texto_tir}")
             return resultado
             
         except Exception as e:
             print(f"[ERROR] Error calculando ROI: {e}")
             return {'error': str(e)}
     
-    def _calcular_tir_simplificado(self, flujos_caja: List[float]) -> float:
-        """Calcular TIR de forma simplificada"""
+    def _calcular_tir_simplificado(self, flujos_caja: List[float]) -> Optional[float]:
+        """Calcular TIR con el buscador de raíces del motor (None si no existe)"""
         try:
-            # Método de aproximación para TIR
             if not flujos_caja or len(flujos_caja) == 0:
                 return 0.0
             
-            # Buscar tasa que haga VAN = 0
-            for tasa in np.arange(0.01, 0.50, 0.01):
-                van_tasa = sum([flujo / (1 + tasa) ** (i + 1) for i, flujo in enumerate(flujos_caja)])
-                if abs(van_tasa) < 1000:  # Tolerancia
-                    return tasa
-            
-            return 0.15  # TIR por defecto
-            
+            tir = calcular_tir(np.asarray(flujos_caja, dtype=float))[0]
+            return None if np.isnan(tir) else float(tir)
+        
         except Exception as e:
             print(f"[ERROR] Error calculando TIR: {e}")
-            return 0.10
+            return None
     
     def _calcular_payback_period(self, flujos_caja: List[float]) -> float:
         """Calcular período de recuperación de la inversión"""
         try:
-            acumulado = 0
-            for i, flujo in enumerate(flujos_caja):
-                acumulado += flujo
-                if acumulado >= 0:
-                    return i + 1
-            
-            return len(flujos_caja)  # No se recupera en el período
-            
+            if not flujos_caja:
+                return 0.0
+            return float(calcular_payback(np.asarray(flujos_caja, dtype=float))[0])
+        
         except Exception as e:
             print(f"[ERROR] Error calculando payback: {e}")
             return 0.0
     
+    def evaluar_escenarios_economicos(self, escenarios: pd.DataFrame, horizonte_anos: int = 10,
+                                      tasa_descuento: float = 0.08) -> pd.DataFrame:
+        """ROI, VAN, TIR y payback de muchos escenarios (cultivo, área, precio) a la vez
+        
+        Args:
+            escenarios: Columnas cultivo_id y area_hectareas; opcionales factor_precio,
+                factor_rendimiento y tasa_descuento
+        """
+        try:
+            print(f"[ROI] Evaluando {len(escenarios)} escenarios económicos")
+            return self.motor_economico.evaluar_escenarios(escenarios, horizonte_anos, tasa_descuento)
+        
+        except Exception as e:
+            print(f"[ERROR] Error evaluando escenarios económicos: {e}")
+            return pd.DataFrame()
+    
+    def simular_riesgo_cultivo(self, cultivo_id: str, area_hectareas: float, horizonte_anos: int = 10,
+                               tasa_descuento: float = 0.08, n_simulaciones: int = 10000,
+                               volatilidad_precio: float = 0.20, volatilidad_rendimiento: float = 0.15,
+                               semilla: Optional[int] = None) -> Dict:
+        """Percentiles de VAN, TIR y ROI por Monte Carlo de precio y rendimiento"""
+        try:
+            print(f"[ROI] Simulando {n_simulaciones} escenarios de precio y rendimiento para {cultivo_id}")
+            
+            resultado = self.motor_economico.simular_montecarlo(
+                cultivo_id, area_hectareas, horizonte_anos, tasa_descuento, n_simulaciones,
+                volatilidad_precio, volatilidad_rendimiento, semilla=semilla
+            )
+            
+            print(f"[OK] VAN P50: ${resultado['van']['p50']:,.0f}, "
+                  f"probabilidad de VAN negativo: {resultado['probabilidad_van_negativo']:.1%}")
+            return resultado
+        
+        except Exception as e:
+            print(f"[ERROR] Error en simulación Monte Carlo: {e}")
+            return {'error': str(e)}
+    
     def _guardar_analisis_roi(self, analisis_id: str, cultivo_id: str, area_hectareas: float,
                             horizonte_anos: int, roi: float, van: float, tir: float, payback: float):
         """Guardar análisis ROI en la base de datos"""
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+💾 ESCRITOR DE LECTURAS DE SENSORES METGO 3D
+Sistema Meteorológico Agrícola Quillota - Persistencia por lotes de lecturas de riego
+"""
+
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class EscritorLecturasSensores:
+    """Acumula lecturas en memoria y las inserta por lotes en SQLite
+
+    Cada lectura queda pendiente hasta que se junta un lote (tamano_lote) o
+    vence el intervalo de vaciado; entonces todo el lote se inserta con
+    executemany en una sola transacción, es decir, un commit (y un fsync)
+    por lote en vez de uno por lectura. Si la escritura falla, el lote vuelve
+    a quedar pendiente, acotado por max_pendientes (se descartan las más
+    antiguas). cerrar() vacía lo pendiente y se registra en atexit para que
+    un apagado normal no pierda lecturas.
+    """
+
+    def __init__(self, base_datos: str, tabla: str, columnas: Sequence[str],
+                 tamano_lote: int = 500, intervalo_vaciado: float = 30.0,
+                 max_pendientes: int = 100000, logger: Optional[logging.Logger] = None):
+        if tamano_lote <= 0:
+            raise ValueError("El tamaño de lote debe ser positivo")
+
+        self.base_datos = base_datos
+        self.tabla = tabla
+        self.columnas = list(columnas)
+        self.tamano_lote = tamano_lote
+        self.intervalo_vaciado = intervalo_vaciado
+        self.max_pendientes = max(max_pendientes, tamano_lote)
+        self.logger = logger or logging.getLogger(__name__)
+        self.sql_insercion = (
+            f"INSERT INTO {tabla} ({', '.join(self.columnas)}) "
+            f"VALUES ({', '.join('?' for _ in self.columnas)})"
+        )
+
+        self._pendientes: List[Tuple] = []
+        self._ultimo_vaciado = time.monotonic()
+        self._lock = threading.Lock()
+        self._lock_escritura = threading.Lock()
+        self._conexion: Optional[sqlite3.Connection] = None
+        self._detener = threading.Event()
+        self._hilo_vaciado: Optional[threading.Thread] = None
+        self._cerrado = False
+        self.contadores = {
+            'recibidas': 0,
+            'escritas': 0,
+            'lotes': 0,
+            'descartadas': 0,
+            'errores': 0
+        }
+        atexit.register(self.cerrar)
+
+    def __len__(self) -> int:
+        return len(self._pendientes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+    def _conectar(self) -> sqlite3.Connection:
+        if self._conexion is None:
+            self._conexion = sqlite3.connect(self.base_datos, check_same_thread=False)
+        return self._conexion
+
+    def agregar(self, fila: Sequence[Any]) -> int:
+        """Agregar una lectura (valores en el orden de columnas); vacía si corresponde
+
+        Returns:
+            int: Lecturas escritas en este llamado (0 si solo quedó pendiente)
+        """
+        return self.agregar_lote([fila])
+
+    def agregar_lote(self, filas: Sequence[Sequence[Any]]) -> int:
+        """Agregar varias lecturas; vacía si se completó un lote o venció el intervalo"""
+        with self._lock:
+            self._pendientes.extend(tuple(fila) for fila in filas)
+            self.contadores['recibidas'] += len(filas)
+            self._acotar_pendientes()
+        return self.vaciar() if self.debe_vaciar() else 0
+
+    def _acotar_pendientes(self):
+        exceso = len(self._pendientes) - self.max_pendientes
+        if exceso > 0:
+            del self._pendientes[:exceso]
+            self.contadores['descartadas'] += exceso
+
+    def debe_vaciar(self) -> bool:
+        """Indicar si hay un lote completo o venció el intervalo de vaciado"""
+        if not self._pendientes:
+            return False
+        return (len(self._pendientes) >= self.tamano_lote or
+                time.monotonic() - self._ultimo_vaciado >= self.intervalo_vaciado)
+
+    def vaciar(self) -> int:
+        """Escribir todas las lecturas pendientes en una transacción
+
+        Returns:
+            int: Lecturas escritas
+        """
+        with self._lock_escritura:
+            with self._lock:
+                lote, self._pendientes = self._pendientes, []
+                self._ultimo_vaciado = time.monotonic()
+
+            if not lote:
+                return 0
+
+            try:
+                conexion = self._conectar()
+                with conexion:
+                    conexion.executemany(self.sql_insercion, lote)
+            except Exception as e:
+                # Devolver el lote al inicio para reintentar en el próximo vaciado
+                with self._lock:
+                    self._pendientes[:0] = lote
+                    self._acotar_pendientes()
+                    self.contadores['errores'] += 1
+                self.logger.error(f"Error escribiendo lote de lecturas en {self.tabla}: {e}")
+                return 0
+
+            self.contadores['escritas'] += len(lote)
+            self.contadores['lotes'] += 1
+            return len(lote)
+
+    def iniciar_vaciado_periodico(self):
+        """Hilo que vacía cada intervalo aunque no lleguen lecturas nuevas"""
+        if self._hilo_vaciado is not None and self._hilo_vaciado.is_alive():
+            return
+
+        self._detener.clear()
+        self._hilo_vaciado = threading.Thread(
+            target=self._bucle_vaciado, name=f'vaciado_{self.tabla}', daemon=True
+        )
+        self._hilo_vaciado.start()
+
+    def _bucle_vaciado(self):
+        """Vaciar en cada intervalo hasta que se pida detener"""
+        while not self._detener.wait(self.intervalo_vaciado):
+            self.vaciar()
+
+    def cerrar(self):
+        """Detener el hilo periódico, vaciar lo pendiente y cerrar la conexión"""
+        if self._cerrado:
+            return
+        self._detener.set()
+        if self._hilo_vaciado is not None:
+            self._hilo_vaciado.join()
+            self._hilo_vaciado = None
+        self.vaciar()
+
+        with self._lock_escritura:
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
+        self._cerrado = True
+        atexit.unregister(self.cerrar)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Contadores y lecturas pendientes"""
+        return {**self.contadores, 'pendientes': len(self._pendientes)}
@@ -27,6 +27,8 @@ from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import r2_score, mean_squared_error
 import joblib
 import warnings
+
+from acumuladores_termicos import AcumuladoresTermicos
 warnings.filterwarnings('ignore')
 
 class ExpansionRegionalCasablancaMetgo:
@@ -40,9 +42,6 @@ class ExpansionRegionalCasablancaMetgo:
         # Crear directorios necesarios
         self._crear_directorios()
         
-        # Inicializar base de datos
-        self._inicializar_base_datos()
-        
         # Configuración específica de Casablanca
         self.configuracion_casablanca = {
             'region': 'Valle de Casablanca',
@@ -134,7 +133,10 @@ class ExpansionRegionalCasablancaMetgo:
                 'humedad_optima': [60, 80],         # %
                 'precipitacion_anual': [400, 800],  # mm
                 'horas_frio': [400, 800],           # horas < 7°C
-                'horas_sol': [2500, 3000]           # horas/año
+                'horas_sol': [2500, 3000],          # horas/año
+                'temperatura_base_gdd': 10,         # °C
+                'umbral_horas_frio': 7,             # °C
+                'mes_inicio_temporada': 6           # temporada desde el 1 de junio
             },
             'riesgos_especificos': {
                 'heladas_tardias': {'periodo': 'Sep-Oct', 'riesgo': 'Alto'},
@@ -167,6 +169,18 @@ class ExpansionRegionalCasablancaMetgo:
             }
         }
         
+        # Inicializar base de datos (requiere la configuración de estaciones)
+        self._inicializar_base_datos()
+        
+        # Grados-día, horas de frío y temperatura activa acumulados por temporada
+        requerimientos = self.configuracion_uva_blanca['requerimientos_climaticos']
+        self.acumuladores_termicos = AcumuladoresTermicos(
+            self.base_datos,
+            temperatura_base=requerimientos['temperatura_base_gdd'],
+            umbral_frio=requerimientos['umbral_horas_frio'],
+            mes_inicio_temporada=requerimientos['mes_inicio_temporada']
+        )
+
         self.logger.info("Sistema de Expansión Regional Casablanca inicializado")
     
     def _crear_directorios(self):
@@ -316,6 +330,16 @@ class ExpansionRegionalCasablancaMetgo:
                 )
             ''')
             
+            # Índices por estación y fecha (lecturas por temporada y análisis incremental)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_datos_casablanca_estacion_fecha
+                ON datos_meteorologicos_casablanca (estacion_id, fecha)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_fenologicos_estacion_fecha
+                ON analisis_fenologicos (estacion_id, fecha_analisis)
+            ''')
+            
             # Insertar estaciones de Casablanca
             for estacion_id, datos in self.estaciones_casablanca.items():
                 cursor.execute('''
@@ -526,49 +550,217 @@ class ExpansionRegionalCasablancaMetgo:
             conn = sqlite3.connect(self.base_datos)
             cursor = conn.cursor()
             
-            for dato in datos:
-                cursor.execute('''
-                    INSERT INTO datos_meteorologicos_casablanca 
-                    (estacion_id, fecha, temperatura_max, temperatura_min, temperatura_promedio,
-                     humedad_relativa, precipitacion, velocidad_viento, direccion_viento,
-                     presion_atmosferica, radiacion_solar, temperatura_mar, humedad_marina,
-                     velocidad_brisa, direccion_brisa, intensidad_brisa)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    dato['estacion_id'], dato['fecha'], dato['temperatura_max'],
-                    dato['temperatura_min'], dato['temperatura_promedio'],
-                    dato['humedad_relativa'], dato['precipitacion'], dato['velocidad_viento'],
-                    dato['direccion_viento'], dato['presion_atmosferica'], dato['radiacion_solar'],
-                    dato['temperatura_mar'], dato['humedad_marina'], dato['velocidad_brisa'],
-                    dato['direccion_brisa'], dato['intensidad_brisa']
-                ))
+            cursor.executemany('''
+                INSERT INTO datos_meteorologicos_casablanca 
+                (estacion_id, fecha, temperatura_max, temperatura_min, temperatura_promedio,
+                 humedad_relativa, precipitacion, velocidad_viento, direccion_viento,
+                 presion_atmosferica, radiacion_solar, temperatura_mar, humedad_marina,
+                 velocidad_brisa, direccion_brisa, intensidad_brisa)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(
+                dato['estacion_id'], self._formatear_fecha(dato['fecha']), dato['temperatura_max'],
+                dato['temperatura_min'], dato['temperatura_promedio'],
+                dato['humedad_relativa'], dato['precipitacion'], dato['velocidad_viento'],
+                dato['direccion_viento'], dato['presion_atmosferica'], dato['radiacion_solar'],
+                dato['temperatura_mar'], dato['humedad_marina'], dato['velocidad_brisa'],
+                dato['direccion_brisa'], dato['intensidad_brisa']
+            ) for dato in datos if dato])
             
             conn.commit()
             conn.close()
             
+            # Actualizar acumulados térmicos con los días recibidos
+            validos = [dato for dato in datos if dato]
+            if validos:
+                self.acumuladores_termicos.registrar_dias(
+                    estacion_id,
+                    [dato['fecha'] for dato in validos],
+                    [dato['temperatura_min'] for dato in validos],
+                    [dato['temperatura_max'] for dato in validos],
+                    [dato['temperatura_promedio'] for dato in validos]
+                )
+
         except Exception as e:
             print(f"[ERROR] Error guardando datos de estación: {e}")
     
-    def _generar_analisis_fenologicos(self, fechas: pd.DatetimeIndex):
-        """Generar análisis fenológicos para uva blanca"""
+    def _formatear_fecha(self, fecha) -> str:
+        """Fecha como texto ISO ordenable, formato con que se guardan los registros"""
+        return pd.Timestamp(fecha).strftime('%Y-%m-%d %H:%M:%S')
+    
+    def _generar_analisis_fenologicos(self, fechas: Optional[pd.DatetimeIndex] = None) -> int:
+        """Generar análisis fenológicos para uva blanca
+        
+        Por estación se leen los días pendientes en una consulta, se toman los
+        acumulados de temporada de la tabla de sumas prefijo, se calculan
+        todos los días con operaciones de arreglos y se insertan en bloque. Solo se
+        analizan días posteriores al último análisis guardado, de modo que
+        volver a ejecutar procesa únicamente los días agregados. Con fechas
+        se restringe a esos días; sin fechas se toman todos los pendientes.
+        
+        Returns:
+            int: Número de análisis insertados
+        """
         try:
+            total = 0
+            conn = sqlite3.connect(self.base_datos)
+            
             for estacion_id in self.estaciones_casablanca.keys():
-                for fecha in fechas:
-                    # Determinar fase fenológica según el mes
-                    fase_fenologica = self._determinar_fase_fenologica(fecha.month)
-                    
-                    # Calcular parámetros fenológicos
-                    analisis = self._calcular_parametros_fenologicos(
-                        estacion_id, fecha, fase_fenologica
-                    )
-                    
-                    # Guardar análisis
-                    self._guardar_analisis_fenologico(estacion_id, fecha, analisis)
+                ultimo = conn.execute('''
+                    SELECT MAX(fecha_analisis) FROM analisis_fenologicos WHERE estacion_id = ?
+                ''', (estacion_id,)).fetchone()[0]
+                
+                self._sincronizar_acumuladores(conn, estacion_id)
+                
+                # Primer día a analizar
+                if fechas is not None and len(fechas) > 0:
+                    desde = pd.Timestamp(min(fechas)).normalize()
+                    hasta = pd.Timestamp(max(fechas)).normalize() + timedelta(days=1)
+                else:
+                    desde = pd.Timestamp(ultimo) if ultimo else None
+                    hasta = None
+                if ultimo and desde is not None:
+                    desde = max(desde, pd.Timestamp(ultimo))
+                
+                datos = self._cargar_datos_estacion(conn, estacion_id, desde, hasta)
+                if ultimo:
+                    datos = datos[datos['fecha'] > ultimo]
+                if fechas is not None:
+                    datos = datos[datos['dia'].isin(set(pd.DatetimeIndex(fechas).normalize()))]
+                if datos.empty:
+                    continue
+                
+                analisis = self._calcular_fenologia_dias(estacion_id, datos)
+                total += self._guardar_analisis_fenologicos(conn, estacion_id, analisis)
+                # Liberar el bloqueo de escritura antes de actualizar acumuladores de la siguiente estación
+                conn.commit()
             
-            print("[OK] Análisis fenológicos generados")
+            conn.close()
             
+            print(f"[OK] Análisis fenológicos generados: {total}")
+            return total
+        
         except Exception as e:
             print(f"[ERROR] Error generando análisis fenológicos: {e}")
+            return 0
+    
+    def actualizar_analisis_fenologicos(self) -> int:
+        """Analizar solo los días agregados desde la última ejecución"""
+        return self._generar_analisis_fenologicos()
+    
+    def _sincronizar_acumuladores(self, conn: sqlite3.Connection, estacion_id: str):
+        """Registrar en los acumuladores los días guardados por otras vías y aún no incluidos
+        
+        Se buscan los (estación, día) sin fila de acumulados, así que también
+        entran días atrasados anteriores al último registrado.
+        """
+        consulta = '''
+            SELECT d.fecha, d.temperatura_min, d.temperatura_max, d.temperatura_promedio
+            FROM datos_meteorologicos_casablanca d
+            WHERE d.estacion_id = ? AND NOT EXISTS (
+                SELECT 1 FROM acumulados_termicos a
+                WHERE a.estacion_id = d.estacion_id AND a.fecha = date(d.fecha)
+            )
+            ORDER BY d.fecha, d.id
+        '''
+        
+        pendientes = pd.read_sql_query(consulta, conn, params=[estacion_id])
+        if not pendientes.empty:
+            self.acumuladores_termicos.registrar_dias(
+                estacion_id, pd.to_datetime(pendientes['fecha']), pendientes['temperatura_min'],
+                pendientes['temperatura_max'], pendientes['temperatura_promedio']
+            )
+    
+    def _cargar_datos_estacion(self, conn: sqlite3.Connection, estacion_id: str,
+                               desde: Optional[pd.Timestamp] = None,
+                               hasta: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Leer en una consulta los datos diarios de la estación entre `desde` y `hasta`"""
+        consulta = '''
+            SELECT fecha, temperatura_max, temperatura_min, temperatura_promedio,
+                   humedad_relativa, precipitacion
+            FROM datos_meteorologicos_casablanca
+            WHERE estacion_id = ?
+        '''
+        parametros = [estacion_id]
+        if desde is not None:
+            consulta += ' AND fecha >= ?'
+            parametros.append(self._formatear_fecha(desde))
+        if hasta is not None:
+            consulta += ' AND fecha < ?'
+            parametros.append(self._formatear_fecha(hasta))
+        consulta += ' ORDER BY fecha, id'
+        
+        datos = pd.read_sql_query(consulta, conn, params=parametros)
+        datos['dia'] = pd.to_datetime(datos['fecha']).dt.normalize()
+        # Un registro por día, como la consulta por día que reemplaza
+        return datos.drop_duplicates('dia', keep='first').reset_index(drop=True)
+    
+    def _calcular_fenologia_dias(self, estacion_id: str, datos: pd.DataFrame) -> pd.DataFrame:
+        """Fase, acumulados, avance y riesgos de todos los días con operaciones vectorizadas"""
+        fases = self.configuracion_uva_blanca['fases_fenologicas']
+
+        t_max = datos['temperatura_max'].to_numpy(dtype=float)
+        t_min = datos['temperatura_min'].to_numpy(dtype=float)
+        t_prom = datos['temperatura_promedio'].to_numpy(dtype=float)
+        humedad = datos['humedad_relativa'].to_numpy(dtype=float)
+        precipitacion = datos['precipitacion'].to_numpy(dtype=float)
+        meses = datos['dia'].dt.month.to_numpy()
+        
+        # Acumulados de temporada de todos los días en una consulta de sumas prefijo
+        acumulados = self.acumuladores_termicos.acumulados_en_fechas(estacion_id, datos['dia'])
+
+        # Fase y rango de meses de la fase, por mes del año
+        fase_por_mes = np.array([self._determinar_fase_fenologica(mes) for mes in range(13)], dtype=object)
+        fase = fase_por_mes[meses]
+        mes_inicio = np.array([min(fases[f]['meses']) for f in fase_por_mes])[meses]
+        mes_fin = np.array([max(fases[f]['meses']) for f in fase_por_mes])[meses]
+        
+        # Avance proporcional dentro de la fase ajustado por temperatura
+        avance_base = (meses - mes_inicio + 1) / (mes_fin - mes_inicio + 1) * 100
+        avance = np.clip(avance_base + (t_prom - 15) * 2, 0, 100)
+        avance = np.where(meses < mes_inicio, 0.0, np.where(meses > mes_fin, 100.0, avance))
+        
+        # Riesgo de helada según temperatura mínima y sensibilidad de la fase
+        riesgo_helada = np.select([t_min < -2, t_min < 0, t_min < 2, t_min < 5], [90, 70, 40, 20], 5).astype(float)
+        riesgo_helada *= np.select([np.isin(fase, ['brotacion', 'floracion']), fase == 'cuajado'], [1.5, 1.3], 1.0)
+        riesgo_helada = np.minimum(riesgo_helada, 100)
+        
+        # Riesgo de estrés hídrico por temperatura, humedad y lluvia
+        riesgo_estres = (np.maximum(0, (t_max - 25) * 3) + np.maximum(0, (60 - humedad) * 0.5)
+                         + np.maximum(0, (5 - precipitacion) * 2))
+        riesgo_estres = np.minimum(riesgo_estres * np.where(np.isin(fase, ['desarrollo', 'madurez']), 1.2, 1.0), 100)
+        
+        resultado = pd.DataFrame({
+            'fecha': datos['fecha'],
+            'dia': datos['dia'],
+            'fase_fenologica': fase,
+            'porcentaje_avance': np.round(avance, 1),
+            'temperatura_acumulada': acumulados['temperatura_activa_acumulada'].round(1).to_numpy(),
+            'horas_frio_acumuladas': acumulados['horas_frio_acumuladas'].round(1).to_numpy(),
+            'grado_dias_crecimiento': acumulados['grado_dias_acumulados'].round(1).to_numpy(),
+            'riesgo_helada': np.round(riesgo_helada, 1),
+            'riesgo_estres_hidrico': np.round(riesgo_estres, 1)
+        })
+        resultado['recomendacion'] = [
+            self._generar_recomendacion_fenologica(f, a, h, s)
+            for f, a, h, s in zip(fase, avance, riesgo_helada, riesgo_estres)
+        ]
+        return resultado
+    
+    def _guardar_analisis_fenologicos(self, conn: sqlite3.Connection, estacion_id: str,
+                                      analisis: pd.DataFrame) -> int:
+        """Insertar en bloque los análisis fenológicos de una estación"""
+        columnas = ['fecha', 'fase_fenologica', 'porcentaje_avance', 'temperatura_acumulada',
+                    'horas_frio_acumuladas', 'grado_dias_crecimiento', 'riesgo_helada',
+                    'riesgo_estres_hidrico', 'recomendacion']
+        filas = [(estacion_id, *fila) for fila in analisis[columnas].itertuples(index=False, name=None)]
+        conn.executemany('''
+            INSERT INTO analisis_fenologicos 
+            (estacion_id, fecha_analisis, fase_fenologica, porcentaje_avance,
+             temperatura_acumulada, horas_frio_acumuladas, grado_dias_crecimiento,
+             riesgo_helada, riesgo_estres_hidrico, recomendacion)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', filas)
+        return len(filas)
     
     def _determinar_fase_fenologica(self, mes: int) -> str:
         """Determinar fase fenológica según el mes"""
@@ -631,10 +823,13 @@ class ExpansionRegionalCasablancaMetgo:
             conn = sqlite3.connect(self.base_datos)
             cursor = conn.cursor()
             
+            # Rango [día, día siguiente) en vez de DATE(fecha) para usar el índice
+            dia = pd.Timestamp(fecha).normalize()
             cursor.execute('''
                 SELECT * FROM datos_meteorologicos_casablanca 
-                WHERE estacion_id = ? AND DATE(fecha) = DATE(?)
-            ''', (estacion_id, fecha.strftime('%Y-%m-%d')))
+                WHERE estacion_id = ? AND fecha >= ? AND fecha < ?
+                ORDER BY fecha, id
+            ''', (estacion_id, self._formatear_fecha(dia), self._formatear_fecha(dia + timedelta(days=1))))
             
             row = cursor.fetchone()
             conn.close()
@@ -656,44 +851,28 @@ class ExpansionRegionalCasablancaMetgo:
             return None
     
     def _calcular_temperatura_acumulada(self, estacion_id: str, fecha: datetime) -> float:
-        """Calcular temperatura acumulada desde inicio del ciclo"""
+        """Calcular temperatura activa acumulada desde inicio del ciclo (días sobre la temperatura base)"""
         try:
-            # Simular cálculo de temperatura acumulada
-            # En implementación real, se sumarían las temperaturas desde inicio del ciclo
-            dias_desde_inicio = (fecha - datetime(fecha.year, 6, 1)).days
-            return max(0, dias_desde_inicio * np.random.uniform(15, 25))
-            
+            return self.acumuladores_termicos.acumulado(estacion_id, fecha)['temperatura_activa_acumulada']
+
         except Exception as e:
             print(f"[ERROR] Error calculando temperatura acumulada: {e}")
             return 0.0
     
     def _calcular_horas_frio_acumuladas(self, estacion_id: str, fecha: datetime) -> float:
-        """Calcular horas de frío acumuladas"""
+        """Calcular horas de frío acumuladas (horas < 7°C desde inicio del ciclo)"""
         try:
-            # Simular cálculo de horas de frío
-            # En implementación real, se contarían horas < 7°C
-            dias_invierno = (fecha - datetime(fecha.year, 6, 1)).days
-            return max(0, dias_invierno * np.random.uniform(8, 12))
-            
+            return self.acumuladores_termicos.acumulado(estacion_id, fecha)['horas_frio_acumuladas']
+
         except Exception as e:
             print(f"[ERROR] Error calculando horas de frío: {e}")
             return 0.0
     
     def _calcular_grado_dias_crecimiento(self, estacion_id: str, fecha: datetime) -> float:
-        """Calcular grados-día de crecimiento"""
+        """Calcular grados-día de crecimiento acumulados desde inicio del ciclo"""
         try:
-            datos_meteo = self._obtener_datos_meteo_dia(estacion_id, fecha)
-            if not datos_meteo:
-                return 0.0
-            
-            temp_base = 10  # Temperatura base para uva
-            temp_promedio = datos_meteo['temperatura_promedio']
-            
-            if temp_promedio > temp_base:
-                return temp_promedio - temp_base
-            else:
-                return 0.0
-                
+            return self.acumuladores_termicos.acumulado(estacion_id, fecha)['grado_dias_acumulados']
+
         except Exception as e:
             print(f"[ERROR] Error calculando grados-día: {e}")
             return 0.0
@@ -844,7 +1023,7 @@ class ExpansionRegionalCasablancaMetgo:
                  riesgo_helada, riesgo_estres_hidrico, recomendacion)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
-                estacion_id, fecha, analisis['fase_fenologica'],
+                estacion_id, self._formatear_fecha(fecha), analisis['fase_fenologica'],
                 analisis['porcentaje_avance'], analisis['temperatura_acumulada'],
                 analisis['horas_frio_acumuladas'], analisis['grado_dias_crecimiento'],
                 analisis['riesgo_helada'], analisis['riesgo_estres_hidrico'],
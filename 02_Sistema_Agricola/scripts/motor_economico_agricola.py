@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+💹 MOTOR ECONÓMICO AGRÍCOLA METGO 3D
+Sistema Meteorológico Agrícola Quillota - Flujos de caja, VAN, TIR y Monte Carlo vectorizados
+"""
+
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+PARAMETROS_CULTIVO = [
+    'precio_kg', 'rendimiento_hectarea', 'costo_produccion_hectarea', 'costo_plantacion',
+    'tiempo_inicio_produccion', 'costo_mantenimiento_anual', 'incremento_rendimiento_anual',
+    'estabilizacion_rendimiento'
+]
+
+
+def calcular_van(flujos: np.ndarray, tasa_descuento) -> np.ndarray:
+    """VAN de cada fila de flujos (año 1 en la primera columna) a su tasa de descuento"""
+    flujos = np.atleast_2d(flujos)
+    años = np.arange(1, flujos.shape[1] + 1)
+    tasa = np.broadcast_to(np.asarray(tasa_descuento, dtype=float), flujos.shape[:1])
+    return np.sum(flujos * (1 + tasa[:, None]) ** -años, axis=1)
+
+
+def calcular_tir(flujos: np.ndarray, tolerancia: float = 1e-7, max_iteraciones: int = 100,
+                 limite_inferior: float = -0.99, limite_superior: float = 10.0) -> np.ndarray:
+    """TIR de cada fila de flujos con Newton acotado por bisección
+
+    Todas las filas se resuelven a la vez: un paso de Newton que sale del
+    intervalo con cambio de signo se reemplaza por bisección, por lo que la
+    convergencia está garantizada. Filas sin cambio de signo del VAN en
+    [limite_inferior, limite_superior] no tienen TIR y devuelven NaN.
+    """
+    flujos = np.atleast_2d(np.asarray(flujos, dtype=float))
+    años = np.arange(1, flujos.shape[1] + 1)
+
+    def van_y_derivada(filas, tasa):
+        descuento = (1 + tasa[:, None]) ** -años
+        return np.sum(filas * descuento, axis=1), np.sum(-años * filas * descuento / (1 + tasa[:, None]), axis=1)
+
+    inferior = np.full(len(flujos), limite_inferior)
+    superior = np.full(len(flujos), limite_superior)
+    van_inferior, _ = van_y_derivada(flujos, inferior)
+    van_superior, _ = van_y_derivada(flujos, superior)
+    con_tir = np.sign(van_inferior) != np.sign(van_superior)
+
+    tasa = np.full(len(flujos), 0.1)
+    pendientes = con_tir.copy()
+    for _ in range(max_iteraciones):
+        if not pendientes.any():
+            break
+        van, derivada = van_y_derivada(flujos[pendientes], tasa[pendientes])
+
+        # Achicar el intervalo conservando el cambio de signo
+        mismo_signo = van * van_inferior[pendientes] > 0
+        inferior[pendientes] = np.where(mismo_signo, tasa[pendientes], inferior[pendientes])
+        van_inferior[pendientes] = np.where(mismo_signo, van, van_inferior[pendientes])
+        superior[pendientes] = np.where(mismo_signo, superior[pendientes], tasa[pendientes])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = tasa[pendientes] - van / derivada
+        dentro = np.isfinite(newton) & (newton > inferior[pendientes]) & (newton < superior[pendientes])
+        nueva = np.where(dentro, newton, (inferior[pendientes] + superior[pendientes]) / 2)
+
+        convergida = (np.abs(nueva - tasa[pendientes]) < tolerancia) | (van == 0)
+        tasa[pendientes] = nueva
+        pendientes[np.flatnonzero(pendientes)[convergida]] = False
+
+    return np.where(con_tir, tasa, np.nan)
+
+
+def calcular_payback(flujos: np.ndarray) -> np.ndarray:
+    """Primer año con flujo acumulado no negativo; el horizonte si no se recupera"""
+    flujos = np.atleast_2d(flujos)
+    recuperado = np.cumsum(flujos, axis=1) >= 0
+    return np.where(recuperado.any(axis=1), recuperado.argmax(axis=1) + 1, flujos.shape[1])
+
+
+class MotorEconomicoAgricola:
+    """Matrices de flujos de caja (escenarios × años) para muchos cultivos a la vez
+
+    Cada escenario combina cultivo, superficie y factores de precio y
+    rendimiento. Los flujos siguen la misma lógica anual que
+    calcular_roi_cultivo (establecimiento, crecimiento hasta la
+    estabilización y producción), pero se calculan con arreglos.
+    """
+
+    def __init__(self, configuracion_cultivos: Dict[str, Dict[str, Any]]):
+        self.configuracion_cultivos = configuracion_cultivos
+        self._tabla = pd.DataFrame.from_dict(configuracion_cultivos, orient='index')[PARAMETROS_CULTIVO].astype(float)
+
+    def parametros(self, cultivos: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Parámetros económicos de cada escenario como columnas (n_escenarios,)"""
+        faltantes = set(cultivos) - set(self._tabla.index)
+        if faltantes:
+            raise ValueError(f"Cultivo {sorted(faltantes)[0]} no encontrado")
+        filas = self._tabla.loc[list(cultivos)]
+        return {columna: filas[columna].to_numpy() for columna in PARAMETROS_CULTIVO}
+
+    def flujos_caja(self, cultivos: Sequence[str], area_hectareas, horizonte_anos: int = 10,
+                    factor_precio=1.0, factor_rendimiento=1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Ingresos, costos y flujos (n_escenarios, horizonte_anos)
+
+        Args:
+            cultivos: Cultivo de cada escenario
+            area_hectareas: Superficie por escenario (escalar o arreglo)
+            factor_precio: Multiplicador del precio, (n,) o (n, horizonte) por año
+            factor_rendimiento: Multiplicador del rendimiento, (n,) o (n, horizonte)
+        """
+        p = self.parametros(cultivos)
+        n = len(cultivos)
+        area = np.broadcast_to(np.asarray(area_hectareas, dtype=float), (n,))[:, None]
+        años = np.arange(1, horizonte_anos + 1)[None, :]
+
+        def por_año(factor):
+            factor = np.asarray(factor, dtype=float)
+            return factor[:, None] if factor.ndim == 1 else factor
+
+        inicio = p['tiempo_inicio_produccion'][:, None]
+        establecimiento = años <= inicio
+        año_produccion = np.minimum(años - inicio, p['estabilizacion_rendimiento'][:, None])
+        factor_crecimiento = 1 + p['incremento_rendimiento_anual'][:, None] * año_produccion
+
+        ingresos = np.where(
+            establecimiento, 0.0,
+            p['rendimiento_hectarea'][:, None] * factor_crecimiento * por_año(factor_rendimiento) *
+            p['precio_kg'][:, None] * por_año(factor_precio) * area
+        )
+        costos = np.where(
+            establecimiento,
+            p['costo_plantacion'][:, None] * area / np.maximum(inicio, 1) + p['costo_mantenimiento_anual'][:, None] * area,
+            p['costo_produccion_hectarea'][:, None] * area
+        )
+        costos = np.broadcast_to(costos, ingresos.shape)
+        return ingresos, costos, ingresos - costos
+
+    def metricas(self, ingresos: np.ndarray, costos: np.ndarray, flujos: np.ndarray,
+                 tasa_descuento) -> Dict[str, np.ndarray]:
+        """ROI, VAN, TIR, payback y totales de cada fila de una matriz de flujos"""
+        ingresos_totales = ingresos.sum(axis=1)
+        costos_totales = costos.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = np.where(costos_totales > 0, (ingresos_totales - costos_totales) / costos_totales * 100, 0.0)
+        return {
+            'roi': roi,
+            'van': calcular_van(flujos, tasa_descuento),
+            'tir': calcular_tir(flujos),
+            'payback': calcular_payback(flujos),
+            'ingresos_totales': ingresos_totales,
+            'costos_totales': costos_totales
+        }
+
+    def evaluar_escenarios(self, escenarios: pd.DataFrame, horizonte_anos: int = 10,
+                           tasa_descuento: float = 0.08) -> pd.DataFrame:
+        """ROI, VAN, TIR y payback de cada escenario
+
+        Args:
+            escenarios: Columnas cultivo_id y area_hectareas; opcionales
+                factor_precio, factor_rendimiento y tasa_descuento
+        """
+        ingresos, costos, flujos = self.flujos_caja(
+            escenarios['cultivo_id'].tolist(),
+            escenarios['area_hectareas'].to_numpy(dtype=float),
+            horizonte_anos,
+            escenarios['factor_precio'].to_numpy(dtype=float) if 'factor_precio' in escenarios else 1.0,
+            escenarios['factor_rendimiento'].to_numpy(dtype=float) if 'factor_rendimiento' in escenarios else 1.0
+        )
+        tasas = escenarios['tasa_descuento'].to_numpy(dtype=float) if 'tasa_descuento' in escenarios else tasa_descuento
+        metricas = self.metricas(ingresos, costos, flujos, tasas)
+
+        resultado = escenarios.copy()
+        for nombre, valores in metricas.items():
+            resultado[nombre] = valores
+        resultado['beneficio_neto'] = resultado['ingresos_totales'] - resultado['costos_totales']
+        return resultado
+
+    def simular_montecarlo(self, cultivo_id: str, area_hectareas: float, horizonte_anos: int = 10,
+                           tasa_descuento: float = 0.08, n_simulaciones: int = 10000,
+                           volatilidad_precio: float = 0.20, volatilidad_rendimiento: float = 0.15,
+                           correlacion_precio_rendimiento: float = -0.3,
+                           percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+                           semilla: Optional[int] = None) -> Dict[str, Any]:
+        """Distribución de VAN, TIR y ROI muestreando precio y rendimiento por año
+
+        Los factores de precio y rendimiento de cada año son lognormales de
+        media 1, correlacionados entre sí (años buenos de cosecha suelen
+        bajar el precio). Todas las simulaciones se evalúan como una matriz.
+        """
+        rng = np.random.default_rng(semilla)
+        forma = (n_simulaciones, horizonte_anos)
+        z_precio = rng.standard_normal(forma)
+        z_rendimiento = (correlacion_precio_rendimiento * z_precio +
+                         np.sqrt(1 - correlacion_precio_rendimiento ** 2) * rng.standard_normal(forma))
+        factor_precio = np.exp(volatilidad_precio * z_precio - volatilidad_precio ** 2 / 2)
+        factor_rendimiento = np.exp(volatilidad_rendimiento * z_rendimiento - volatilidad_rendimiento ** 2 / 2)
+
+        ingresos, costos, flujos = self.flujos_caja(
+            [cultivo_id] * n_simulaciones, area_hectareas, horizonte_anos, factor_precio, factor_rendimiento
+        )
+        metricas = self.metricas(ingresos, costos, flujos, tasa_descuento)
+
+        def distribucion(valores):
+            validos = valores[np.isfinite(valores)]
+            if len(validos) == 0:
+                return {f'p{p:g}': None for p in percentiles} | {'media': None, 'desviacion': None}
+            resumen = {f'p{p:g}': float(v) for p, v in zip(percentiles, np.percentile(validos, percentiles))}
+            return resumen | {'media': float(validos.mean()), 'desviacion': float(validos.std())}
+
+        return {
+            'cultivo_id': cultivo_id,
+            'area_hectareas': area_hectareas,
+            'horizonte_anos': horizonte_anos,
+            'n_simulaciones': n_simulaciones,
+            'van': distribucion(metricas['van']),
+            'tir': distribucion(metricas['tir']),
+            'roi': distribucion(metricas['roi']),
+            'payback': distribucion(metricas['payback'].astype(float)),
+            'probabilidad_van_negativo': float(np.mean(metricas['van'] < 0)),
+            'proporcion_sin_tir': float(np.mean(np.isnan(metricas['tir'])))
+        }
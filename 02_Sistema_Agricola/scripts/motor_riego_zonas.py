@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🗺️ MOTOR DE RIEGO MULTIZONA METGO 3D
+Sistema Meteorológico Agrícola Quillota - Decisión y programación de riego para todas las zonas a la vez
+"""
+
+import heapq
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columnas de la matriz de zonas y valor por defecto cuando no se entregan
+COLUMNAS_ZONA = {
+    'controlador_id': None,
+    'tipo_riego': 'goteo',
+    'humedad_suelo': np.nan,
+    'temperatura': np.nan,
+    'humedad_optima_min': 30.0,
+    'humedad_optima_max': 60.0,
+    'humedad_critica_min': 20.0,
+    'temperatura_optima_min': -np.inf,
+    'temperatura_optima_max': np.inf,
+    'duracion_base_minutos': 30.0,
+    'coeficiente_cultivo': 1.0,
+    'caudal_litros_minuto': 20.0,
+    'presion_trabajo': 1.5,
+    'activa': True
+}
+
+URGENCIAS = np.array(['normal', 'baja', 'alta', 'critica'])
+
+
+class MotorRiegoZonas:
+    """Evalúa necesidad, duración y controlador de todas las zonas con arreglos
+
+    Cada fila de la matriz de zonas es una válvula/sector con su estado de
+    sensores y los parámetros de su cultivo. La evaluación es vectorizada;
+    la programación asigna horarios por prioridad respetando el máximo de
+    válvulas simultáneas, el caudal de la red y la presión disponible.
+    """
+
+    def __init__(self, limite_valvulas_simultaneas: int = 4, caudal_maximo_litros_minuto: float = 200.0,
+                 presion_disponible: float = 3.0, tiempo_riego_minimo: int = 10,
+                 tiempo_riego_maximo: int = 120, umbral_precipitacion: float = 5.0,
+                 umbral_viento: float = 15.0, et0_referencia: float = 5.0):
+        self.limite_valvulas_simultaneas = limite_valvulas_simultaneas
+        self.caudal_maximo_litros_minuto = caudal_maximo_litros_minuto
+        self.presion_disponible = presion_disponible
+        self.tiempo_riego_minimo = tiempo_riego_minimo
+        self.tiempo_riego_maximo = tiempo_riego_maximo
+        self.umbral_precipitacion = umbral_precipitacion
+        self.umbral_viento = umbral_viento
+        self.et0_referencia = et0_referencia
+
+    def preparar_zonas(self, zonas: pd.DataFrame) -> pd.DataFrame:
+        """Completar columnas faltantes con sus valores por defecto"""
+        zonas = zonas.copy()
+        if 'zona_id' not in zonas.columns:
+            zonas['zona_id'] = zonas.index.astype(str)
+        for columna, defecto in COLUMNAS_ZONA.items():
+            if columna not in zonas.columns:
+                zonas[columna] = zonas['zona_id'] if columna == 'controlador_id' else defecto
+        return zonas.reset_index(drop=True)
+
+    def evaluar(self, zonas: pd.DataFrame, pronostico: Optional[Dict[str, float]] = None,
+                en_horario: bool = True) -> pd.DataFrame:
+        """Necesidad, urgencia, duración y volumen de riego de todas las zonas
+
+        Args:
+            zonas: Una fila por zona (ver COLUMNAS_ZONA)
+            pronostico: temperatura, precipitacion (mm), viento (km/h) y, si se
+                conoce, et0 (mm/día) del pronóstico del predio
+            en_horario: Si el momento actual está dentro del horario de riego
+        """
+        zonas = self.preparar_zonas(zonas)
+        pronostico = pronostico or {}
+
+        humedad = zonas['humedad_suelo'].to_numpy(dtype=float)
+        temperatura = zonas['temperatura'].to_numpy(dtype=float)
+        temperatura = np.where(np.isnan(temperatura), pronostico.get('temperatura', 22.0), temperatura)
+        precipitacion = float(pronostico.get('precipitacion', 0.0))
+        viento = float(pronostico.get('viento', 5.0))
+
+        critica = humedad < zonas['humedad_critica_min'].to_numpy(dtype=float)
+        bajo_optimo = humedad < zonas['humedad_optima_min'].to_numpy(dtype=float)
+        sobre_optimo = humedad > zonas['humedad_optima_max'].to_numpy(dtype=float)
+        urgencia = URGENCIAS[np.select([critica, bajo_optimo, sobre_optimo], [3, 2, 1], 0)]
+
+        # Lluvia o viento suspenden todo el predio; el viento solo afecta a la aspersión
+        aspersion = zonas['tipo_riego'].to_numpy() == 'aspersion'
+        suspendida_lluvia = np.bool_(precipitacion >= self.umbral_precipitacion)
+        suspendida_viento = aspersion & (viento >= self.umbral_viento)
+        activa = zonas['activa'].to_numpy(dtype=bool)
+        en_horario = np.bool_(en_horario)
+        necesita = bajo_optimo & activa & ~suspendida_lluvia & ~suspendida_viento & en_horario
+
+        # Duración: base del cultivo por urgencia, temperatura y demanda evaporativa (Kc·ET0),
+        # truncando a minutos enteros en cada paso como evaluar_necesidad_riego
+        duracion = np.floor(zonas['duracion_base_minutos'].to_numpy(dtype=float) * np.where(critica, 1.5, 1.2))
+        duracion = np.floor(duracion * np.select(
+            [temperatura > zonas['temperatura_optima_max'].to_numpy(dtype=float),
+             temperatura < zonas['temperatura_optima_min'].to_numpy(dtype=float)],
+            [1.1, 0.9], 1.0
+        ))
+        if 'et0' in pronostico:
+            duracion = np.floor(
+                duracion * zonas['coeficiente_cultivo'].to_numpy(dtype=float) * pronostico['et0'] / self.et0_referencia
+            )
+        duracion = np.where(
+            necesita, np.clip(duracion, self.tiempo_riego_minimo, self.tiempo_riego_maximo), 0
+        ).astype(int)
+
+        motivo = np.select(
+            [~activa, bajo_optimo & suspendida_lluvia, bajo_optimo & suspendida_viento,
+             bajo_optimo & ~en_horario, necesita],
+            ['zona_inactiva', 'precipitacion', 'viento', 'fuera_de_horario', 'deficit_humedad'],
+            'humedad_adecuada'
+        )
+
+        evaluacion = zonas[['zona_id', 'controlador_id', 'tipo_riego', 'humedad_suelo']].copy()
+        evaluacion['temperatura'] = temperatura
+        evaluacion['necesita_riego'] = necesita
+        evaluacion['urgencia'] = urgencia
+        evaluacion['motivo'] = motivo
+        evaluacion['duracion_minutos'] = duracion
+        evaluacion['caudal_litros_minuto'] = zonas['caudal_litros_minuto'].to_numpy(dtype=float)
+        evaluacion['presion_trabajo'] = zonas['presion_trabajo'].to_numpy(dtype=float)
+        evaluacion['volumen_litros'] = duracion * evaluacion['caudal_litros_minuto'].to_numpy()
+        # Prioridad: urgencia y luego déficit relativo bajo el óptimo
+        deficit = (zonas['humedad_optima_min'].to_numpy(dtype=float) - humedad) / zonas['humedad_optima_min'].to_numpy(dtype=float)
+        evaluacion['prioridad'] = np.select([critica, bajo_optimo], [2.0, 1.0], 0.0) + np.clip(deficit, 0, 1)
+        return evaluacion
+
+    def programar(self, evaluacion: pd.DataFrame, ventana_minutos: Optional[int] = None,
+                  ocupadas: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        """Asignar inicio y fin a las zonas que requieren riego
+
+        Las zonas se atienden por prioridad y cada una parte en el primer
+        instante en que hay válvula libre y caudal disponible. Zonas cuya
+        presión de trabajo supera la disponible, o cuyo caudal supera el de
+        la red, no se programan; con ventana_minutos, las que terminarían
+        fuera de la ventana quedan diferidas.
+
+        Args:
+            ocupadas: Minutos restantes de las válvulas que ya están regando;
+                ocupan válvula y caudal hasta terminar y no se reprograman
+        """
+        programa = evaluacion.copy()
+        ocupadas = ocupadas or {}
+        programa['inicio_minuto'] = np.nan
+        programa['fin_minuto'] = np.nan
+        programa['estado'] = np.where(programa['necesita_riego'], 'pendiente', 'no_requerida')
+
+        caudal = programa['caudal_litros_minuto'].to_numpy(dtype=float)
+        en_riego = programa['zona_id'].isin(list(ocupadas)).to_numpy()
+        programa.loc[en_riego, 'estado'] = 'en_curso'
+        necesita = programa['necesita_riego'].to_numpy(dtype=bool) & ~en_riego
+        sin_presion = necesita & (programa['presion_trabajo'].to_numpy(dtype=float) > self.presion_disponible)
+        excede_caudal = necesita & ~sin_presion & (caudal > self.caudal_maximo_litros_minuto)
+        programa.loc[sin_presion, 'estado'] = 'sin_presion'
+        programa.loc[excede_caudal, 'estado'] = 'excede_caudal'
+
+        candidatas = np.flatnonzero(necesita & ~sin_presion & ~excede_caudal)
+        orden = candidatas[np.argsort(-programa['prioridad'].to_numpy()[candidatas], kind='stable')]
+        duraciones = programa['duracion_minutos'].to_numpy()
+        inicios = np.full(len(programa), np.nan)
+
+        # Lista por prioridad: se liberan válvulas (por orden de término) hasta que la zona cabe
+        caudal_zona = dict(zip(programa['zona_id'], caudal))
+        en_curso = [(float(restantes), caudal_zona.get(zona_id, COLUMNAS_ZONA['caudal_litros_minuto']))
+                    for zona_id, restantes in ocupadas.items()]
+        heapq.heapify(en_curso)
+        instante = 0.0
+        caudal_en_uso = sum(caudal_ocupado for _, caudal_ocupado in en_curso)
+        for indice in orden:
+            while en_curso and (len(en_curso) >= self.limite_valvulas_simultaneas or
+                                caudal_en_uso + caudal[indice] > self.caudal_maximo_litros_minuto + 1e-9):
+                fin, caudal_liberado = heapq.heappop(en_curso)
+                instante = max(instante, fin)
+                caudal_en_uso -= caudal_liberado
+            inicios[indice] = instante
+            heapq.heappush(en_curso, (instante + duraciones[indice], caudal[indice]))
+            caudal_en_uso += caudal[indice]
+
+        programadas = ~np.isnan(inicios)
+        programa.loc[programadas, 'inicio_minuto'] = inicios[programadas]
+        programa.loc[programadas, 'fin_minuto'] = inicios[programadas] + duraciones[programadas]
+        programa.loc[programadas, 'estado'] = 'programada'
+        if ventana_minutos is not None:
+            programa.loc[programadas & (programa['fin_minuto'] > ventana_minutos).to_numpy(), 'estado'] = 'diferida'
+        return programa
+
+    def planificar(self, zonas: pd.DataFrame, pronostico: Optional[Dict[str, float]] = None,
+                   en_horario: bool = True, ventana_minutos: Optional[int] = None,
+                   ocupadas: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Evaluar y programar todo el predio
+
+        Returns:
+            Dict: programa por zona, controladores a activar y resumen
+        """
+        programa = self.programar(self.evaluar(zonas, pronostico, en_horario), ventana_minutos, ocupadas)
+        programadas = programa[programa['estado'] == 'programada']
+        return {
+            'programa': programa,
+            'controladores': programadas['controlador_id'].drop_duplicates().tolist(),
+            'resumen': {
+                'zonas': len(programa),
+                'requieren_riego': int(programa['necesita_riego'].sum()),
+                'programadas': len(programadas),
+                'en_curso': int((programa['estado'] == 'en_curso').sum()),
+                'no_programadas': int(programa['estado'].isin(['sin_presion', 'excede_caudal', 'diferida']).sum()),
+                'volumen_total_litros': float(programadas['volumen_litros'].sum()),
+                'duracion_total_minutos': float(programadas['fin_minuto'].max()) if len(programadas) else 0.0
+            }
+        }
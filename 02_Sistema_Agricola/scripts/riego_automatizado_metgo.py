@@ -21,6 +21,9 @@ import sqlite3
 from dataclasses import dataclass
 import yaml
 
+from escritor_lecturas_sensores import EscritorLecturasSensores
+from motor_riego_zonas import MotorRiegoZonas
+
 # Flask para API del sistema de riego
 try:
     from flask import Flask, request, jsonify, render_template
@@ -102,9 +105,32 @@ class RiegoAutomatizadoMETGO:
             'horario_riego_inicio': '06:00',
             'horario_riego_fin': '18:00',
             'dias_riego': [0, 1, 2, 3, 4, 5, 6],  # Todos los días
-            'notificaciones': True
+            'notificaciones': True,
+            'lote_lecturas': 500,  # lecturas por transacción
+            'intervalo_vaciado_lecturas': 60,  # segundos
+            'max_valvulas_simultaneas': 4,
+            'caudal_maximo_litros_minuto': 200  # capacidad de la bomba
         }
         
+        # Motor multizona: evalúa y programa todas las válvulas del predio a la vez
+        self.motor_zonas = MotorRiegoZonas(
+            limite_valvulas_simultaneas=self.configuracion_sistema['max_valvulas_simultaneas'],
+            caudal_maximo_litros_minuto=self.configuracion_sistema['caudal_maximo_litros_minuto'],
+            tiempo_riego_minimo=self.configuracion_sistema['tiempo_riego_minimo'],
+            tiempo_riego_maximo=self.configuracion_sistema['tiempo_riego_maximo']
+        )
+        
+        # Lecturas de sensores: se insertan por lotes, un commit por lote
+        self.escritor_lecturas = EscritorLecturasSensores(
+            self.archivo_bd, 'lecturas_sensores',
+            ['sensor_id', 'timestamp', 'valor', 'unidad', 'calidad_datos'],
+            tamano_lote=self.configuracion_sistema['lote_lecturas'],
+            intervalo_vaciado=self.configuracion_sistema['intervalo_vaciado_lecturas'],
+            logger=self.logger
+        )
+        # Vaciar lecturas pendientes cada intervalo aunque no haya lecturas nuevas
+        self.escritor_lecturas.iniciar_vaciado_periodico()
+
         # Sensores y controladores
         self.sensores = {}
         self.controladores = {}
@@ -150,9 +176,11 @@ class RiegoAutomatizadoMETGO:
     
     def _inicializar_base_datos(self):
         """Inicializar base de datos SQLite"""
+        # Fuera del try: el escritor de lecturas usa la ruta aunque falle la conexión
+        archivo_bd = f"{self.configuracion['directorio_datos']}/riego.db"
+        self.archivo_bd = archivo_bd
+        
         try:
-            archivo_bd = f"{self.configuracion['directorio_datos']}/riego.db"
-            
             self.conexion_bd = sqlite3.connect(archivo_bd, check_same_thread=False)
             self.cursor_bd = self.conexion_bd.cursor()
             
@@ -485,25 +513,27 @@ class RiegoAutomatizadoMETGO:
             return {}
     
     def _guardar_lectura_sensor(self, sensor_id: str, valor: float, unidad: str):
-        """Guardar lectura de sensor en base de datos"""
+        """Guardar lectura de sensor (pendiente hasta el próximo lote del escritor)"""
         try:
-            self.cursor_bd.execute('''
-                INSERT INTO lecturas_sensores 
-                (sensor_id, timestamp, valor, unidad, calidad_datos)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
+            self.escritor_lecturas.agregar((
                 sensor_id,
                 datetime.now().isoformat(),
                 valor,
                 unidad,
                 0.95 + np.random.rand() * 0.05
             ))
-            
-            self.conexion_bd.commit()
-            
+        
         except Exception as e:
             self.logger.error(f"Error guardando lectura de sensor: {e}")
     
+    def cerrar(self):
+        """Escribir las lecturas pendientes y cerrar la base de datos"""
+        try:
+            self.escritor_lecturas.cerrar()
+            self.conexion_bd.close()
+        except Exception as e:
+            self.logger.error(f"Error cerrando sistema de riego: {e}")
+    
     def evaluar_condiciones_riego(self) -> Dict[str, Any]:
         """Evaluar condiciones para activar riego"""
         try:
@@ -551,6 +581,66 @@ class RiegoAutomatizadoMETGO:
             self.logger.error(f"Error evaluando condiciones de riego: {e}")
             return {'debe_regar': False, 'error': str(e)}
     
+    def evaluar_zonas_riego(self, zonas: Optional[pd.DataFrame] = None,
+                            pronostico: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Evaluar y programar el riego de todas las zonas en una pasada
+        
+        Args:
+            zonas: Matriz de zonas (una fila por válvula, ver motor_riego_zonas);
+                por defecto una zona por controlador activo con los sensores actuales
+            pronostico: Pronóstico del predio; por defecto el meteorológico actual
+        """
+        try:
+            if zonas is None:
+                zonas = self._construir_matriz_zonas()
+            if pronostico is None:
+                pronostico = self._obtener_datos_meteorologicos()
+            
+            # Presión disponible en la red según el sensor de presión
+            sensor_presion = self.sensores.get('sensor_presion_1')
+            if sensor_presion is not None and sensor_presion.estado == 'activo':
+                self.motor_zonas.presion_disponible = sensor_presion.valor
+            
+            ahora = datetime.now()
+            inicio = datetime.strptime(self.configuracion_sistema['horario_riego_inicio'], '%H:%M').time()
+            fin = datetime.strptime(self.configuracion_sistema['horario_riego_fin'], '%H:%M').time()
+            en_horario = inicio <= ahora.time() <= fin
+            ventana_minutos = int((datetime.combine(ahora.date(), fin) - ahora).total_seconds() // 60)
+            
+            plan = self.motor_zonas.planificar(zonas, pronostico, en_horario, max(ventana_minutos, 0))
+            plan['timestamp'] = ahora.isoformat()
+            
+            self.logger.info(
+                f"Evaluación multizona - {plan['resumen']['programadas']} de "
+                f"{plan['resumen']['zonas']} zonas programadas"
+            )
+            return plan
+        
+        except Exception as e:
+            self.logger.error(f"Error evaluando zonas de riego: {e}")
+            return {'programa': pd.DataFrame(), 'controladores': [], 'error': str(e)}
+    
+    def _construir_matriz_zonas(self) -> pd.DataFrame:
+        """Una zona por controlador activo con la última lectura de los sensores"""
+        humedad = self.sensores.get('sensor_humedad_1')
+        temperatura = self.sensores.get('sensor_temperatura_1')
+        
+        return pd.DataFrame([
+            {
+                'zona_id': controlador.id,
+                'controlador_id': controlador.id,
+                'tipo_riego': controlador.tipo,
+                'humedad_suelo': humedad.valor if humedad is not None else 50.0,
+                'temperatura': temperatura.valor if temperatura is not None else np.nan,
+                'humedad_optima_min': self.configuracion_sistema['umbral_humedad'],
+                'temperatura_optima_max': self.configuracion_sistema['umbral_temperatura'],
+                'caudal_litros_minuto': controlador.configuracion.get('caudal_litros_minuto', 20),
+                'presion_trabajo': controlador.configuracion.get('presion_trabajo', 1.5)
+            }
+            for controlador in self.controladores.values()
+            if controlador.estado == 'activo'
+        ])
+    
     def _obtener_datos_meteorologicos(self) -> Dict[str, float]:
         """Obtener datos meteorológicos (simulados)"""
         try:
@@ -984,6 +1074,7 @@ def main():
             print(f"   Programaciones activas: {estadisticas.get('programaciones', {}).get('activas', 0)}")
             print(f"   Riego diario: {estadisticas.get('riego_diario', {}).get('litros', 0)} litros")
         
+        riego_sistema.cerrar()
         return True
         
     except Exception as e:
@@ -18,6 +18,9 @@ from enum import Enum
 import threading
 import queue
 
+from escritor_lecturas_sensores import EscritorLecturasSensores
+from motor_riego_zonas import MotorRiegoZonas
+
 # Simulación de sensores IoT (en producción serían librerías reales)
 class SensorHumedad:
     def __init__(self, pin: int):
@@ -49,11 +52,13 @@ class ActuadorRiego:
         self.pin = pin
         self.estado = False
         self.tiempo_activacion = 0
+        self.duracion_segundos = 0
     
     def activar(self, duracion_segundos: int):
         """Activar sistema de riego"""
         self.estado = True
         self.tiempo_activacion = time.time()
+        self.duracion_segundos = duracion_segundos
         print(f"💧 Sistema de riego activado por {duracion_segundos} segundos")
         # En producción: GPIO.output(self.pin, GPIO.HIGH)
         
@@ -65,6 +70,12 @@ class ActuadorRiego:
         self.estado = False
         print("💧 Sistema de riego desactivado")
         # En producción: GPIO.output(self.pin, GPIO.LOW)
+    
+    def segundos_restantes(self) -> float:
+        """Segundos que faltan para que termine el riego en curso (0 si está cerrado)"""
+        if not self.estado:
+            return 0.0
+        return max(0.0, self.tiempo_activacion + self.duracion_segundos - time.time())
 
 class TipoCultivo(Enum):
     PALTO = "palto"
@@ -96,6 +107,38 @@ class SistemaRiegoInteligente:
         self._inicializar_base_datos()
         self._cargar_configuraciones_cultivos()
         
+        # Lecturas de sensores: se insertan por lotes, un commit por lote
+        self.escritor_lecturas = EscritorLecturasSensores(
+            self.base_datos, 'lecturas_sensores',
+            ['sensor_id', 'tipo_sensor', 'valor', 'unidad', 'ubicacion', 'fecha_lectura'],
+            tamano_lote=500, intervalo_vaciado=60, logger=self.logger
+        )
+        self._ids_sensores: Dict[Tuple[str, str], int] = {}
+        
+        # Turnos posteriores del último ciclo: se cancelan al replanificar
+        self._turnos_programados: Dict[str, threading.Timer] = {}
+        
+        # Motor multizona: todas las ubicaciones se evalúan y programan a la vez
+        self.motor_zonas = MotorRiegoZonas(
+            limite_valvulas_simultaneas=2,
+            caudal_maximo_litros_minuto=60.0,
+            tiempo_riego_minimo=0,
+            tiempo_riego_maximo=240
+        )
+        self._tabla_cultivos = pd.DataFrame([
+            {
+                'cultivo': tipo.value,
+                'humedad_optima_min': config.humedad_optima_min,
+                'humedad_optima_max': config.humedad_optima_max,
+                'humedad_critica_min': config.humedad_critica_min,
+                'temperatura_optima_min': config.temperatura_optima_min,
+                'temperatura_optima_max': config.temperatura_optima_max,
+                'duracion_base_minutos': config.duracion_riego_minutos,
+                'coeficiente_cultivo': config.coeficiente_cultivo
+            }
+            for tipo, config in self.configuraciones_cultivos.items()
+        ])
+        
         # Sensores IoT
         self.sensores_humedad = {}
         self.sensores_temperatura = {}
@@ -370,73 +413,55 @@ class SistemaRiegoInteligente:
             return {}
     
     def _almacenar_lectura_sensor(self, tipo_sensor: str, ubicacion: str, valor: float, unidad: str):
-        """Almacenar lectura de sensor en base de datos"""
+        """Almacenar lectura de sensor (pendiente hasta el próximo lote del escritor)"""
         try:
-            conn = sqlite3.connect(self.base_datos)
-            cursor = conn.cursor()
-            
-            # Obtener ID del sensor
-            cursor.execute('SELECT id FROM sensores WHERE tipo = ? AND ubicacion = ?', 
-                         (tipo_sensor, ubicacion))
-            sensor_id = cursor.fetchone()
-            
-            if sensor_id:
-                cursor.execute('''
-                    INSERT INTO lecturas_sensores 
-                    (sensor_id, tipo_sensor, valor, unidad, ubicacion)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (sensor_id[0], tipo_sensor, valor, unidad, ubicacion))
-            
-            conn.commit()
-            conn.close()
+            sensor_id = self._obtener_id_sensor(tipo_sensor, ubicacion)
             
+            if sensor_id is not None:
+                # Hora de lectura explícita en UTC, como CURRENT_TIMESTAMP, aunque el lote se escriba después
+                fecha_lectura = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+                self.escritor_lecturas.agregar(
+                    (sensor_id, tipo_sensor, valor, unidad, ubicacion, fecha_lectura)
+                )
+        
         except Exception as e:
             self.logger.error(f"Error almacenando lectura de sensor: {e}")
     
+    def _obtener_id_sensor(self, tipo_sensor: str, ubicacion: str) -> Optional[int]:
+        """ID del sensor por (tipo, ubicación), consultado una sola vez por sensor"""
+        clave = (tipo_sensor, ubicacion)
+        if clave not in self._ids_sensores:
+            conn = sqlite3.connect(self.base_datos)
+            fila = conn.execute('SELECT MIN(id) FROM sensores WHERE tipo = ? AND ubicacion = ?',
+                                clave).fetchone()
+            conn.close()
+            if fila is None or fila[0] is None:
+                return None
+            self._ids_sensores[clave] = fila[0]
+        return self._ids_sensores[clave]
+    
+    def cerrar(self):
+        """Cancelar turnos pendientes y escribir las lecturas antes de apagar"""
+        self._cancelar_turnos_programados()
+        self.escritor_lecturas.cerrar()
+    
     def evaluar_necesidad_riego(self, ubicacion: str, cultivo: TipoCultivo) -> Dict[str, Any]:
         """Evaluar si es necesario regar en una ubicación específica"""
         try:
-            # Leer sensores de la ubicación
-            humedad_actual = self.sensores_humedad[ubicacion].leer_humedad()
-            temperatura_actual = self.sensores_temperatura[ubicacion].leer_temperatura()
-            
-            # Obtener configuración del cultivo
+            # Misma lógica que el motor multizona, con una sola zona
+            evaluacion = self.evaluar_zonas({ubicacion: cultivo}).iloc[0]
             config = self.configuraciones_cultivos[cultivo]
             
-            # Evaluar condiciones
-            necesidad_riego = False
-            urgencia = 'normal'
-            duracion_recomendada = config.duracion_riego_minutos
-            
-            # Lógica de decisión
-            if humedad_actual < config.humedad_critica_min:
-                necesidad_riego = True
-                urgencia = 'critica'
-                duracion_recomendada = int(config.duracion_riego_minutos * 1.5)
-            elif humedad_actual < config.humedad_optima_min:
-                necesidad_riego = True
-                urgencia = 'alta'
-                duracion_recomendada = int(config.duracion_riego_minutos * 1.2)
-            elif humedad_actual > config.humedad_optima_max:
-                necesidad_riego = False
-                urgencia = 'baja'
-            
-            # Ajustar según temperatura
-            if temperatura_actual > config.temperatura_optima_max:
-                if necesidad_riego:
-                    duracion_recomendada = int(duracion_recomendada * 1.1)
-            elif temperatura_actual < config.temperatura_optima_min:
-                if necesidad_riego:
-                    duracion_recomendada = int(duracion_recomendada * 0.9)
-            
             resultado = {
                 'ubicacion': ubicacion,
                 'cultivo': cultivo.value,
-                'humedad_actual': humedad_actual,
-                'temperatura_actual': temperatura_actual,
-                'necesidad_riego': necesidad_riego,
-                'urgencia': urgencia,
-                'duracion_recomendada_segundos': duracion_recomendada * 60,
+                'humedad_actual': float(evaluacion['humedad_suelo']),
+                'temperatura_actual': float(evaluacion['temperatura']),
+                'necesidad_riego': bool(evaluacion['necesita_riego']),
+                'urgencia': evaluacion['urgencia'],
+                # Sin necesidad de riego se informa la duración base del cultivo
+                'duracion_recomendada_segundos': (int(evaluacion['duracion_minutos']) if evaluacion['necesita_riego']
+                                                  else config.duracion_riego_minutos) * 60,
                 'configuracion_usada': {
                     'humedad_optima_min': config.humedad_optima_min,
                     'humedad_optima_max': config.humedad_optima_max,
@@ -451,6 +476,56 @@ class SistemaRiegoInteligente:
             self.logger.error(f"Error evaluando necesidad de riego: {e}")
             return {}
     
+    def evaluar_zonas(self, cultivos_ubicacion: Dict[str, TipoCultivo],
+                      lecturas: Optional[Dict[str, Dict[str, float]]] = None,
+                      pronostico: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        """Evaluar necesidad, urgencia y duración de todas las ubicaciones a la vez
+        
+        Args:
+            cultivos_ubicacion: Cultivo de cada ubicación
+            lecturas: Humedad y temperatura por ubicación; si falta una, se leen sus sensores
+            pronostico: Pronóstico del predio (temperatura, precipitacion, viento, et0)
+        """
+        return self.motor_zonas.evaluar(self._matriz_zonas(cultivos_ubicacion, lecturas), pronostico)
+    
+    def planificar_riego(self, cultivos_ubicacion: Dict[str, TipoCultivo],
+                         lecturas: Optional[Dict[str, Dict[str, float]]] = None,
+                         pronostico: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Programa de riego de todas las ubicaciones respetando válvulas y caudal
+        
+        Las válvulas abiertas cuentan como ocupadas (válvula y caudal) por el
+        tiempo que les queda y no se vuelven a programar.
+        """
+        ocupadas = {
+            ubicacion: actuador.segundos_restantes() / 60
+            for ubicacion, actuador in self.actuadores_riego.items()
+            if actuador.estado
+        }
+        return self.motor_zonas.planificar(self._matriz_zonas(cultivos_ubicacion, lecturas), pronostico,
+                                           ocupadas=ocupadas)
+    
+    def _matriz_zonas(self, cultivos_ubicacion: Dict[str, TipoCultivo],
+                      lecturas: Optional[Dict[str, Dict[str, float]]] = None) -> pd.DataFrame:
+        """Una fila por ubicación con su lectura y los parámetros de su cultivo"""
+        lecturas = lecturas or {}
+        filas = []
+        for ubicacion, cultivo in cultivos_ubicacion.items():
+            lectura = lecturas.get(ubicacion)
+            if lectura is None:
+                lectura = {
+                    'humedad': self.sensores_humedad[ubicacion].leer_humedad(),
+                    'temperatura': self.sensores_temperatura[ubicacion].leer_temperatura()
+                }
+            filas.append({
+                'zona_id': ubicacion,
+                'controlador_id': ubicacion,
+                'cultivo': cultivo.value,
+                'humedad_suelo': lectura['humedad'],
+                'temperatura': lectura['temperatura']
+            })
+        
+        return pd.DataFrame(filas).merge(self._tabla_cultivos, on='cultivo', how='left')
+    
     def ejecutar_riego_inteligente(self, ubicacion: str, duracion_segundos: int, motivo: str = "automatico"):
         """Ejecutar riego en ubicación específica"""
         try:
@@ -487,6 +562,17 @@ class SistemaRiegoInteligente:
             self.logger.error(f"Error ejecutando riego: {e}")
             return False
     
+    def _iniciar_turno(self, ubicacion: str, duracion_segundos: int):
+        """Callback de un turno programado: sale de la cola y abre la válvula"""
+        self._turnos_programados.pop(ubicacion, None)
+        self.ejecutar_riego_inteligente(ubicacion, duracion_segundos, 'automatico')
+    
+    def _cancelar_turnos_programados(self):
+        """Cancelar los turnos que aún no parten"""
+        for turno in self._turnos_programados.values():
+            turno.cancel()
+        self._turnos_programados.clear()
+    
     def _finalizar_riego(self, ubicacion: str):
         """Finalizar riego y registrar resultados"""
         try:
@@ -620,21 +706,37 @@ class SistemaRiegoInteligente:
                 'sector_d': TipoCultivo.HORTALIZAS
             }
             
-            for ubicacion, cultivo in cultivos_ubicacion.items():
-                # Evaluar necesidad de riego
-                evaluacion = self.evaluar_necesidad_riego(ubicacion, cultivo)
+            # Los turnos del ciclo anterior que no partieron se replanifican con lecturas nuevas
+            self._cancelar_turnos_programados()
+            
+            # Evaluar y programar todas las ubicaciones en una pasada
+            programa = self.planificar_riego(cultivos_ubicacion)['programa']
+            
+            for zona in programa.itertuples(index=False):
+                cultivo = cultivos_ubicacion[zona.zona_id]
                 
-                if evaluacion['necesidad_riego']:
-                    print(f"[RIEGO] {ubicacion} ({cultivo.value}): Humedad {evaluacion['humedad_actual']:.1f}% - Riego necesario")
+                if zona.necesita_riego:
+                    print(f"[RIEGO] {zona.zona_id} ({cultivo.value}): Humedad {zona.humedad_suelo:.1f}% - Riego necesario")
                     
                     # Ejecutar riego si está en modo automático
-                    if self.estado_sistema['modo_automatico']:
-                        duracion = evaluacion['duracion_recomendada_segundos']
-                        self.ejecutar_riego_inteligente(ubicacion, duracion, 'automatico')
-                    else:
+                    if not self.estado_sistema['modo_automatico']:
                         print(f"[RIEGO] Modo automático desactivado - Riego no ejecutado")
+                    elif zona.estado == 'en_curso':
+                        print(f"[RIEGO] {zona.zona_id}: riego en curso")
+                    elif zona.estado != 'programada':
+                        print(f"[RIEGO] {zona.zona_id}: no programado ({zona.estado})")
+                    elif zona.inicio_minuto == 0:
+                        self.ejecutar_riego_inteligente(zona.zona_id, int(zona.duracion_minutos) * 60, 'automatico')
+                    else:
+                        # Turno posterior: esperar a que se liberen válvulas y caudal
+                        turno = threading.Timer(zona.inicio_minuto * 60, self._iniciar_turno,
+                                                args=[zona.zona_id, int(zona.duracion_minutos) * 60])
+                        turno.daemon = True
+                        self._turnos_programados[zona.zona_id] = turno
+                        turno.start()
+                        print(f"[RIEGO] {zona.zona_id}: programado en {zona.inicio_minuto:.0f} min")
                 else:
-                    print(f"[RIEGO] {ubicacion} ({cultivo.value}): Humedad {evaluacion['humedad_actual']:.1f}% - No requiere riego")
+                    print(f"[RIEGO] {zona.zona_id} ({cultivo.value}): Humedad {zona.humedad_suelo:.1f}% - No requiere riego")
             
             self.estado_sistema['ultima_evaluacion'] = datetime.now()
             print(f"[CICLO] Evaluación completada")
@@ -661,6 +763,9 @@ class SistemaRiegoInteligente:
             print("  - Lectura de sensores: cada 30 minutos")
             print("  - Reportes diarios: 06:00 AM")
             
+            # Vaciar lecturas pendientes cada intervalo aunque no haya lecturas nuevas
+            self.escritor_lecturas.iniciar_vaciado_periodico()
+            
             # Ejecutar primera evaluación
             self.ejecutar_ciclo_riego_automatico()
             
@@ -674,6 +779,8 @@ class SistemaRiegoInteligente:
             self.estado_sistema['activo'] = False
         except Exception as e:
             self.logger.error(f"Error en monitoreo continuo: {e}")
+        finally:
+            self.cerrar()
     
     def generar_reporte_diario(self):
         """Generar reporte diario del sistema de riego"""
@@ -681,6 +788,8 @@ class SistemaRiegoInteligente:
             fecha = datetime.now().strftime('%Y-%m-%d')
             print(f"[REPORTE] Generando reporte diario para {fecha}")
             
+            # Incluir lecturas aún pendientes de escribir
+            self.escritor_lecturas.vaciar()
             conn = sqlite3.connect(self.base_datos)
             
             # Estadísticas de riego del día
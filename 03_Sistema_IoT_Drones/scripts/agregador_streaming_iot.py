@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+📈 AGREGADOR STREAMING IoT - METGO 3D
+Sistema Meteorológico Agrícola Quillota - Estadísticas incrementales y persistencia por micro-lotes
+"""
+
+import csv
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Columnas escritas en el archivo rodante (la ubicación se deduce del sensor_id)
+COLUMNAS_PERSISTENCIA = ['timestamp', 'sensor_id', 'tipo', 'valor', 'unidad', 'bateria', 'senal', 'estado']
+
+
+class EstadisticaWelford:
+    """Conteo, media, varianza (Welford), mínimo y máximo en O(1) por valor"""
+
+    __slots__ = ('count', 'media', 'm2', 'minimo', 'maximo')
+
+    def __init__(self):
+        self.count = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def actualizar(self, valor: float):
+        """Incorporar un valor nuevo"""
+        self.count += 1
+        delta = valor - self.media
+        self.media += delta / self.count
+        self.m2 += delta * (valor - self.media)
+        if valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    @property
+    def varianza(self) -> float:
+        """Varianza muestral (ddof=1, igual que pandas)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def a_dict(self, decimales: int = 2) -> Dict:
+        """Resumen con las mismas claves que las estadísticas por tipo del sistema IoT"""
+        return {
+            'count': self.count,
+            'mean': round(self.media, decimales),
+            'std': round(math.sqrt(self.varianza), decimales) if self.count > 1 else math.nan,
+            'min': round(self.minimo, decimales),
+            'max': round(self.maximo, decimales)
+        }
+
+
+class AgregadorStreamingIoT:
+    """Ingesta streaming de lecturas IoT con memoria y costo por mensaje acotados
+
+    Cada lectura actualiza agregados por tipo y por (sensor, tipo), entra a un
+    buffer circular de lecturas recientes y queda pendiente de persistencia.
+    Los pendientes se anexan a un CSV diario cuando se acumula un micro-lote o
+    vence el intervalo de persistencia, en vez de reescribir todo el historial.
+    """
+
+    def __init__(self, directorio_datos: str = 'data/iot',
+                 capacidad_buffer: int = 10000,
+                 intervalo_persistencia: float = 10.0,
+                 tamano_micro_lote: int = 5000,
+                 prefijo_archivo: str = 'datos_iot_stream'):
+        self.directorio_datos = Path(directorio_datos)
+        self.directorio_datos.mkdir(parents=True, exist_ok=True)
+        self.intervalo_persistencia = intervalo_persistencia
+        self.tamano_micro_lote = tamano_micro_lote
+        self.prefijo_archivo = prefijo_archivo
+
+        self.recientes = deque(maxlen=capacidad_buffer)
+        self.por_tipo: Dict[str, EstadisticaWelford] = {}
+        self.por_sensor: Dict[Tuple[str, str], EstadisticaWelford] = {}
+        self.total_lecturas = 0
+        self.total_persistidas = 0
+        self.inicio: Optional[datetime] = None
+        self.fin: Optional[datetime] = None
+
+        self._pendientes: List[Dict] = []
+        self._ultima_persistencia = time.monotonic()
+        self._lock = threading.Lock()
+        self._lock_archivo = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo_persistencia: Optional[threading.Thread] = None
+
+    def agregar(self, lectura: Dict):
+        """Incorporar una lectura validada (sensor_id, tipo, timestamp, valor)"""
+        valor = float(lectura['valor'])
+        tipo = lectura['tipo']
+        clave_sensor = (lectura['sensor_id'], tipo)
+
+        try:
+            instante = datetime.fromisoformat(str(lectura['timestamp']))
+        except ValueError:
+            instante = None
+
+        with self._lock:
+            estadistica = self.por_tipo.get(tipo)
+            if estadistica is None:
+                estadistica = self.por_tipo[tipo] = EstadisticaWelford()
+            estadistica.actualizar(valor)
+
+            estadistica = self.por_sensor.get(clave_sensor)
+            if estadistica is None:
+                estadistica = self.por_sensor[clave_sensor] = EstadisticaWelford()
+            estadistica.actualizar(valor)
+
+            if instante is not None:
+                if self.inicio is None or instante < self.inicio:
+                    self.inicio = instante
+                if self.fin is None or instante > self.fin:
+                    self.fin = instante
+
+            self.total_lecturas += 1
+            self.recientes.append(lectura)
+            self._pendientes.append(lectura)
+
+    def agregar_lote(self, lecturas: List[Dict]):
+        """Incorporar varias lecturas"""
+        for lectura in lecturas:
+            self.agregar(lectura)
+
+    def debe_persistir(self) -> bool:
+        """Indicar si hay un micro-lote completo o venció el intervalo"""
+        if not self._pendientes:
+            return False
+        return (len(self._pendientes) >= self.tamano_micro_lote or
+                time.monotonic() - self._ultima_persistencia >= self.intervalo_persistencia)
+
+    def persistir_si_corresponde(self) -> int:
+        """Persistir los pendientes solo si corresponde según tamaño o tiempo"""
+        return self.persistir() if self.debe_persistir() else 0
+
+    def _archivo_actual(self) -> Path:
+        """Archivo rodante del día"""
+        return self.directorio_datos / f"{self.prefijo_archivo}_{datetime.now().strftime('%Y%m%d')}.csv"
+
+    def persistir(self) -> int:
+        """Anexar las lecturas pendientes al archivo rodante del día"""
+        with self._lock:
+            lote, self._pendientes = self._pendientes, []
+            self._ultima_persistencia = time.monotonic()
+
+        if not lote:
+            return 0
+
+        with self._lock_archivo:
+            archivo = self._archivo_actual()
+            nuevo = not archivo.exists()
+            with open(archivo, 'a', newline='', encoding='utf-8') as f:
+                escritor = csv.DictWriter(f, fieldnames=COLUMNAS_PERSISTENCIA, extrasaction='ignore')
+                if nuevo:
+                    escritor.writeheader()
+                escritor.writerows(lote)
+            self.total_persistidas += len(lote)
+
+        return len(lote)
+
+    def iniciar_persistencia_periodica(self):
+        """Hilo que persiste los pendientes cada intervalo aunque no lleguen mensajes"""
+        if self._hilo_persistencia is not None and self._hilo_persistencia.is_alive():
+            return
+
+        self._detener.clear()
+        self._hilo_persistencia = threading.Thread(
+            target=self._bucle_persistencia, name='persistencia_iot', daemon=True
+        )
+        self._hilo_persistencia.start()
+
+    def _bucle_persistencia(self):
+        """Persistir en cada intervalo hasta que se pida detener"""
+        while not self._detener.wait(self.intervalo_persistencia):
+            try:
+                self.persistir()
+            except Exception as e:
+                print(f"Error persistiendo micro-lote IoT: {e}")
+
+    def cerrar(self):
+        """Detener el hilo periódico y persistir lo pendiente"""
+        self._detener.set()
+        if self._hilo_persistencia is not None:
+            self._hilo_persistencia.join()
+            self._hilo_persistencia = None
+        self.persistir()
+
+    def estadisticas(self) -> Dict:
+        """Resumen con el mismo formato que SistemaIoTMETGO.estadisticas"""
+        with self._lock:
+            return {
+                'total_lecturas': self.total_lecturas,
+                'sensores_activos': len({sensor_id for sensor_id, _ in self.por_sensor}),
+                'tipos_sensores': len(self.por_tipo),
+                'rango_temporal': {
+                    'inicio': self.inicio.isoformat() if self.inicio else None,
+                    'fin': self.fin.isoformat() if self.fin else None
+                },
+                'estadisticas_por_tipo': {tipo: e.a_dict() for tipo, e in self.por_tipo.items()},
+                'estadisticas_por_sensor': {
+                    f"{sensor_id}|{tipo}": e.a_dict() for (sensor_id, tipo), e in self.por_sensor.items()
+                },
+                'lecturas_en_buffer': len(self.recientes),
+                'lecturas_persistidas': self.total_persistidas,
+                'lecturas_pendientes': len(self._pendientes)
+            }
+
+    def lecturas_recientes(self) -> pd.DataFrame:
+        """Ventana de lecturas recientes del buffer circular como DataFrame"""
+        with self._lock:
+            recientes = list(self.recientes)
+        return pd.DataFrame(recientes)
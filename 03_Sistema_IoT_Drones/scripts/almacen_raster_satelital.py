@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🗺️ ALMACÉN RASTER SATELITAL - METGO 3D
+Sistema Meteorológico Agrícola Quillota - Bandas en teselas binarias mapeadas en memoria
+"""
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (fila_inicio, fila_fin, columna_inicio, columna_fin) en píxeles, fin exclusivo
+Ventana = Tuple[int, int, int, int]
+
+
+class AlmacenRasterSatelital:
+    """Almacén de escenas satelitales con bandas teseladas y catálogo JSON
+
+    Cada banda se guarda como un .npy de forma (teselas_y, teselas_x, T, T), de
+    modo que cada tesela de T×T píxeles es contigua en disco. Las bandas se
+    abren como memmap: leer una ventana o una tesela solo toca las páginas de
+    las teselas que la cubren, sin cargar ni parsear la escena completa.
+
+    El bbox de una escena es [min_lon, min_lat, max_lon, max_lat] con la fila 0
+    en max_lat (imagen orientada al norte).
+    """
+
+    ARCHIVO_CATALOGO = 'catalogo.json'
+
+    def __init__(self, directorio: str = 'data/satelitales/raster', tamano_tesela: int = 256):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.tamano_tesela = tamano_tesela
+        self._lock = threading.Lock()
+        self._catalogo = self._cargar_catalogo()
+
+    def _cargar_catalogo(self) -> Dict[str, Dict]:
+        ruta = self.directorio / self.ARCHIVO_CATALOGO
+        if not ruta.exists():
+            return {}
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _guardar_catalogo(self):
+        """Reescribir el catálogo de forma atómica"""
+        ruta = self.directorio / self.ARCHIVO_CATALOGO
+        temporal = ruta.with_suffix('.json.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self._catalogo, f, indent=2, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    def escenas(self) -> List[str]:
+        return sorted(self._catalogo)
+
+    def metadatos(self, escena_id: str) -> Dict:
+        if escena_id not in self._catalogo:
+            raise KeyError(f"Escena no registrada en el almacén raster: {escena_id}")
+        return self._catalogo[escena_id]
+
+    def existe(self, escena_id: str) -> bool:
+        return escena_id in self._catalogo
+
+    def eliminar_escena(self, escena_id: str):
+        with self._lock:
+            self._catalogo.pop(escena_id, None)
+            self._guardar_catalogo()
+        shutil.rmtree(self.directorio / escena_id, ignore_errors=True)
+
+    def _ruta_banda(self, escena_id: str, banda: str) -> Path:
+        return self.directorio / escena_id / f"{banda}.npy"
+
+    def crear_escena(self, escena_id: str, alto: int, ancho: int, bandas: Sequence[str],
+                     dtype=np.float32, bbox: Optional[Sequence[float]] = None,
+                     tipo: str = '', metadata: Optional[Dict] = None) -> Dict[str, np.memmap]:
+        """Reservar las bandas de una escena y devolverlas como memmaps escribibles teselados"""
+        t = self.tamano_tesela
+        teselas_y, teselas_x = -(-alto // t), -(-ancho // t)
+        (self.directorio / escena_id).mkdir(parents=True, exist_ok=True)
+
+        memmaps = {
+            banda: np.lib.format.open_memmap(self._ruta_banda(escena_id, banda), mode='w+',
+                                             dtype=dtype, shape=(teselas_y, teselas_x, t, t))
+            for banda in bandas
+        }
+
+        with self._lock:
+            self._catalogo[escena_id] = {
+                'tipo': tipo,
+                'alto': alto,
+                'ancho': ancho,
+                'bandas': list(bandas),
+                'dtype': np.dtype(dtype).name,
+                'tamano_tesela': t,
+                'teselas': [teselas_y, teselas_x],
+                'bbox': [float(v) for v in bbox] if bbox is not None else None,
+                'metadata': metadata or {},
+                'timestamp': datetime.now().isoformat()
+            }
+            self._guardar_catalogo()
+        return memmaps
+
+    def guardar_escena(self, escena_id: str, bandas: Dict[str, np.ndarray],
+                       bbox: Optional[Sequence[float]] = None, tipo: str = '',
+                       metadata: Optional[Dict] = None):
+        """Guardar arreglos 2D (una entrada por banda) en el layout teselado"""
+        primera = next(iter(bandas.values()))
+        alto, ancho = primera.shape
+        memmaps = self.crear_escena(escena_id, alto, ancho, list(bandas), primera.dtype,
+                                    bbox=bbox, tipo=tipo, metadata=metadata)
+        for banda, datos in bandas.items():
+            if datos.shape != (alto, ancho):
+                raise ValueError(f"La banda {banda} tiene forma {datos.shape}, se esperaba {(alto, ancho)}")
+            destino = memmaps[banda]
+            for ty, tx, (f0, f1, c0, c1) in self.iterar_teselas(escena_id):
+                destino[ty, tx, :f1 - f0, :c1 - c0] = datos[f0:f1, c0:c1]
+            destino.flush()
+
+    def abrir_banda(self, escena_id: str, banda: str, modo: str = 'r') -> np.memmap:
+        """Memmap teselado (teselas_y, teselas_x, T, T) de una banda"""
+        self.metadatos(escena_id)
+        return np.load(self._ruta_banda(escena_id, banda), mmap_mode=modo)
+
+    def iterar_teselas(self, escena_id: str) -> Iterator[Tuple[int, int, Ventana]]:
+        """(ty, tx, ventana en píxeles) de cada tesela, recortada al tamaño real de la escena"""
+        meta = self.metadatos(escena_id)
+        t = meta['tamano_tesela']
+        teselas_y, teselas_x = meta['teselas']
+        for ty in range(teselas_y):
+            for tx in range(teselas_x):
+                yield ty, tx, (ty * t, min((ty + 1) * t, meta['alto']),
+                               tx * t, min((tx + 1) * t, meta['ancho']))
+
+    def leer_tesela(self, escena_id: str, banda: str, ty: int, tx: int) -> np.ndarray:
+        """Vista de solo lectura de una tesela, recortada al borde de la escena"""
+        meta = self.metadatos(escena_id)
+        t = meta['tamano_tesela']
+        alto = min(t, meta['alto'] - ty * t)
+        ancho = min(t, meta['ancho'] - tx * t)
+        return self.abrir_banda(escena_id, banda)[ty, tx, :alto, :ancho]
+
+    def leer_ventana(self, escena_id: str, ventana: Ventana,
+                     bandas: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Leer una ventana de píxeles copiando solo las teselas que la cubren"""
+        meta = self.metadatos(escena_id)
+        t = meta['tamano_tesela']
+        f0, f1, c0, c1 = ventana
+        f0, c0 = max(0, f0), max(0, c0)
+        f1, c1 = min(meta['alto'], f1), min(meta['ancho'], c1)
+        if f1 <= f0 or c1 <= c0:
+            raise ValueError(f"Ventana vacía o fuera de la escena {escena_id}: {ventana}")
+
+        resultado = {}
+        for banda in bandas or meta['bandas']:
+            origen = self.abrir_banda(escena_id, banda)
+            salida = np.empty((f1 - f0, c1 - c0), dtype=origen.dtype)
+            for ty in range(f0 // t, (f1 - 1) // t + 1):
+                for tx in range(c0 // t, (c1 - 1) // t + 1):
+                    # Intersección de la tesela con la ventana, en coordenadas de escena
+                    y0, y1 = max(f0, ty * t), min(f1, (ty + 1) * t)
+                    x0, x1 = max(c0, tx * t), min(c1, (tx + 1) * t)
+                    salida[y0 - f0:y1 - f0, x0 - c0:x1 - c0] = \
+                        origen[ty, tx, y0 - ty * t:y1 - ty * t, x0 - tx * t:x1 - tx * t]
+            resultado[banda] = salida
+        return resultado
+
+    def leer_escena(self, escena_id: str, bandas: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Leer las bandas completas como arreglos 2D"""
+        meta = self.metadatos(escena_id)
+        return self.leer_ventana(escena_id, (0, meta['alto'], 0, meta['ancho']), bandas)
+
+    def ventana_bbox(self, escena_id: str, bbox: Sequence[float]) -> Ventana:
+        """Convertir un bbox geográfico [min_lon, min_lat, max_lon, max_lat] en ventana de píxeles"""
+        meta = self.metadatos(escena_id)
+        if meta['bbox'] is None:
+            raise ValueError(f"La escena {escena_id} no tiene bbox geográfico")
+        min_lon, min_lat, max_lon, max_lat = meta['bbox']
+        paso_lon = (max_lon - min_lon) / meta['ancho']
+        paso_lat = (max_lat - min_lat) / meta['alto']
+
+        c0 = int(np.floor((bbox[0] - min_lon) / paso_lon))
+        c1 = int(np.ceil((bbox[2] - min_lon) / paso_lon))
+        f0 = int(np.floor((max_lat - bbox[3]) / paso_lat))
+        f1 = int(np.ceil((max_lat - bbox[1]) / paso_lat))
+        return (max(0, f0), min(meta['alto'], f1), max(0, c0), min(meta['ancho'], c1))
+
+    def leer_bbox(self, escena_id: str, bbox: Sequence[float],
+                  bandas: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Leer la porción de la escena que cubre un bbox geográfico"""
+        return self.leer_ventana(escena_id, self.ventana_bbox(escena_id, bbox), bandas)
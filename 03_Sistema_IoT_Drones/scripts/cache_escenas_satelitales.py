@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🗃️ CACHÉ DE ESCENAS SATELITALES - METGO 3D
+Sistema Meteorológico Agrícola Quillota - Resultados por checksum y catálogo incremental
+"""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+TAMANO_BLOQUE_HASH = 1 << 20
+
+
+def firma_archivo(ruta: Path) -> Optional[str]:
+    """mtime en ns y tamaño del archivo, o None si no existe"""
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return f"{estado.st_mtime_ns}:{estado.st_size}"
+
+
+def calcular_hash(ruta: Path) -> str:
+    """SHA-256 del contenido, leyendo por bloques"""
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b''):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+def miniatura(bandas: List[np.ndarray], lado_maximo: int = 128) -> np.ndarray:
+    """Miniatura (alto, ancho, canales) por submuestreo con paso fijo, sin copiar la escena"""
+    alto, ancho = bandas[0].shape
+    paso = max(1, -(-max(alto, ancho) // lado_maximo))
+    return np.stack([banda[::paso, ::paso] for banda in bandas], axis=-1)
+
+
+class CacheEscenasSatelitales:
+    """Caché persistente (SQLite) para el procesamiento de escenas satelitales
+
+    - Hashes de contenido por ruta, recalculados solo si cambian mtime o tamaño.
+    - Resultados (estadísticas de índices + miniatura) por (hash, versión de
+      parámetros): una imagen idéntica copiada o renombrada reutiliza el
+      resultado, y cambiar fórmulas o umbrales invalida lo calculado.
+    - Catálogo incremental de un directorio: solo se relee la entrada de los
+      archivos cuya firma (propia o de sus dependencias) cambió.
+    """
+
+    def __init__(self, directorio: str = 'data/satelitales/cache', version_parametros: str = '1'):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.version_parametros = version_parametros
+        self._lock = threading.Lock()
+        self.conexion = sqlite3.connect(str(self.directorio / 'cache_escenas.db'), check_same_thread=False)
+        self._crear_tablas()
+
+        # Copias en memoria: un refresco del catálogo no toca la base de datos
+        self._hashes: Dict[str, Tuple[str, str]] = {
+            ruta: (firma, hash_contenido)
+            for ruta, firma, hash_contenido in self.conexion.execute('SELECT ruta, firma, hash FROM hashes')
+        }
+        self._catalogo: Dict[str, Tuple[str, Dict]] = {
+            ruta: (firma, json.loads(entrada))
+            for ruta, firma, entrada in self.conexion.execute('SELECT ruta, firma, entrada FROM catalogo')
+        }
+        self.contadores = {'aciertos': 0, 'fallos': 0, 'hashes_calculados': 0, 'entradas_releidas': 0}
+
+    def _crear_tablas(self):
+        with self._lock:
+            self.conexion.executescript('''
+                CREATE TABLE IF NOT EXISTS hashes (
+                    ruta TEXT PRIMARY KEY,
+                    firma TEXT NOT NULL,
+                    hash TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS resultados (
+                    hash TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    resultado TEXT NOT NULL,
+                    miniatura BLOB,
+                    timestamp TEXT,
+                    PRIMARY KEY (hash, version)
+                );
+                CREATE TABLE IF NOT EXISTS catalogo (
+                    ruta TEXT PRIMARY KEY,
+                    firma TEXT NOT NULL,
+                    entrada TEXT NOT NULL
+                );
+            ''')
+            self.conexion.commit()
+
+    def hash_archivo(self, ruta) -> str:
+        """Hash de contenido, reutilizado mientras no cambien mtime ni tamaño"""
+        clave = str(ruta)
+        firma = firma_archivo(Path(ruta))
+        if firma is None:
+            raise FileNotFoundError(clave)
+
+        guardado = self._hashes.get(clave)
+        if guardado is not None and guardado[0] == firma:
+            return guardado[1]
+
+        hash_contenido = calcular_hash(Path(ruta))
+        self.contadores['hashes_calculados'] += 1
+        with self._lock:
+            self._hashes[clave] = (firma, hash_contenido)
+            self.conexion.execute('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?)', (clave, firma, hash_contenido))
+            self.conexion.commit()
+        return hash_contenido
+
+    def obtener_resultado(self, hash_contenido: str) -> Optional[Dict]:
+        with self._lock:
+            fila = self.conexion.execute(
+                'SELECT resultado FROM resultados WHERE hash = ? AND version = ?',
+                (hash_contenido, self.version_parametros)
+            ).fetchone()
+        if fila is None:
+            self.contadores['fallos'] += 1
+            return None
+        self.contadores['aciertos'] += 1
+        return json.loads(fila[0])
+
+    def obtener_miniatura(self, hash_contenido: str) -> Optional[np.ndarray]:
+        with self._lock:
+            fila = self.conexion.execute(
+                'SELECT miniatura FROM resultados WHERE hash = ? AND version = ?',
+                (hash_contenido, self.version_parametros)
+            ).fetchone()
+        if fila is None or fila[0] is None:
+            return None
+        return np.load(io.BytesIO(fila[0]), allow_pickle=False)
+
+    def guardar_resultado(self, hash_contenido: str, resultado: Dict,
+                          imagen_miniatura: Optional[np.ndarray] = None):
+        blob = None
+        if imagen_miniatura is not None:
+            buffer = io.BytesIO()
+            np.save(buffer, np.ascontiguousarray(imagen_miniatura), allow_pickle=False)
+            blob = buffer.getvalue()
+        with self._lock:
+            self.conexion.execute(
+                'INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?)',
+                (hash_contenido, self.version_parametros, json.dumps(resultado, ensure_ascii=False),
+                 blob, datetime.now().isoformat())
+            )
+            self.conexion.commit()
+
+    def escanear(self, directorio, patron: str, cargar_entrada: Callable[[Path], Dict],
+                 dependencias: Optional[Callable[[Path], List[Path]]] = None) -> List[Dict]:
+        """Entradas del catálogo para los archivos de un directorio
+
+        cargar_entrada(archivo) solo se llama para archivos nuevos o cuya firma,
+        o la de alguna dependencia (p.ej. su JSON de metadatos), cambió. Las
+        entradas de archivos eliminados se descartan.
+        """
+        directorio = Path(directorio)
+        vistos = set()
+        cambios, entradas = [], []
+
+        for archivo in directorio.glob(patron):
+            clave = str(archivo)
+            vistos.add(clave)
+            rutas_firma = [archivo] + (dependencias(archivo) if dependencias else [])
+            firma = '|'.join(str(firma_archivo(ruta)) for ruta in rutas_firma)
+
+            guardado = self._catalogo.get(clave)
+            if guardado is not None and guardado[0] == firma:
+                entradas.append(guardado[1])
+                continue
+
+            entrada = cargar_entrada(archivo)
+            self.contadores['entradas_releidas'] += 1
+            cambios.append((clave, firma, entrada))
+            entradas.append(entrada)
+
+        eliminados = [ruta for ruta in self._catalogo
+                      if ruta not in vistos and Path(ruta).parent == directorio and Path(ruta).match(patron)]
+
+        if cambios or eliminados:
+            with self._lock:
+                for clave, firma, entrada in cambios:
+                    self._catalogo[clave] = (firma, entrada)
+                for ruta in eliminados:
+                    del self._catalogo[ruta]
+                self.conexion.executemany(
+                    'INSERT OR REPLACE INTO catalogo VALUES (?, ?, ?)',
+                    [(clave, firma, json.dumps(entrada, ensure_ascii=False)) for clave, firma, entrada in cambios]
+                )
+                self.conexion.executemany('DELETE FROM catalogo WHERE ruta = ?', [(ruta,) for ruta in eliminados])
+                self.conexion.commit()
+
+        return entradas
+
+    def cerrar(self):
+        with self._lock:
+            self.conexion.close()
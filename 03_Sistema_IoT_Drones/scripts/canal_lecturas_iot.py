@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+📡 CANAL ACOTADO DE LECTURAS IoT - METGO 3D
+Sistema Meteorológico Agrícola Quillota - Buffer circular con política de desborde y drenado columnar
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+POLITICAS_DESBORDE = ('descartar_antiguo', 'bloquear', 'muestrear')
+
+
+class CanalLecturasIoT:
+    """Canal productor/consumidor de capacidad fija para lecturas IoT
+
+    Cuando el canal está lleno se aplica la política de desborde:
+    - 'descartar_antiguo': la lectura nueva reemplaza a la más antigua
+    - 'bloquear': el productor espera espacio (hasta timeout_bloqueo) y, si no
+      lo hay, la lectura se descarta
+    - 'muestrear': solo una de cada paso_muestreo lecturas entrantes reemplaza a
+      la más antigua, de modo que durante un corte se conserva cobertura temporal
+      a menor resolución
+    En todos los casos la memoria queda acotada por la capacidad.
+    """
+
+    def __init__(self, capacidad: int = 10000,
+                 politica: str = 'descartar_antiguo',
+                 timeout_bloqueo: Optional[float] = None,
+                 paso_muestreo: int = 10):
+        if politica not in POLITICAS_DESBORDE:
+            raise ValueError(f"Política de desborde no soportada: {politica}")
+        if capacidad <= 0:
+            raise ValueError("La capacidad del canal debe ser positiva")
+
+        self.capacidad = capacidad
+        self.politica = politica
+        self.timeout_bloqueo = timeout_bloqueo
+        self.paso_muestreo = max(1, paso_muestreo)
+
+        self._buffer = deque(maxlen=capacidad)
+        self._condicion = threading.Condition()
+        self._entrantes_en_desborde = 0
+        self.contadores = {
+            'publicadas': 0,
+            'aceptadas': 0,
+            'descartadas': 0,
+            'reemplazadas': 0,
+            'drenadas': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def _publicar_sin_lock(self, lectura: Dict[str, Any], limite: Optional[float]) -> bool:
+        """Insertar una lectura aplicando la política (el llamador tiene la condición)"""
+        self.contadores['publicadas'] += 1
+
+        if len(self._buffer) >= self.capacidad:
+            if self.politica == 'bloquear':
+                while len(self._buffer) >= self.capacidad:
+                    restante = None if limite is None else limite - time.monotonic()
+                    if restante is not None and restante <= 0:
+                        self.contadores['descartadas'] += 1
+                        return False
+                    self._condicion.wait(restante)
+            elif self.politica == 'muestrear':
+                self._entrantes_en_desborde += 1
+                if self._entrantes_en_desborde % self.paso_muestreo:
+                    self.contadores['descartadas'] += 1
+                    return False
+                self.contadores['reemplazadas'] += 1
+            else:
+                self.contadores['reemplazadas'] += 1
+        else:
+            self._entrantes_en_desborde = 0
+
+        # deque con maxlen expulsa la más antigua si el canal está lleno
+        self._buffer.append(lectura)
+        self.contadores['aceptadas'] += 1
+        self._condicion.notify_all()
+        return True
+
+    def _limite_bloqueo(self) -> Optional[float]:
+        return None if self.timeout_bloqueo is None else time.monotonic() + self.timeout_bloqueo
+
+    def publicar(self, lectura: Dict[str, Any]) -> bool:
+        """Publicar una lectura; devuelve False si la política la descartó"""
+        with self._condicion:
+            return self._publicar_sin_lock(lectura, self._limite_bloqueo())
+
+    def publicar_lote(self, lecturas: List[Dict[str, Any]]) -> int:
+        """Publicar varias lecturas tomando el lock una sola vez; devuelve las aceptadas"""
+        limite = self._limite_bloqueo()
+        with self._condicion:
+            return sum(self._publicar_sin_lock(lectura, limite) for lectura in lecturas)
+
+    def drenar_registros(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Extraer hasta n lecturas (todas si n es None) en orden de llegada"""
+        with self._condicion:
+            cantidad = len(self._buffer) if n is None else min(n, len(self._buffer))
+            extraidas = [self._buffer.popleft() for _ in range(cantidad)]
+            self.contadores['drenadas'] += cantidad
+            if cantidad:
+                self._condicion.notify_all()
+        return extraidas
+
+    def drenar(self, n: Optional[int] = None, columnas: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """Extraer hasta n lecturas como arreglos por columna
+
+        Las columnas numéricas quedan como arreglos float/int y el resto como
+        arreglos de objetos; las claves ausentes en una lectura quedan en None.
+        """
+        return registros_a_columnas(self.drenar_registros(n), columnas)
+
+    def instantanea(self) -> List[Dict[str, Any]]:
+        """Copia del contenido actual sin consumirlo"""
+        with self._condicion:
+            return list(self._buffer)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Contadores y ocupación del canal, sin consumir lecturas"""
+        with self._condicion:
+            ocupacion = len(self._buffer)
+            return {
+                **self.contadores,
+                'ocupacion': ocupacion,
+                'capacidad': self.capacidad,
+                'uso_porcentaje': round(100 * ocupacion / self.capacidad, 1),
+                'politica': self.politica
+            }
+
+
+def registros_a_columnas(registros: List[Dict[str, Any]],
+                         columnas: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """Convertir una lista de lecturas en un diccionario columna -> arreglo"""
+    if columnas is None:
+        columnas = list(registros[0].keys()) if registros else []
+
+    resultado = {}
+    for columna in columnas:
+        valores = [registro.get(columna) for registro in registros]
+        if valores and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valores):
+            resultado[columna] = np.asarray(valores)
+        else:
+            arreglo = np.empty(len(valores), dtype=object)
+            arreglo[:] = valores
+            resultado[columna] = arreglo
+    return resultado
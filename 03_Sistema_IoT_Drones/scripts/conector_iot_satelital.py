@@ -17,7 +17,6 @@ from typing import Dict, List, Any, Optional
 import logging
 import sqlite3
 import threading
-import queue
 try:
     import cv2
     CV2_AVAILABLE = True
@@ -32,13 +31,21 @@ except ImportError:
 import requests
 from io import BytesIO
 
+from canal_lecturas_iot import CanalLecturasIoT
+from formato_binario_iot import ESQUEMA_CONECTOR, RegistroIoT, codificar_lote
+from motor_indices_espectrales import CLASES_NDVI, INDICES_RGB, MotorIndicesEspectrales
+from cache_escenas_satelitales import CacheEscenasSatelitales, miniatura
+
 class ConectorSensoresIoT:
     """Conector para sensores IoT del sistema METGO 3D"""
     
-    def __init__(self):
+    def __init__(self, capacidad_canal: int = 10000, politica_desborde: str = 'descartar_antiguo'):
         self.logger = logging.getLogger('IOT_CONNECTOR')
         self.sensores_activos = {}
-        self.datos_sensores = queue.Queue()
+        # Canal acotado: la memoria no crece si los consumidores se atrasan
+        self.datos_sensores = CanalLecturasIoT(capacidad=capacidad_canal, politica=politica_desborde)
+        # Registro de ids para el formato binario compacto (ver formato_binario_iot)
+        self.registro_iot = RegistroIoT()
         self.simulacion_activa = False
         
         # Configuracion de sensores
@@ -191,10 +198,12 @@ class ConectorSensoresIoT:
                 while self.simulacion_activa:
                     estacion_info = self.estaciones_iot[estacion_id]
                     
+                    lecturas = []
                     for sensor in estacion_info['sensores']:
                         datos = self.simular_datos_sensor(sensor, estacion_id)
                         if datos:
-                            self.datos_sensores.put(datos)
+                            lecturas.append(datos)
+                    self.datos_sensores.publicar_lote(lecturas)
                     
                     # Esperar antes de la siguiente lectura
                     time.sleep(5)
@@ -219,46 +228,59 @@ class ConectorSensoresIoT:
     def obtener_datos_iot(self, limite=100) -> List[Dict[str, Any]]:
         """Obtener datos de sensores IoT"""
         try:
-            datos = []
-            contador = 0
-            
-            while not self.datos_sensores.empty() and contador < limite:
-                dato = self.datos_sensores.get_nowait()
-                datos.append(dato)
-                contador += 1
-            
-            return datos
+            return self.datos_sensores.drenar_registros(limite)
             
         except Exception as e:
             self.logger.error(f"Error obteniendo datos IoT: {e}")
             return []
     
+    def obtener_datos_iot_binario(self, limite=None) -> bytes:
+        """Obtener datos de sensores IoT como un lote binario compacto
+        
+        El suscriptor necesita self.registro_iot.a_json() para decodificarlo.
+        """
+        try:
+            return codificar_lote(self.datos_sensores.drenar_registros(limite), self.registro_iot, ESQUEMA_CONECTOR)
+            
+        except Exception as e:
+            self.logger.error(f"Error codificando datos IoT: {e}")
+            return b''
+    
+    def obtener_datos_iot_columnar(self, limite=None, columnas=None) -> Dict[str, np.ndarray]:
+        """Obtener datos de sensores IoT como arreglos por columna"""
+        try:
+            return self.datos_sensores.drenar(limite, columnas)
+            
+        except Exception as e:
+            self.logger.error(f"Error obteniendo datos IoT columnares: {e}")
+            return {}
+    
     def obtener_estadisticas_iot(self) -> Dict[str, Any]:
-        """Obtener estadisticas de sensores IoT"""
+        """Obtener estadisticas de sensores IoT (sin consumir las lecturas del canal)"""
         try:
-            datos = self.obtener_datos_iot(1000)
+            datos = self.datos_sensores.instantanea()
             
             if not datos:
-                return {'error': 'No hay datos disponibles'}
+                return {'error': 'No hay datos disponibles', 'canal': self.datos_sensores.estadisticas()}
             
-            df = pd.DataFrame(datos)
+            df = pd.DataFrame(datos, columns=['timestamp', 'estacion_id', 'sensor', 'bateria', 'senal'])
             
             estadisticas = {
                 'total_lecturas': len(df),
                 'estaciones_activas': df['estacion_id'].nunique(),
                 'sensores_activos': df['sensor'].nunique(),
                 'ultima_lectura': df['timestamp'].max(),
-                'estaciones': {}
+                'estaciones': {},
+                'canal': self.datos_sensores.estadisticas()
             }
             
-            for estacion in df['estacion_id'].unique():
-                datos_estacion = df[df['estacion_id'] == estacion]
-                estadisticas['estaciones'][estacion] = {
-                    'lecturas': len(datos_estacion),
-                    'sensores': datos_estacion['sensor'].nunique(),
-                    'bateria_promedio': datos_estacion['bateria'].mean(),
-                    'senal_promedio': datos_estacion['senal'].mean()
-                }
+            por_estacion = df.groupby('estacion_id', sort=False).agg(
+                lecturas=('sensor', 'size'),
+                sensores=('sensor', 'nunique'),
+                bateria_promedio=('bateria', 'mean'),
+                senal_promedio=('senal', 'mean')
+            )
+            estadisticas['estaciones'] = por_estacion.to_dict(orient='index')
             
             return estadisticas
             
@@ -314,6 +336,14 @@ class ConectorDatosSatelitales:
             },
             'centro': {'lat': -32.8833, 'lon': -71.25}
         }
+        
+        # Motor de indices espectrales por teselas (memoria acotada, multihilo)
+        self.motor_indices = MotorIndicesEspectrales(INDICES_RGB, clases={'ndvi': CLASES_NDVI})
+        
+        # Cache de resultados por checksum de imagen + catalogo incremental
+        self.cache_escenas = CacheEscenasSatelitales(
+            'data/satelitales/cache', version_parametros=self.motor_indices.version_parametros()
+        )
     
     def simular_imagen_satelital(self, satelite: str, fecha: datetime = None) -> Dict[str, Any]:
         """Simular imagen satelital"""
@@ -390,103 +420,157 @@ class ConectorDatosSatelitales:
             self.logger.error(f"Error simulando imagen satelital: {e}")
             return None
     
-    def procesar_imagen_satelital(self, ruta_imagen: str) -> Dict[str, Any]:
+    def _cargar_bandas_rgb(self, ruta_imagen: str) -> Optional[Dict[str, np.ndarray]]:
+        """Cargar imagen y devolver vistas r, g, b (sin copias float32 de la escena)"""
+        imagen = cv2.imread(ruta_imagen)
+        if imagen is None:
+            return None
+        # OpenCV entrega BGR: las bandas son vistas del arreglo uint8 original
+        return {'r': imagen[:, :, 2], 'g': imagen[:, :, 1], 'b': imagen[:, :, 0]}
+    
+    def _resultado_indices(self, resultado: Dict[str, Any]) -> Dict[str, Any]:
+        """Formato de salida de procesar_imagen_satelital a partir del motor de indices
+        
+        El timestamp de procesamiento no se guarda en cache: se agrega al entregar
+        el resultado (ver _con_timestamp).
+        """
+        return {
+            'procesado': True,
+            'indices': resultado['indices'],
+            'resumen': resultado['clases']
+        }
+    
+    def _con_timestamp(self, resultado: Dict[str, Any]) -> Dict[str, Any]:
+        return {**resultado, 'timestamp_procesamiento': datetime.now().isoformat()}
+    
+    def _hash_imagen(self, ruta_imagen: str) -> Optional[str]:
+        """Hash de contenido de la imagen, o None si el archivo no existe"""
+        try:
+            return self.cache_escenas.hash_archivo(ruta_imagen)
+        except FileNotFoundError:
+            return None
+    
+    def _guardar_en_cache(self, hash_imagen: str, bandas: Dict[str, np.ndarray],
+                          resultado: Dict[str, Any]) -> Dict[str, Any]:
+        """Formatear resultado del motor y guardarlo en cache junto con la miniatura RGB"""
+        resultado = self._resultado_indices(resultado)
+        self.cache_escenas.guardar_resultado(
+            hash_imagen, resultado, miniatura([bandas['r'], bandas['g'], bandas['b']])
+        )
+        return self._con_timestamp(resultado)
+    
+    def procesar_imagen_satelital(self, ruta_imagen: str, usar_cache: bool = True) -> Dict[str, Any]:
         """Procesar imagen satelital para extraer indices"""
         try:
+            # Imagen ya procesada con los mismos parametros: no se decodifica
+            hash_imagen = None
+            if usar_cache:
+                hash_imagen = self._hash_imagen(ruta_imagen)
+                if hash_imagen is None:
+                    return {'error': 'No se pudo cargar la imagen'}
+                resultado = self.cache_escenas.obtener_resultado(hash_imagen)
+                if resultado is not None:
+                    return self._con_timestamp(resultado)
+            
             if not CV2_AVAILABLE:
                 return {'error': 'OpenCV no disponible', 'procesado': False}
             
             # Cargar imagen
-            imagen = cv2.imread(ruta_imagen)
-            if imagen is None:
+            bandas = self._cargar_bandas_rgb(ruta_imagen)
+            if bandas is None:
                 return {'error': 'No se pudo cargar la imagen'}
             
-            # Convertir a RGB
-            imagen_rgb = cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
-            
-            # Calcular indices espectrales
-            r = imagen_rgb[:, :, 0].astype(np.float32)
-            g = imagen_rgb[:, :, 1].astype(np.float32)
-            b = imagen_rgb[:, :, 2].astype(np.float32)
-            
-            # NDVI (Normalized Difference Vegetation Index)
-            ndvi = np.where((r + b) != 0, (r - b) / (r + b), 0)
-            
-            # GNDVI (Green Normalized Difference Vegetation Index)
-            gndvi = np.where((g + b) != 0, (g - b) / (g + b), 0)
-            
-            # SAVI (Soil Adjusted Vegetation Index)
-            savi = np.where((r + b + 0.5) != 0, (r - b) / (r + b + 0.5) * 1.5, 0)
-            
-            # EVI (Enhanced Vegetation Index)
-            evi = np.where((r + 6*b - 7.5*g + 1) != 0, 2.5 * (r - b) / (r + 6*b - 7.5*g + 1), 0)
-            
-            # Calcular estadisticas
-            indices = {
-                'ndvi': {
-                    'media': float(np.mean(ndvi)),
-                    'desviacion': float(np.std(ndvi)),
-                    'min': float(np.min(ndvi)),
-                    'max': float(np.max(ndvi))
-                },
-                'gndvi': {
-                    'media': float(np.mean(gndvi)),
-                    'desviacion': float(np.std(gndvi)),
-                    'min': float(np.min(gndvi)),
-                    'max': float(np.max(gndvi))
-                },
-                'savi': {
-                    'media': float(np.mean(savi)),
-                    'desviacion': float(np.std(savi)),
-                    'min': float(np.min(savi)),
-                    'max': float(np.max(savi))
-                },
-                'evi': {
-                    'media': float(np.mean(evi)),
-                    'desviacion': float(np.std(evi)),
-                    'min': float(np.min(evi)),
-                    'max': float(np.max(evi))
-                }
-            }
-            
-            return {
-                'procesado': True,
-                'indices': indices,
-                'timestamp_procesamiento': datetime.now().isoformat(),
-                'resumen': {
-                    'vegetacion_saludable': float(np.mean(ndvi > 0.3)),
-                    'vegetacion_moderada': float(np.mean((ndvi > 0.1) & (ndvi <= 0.3))),
-                    'vegetacion_baja': float(np.mean(ndvi <= 0.1))
-                }
-            }
+            # NDVI, GNDVI, SAVI y EVI en una pasada por tesela
+            resultado = self.motor_indices.procesar_arreglos(bandas)
+            if hash_imagen is None:
+                return self._con_timestamp(self._resultado_indices(resultado))
+            return self._guardar_en_cache(hash_imagen, bandas, resultado)
             
         except Exception as e:
             self.logger.error(f"Error procesando imagen satelital: {e}")
             return {'error': str(e)}
     
-    def obtener_imagenes_disponibles(self) -> List[Dict[str, Any]]:
-        """Obtener lista de imagenes satelitales disponibles"""
+    def procesar_imagenes_satelitales(self, rutas_imagenes: List[str],
+                                      usar_cache: bool = True) -> List[Dict[str, Any]]:
+        """Procesar varias imagenes repartiendo las teselas de todas en el mismo pool de hilos"""
         try:
-            imagenes = []
+            resultados = [None] * len(rutas_imagenes)
+            hashes = [None] * len(rutas_imagenes)
+            pendientes = []
+            for i, ruta in enumerate(rutas_imagenes):
+                if usar_cache:
+                    hashes[i] = self._hash_imagen(ruta)
+                    if hashes[i] is None:
+                        # Archivo inexistente: solo falla esta imagen
+                        resultados[i] = {'error': 'No se pudo cargar la imagen'}
+                        continue
+                    resultado = self.cache_escenas.obtener_resultado(hashes[i])
+                    if resultado is not None:
+                        resultados[i] = self._con_timestamp(resultado)
+                        continue
+                pendientes.append(i)
+            
+            if pendientes and not CV2_AVAILABLE:
+                for i in pendientes:
+                    resultados[i] = {'error': 'OpenCV no disponible', 'procesado': False}
+                return resultados
+            
+            escenas, posiciones = [], []
+            for i in pendientes:
+                bandas = self._cargar_bandas_rgb(rutas_imagenes[i])
+                if bandas is None:
+                    resultados[i] = {'error': 'No se pudo cargar la imagen'}
+                else:
+                    escenas.append(bandas)
+                    posiciones.append(i)
             
-            for archivo in self.directorio_imagenes.glob('*.png'):
-                # Buscar metadatos correspondientes
-                nombre_base = archivo.stem
-                metadatos_archivo = self.directorio_metadatos / f"{nombre_base}_metadata.json"
-                
-                if metadatos_archivo.exists():
-                    with open(metadatos_archivo, 'r', encoding='utf-8') as f:
-                        metadatos = json.load(f)
-                    imagenes.append(metadatos)
+            for i, bandas, resultado in zip(posiciones, escenas, self.motor_indices.procesar_lote(escenas)):
+                if hashes[i] is None:
+                    resultados[i] = self._con_timestamp(self._resultado_indices(resultado))
                 else:
-                    # Crear metadatos basicos
-                    imagenes.append({
-                        'archivo': archivo.name,
-                        'ruta': str(archivo),
-                        'satelite': 'desconocido',
-                        'fecha_adquisicion': datetime.fromtimestamp(archivo.stat().st_mtime).isoformat(),
-                        'procesado': False
-                    })
+                    resultados[i] = self._guardar_en_cache(hashes[i], bandas, resultado)
+            return resultados
+            
+        except Exception as e:
+            self.logger.error(f"Error procesando lote de imagenes satelitales: {e}")
+            return [{'error': str(e)} for _ in rutas_imagenes]
+    
+    def obtener_miniatura(self, ruta_imagen: str) -> Optional[np.ndarray]:
+        """Miniatura RGB guardada al procesar la imagen (None si aun no se proceso)"""
+        try:
+            return self.cache_escenas.obtener_miniatura(self.cache_escenas.hash_archivo(ruta_imagen))
+        except Exception as e:
+            self.logger.error(f"Error obteniendo miniatura: {e}")
+            return None
+    
+    def _ruta_metadatos(self, archivo: Path) -> Path:
+        return self.directorio_metadatos / f"{archivo.stem}_metadata.json"
+    
+    def _leer_metadatos_imagen(self, archivo: Path) -> Dict[str, Any]:
+        """Metadatos de una imagen, o metadatos basicos si no tiene archivo asociado"""
+        metadatos_archivo = self._ruta_metadatos(archivo)
+        
+        if metadatos_archivo.exists():
+            with open(metadatos_archivo, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        
+        # Crear metadatos basicos
+        return {
+            'archivo': archivo.name,
+            'ruta': str(archivo),
+            'satelite': 'desconocido',
+            'fecha_adquisicion': datetime.fromtimestamp(archivo.stat().st_mtime).isoformat(),
+            'procesado': False
+        }
+    
+    def obtener_imagenes_disponibles(self) -> List[Dict[str, Any]]:
+        """Obtener lista de imagenes satelitales disponibles"""
+        try:
+            # Solo se releen metadatos de imagenes nuevas o modificadas (imagen o su JSON)
+            imagenes = self.cache_escenas.escanear(
+                self.directorio_imagenes, '*.png', self._leer_metadatos_imagen,
+                dependencias=lambda archivo: [self._ruta_metadatos(archivo)]
+            )
             
             return sorted(imagenes, key=lambda x: x['fecha_adquisicion'], reverse=True)
             
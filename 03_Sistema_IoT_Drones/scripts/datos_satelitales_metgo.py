@@ -47,6 +47,9 @@ try:
 except ImportError:
     FOLIUM_AVAILABLE = False
 
+from almacen_raster_satelital import AlmacenRasterSatelital
+from motor_indices_espectrales import INDICES_MULTIESPECTRALES, MotorIndicesEspectrales
+
 # Configuración
 warnings.filterwarnings('ignore')
 
@@ -81,6 +84,7 @@ class DatosSatelitalesMETGO:
             'directorio_datos': 'data/satelitales',
             'directorio_imagenes': 'data/satelitales/imagenes',
             'directorio_metadatos': 'data/satelitales/metadatos',
+            'directorio_raster': 'data/satelitales/raster',
             'directorio_logs': 'logs/satelitales',
             'directorio_reportes': 'reportes/satelitales',
             'version': '2.0',
@@ -99,6 +103,13 @@ class DatosSatelitalesMETGO:
         # Base de datos
         self._inicializar_base_datos()
         
+        # Almacén raster teselado (bandas binarias mapeadas en memoria + catálogo de escenas)
+        self.almacen_raster = AlmacenRasterSatelital(self.configuracion['directorio_raster'])
+        
+        # Motor de índices espectrales por teselas
+        self.motor_indices = MotorIndicesEspectrales(INDICES_MULTIESPECTRALES,
+                                                     tamano_tesela=self.almacen_raster.tamano_tesela)
+        
         # Configuración de APIs
         self.configuracion_apis = {
             'nasa_earthdata': {
@@ -404,7 +415,7 @@ class DatosSatelitalesMETGO:
                 tipo = np.random.choice(tipos_imagenes)
                 
                 # Generar resolución
-                resolucion = np.random.choice([(512, 512), (1024, 1024), (2048, 2048)])
+                resolucion = [(512, 512), (1024, 1024), (2048, 2048)][np.random.randint(3)]
                 
                 # Crear archivo de imagen sintético
                 ruta_archivo = f"{self.configuracion['directorio_imagenes']}/imagen_{i+1}_{tipo.lower()}.tif"
@@ -420,8 +431,21 @@ class DatosSatelitalesMETGO:
                     # Imagen monocromática
                     imagen_data = np.random.randint(0, 255, resolucion, dtype=np.uint8)
                 
+                metadata = {
+                    'generada_sinteticamente': True,
+                    'satelite': str(np.random.choice(['Landsat-8', 'Sentinel-2', 'MODIS'])),
+                    'banda': str(np.random.choice(['B2', 'B3', 'B4', 'B8', 'B11', 'B12'])),
+                    'resolucion_espacial': int(np.random.choice([10, 30, 250])),
+                    'fecha_adquisicion': timestamp.isoformat()
+                }
+                
+                # Extensión geográfica de la escena centrada en (lat, lon)
+                medio_lat = resolucion[0] * metadata['resolucion_espacial'] / 2 / 111320
+                medio_lon = resolucion[1] * metadata['resolucion_espacial'] / 2 / (111320 * np.cos(np.radians(lat)))
+                bbox = [lon - medio_lon, lat - medio_lat, lon + medio_lon, lat + medio_lat]
+                
                 # Guardar imagen sintética
-                self._guardar_imagen_sintetica(imagen_data, ruta_archivo, tipo)
+                self._guardar_imagen_sintetica(imagen_data, ruta_archivo, tipo, bbox=bbox, metadata=metadata)
                 
                 # Crear objeto de imagen
                 imagen = ImagenSatelital(
@@ -431,13 +455,7 @@ class DatosSatelitalesMETGO:
                     coordenadas=(lat, lon),
                     resolucion=resolucion,
                     ruta_archivo=ruta_archivo,
-                    metadata={
-                        'generada_sinteticamente': True,
-                        'satelite': np.random.choice(['Landsat-8', 'Sentinel-2', 'MODIS']),
-                        'banda': np.random.choice(['B2', 'B3', 'B4', 'B8', 'B11', 'B12']),
-                        'resolucion_espacial': np.random.choice([10, 30, 250]),
-                        'fecha_adquisicion': timestamp.isoformat()
-                    }
+                    metadata=metadata
                 )
                 
                 imagenes_generadas.append(imagen)
@@ -450,21 +468,28 @@ class DatosSatelitalesMETGO:
             self.logger.error(f"Error generando imágenes satelitales sintéticas: {e}")
             return []
     
-    def _guardar_imagen_sintetica(self, imagen_data: np.ndarray, ruta_archivo: str, tipo: str):
+    def escena_raster(self, ruta_archivo: str) -> str:
+        """Id de la escena en el almacén raster correspondiente a una ruta de imagen"""
+        return Path(ruta_archivo).stem
+    
+    def _guardar_imagen_sintetica(self, imagen_data: np.ndarray, ruta_archivo: str, tipo: str,
+                                  bbox: Optional[List[float]] = None, metadata: Optional[Dict] = None):
         """Guardar imagen sintética"""
         try:
             # Crear directorio si no existe
             Path(ruta_archivo).parent.mkdir(parents=True, exist_ok=True)
             
-            # Guardar como archivo de texto (simulando imagen)
+            # Guardar en el almacén raster teselado (binario, sin parseo de texto al leer)
             if tipo == 'RGB':
-                # Guardar datos RGB
-                np.savetxt(ruta_archivo.replace('.tif', '_r.txt'), imagen_data[0], fmt='%d')
-                np.savetxt(ruta_archivo.replace('.tif', '_g.txt'), imagen_data[1], fmt='%d')
-                np.savetxt(ruta_archivo.replace('.tif', '_b.txt'), imagen_data[2], fmt='%d')
+                bandas = {'r': imagen_data[0], 'g': imagen_data[1], 'b': imagen_data[2]}
             else:
-                # Guardar datos monocromáticos
-                np.savetxt(ruta_archivo.replace('.tif', '.txt'), imagen_data, fmt='%.6f')
+                # Índices en float32: suficiente para valores en [-1, 1] y la mitad de espacio
+                datos = imagen_data.astype(np.float32) if imagen_data.dtype.kind == 'f' else imagen_data
+                bandas = {tipo.lower(): datos}
+            
+            self.almacen_raster.guardar_escena(
+                self.escena_raster(ruta_archivo), bandas, bbox=bbox, tipo=tipo, metadata=metadata
+            )
             
             # Crear archivo de metadatos
             metadata_file = ruta_archivo.replace('.tif', '_metadata.json')
@@ -472,6 +497,7 @@ class DatosSatelitalesMETGO:
                 'tipo': tipo,
                 'dimensiones': imagen_data.shape,
                 'tipo_datos': str(imagen_data.dtype),
+                'escena_raster': self.escena_raster(ruta_archivo),
                 'generada_sinteticamente': True,
                 'timestamp': datetime.now().isoformat()
             }
@@ -487,56 +513,20 @@ class DatosSatelitalesMETGO:
         try:
             self.logger.info(f"Calculando índices espectrales para imagen {imagen.id}")
             
-            # Cargar datos de imagen
-            if imagen.tipo == 'RGB':
-                # Para imágenes RGB, usar datos sintéticos
-                r = np.random.rand(100, 100) * 0.8 + 0.1
-                g = np.random.rand(100, 100) * 0.8 + 0.1
-                b = np.random.rand(100, 100) * 0.8 + 0.1
-                nir = np.random.rand(100, 100) * 0.8 + 0.1
-                swir = np.random.rand(100, 100) * 0.8 + 0.1
-            else:
-                # Para otros tipos, generar datos sintéticos
-                r = np.random.rand(100, 100) * 0.8 + 0.1
-                g = np.random.rand(100, 100) * 0.8 + 0.1
-                b = np.random.rand(100, 100) * 0.8 + 0.1
-                nir = np.random.rand(100, 100) * 0.8 + 0.1
-                swir = np.random.rand(100, 100) * 0.8 + 0.1
-            
-            # Calcular índices espectrales
-            indices = {}
-            
-            # NDVI (Normalized Difference Vegetation Index)
-            ndvi = (nir - r) / (nir + r + 1e-8)
-            indices['NDVI'] = np.mean(ndvi)
-            
-            # NDWI (Normalized Difference Water Index)
-            ndwi = (g - nir) / (g + nir + 1e-8)
-            indices['NDWI'] = np.mean(ndwi)
+            escena_id = self.escena_raster(imagen.ruta_archivo)
+            bandas_requeridas = {'nir', 'r', 'g', 'b'}
             
-            # EVI (Enhanced Vegetation Index)
-            evi = 2.5 * (nir - r) / (nir + 6 * r - 7.5 * b + 1 + 1e-8)
-            indices['EVI'] = np.mean(evi)
-            
-            # SAVI (Soil Adjusted Vegetation Index)
-            savi = ((nir - r) / (nir + r + 0.5 + 1e-8)) * 1.5
-            indices['SAVI'] = np.mean(savi)
-            
-            # GNDVI (Green Normalized Difference Vegetation Index)
-            gndvi = (nir - g) / (nir + g + 1e-8)
-            indices['GNDVI'] = np.mean(gndvi)
-            
-            # RVI (Ratio Vegetation Index)
-            rvi = nir / (r + 1e-8)
-            indices['RVI'] = np.mean(rvi)
-            
-            # DVI (Difference Vegetation Index)
-            dvi = nir - r
-            indices['DVI'] = np.mean(dvi)
+            if (self.almacen_raster.existe(escena_id) and
+                    bandas_requeridas <= set(self.almacen_raster.metadatos(escena_id)['bandas'])):
+                # Bandas reales del almacén: se leen tesela a tesela desde el memmap
+                resultado = self.motor_indices.procesar_escena_almacen(self.almacen_raster, escena_id)
+            else:
+                # Sin bandas multiespectrales, usar datos sintéticos
+                bandas = {banda: np.random.rand(100, 100) * 0.8 + 0.1 for banda in ('r', 'g', 'b', 'nir')}
+                resultado = self.motor_indices.procesar_arreglos(bandas)
             
-            # ARVI (Atmospherically Resistant Vegetation Index)
-            arvi = (nir - (2 * r - b)) / (nir + (2 * r - b) + 1e-8)
-            indices['ARVI'] = np.mean(arvi)
+            # Todos los índices en una pasada por tesela; se reporta la media de cada uno
+            indices = {nombre: estadisticas['media'] for nombre, estadisticas in resultado['indices'].items()}
             
             self.logger.info(f"Índices espectrales calculados: {len(indices)}")
             return indices
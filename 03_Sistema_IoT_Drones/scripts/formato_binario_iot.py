@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+📦 FORMATO BINARIO COMPACTO IoT - METGO 3D
+Sistema Meteorológico Agrícola Quillota - Registro de ids y registros empaquetados para enlaces LoRa/celulares
+"""
+
+import json
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Encabezado de lote: firma, versión y cantidad de registros
+FIRMA_LOTE = b'MG'
+VERSION_FORMATO = 1
+ENCABEZADO_LOTE = struct.Struct('<2sBI')
+
+# Registro por lectura (19 bytes): ids de estación y sensor, epoch en microsegundos,
+# valor float32, batería y señal en porcentaje entero y código de estado
+DTYPE_REGISTRO = np.dtype([
+    ('estacion', '<u2'),
+    ('sensor', '<u2'),
+    ('epoch_us', '<i8'),
+    ('valor', '<f4'),
+    ('bateria', 'u1'),
+    ('senal', 'u1'),
+    ('estado', 'u1')
+])
+
+MAXIMOS_CATALOGO = {'estaciones': 0xFFFF, 'sensores': 0xFFFF, 'estados': 0xFF}
+
+
+class RegistroIncompleto(ValueError):
+    """El lote usa ids que el registro del suscriptor todavía no conoce"""
+
+
+class CatalogoIds:
+    """Asignación estable clave -> id entero pequeño con metadatos por clave"""
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self.claves: List[str] = []
+        self.metadatos: List[Dict[str, Any]] = []
+        self._ids: Dict[str, int] = {}
+        # Claves nuevas o metadatos cambiados desde la creación (para versionar el registro)
+        self.modificaciones = 0
+
+    def __len__(self) -> int:
+        return len(self.claves)
+
+    def obtener_id(self, clave: Any, metadatos: Optional[Dict[str, Any]] = None) -> int:
+        """Id de la clave, registrándola (con sus metadatos) si es nueva
+
+        Si la clave ya existe y llegan metadatos distintos, se reemplazan.
+        """
+        clave = str(clave)
+        identificador = self._ids.get(clave)
+        if identificador is None:
+            if len(self.claves) > self.maximo:
+                raise ValueError(f"Catálogo lleno: no se pueden registrar más de {self.maximo + 1} claves")
+            identificador = len(self.claves)
+            self._ids[clave] = identificador
+            self.claves.append(clave)
+            self.metadatos.append(dict(metadatos or {}))
+            self.modificaciones += 1
+        elif metadatos is not None and metadatos != self.metadatos[identificador]:
+            self.metadatos[identificador] = dict(metadatos)
+            self.modificaciones += 1
+        return identificador
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {'claves': self.claves, 'metadatos': self.metadatos}
+
+    def cargar(self, datos: Dict[str, Any]):
+        """Reemplazar el contenido por el de a_dict()"""
+        self.claves = list(datos['claves'])
+        self.metadatos = [dict(m) for m in datos['metadatos']]
+        self._ids = {clave: i for i, clave in enumerate(self.claves)}
+
+
+class RegistroIoT:
+    """Registro de estaciones, sensores y estados compartido por publicador y suscriptor
+
+    Los metadatos repetidos (nombre, coordenadas, unidad...) viajan una sola vez
+    en el registro; cada lectura solo lleva los ids.
+    """
+
+    def __init__(self):
+        self.estaciones = CatalogoIds(MAXIMOS_CATALOGO['estaciones'])
+        self.sensores = CatalogoIds(MAXIMOS_CATALOGO['sensores'])
+        self.estados = CatalogoIds(MAXIMOS_CATALOGO['estados'])
+        self.version = 0
+
+    def tamanos(self) -> Tuple[int, int, int]:
+        return len(self.estaciones), len(self.sensores), len(self.estados)
+
+    def modificaciones(self) -> int:
+        return self.estaciones.modificaciones + self.sensores.modificaciones + self.estados.modificaciones
+
+    def a_json(self) -> str:
+        return json.dumps({
+            'version': self.version,
+            'estaciones': self.estaciones.a_dict(),
+            'sensores': self.sensores.a_dict(),
+            'estados': self.estados.a_dict()
+        })
+
+    @classmethod
+    def desde_json(cls, texto: str) -> 'RegistroIoT':
+        registro = cls()
+        registro.actualizar_desde_json(texto)
+        return registro
+
+    def actualizar_desde_json(self, texto: str):
+        """Cargar un registro recibido del publicador"""
+        datos = json.loads(texto)
+        self.estaciones.cargar(datos['estaciones'])
+        self.sensores.cargar(datos['sensores'])
+        self.estados.cargar(datos['estados'])
+        self.version = datos.get('version', 0)
+
+
+@dataclass
+class EsquemaLecturas:
+    """Qué campos de un dict de lectura van como ids y cuáles son metadatos del registro"""
+    campo_sensor: str
+    metadatos_sensor: Tuple[str, ...] = ()
+    campo_estacion: Optional[str] = None
+    metadatos_estacion: Tuple[str, ...] = ()
+    campo_estado: Optional[str] = None
+    decimales_valor: int = 2
+
+
+# Lecturas de ConectorSensoresIoT.simular_datos_sensor
+ESQUEMA_CONECTOR = EsquemaLecturas(
+    campo_sensor='sensor',
+    metadatos_sensor=('unidad',),
+    campo_estacion='estacion_id',
+    metadatos_estacion=('estacion_nombre', 'coordenadas', 'elevacion'),
+    campo_estado='calidad',
+    decimales_valor=1
+)
+
+# Lecturas de SensorIoT.leer_sensor (SistemaIoTMETGO)
+ESQUEMA_SISTEMA = EsquemaLecturas(
+    campo_sensor='sensor_id',
+    metadatos_sensor=('tipo', 'unidad', 'ubicacion'),
+    campo_estado='estado',
+    decimales_valor=2
+)
+
+
+def _epoch_us(timestamp: Any) -> int:
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp))
+    return round(timestamp.timestamp() * 1_000_000)
+
+
+def _porcentaje(valor: Any) -> int:
+    return 0 if valor is None else min(255, max(0, int(round(float(valor)))))
+
+
+def codificar_lote(lecturas: List[Dict[str, Any]], registro: RegistroIoT,
+                   esquema: EsquemaLecturas) -> bytes:
+    """Empaquetar lecturas en un único mensaje binario
+
+    Las claves nuevas, o las existentes cuyos metadatos cambiaron, se registran
+    en el registro (cuya versión aumenta), por lo que el publicador debe reenviar
+    registro.a_json() cuando cambie la versión.
+    """
+    modificaciones = registro.modificaciones()
+    sin_id = [0] * len(lecturas)
+    estaciones, sensores, estados = list(sin_id), [], list(sin_id)
+
+    for i, lectura in enumerate(lecturas):
+        if esquema.campo_estacion is not None:
+            estaciones[i] = registro.estaciones.obtener_id(
+                lectura[esquema.campo_estacion],
+                {campo: lectura.get(campo) for campo in esquema.metadatos_estacion}
+            )
+        sensores.append(registro.sensores.obtener_id(
+            lectura[esquema.campo_sensor],
+            {campo: lectura.get(campo) for campo in esquema.metadatos_sensor}
+        ))
+        if esquema.campo_estado is not None:
+            estados[i] = registro.estados.obtener_id(lectura.get(esquema.campo_estado))
+
+    registros = np.empty(len(lecturas), dtype=DTYPE_REGISTRO)
+    registros['estacion'] = estaciones
+    registros['sensor'] = sensores
+    registros['estado'] = estados
+    registros['epoch_us'] = [_epoch_us(lectura['timestamp']) for lectura in lecturas]
+    registros['valor'] = [lectura['valor'] for lectura in lecturas]
+    registros['bateria'] = [_porcentaje(lectura.get('bateria')) for lectura in lecturas]
+    registros['senal'] = [_porcentaje(lectura.get('senal')) for lectura in lecturas]
+
+    if registro.modificaciones() != modificaciones:
+        registro.version += 1
+
+    return ENCABEZADO_LOTE.pack(FIRMA_LOTE, VERSION_FORMATO, len(registros)) + registros.tobytes()
+
+
+def decodificar_registros(datos: bytes) -> np.ndarray:
+    """Leer un mensaje binario como arreglo estructurado (sin copiar), para consumo columnar"""
+    firma, version, cantidad = ENCABEZADO_LOTE.unpack_from(datos)
+    if firma != FIRMA_LOTE or version != VERSION_FORMATO:
+        raise ValueError(f"Mensaje IoT binario no reconocido (firma={firma!r}, version={version})")
+    esperado = ENCABEZADO_LOTE.size + cantidad * DTYPE_REGISTRO.itemsize
+    if len(datos) != esperado:
+        raise ValueError(f"Mensaje IoT binario truncado: {len(datos)} bytes, se esperaban {esperado}")
+    return np.frombuffer(datos, dtype=DTYPE_REGISTRO, count=cantidad, offset=ENCABEZADO_LOTE.size)
+
+
+def decodificar_lote(datos: bytes, registro: RegistroIoT,
+                     esquema: EsquemaLecturas) -> List[Dict[str, Any]]:
+    """Reconstruir los dicts de lectura a partir del mensaje binario y el registro
+
+    Lanza RegistroIncompleto si el lote usa ids que el registro no tiene (p.ej. el
+    lote llegó antes que el registro retenido); el suscriptor puede guardarlo y
+    reintentar cuando se actualice el registro.
+    """
+    registros = decodificar_registros(datos)
+    catalogos = [('sensor', registro.sensores)]
+    if esquema.campo_estacion is not None:
+        catalogos.append(('estacion', registro.estaciones))
+    if esquema.campo_estado is not None:
+        catalogos.append(('estado', registro.estados))
+    for campo, catalogo in catalogos:
+        if len(registros) and registros[campo].max() >= len(catalogo):
+            raise RegistroIncompleto(
+                f"Lote con {campo} id {registros[campo].max()} y registro versión "
+                f"{registro.version} con {len(catalogo)} claves"
+            )
+
+    valores = np.round(registros['valor'].astype(np.float64), esquema.decimales_valor).tolist()
+
+    lecturas = []
+    for fila, valor in zip(registros.tolist(), valores):
+        estacion, sensor, epoch_us, _, bateria, senal, estado = fila
+        lectura = {
+            'timestamp': (datetime.fromtimestamp(epoch_us // 1_000_000) +
+                          timedelta(microseconds=epoch_us % 1_000_000)).isoformat(),
+            'valor': valor,
+            'bateria': bateria,
+            'senal': senal
+        }
+        if esquema.campo_estacion is not None:
+            lectura[esquema.campo_estacion] = registro.estaciones.claves[estacion]
+            lectura.update(registro.estaciones.metadatos[estacion])
+        lectura[esquema.campo_sensor] = registro.sensores.claves[sensor]
+        lectura.update(registro.sensores.metadatos[sensor])
+        if esquema.campo_estado is not None:
+            lectura[esquema.campo_estado] = registro.estados.claves[estado]
+        lecturas.append(lectura)
+    return lecturas
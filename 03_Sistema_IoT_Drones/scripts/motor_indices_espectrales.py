@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🌿 MOTOR DE ÍNDICES ESPECTRALES POR TESELAS - METGO 3D
+Sistema Meteorológico Agrícola Quillota - Cálculo fusionado de índices con memoria acotada
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EPSILON = 1e-8
+
+# Incrementar al cambiar fórmulas o estadísticas: invalida resultados cacheados
+VERSION_KERNELS = 1
+
+
+@dataclass
+class DefinicionIndice:
+    """Índice espectral: bandas que usa y kernel que lo escribe en un buffer de salida
+
+    El kernel recibe (bandas, salida, aux1, aux2), todos float32 del tamaño de la
+    tesela, y no debe reservar arreglos del tamaño de la tesela.
+    """
+    bandas: Tuple[str, ...]
+    kernel: Callable[[Dict[str, np.ndarray], np.ndarray, np.ndarray, np.ndarray], None]
+
+
+def _cociente_seguro(numerador: np.ndarray, denominador: np.ndarray, salida: np.ndarray):
+    """salida = numerador / denominador donde denominador != 0, y 0 en el resto
+
+    A diferencia de np.where, solo se divide donde el denominador es válido.
+    """
+    salida.fill(0)
+    np.divide(numerador, denominador, out=salida, where=denominador != 0)
+
+
+def _diferencia_normalizada(a: str, b: str, suma: float = 0.0, escala: float = 1.0,
+                            epsilon: float = 0.0):
+    """Kernel de (a - b) / (a + b + suma + epsilon) * escala"""
+    def kernel(bandas, salida, aux1, aux2):
+        np.subtract(bandas[a], bandas[b], out=aux1)
+        np.add(bandas[a], bandas[b], out=aux2)
+        if suma or epsilon:
+            aux2 += suma + epsilon
+        if epsilon:
+            np.divide(aux1, aux2, out=salida)
+        else:
+            _cociente_seguro(aux1, aux2, salida)
+        if escala != 1.0:
+            salida *= escala
+    # Constantes del kernel: forman parte de la huella de parámetros
+    kernel.parametros = {'a': a, 'b': b, 'suma': suma, 'escala': escala, 'epsilon': epsilon}
+    return kernel
+
+
+def _evi_rgb(bandas, salida, aux1, aux2):
+    """2.5 * (r - b) / (r + 6b - 7.5g + 1), 0 si el denominador es 0"""
+    r, g, b = bandas['r'], bandas['g'], bandas['b']
+    np.subtract(r, b, out=aux1)
+    aux1 *= 2.5
+    np.multiply(b, 6, out=aux2)
+    aux2 += r
+    aux2 += 1
+    np.multiply(g, 7.5, out=salida)
+    aux2 -= salida
+    _cociente_seguro(aux1, aux2, salida)
+
+
+def _evi(bandas, salida, aux1, aux2):
+    """2.5 * (nir - r) / (nir + 6r - 7.5b + 1 + eps)"""
+    nir, r, b = bandas['nir'], bandas['r'], bandas['b']
+    np.subtract(nir, r, out=aux1)
+    aux1 *= 2.5
+    np.multiply(r, 6, out=aux2)
+    aux2 += nir
+    aux2 += 1 + EPSILON
+    np.multiply(b, 7.5, out=salida)
+    aux2 -= salida
+    np.divide(aux1, aux2, out=salida)
+
+
+def _rvi(bandas, salida, aux1, aux2):
+    """nir / (r + eps)"""
+    np.add(bandas['r'], EPSILON, out=aux1)
+    np.divide(bandas['nir'], aux1, out=salida)
+
+
+def _dvi(bandas, salida, aux1, aux2):
+    """nir - r"""
+    np.subtract(bandas['nir'], bandas['r'], out=salida)
+
+
+def _arvi(bandas, salida, aux1, aux2):
+    """(nir - (2r - b)) / (nir + (2r - b) + eps)"""
+    nir = bandas['nir']
+    np.multiply(bandas['r'], 2, out=salida)
+    salida -= bandas['b']
+    np.subtract(nir, salida, out=aux1)
+    np.add(nir, salida, out=aux2)
+    aux2 += EPSILON
+    np.divide(aux1, aux2, out=salida)
+
+
+# Índices a partir de una imagen RGB (ConectorDatosSatelitales.procesar_imagen_satelital)
+INDICES_RGB = {
+    'ndvi': DefinicionIndice(('r', 'b'), _diferencia_normalizada('r', 'b')),
+    'gndvi': DefinicionIndice(('g', 'b'), _diferencia_normalizada('g', 'b')),
+    'savi': DefinicionIndice(('r', 'b'), _diferencia_normalizada('r', 'b', suma=0.5, escala=1.5)),
+    'evi': DefinicionIndice(('r', 'g', 'b'), _evi_rgb)
+}
+
+# Índices multiespectrales (DatosSatelitalesMETGO.calcular_indices_espectrales)
+INDICES_MULTIESPECTRALES = {
+    'NDVI': DefinicionIndice(('nir', 'r'), _diferencia_normalizada('nir', 'r', epsilon=EPSILON)),
+    'NDWI': DefinicionIndice(('g', 'nir'), _diferencia_normalizada('g', 'nir', epsilon=EPSILON)),
+    'EVI': DefinicionIndice(('nir', 'r', 'b'), _evi),
+    'SAVI': DefinicionIndice(('nir', 'r'), _diferencia_normalizada('nir', 'r', suma=0.5, escala=1.5,
+                                                                   epsilon=EPSILON)),
+    'GNDVI': DefinicionIndice(('nir', 'g'), _diferencia_normalizada('nir', 'g', epsilon=EPSILON)),
+    'RVI': DefinicionIndice(('nir', 'r'), _rvi),
+    'DVI': DefinicionIndice(('nir', 'r'), _dvi),
+    'ARVI': DefinicionIndice(('nir', 'r', 'b'), _arvi)
+}
+
+# Clases por umbrales (bordes derechos cerrados: umbral_i-1 < x <= umbral_i)
+CLASES_NDVI = {
+    'umbrales': [0.1, 0.3],
+    'nombres': ['vegetacion_baja', 'vegetacion_moderada', 'vegetacion_saludable']
+}
+
+
+class EstadisticaParcial:
+    """Conteo, media, M2, mínimo, máximo y conteo por clase combinables entre teselas"""
+
+    __slots__ = ('n', 'media', 'm2', 'minimo', 'maximo', 'clases')
+
+    def __init__(self, n=0, media=0.0, m2=0.0, minimo=np.inf, maximo=-np.inf, clases=None):
+        self.n = n
+        self.media = media
+        self.m2 = m2
+        self.minimo = minimo
+        self.maximo = maximo
+        self.clases = clases
+
+    @classmethod
+    def de_tesela(cls, valores: np.ndarray, umbrales: Optional[Sequence[float]] = None) -> 'EstadisticaParcial':
+        n = valores.size
+        media = float(valores.mean(dtype=np.float64))
+        # M2 en float64 sin crear otra copia float32 de la tesela
+        m2 = float(np.square(valores - np.float32(media), dtype=np.float64).sum())
+        clases = None
+        if umbrales is not None:
+            # Umbrales en el dtype de la tesela, igual que comparar ndvi > 0.3 en float32
+            bordes = np.asarray(umbrales, dtype=valores.dtype)
+            clases = np.bincount(np.digitize(valores.ravel(), bordes, right=True),
+                                 minlength=len(umbrales) + 1)
+        return cls(n, media, m2, float(valores.min()), float(valores.max()), clases)
+
+    def combinar(self, otra: 'EstadisticaParcial'):
+        """Combinar con otra parcial (algoritmo paralelo de Chan)"""
+        if otra.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.media, self.m2 = otra.n, otra.media, otra.m2
+            self.minimo, self.maximo, self.clases = otra.minimo, otra.maximo, otra.clases
+            return
+        n = self.n + otra.n
+        delta = otra.media - self.media
+        self.media += delta * otra.n / n
+        self.m2 += otra.m2 + delta * delta * self.n * otra.n / n
+        self.n = n
+        self.minimo = min(self.minimo, otra.minimo)
+        self.maximo = max(self.maximo, otra.maximo)
+        if otra.clases is not None:
+            self.clases = otra.clases if self.clases is None else self.clases + otra.clases
+
+    def resumen(self) -> Dict[str, float]:
+        return {
+            'media': self.media,
+            'desviacion': float(np.sqrt(self.m2 / self.n)) if self.n else 0.0,
+            'min': self.minimo,
+            'max': self.maximo
+        }
+
+
+class MotorIndicesEspectrales:
+    """Cálculo de índices espectrales por teselas con buffers float32 preasignados
+
+    Cada tesela se convierte una sola vez a float32 y todos los índices pedidos
+    se calculan sobre ella en la misma pasada, acumulando estadísticas parciales
+    combinables. Un pool de hilos reparte teselas (de una o varias escenas), y
+    cada hilo reutiliza sus propios buffers, así que la memoria máxima depende
+    del tamaño de tesela y del número de hilos, no del tamaño de la escena.
+    """
+
+    def __init__(self, definiciones: Optional[Dict[str, DefinicionIndice]] = None,
+                 tamano_tesela: int = 512, max_hilos: Optional[int] = None,
+                 clases: Optional[Dict[str, Dict]] = None):
+        self.definiciones = definiciones if definiciones is not None else INDICES_RGB
+        self.tamano_tesela = tamano_tesela
+        self.max_hilos = max_hilos or os.cpu_count() or 1
+        self.clases = clases if clases is not None else {}
+        self._local = threading.local()
+
+    def version_parametros(self) -> str:
+        """Huella de los parámetros que determinan el resultado (índices, clases y kernels)
+
+        Incluye, por índice, las bandas, el kernel y sus constantes (suma,
+        escala y epsilon de las diferencias normalizadas), además del EPSILON
+        global que usan los kernels sin parámetros.
+        """
+        parametros = {
+            'kernels': VERSION_KERNELS,
+            'epsilon': EPSILON,
+            'indices': {
+                nombre: {
+                    'bandas': list(d.bandas),
+                    'kernel': d.kernel.__qualname__,
+                    'parametros': getattr(d.kernel, 'parametros', {})
+                }
+                for nombre, d in sorted(self.definiciones.items())
+            },
+            'clases': self.clases
+        }
+        contenido = json.dumps(parametros, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(contenido).hexdigest()[:16]
+
+    def _buffers(self, bandas: Sequence[str], alto: int, ancho: int) -> Dict[str, np.ndarray]:
+        """Buffers float32 del hilo actual: uno por banda más salida y dos auxiliares
+
+        Se reservan una vez por hilo y solo se agrandan si llega una tesela mayor
+        (p.ej. una escena del almacén guardada con otro tamaño de tesela).
+        """
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        t = self.tamano_tesela
+        for nombre in list(bandas) + ['__salida', '__aux1', '__aux2']:
+            actual = buffers.get(nombre)
+            if actual is None or actual.shape[0] < alto or actual.shape[1] < ancho:
+                buffers[nombre] = np.empty((max(t, alto), max(t, ancho)), dtype=np.float32)
+        return buffers
+
+    def _bandas_necesarias(self, indices: Sequence[str]) -> List[str]:
+        bandas = []
+        for indice in indices:
+            for banda in self.definiciones[indice].bandas:
+                if banda not in bandas:
+                    bandas.append(banda)
+        return bandas
+
+    def procesar_tesela(self, leer_banda: Callable[[str], np.ndarray],
+                        indices: Sequence[str]) -> Dict[str, EstadisticaParcial]:
+        """Calcular todos los índices de una tesela y devolver sus estadísticas parciales
+
+        leer_banda(nombre) devuelve la tesela 2D de esa banda en cualquier dtype.
+        """
+        bandas_necesarias = self._bandas_necesarias(indices)
+        origenes = {banda: leer_banda(banda) for banda in bandas_necesarias}
+        alto, ancho = next(iter(origenes.values())).shape
+        buffers = self._buffers(bandas_necesarias, alto, ancho)
+
+        bandas = {}
+        for banda, origen in origenes.items():
+            destino = buffers[banda][:alto, :ancho]
+            np.copyto(destino, origen, casting='unsafe')
+            bandas[banda] = destino
+
+        salida = buffers['__salida'][:alto, :ancho]
+        aux1 = buffers['__aux1'][:alto, :ancho]
+        aux2 = buffers['__aux2'][:alto, :ancho]
+
+        parciales = {}
+        for indice in indices:
+            self.definiciones[indice].kernel(bandas, salida, aux1, aux2)
+            clases = self.clases.get(indice)
+            parciales[indice] = EstadisticaParcial.de_tesela(salida, clases['umbrales'] if clases else None)
+        return parciales
+
+    def _ventanas(self, alto: int, ancho: int):
+        t = self.tamano_tesela
+        for f0 in range(0, alto, t):
+            for c0 in range(0, ancho, t):
+                yield f0, min(f0 + t, alto), c0, min(c0 + t, ancho)
+
+    def _tareas_arreglos(self, bandas: Dict[str, np.ndarray], indices: Sequence[str]):
+        """Funciones sin argumentos, una por tesela, sobre arreglos 2D en memoria o memmap"""
+        alto, ancho = next(iter(bandas.values())).shape
+        return [
+            (lambda f0=f0, f1=f1, c0=c0, c1=c1:
+             self.procesar_tesela(lambda banda: bandas[banda][f0:f1, c0:c1], indices))
+            for f0, f1, c0, c1 in self._ventanas(alto, ancho)
+        ]
+
+    def _tareas_almacen(self, almacen, escena_id: str, indices: Sequence[str],
+                        mapa_bandas: Optional[Dict[str, str]] = None):
+        """Funciones por tesela leyendo directamente del almacén raster teselado"""
+        mapa_bandas = mapa_bandas or {}
+        return [
+            (lambda ty=ty, tx=tx:
+             self.procesar_tesela(
+                 lambda banda: almacen.leer_tesela(escena_id, mapa_bandas.get(banda, banda), ty, tx),
+                 indices))
+            for ty, tx, _ in almacen.iterar_teselas(escena_id)
+        ]
+
+    def _ejecutar(self, grupos_tareas: List[list], indices_por_grupo: List[Sequence[str]]) -> List[Dict]:
+        """Ejecutar todas las teselas de todos los grupos en el pool y combinar por grupo"""
+        with ThreadPoolExecutor(max_workers=self.max_hilos) as pool:
+            futuros = [[pool.submit(tarea) for tarea in tareas] for tareas in grupos_tareas]
+            resultados = []
+            for futuros_grupo, indices in zip(futuros, indices_por_grupo):
+                totales = {indice: EstadisticaParcial() for indice in indices}
+                for futuro in futuros_grupo:
+                    for indice, parcial in futuro.result().items():
+                        totales[indice].combinar(parcial)
+                resultados.append(self._resultado(totales))
+        return resultados
+
+    def _resultado(self, totales: Dict[str, EstadisticaParcial]) -> Dict:
+        resultado = {'indices': {indice: parcial.resumen() for indice, parcial in totales.items()}}
+        fracciones = {}
+        for indice, parcial in totales.items():
+            clases = self.clases.get(indice)
+            if clases and parcial.n:
+                for nombre, conteo in zip(clases['nombres'], parcial.clases):
+                    fracciones[nombre] = float(conteo / parcial.n)
+        if fracciones:
+            resultado['clases'] = fracciones
+        return resultado
+
+    def _indices(self, indices: Optional[Sequence[str]]) -> List[str]:
+        indices = list(indices) if indices is not None else list(self.definiciones)
+        desconocidos = [i for i in indices if i not in self.definiciones]
+        if desconocidos:
+            raise ValueError(f"Índices espectrales no definidos: {desconocidos}")
+        return indices
+
+    def procesar_arreglos(self, bandas: Dict[str, np.ndarray],
+                          indices: Optional[Sequence[str]] = None) -> Dict:
+        """Procesar una escena dada como arreglos 2D por banda (ndarray o memmap)"""
+        indices = self._indices(indices)
+        return self._ejecutar([self._tareas_arreglos(bandas, indices)], [indices])[0]
+
+    def procesar_escena_almacen(self, almacen, escena_id: str,
+                                indices: Optional[Sequence[str]] = None,
+                                mapa_bandas: Optional[Dict[str, str]] = None) -> Dict:
+        """Procesar una escena del almacén raster tesela por tesela
+
+        mapa_bandas traduce nombres del índice (p.ej. 'nir') a bandas de la escena.
+        """
+        indices = self._indices(indices)
+        return self._ejecutar([self._tareas_almacen(almacen, escena_id, indices, mapa_bandas)], [indices])[0]
+
+    def procesar_lote(self, escenas: List[Dict[str, np.ndarray]],
+                      indices: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Procesar varias escenas compartiendo el pool, para usar todos los núcleos"""
+        indices = self._indices(indices)
+        return self._ejecutar([self._tareas_arreglos(bandas, indices) for bandas in escenas],
+                              [indices] * len(escenas))
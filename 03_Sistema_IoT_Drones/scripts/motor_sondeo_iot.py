@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ MOTOR DE SONDEO ASÍNCRONO IoT - METGO 3D
+Sistema Meteorológico Agrícola Quillota - Sondeo concurrente de gateways y sensores
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class MotorSondeoIoT:
+    """Motor asyncio que sondea todos los sensores de todos los gateways en paralelo
+
+    Cada sensor tiene su propia tarea con periodo tomado de su configuración
+    'frecuencia' (segundos) y timeout propio ('timeout'), de modo que un sensor
+    lento no retrasa al resto. Los instantes de lectura se planifican sobre una
+    grilla fija con jitter para no sincronizar ráfagas de la red completa, y
+    las lecturas se publican en una cola acotada compartida: si el consumidor
+    se atrasa, los sensores esperan en vez de acumular memoria.
+    """
+
+    def __init__(self, gateways: Iterable,
+                 periodo_por_defecto: float = 60.0,
+                 timeout_por_defecto: float = 5.0,
+                 jitter: float = 0.1,
+                 capacidad_cola: int = 1000,
+                 max_lecturas_concurrentes: int = 64,
+                 tamano_lote_consumo: int = 500):
+        self.gateways = list(gateways.values()) if isinstance(gateways, dict) else list(gateways)
+        self.periodo_por_defecto = periodo_por_defecto
+        self.timeout_por_defecto = timeout_por_defecto
+        self.jitter = jitter
+        self.capacidad_cola = capacidad_cola
+        self.max_lecturas_concurrentes = max_lecturas_concurrentes
+        self.tamano_lote_consumo = tamano_lote_consumo
+
+        self.cola: Optional[asyncio.Queue] = None
+        self._detener: Optional[asyncio.Event] = None
+        self.metricas = {
+            'lecturas': 0,
+            'timeouts': 0,
+            'errores': 0,
+            'ciclos_omitidos': 0,
+            'esperas_cola_llena': 0
+        }
+
+    def periodo_sensor(self, sensor) -> float:
+        """Periodo de muestreo del sensor en segundos"""
+        return float(sensor.configuracion.get('frecuencia', self.periodo_por_defecto))
+
+    def timeout_sensor(self, sensor) -> float:
+        """Tiempo máximo de espera de una lectura del sensor en segundos"""
+        return float(sensor.configuracion.get('timeout', self.timeout_por_defecto))
+
+    async def leer_sensor(self, sensor) -> Dict:
+        """Leer un sensor respetando su timeout
+
+        Usa leer_sensor_async si el sensor la implementa; las lecturas
+        bloqueantes se ejecutan en el pool de hilos del loop.
+        """
+        if hasattr(sensor, 'leer_sensor_async'):
+            lectura = sensor.leer_sensor_async()
+        else:
+            lectura = asyncio.get_running_loop().run_in_executor(None, sensor.leer_sensor)
+        return await asyncio.wait_for(lectura, timeout=self.timeout_sensor(sensor))
+
+    async def _sondear_sensor(self, gateway, sensor, semaforo: asyncio.Semaphore):
+        """Bucle de sondeo de un sensor sobre una grilla fija de periodo propio"""
+        periodo = self.periodo_sensor(sensor)
+        # Desfase inicial aleatorio para repartir los sensores dentro del periodo;
+        # la grilla avanza sin jitter y cada ciclo aplica el suyo sobre ella
+        grilla = time.monotonic() + random.uniform(0, self.jitter * periodo)
+        proximo = grilla
+
+        while not self._detener.is_set():
+            espera = proximo - time.monotonic()
+            if espera > 0:
+                try:
+                    await asyncio.wait_for(self._detener.wait(), timeout=espera)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Ceder el loop aunque el sensor vaya atrasado
+                await asyncio.sleep(0)
+
+            try:
+                async with semaforo:
+                    lectura = await self.leer_sensor(sensor)
+            except asyncio.TimeoutError:
+                self.metricas['timeouts'] += 1
+                lectura = None
+            except Exception as e:
+                self.metricas['errores'] += 1
+                print(f"Error leyendo sensor {sensor.sensor_id}: {e}")
+                lectura = None
+
+            if lectura:
+                gateway.ultima_comunicacion = datetime.now()
+                if self.cola.full():
+                    self.metricas['esperas_cola_llena'] += 1
+                await self.cola.put(lectura)
+                self.metricas['lecturas'] += 1
+
+            # Siguiente instante de la grilla; si la lectura se atrasó más de un
+            # periodo se omiten los ciclos perdidos en vez de leer en ráfaga
+            grilla += periodo
+            ahora = time.monotonic()
+            if grilla < ahora:
+                omitidos = int((ahora - grilla) // periodo) + 1
+                self.metricas['ciclos_omitidos'] += omitidos
+                grilla += omitidos * periodo
+            proximo = grilla + random.uniform(-self.jitter, self.jitter) * periodo
+
+    async def _consumir(self, consumidor: Callable[[List[Dict]], None]):
+        """Vaciar la cola en lotes y entregarlos al consumidor"""
+        while True:
+            lote = [await self.cola.get()]
+            while len(lote) < self.tamano_lote_consumo and not self.cola.empty():
+                lote.append(self.cola.get_nowait())
+            try:
+                consumidor(lote)
+            except Exception as e:
+                print(f"Error consumiendo lecturas IoT: {e}")
+
+    def _vaciar_cola(self, consumidor: Callable[[List[Dict]], None]):
+        """Entregar al consumidor lo que quedó en la cola al terminar"""
+        lote = []
+        while not self.cola.empty():
+            lote.append(self.cola.get_nowait())
+        if lote:
+            consumidor(lote)
+
+    def detener(self):
+        """Pedir la detención del sondeo (desde el mismo loop)"""
+        if self._detener is not None:
+            self._detener.set()
+
+    async def ejecutar(self, duracion: Optional[float] = None,
+                       consumidor: Optional[Callable[[List[Dict]], None]] = None):
+        """Sondear todos los sensores durante duracion segundos (o hasta detener())
+
+        Sin consumidor las lecturas quedan en self.cola para quien la lea;
+        en ese caso la cola llena detiene a los sensores hasta que se consuma.
+        """
+        self.cola = asyncio.Queue(maxsize=self.capacidad_cola)
+        self._detener = asyncio.Event()
+        semaforo = asyncio.Semaphore(self.max_lecturas_concurrentes)
+
+        tareas = [
+            asyncio.create_task(self._sondear_sensor(gateway, sensor, semaforo))
+            for gateway in self.gateways
+            for sensor in gateway.sensores.values()
+        ]
+        tarea_consumo = asyncio.create_task(self._consumir(consumidor)) if consumidor else None
+
+        try:
+            if duracion is not None:
+                try:
+                    await asyncio.wait_for(self._detener.wait(), timeout=duracion)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await self._detener.wait()
+        finally:
+            self._detener.set()
+            for tarea in tareas:
+                tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+            if tarea_consumo is not None:
+                tarea_consumo.cancel()
+                await asyncio.gather(tarea_consumo, return_exceptions=True)
+                self._vaciar_cola(consumidor)
+
+        return self.metricas
+
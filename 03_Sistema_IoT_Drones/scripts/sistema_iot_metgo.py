@@ -21,6 +21,7 @@ from typing import Dict, List, Tuple, Optional, Any
 import socket
 import struct
 import random
+from collections import deque
 
 # IoT y Comunicaciones
 try:
@@ -35,6 +36,11 @@ try:
 except ImportError:
     REQUESTS_AVAILABLE = False
 
+from agregador_streaming_iot import AgregadorStreamingIoT
+from motor_sondeo_iot import MotorSondeoIoT
+from formato_binario_iot import (ESQUEMA_SISTEMA, RegistroIncompleto, RegistroIoT, codificar_lote,
+                                 decodificar_lote)
+
 # Configuración
 warnings.filterwarnings('ignore')
 
@@ -64,9 +70,9 @@ class SensorIoT:
                 valor = 60 + 20 * np.sin(2 * np.pi * timestamp.hour / 24) + random.gauss(0, 5)
                 valor = max(0, min(100, valor))
             elif self.tipo == 'precipitacion':
-                valor = random.exponential(0.5) if random.random() > 0.9 else 0
+                valor = random.expovariate(1 / 0.5) if random.random() > 0.9 else 0
             elif self.tipo == 'viento_velocidad':
-                valor = random.gamma(2, 2)
+                valor = random.gammavariate(2, 2)
             elif self.tipo == 'viento_direccion':
                 valor = random.uniform(0, 360)
             elif self.tipo == 'presion':
@@ -109,6 +115,19 @@ class SensorIoT:
             print(f"Error leyendo sensor {self.sensor_id}: {e}")
             return {}
     
+    async def leer_sensor_async(self) -> Dict:
+        """Lectura asíncrona con la latencia de enlace configurada
+        
+        configuracion['latencia'] puede ser un número de segundos o un rango
+        (min, max) del que se toma una latencia aleatoria por lectura.
+        """
+        latencia = self.configuracion.get('latencia', 0)
+        if isinstance(latencia, (list, tuple)):
+            latencia = random.uniform(*latencia)
+        if latencia:
+            await asyncio.sleep(latencia)
+        return self.leer_sensor()
+    
     def obtener_estado(self) -> Dict:
         """Obtener estado del sensor"""
         return {
@@ -151,6 +170,24 @@ class GatewayIoT:
         self.ultima_comunicacion = datetime.now()
         return lecturas
     
+    async def leer_todos_los_sensores_async(self, timeout: float = 5.0) -> List[Dict]:
+        """Leer todos los sensores en paralelo; los que exceden el timeout se omiten"""
+        async def _leer(sensor):
+            try:
+                return await asyncio.wait_for(sensor.leer_sensor_async(),
+                                              timeout=sensor.configuracion.get('timeout', timeout))
+            except asyncio.TimeoutError:
+                print(f"Timeout leyendo sensor {sensor.sensor_id}")
+            except Exception as e:
+                print(f"Error leyendo sensor {sensor.sensor_id}: {e}")
+            return {}
+        
+        resultados = await asyncio.gather(*(_leer(sensor) for sensor in self.sensores.values()))
+        lecturas = [lectura for lectura in resultados if lectura]
+        
+        self.ultima_comunicacion = datetime.now()
+        return lecturas
+    
     def obtener_estado_gateway(self) -> Dict:
         """Obtener estado del gateway"""
         return {
@@ -188,9 +225,18 @@ class SistemaIoTMETGO:
         # Inicializar componentes
         self.gateways = {}
         self.sensores = {}
-        self.datos_iot = []
         self.estadisticas = {}
         
+        # Ingesta streaming: agregados O(1), buffer circular y persistencia por micro-lotes
+        self.agregador_iot = AgregadorStreamingIoT(directorio_datos=self.configuracion['directorio_datos'])
+        self.datos_iot = self.agregador_iot.recientes
+        
+        # Registro de ids compartido por publicador y suscriptor del formato binario
+        self.registro_iot = RegistroIoT()
+        self._version_registro_publicada = -1
+        # Lotes binarios recibidos antes que el registro con sus ids (se reintentan al llegar)
+        self._lotes_sin_registro = deque(maxlen=100)
+        
         # Configurar MQTT
         if MQTT_AVAILABLE:
             self._configurar_mqtt()
@@ -220,18 +266,46 @@ class SistemaIoTMETGO:
         """Callback de conexión MQTT"""
         if rc == 0:
             print("✅ Conectado al broker MQTT")
-            client.subscribe(self.configuracion_red['mqtt_topic'])
+            # '<topic>/#' cubre el tópico JSON original, los lotes binarios y el registro
+            client.subscribe(f"{self.configuracion_red['mqtt_topic']}/#")
         else:
             print(f"❌ Error conectando al broker MQTT: {rc}")
     
     def _on_mqtt_message(self, client, userdata, msg):
         """Callback de mensaje MQTT"""
         try:
-            mensaje = json.loads(msg.payload.decode())
-            self.procesar_mensaje_iot(mensaje)
+            topic = self.configuracion_red['mqtt_topic']
+            if msg.topic == f"{topic}/registro":
+                self.registro_iot.actualizar_desde_json(msg.payload.decode())
+                self._procesar_lotes_sin_registro()
+            elif msg.topic == f"{topic}/lotes":
+                self._procesar_lote_binario(msg.payload)
+            else:
+                mensaje = json.loads(msg.payload.decode())
+                self.procesar_mensaje_iot(mensaje)
         except Exception as e:
             print(f"Error procesando mensaje MQTT: {e}")
     
+    def _procesar_lote_binario(self, payload: bytes) -> bool:
+        """Decodificar y procesar un lote binario; si el registro aún no cubre sus ids, guardarlo"""
+        try:
+            mensajes = decodificar_lote(payload, self.registro_iot, ESQUEMA_SISTEMA)
+        except RegistroIncompleto as e:
+            self._lotes_sin_registro.append(payload)
+            print(f"⚠️ Lote IoT en espera del registro: {e}")
+            return False
+        
+        for mensaje in mensajes:
+            self.procesar_mensaje_iot(mensaje)
+        return True
+    
+    def _procesar_lotes_sin_registro(self):
+        """Reintentar, en orden de llegada, los lotes que esperaban el registro"""
+        pendientes = list(self._lotes_sin_registro)
+        self._lotes_sin_registro.clear()
+        for payload in pendientes:
+            self._procesar_lote_binario(payload)
+    
     def _on_mqtt_disconnect(self, client, userdata, rc):
         """Callback de desconexión MQTT"""
         print("⚠️ Desconectado del broker MQTT")
@@ -291,27 +365,27 @@ class SistemaIoTMETGO:
             print(f"Error creando red de sensores: {e}")
             return False
     
-    def iniciar_monitoreo_iot(self, duracion_minutos: int = 60) -> bool:
+    def iniciar_monitoreo_iot(self, duracion_minutos: float = 60) -> bool:
         """Iniciar monitoreo de sensores IoT"""
         try:
             print(f"🚀 Iniciando monitoreo IoT por {duracion_minutos} minutos...")
             
-            inicio = datetime.now()
-            fin = inicio + timedelta(minutes=duracion_minutos)
+            # Sondeo concurrente: cada sensor con su propio periodo ('frecuencia') y timeout
+            self.motor_sondeo = MotorSondeoIoT(self.gateways)
             
-            while datetime.now() < fin:
-                # Leer todos los sensores
-                for gateway in self.gateways.values():
-                    lecturas = gateway.leer_todos_los_sensores()
-                    self.datos_iot.extend(lecturas)
-                
-                # Procesar datos
-                self.procesar_datos_iot()
-                
-                # Esperar antes de la siguiente lectura
-                time.sleep(60)  # 1 minuto
+            def consumir_lote(lecturas: List[Dict]):
+                self.agregador_iot.agregar_lote(lecturas)
+                self.agregador_iot.persistir_si_corresponde()
+            
+            metricas = asyncio.run(self.motor_sondeo.ejecutar(
+                duracion=duracion_minutos * 60,
+                consumidor=consumir_lote
+            ))
+            
+            # Procesar datos
+            self.procesar_datos_iot()
             
-            print("✅ Monitoreo IoT completado")
+            print(f"✅ Monitoreo IoT completado: {metricas['lecturas']} lecturas, {metricas['timeouts']} timeouts")
             return True
             
         except Exception as e:
@@ -321,65 +395,20 @@ class SistemaIoTMETGO:
     def procesar_datos_iot(self) -> bool:
         """Procesar datos de sensores IoT"""
         try:
-            if not self.datos_iot:
+            if not self.agregador_iot.total_lecturas:
                 return False
             
-            # Convertir a DataFrame
-            df = pd.DataFrame(self.datos_iot)
-            
-            # Agregar timestamp
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df.set_index('timestamp', inplace=True)
-            
-            # Calcular estadísticas
-            self.estadisticas = {
-                'total_lecturas': len(df),
-                'sensores_activos': df['sensor_id'].nunique(),
-                'tipos_sensores': df['tipo'].nunique(),
-                'rango_temporal': {
-                    'inicio': df.index.min().isoformat(),
-                    'fin': df.index.max().isoformat()
-                },
-                'estadisticas_por_tipo': {}
-            }
-            
-            # Estadísticas por tipo de sensor
-            for tipo in df['tipo'].unique():
-                datos_tipo = df[df['tipo'] == tipo]['valor']
-                self.estadisticas['estadisticas_por_tipo'][tipo] = {
-                    'count': len(datos_tipo),
-                    'mean': round(datos_tipo.mean(), 2),
-                    'std': round(datos_tipo.std(), 2),
-                    'min': round(datos_tipo.min(), 2),
-                    'max': round(datos_tipo.max(), 2)
-                }
-            
-            # Guardar datos
-            self.guardar_datos_iot(df)
-            
-            print(f"✅ Datos IoT procesados: {len(df)} lecturas")
-            return True
-            
-        except Exception as e:
-            print(f"Error procesando datos IoT: {e}")
-            return False
-    
-    def guardar_datos_iot(self, df: pd.DataFrame) -> bool:
-        """Guardar datos IoT"""
-        try:
-            # Guardar como CSV
-            archivo_csv = f"{self.configuracion['directorio_datos']}/datos_iot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            df.to_csv(archivo_csv)
+            # Anexar el micro-lote pendiente al archivo rodante del día
+            self.agregador_iot.persistir()
             
-            # Guardar como JSON
-            archivo_json = f"{self.configuracion['directorio_datos']}/datos_iot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            df.reset_index().to_json(archivo_json, orient='records', date_format='iso')
+            # Estadísticas desde los agregados incrementales (sin reconstruir el historial)
+            self.estadisticas = self.agregador_iot.estadisticas()
             
-            print(f"✅ Datos IoT guardados: {archivo_csv}")
+            print(f"✅ Datos IoT procesados: {self.estadisticas['total_lecturas']} lecturas")
             return True
             
         except Exception as e:
-            print(f"Error guardando datos IoT: {e}")
+            print(f"Error procesando datos IoT: {e}")
             return False
     
     def procesar_mensaje_iot(self, mensaje: Dict) -> bool:
@@ -389,11 +418,11 @@ class SistemaIoTMETGO:
             if not self.validar_mensaje_iot(mensaje):
                 return False
             
-            # Agregar a datos
-            self.datos_iot.append(mensaje)
+            # Actualizar agregados y buffer reciente en O(1)
+            self.agregador_iot.agregar(mensaje)
             
-            # Procesar en tiempo real
-            self.procesar_datos_iot()
+            # Persistir solo cuando se completa un micro-lote o vence el intervalo
+            self.agregador_iot.persistir_si_corresponde()
             
             return True
             
@@ -436,6 +465,7 @@ class SistemaIoTMETGO:
             )
             
             self.mqtt_client.loop_start()
+            self.agregador_iot.iniciar_persistencia_periodica()
             print("✅ Conectado al broker MQTT")
             return True
             
@@ -451,19 +481,38 @@ class SistemaIoTMETGO:
                 self.mqtt_client.disconnect()
                 print("✅ Desconectado del broker MQTT")
             
+            self.agregador_iot.cerrar()
             return True
             
         except Exception as e:
             print(f"Error desconectando MQTT: {e}")
             return False
     
-    def publicar_datos_iot(self, datos: List[Dict]) -> bool:
-        """Publicar datos IoT via MQTT"""
+    def publicar_datos_iot(self, datos: List[Dict], formato: str = 'binario') -> bool:
+        """Publicar datos IoT via MQTT
+        
+        Con formato 'binario' todas las lecturas viajan en un único mensaje
+        empaquetado en '<topic>/lotes'; el registro de ids se publica retenido en
+        '<topic>/registro' solo cuando cambia. Con 'json' se publica un mensaje
+        JSON por lectura como antes.
+        """
         try:
             if not MQTT_AVAILABLE:
                 print("⚠️ MQTT no disponible")
                 return False
             
+            if formato == 'binario':
+                topic = self.configuracion_red['mqtt_topic']
+                payload = codificar_lote(datos, self.registro_iot, ESQUEMA_SISTEMA)
+                
+                if self.registro_iot.version != self._version_registro_publicada:
+                    self.mqtt_client.publish(f"{topic}/registro", self.registro_iot.a_json(), qos=1, retain=True)
+                    self._version_registro_publicada = self.registro_iot.version
+                
+                self.mqtt_client.publish(f"{topic}/lotes", payload)
+                print(f"✅ {len(datos)} lecturas publicadas via MQTT en un lote de {len(payload)} bytes")
+                return True
+            
             for dato in datos:
                 mensaje = json.dumps(dato)
                 self.mqtt_client.publish(
@@ -487,8 +536,8 @@ class SistemaIoTMETGO:
                 'version': self.configuracion['version'],
                 'gateways': len(self.gateways),
                 'sensores': len(self.sensores),
-                'total_lecturas': len(self.datos_iot),
-                'estadisticas': self.estadisticas,
+                'total_lecturas': self.agregador_iot.total_lecturas,
+                'estadisticas': self.agregador_iot.estadisticas(),
                 'estado_gateways': {}
             }
             
@@ -516,7 +565,7 @@ class SistemaIoTMETGO:
                 'resumen': {
                     'gateways_activos': len(self.gateways),
                     'sensores_activos': len(self.sensores),
-                    'total_lecturas': len(self.datos_iot),
+                    'total_lecturas': self.agregador_iot.total_lecturas,
                     'tiempo_operacion': 'N/A'
                 },
                 'estado_sistema': estado,
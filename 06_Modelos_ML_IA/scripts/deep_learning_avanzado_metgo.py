@@ -21,6 +21,8 @@ import sqlite3
 from dataclasses import dataclass
 import yaml
 
+from ventanas_temporales import GeneradorVentanas, crear_secuencias
+
 # Deep Learning
 try:
     import tensorflow as tf
@@ -299,10 +301,10 @@ class DeepLearningAvanzadoMETGO:
             features = X_train.shape[1]
             
             # Crear secuencias
-            X_train_seq = self._crear_secuencias(X_train, timesteps)
-            y_train_seq = y_train[timesteps:]
-            X_test_seq = self._crear_secuencias(X_test, timesteps)
-            y_test_seq = y_test[timesteps:]
+            # Lotes de ventanas bajo demanda: no se materializan todas las secuencias
+            lotes_train, lotes_test = self._crear_generadores_secuencias(
+                X_train, y_train, X_test, y_test, timesteps
+            )
             
             # Crear modelo LSTM
             model = Sequential([
@@ -337,17 +339,16 @@ class DeepLearningAvanzadoMETGO:
             
             # Entrenar modelo
             history = model.fit(
-                X_train_seq, y_train_seq,
-                validation_data=(X_test_seq, y_test_seq),
+                lotes_train,
+                validation_data=lotes_test,
                 epochs=self.configuracion_modelos['epochs_default'],
-                batch_size=self.configuracion_modelos['batch_size_default'],
                 callbacks=callbacks_list,
                 verbose=1
             )
             
             # Evaluar modelo
-            train_loss = model.evaluate(X_train_seq, y_train_seq, verbose=0)
-            test_loss = model.evaluate(X_test_seq, y_test_seq, verbose=0)
+            train_loss = model.evaluate(lotes_train, verbose=0)
+            test_loss = model.evaluate(lotes_test, verbose=0)
             
             # Guardar modelo
             model.save(f"{self.configuracion['directorio_modelos']}/lstm_avanzado_final.h5")
@@ -404,10 +405,10 @@ class DeepLearningAvanzadoMETGO:
             timesteps = 24
             features = X_train.shape[1]
             
-            X_train_seq = self._crear_secuencias(X_train, timesteps)
-            y_train_seq = y_train[timesteps:]
-            X_test_seq = self._crear_secuencias(X_test, timesteps)
-            y_test_seq = y_test[timesteps:]
+            # Lotes de ventanas bajo demanda: no se materializan todas las secuencias
+            lotes_train, lotes_test = self._crear_generadores_secuencias(
+                X_train, y_train, X_test, y_test, timesteps
+            )
             
             # Crear modelo Transformer
             inputs = keras.Input(shape=(timesteps, features))
@@ -452,17 +453,16 @@ class DeepLearningAvanzadoMETGO:
             
             # Entrenar modelo
             history = model.fit(
-                X_train_seq, y_train_seq,
-                validation_data=(X_test_seq, y_test_seq),
+                lotes_train,
+                validation_data=lotes_test,
                 epochs=self.configuracion_modelos['epochs_default'],
-                batch_size=self.configuracion_modelos['batch_size_default'],
                 callbacks=callbacks_list,
                 verbose=1
             )
             
             # Evaluar modelo
-            train_loss = model.evaluate(X_train_seq, y_train_seq, verbose=0)
-            test_loss = model.evaluate(X_test_seq, y_test_seq, verbose=0)
+            train_loss = model.evaluate(lotes_train, verbose=0)
+            test_loss = model.evaluate(lotes_test, verbose=0)
             
             # Guardar modelo
             model.save(f"{self.configuracion['directorio_modelos']}/transformer_avanzado.h5")
@@ -520,10 +520,10 @@ class DeepLearningAvanzadoMETGO:
             timesteps = 24
             features = X_train.shape[1]
             
-            X_train_seq = self._crear_secuencias(X_train, timesteps)
-            y_train_seq = y_train[timesteps:]
-            X_test_seq = self._crear_secuencias(X_test, timesteps)
-            y_test_seq = y_test[timesteps:]
+            # Lotes de ventanas bajo demanda: no se materializan todas las secuencias
+            lotes_train, lotes_test = self._crear_generadores_secuencias(
+                X_train, y_train, X_test, y_test, timesteps
+            )
             
             # Crear modelo CNN 1D
             model = Sequential([
@@ -552,17 +552,16 @@ class DeepLearningAvanzadoMETGO:
             
             # Entrenar modelo
             history = model.fit(
-                X_train_seq, y_train_seq,
-                validation_data=(X_test_seq, y_test_seq),
+                lotes_train,
+                validation_data=lotes_test,
                 epochs=self.configuracion_modelos['epochs_default'],
-                batch_size=self.configuracion_modelos['batch_size_default'],
                 callbacks=callbacks_list,
                 verbose=1
             )
             
             # Evaluar modelo
-            train_loss = model.evaluate(X_train_seq, y_train_seq, verbose=0)
-            test_loss = model.evaluate(X_test_seq, y_test_seq, verbose=0)
+            train_loss = model.evaluate(lotes_train, verbose=0)
+            test_loss = model.evaluate(lotes_test, verbose=0)
             
             # Guardar modelo
             model.save(f"{self.configuracion['directorio_modelos']}/cnn_1d_avanzado.h5")
@@ -721,16 +720,23 @@ class DeepLearningAvanzadoMETGO:
             return None
     
     def _crear_secuencias(self, datos: np.ndarray, timesteps: int) -> np.ndarray:
-        """Crear secuencias para modelos de series temporales"""
+        """Crear secuencias para modelos de series temporales (vista de solo lectura, sin copia)"""
         try:
-            secuencias = []
-            for i in range(timesteps, len(datos)):
-                secuencias.append(datos[i-timesteps:i])
-            return np.array(secuencias)
+            return crear_secuencias(datos, timesteps)[0]
         except Exception as e:
             self.logger.error(f"Error creando secuencias: {e}")
             return np.array([])
     
+    def _crear_generadores_secuencias(self, X_train: np.ndarray, y_train: np.ndarray,
+                                      X_test: np.ndarray, y_test: np.ndarray,
+                                      timesteps: int) -> Tuple[GeneradorVentanas, GeneradorVentanas]:
+        """Generadores de lotes de ventanas para entrenamiento y validación"""
+        tamano_lote = self.configuracion_modelos['batch_size_default']
+        lotes_train = GeneradorVentanas(X_train, timesteps, objetivo=y_train, tamano_lote=tamano_lote,
+                                        barajar=True, semilla=42)
+        lotes_test = GeneradorVentanas(X_test, timesteps, objetivo=y_test, tamano_lote=tamano_lote)
+        return lotes_train, lotes_test
+    
     def _guardar_modelo(self, modelo: ModeloDeepLearning):
         """Guardar modelo en la base de datos"""
         try:
@@ -31,6 +31,8 @@ from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 
+from ventanas_temporales import GeneradorVentanas, crear_secuencias
+
 # AutoML
 try:
     import autosklearn.regression
@@ -170,21 +172,20 @@ class IAAvanzadaMETGO:
             print(f"Error generando datos sintéticos: {e}")
             return pd.DataFrame()
     
-    def preparar_datos_entrenamiento(self, datos: pd.DataFrame, variable: str, sequence_length: int = 24) -> Tuple[np.ndarray, np.ndarray]:
-        """Preparar datos para entrenamiento de modelos de secuencia"""
+    def preparar_datos_entrenamiento(self, datos: pd.DataFrame, variable: str, sequence_length: int = 24,
+                                     paso: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Preparar datos para entrenamiento de modelos de secuencia
+        
+        X e y son vistas de solo lectura sobre la serie normalizada (sin copiar
+        cada ventana); paso > 1 toma una ventana cada `paso` registros.
+        """
         try:
             # Normalizar datos
             scaler = MinMaxScaler()
             datos_normalizados = scaler.fit_transform(datos[[variable]].values)
             
             # Crear secuencias
-            X, y = [], []
-            for i in range(sequence_length, len(datos_normalizados)):
-                X.append(datos_normalizados[i-sequence_length:i])
-                y.append(datos_normalizados[i])
-            
-            X = np.array(X)
-            y = np.array(y)
+            X, y = crear_secuencias(datos_normalizados, sequence_length, objetivo=datos_normalizados, paso=paso)
             
             # Guardar scaler
             self.scalers[variable] = scaler
@@ -196,6 +197,47 @@ class IAAvanzadaMETGO:
             print(f"Error preparando datos: {e}")
             return np.array([]), np.array([])
     
+    def preparar_generador_entrenamiento(self, datos: pd.DataFrame, variables: List[str], variable_objetivo: str,
+                                         sequence_length: int = 24, tamano_lote: int = 256, paso: int = 1,
+                                         columna_estacion: Optional[str] = None, barajar: bool = True,
+                                         aplanar: bool = False) -> Optional[GeneradorVentanas]:
+        """Generador de lotes multivariable para entrenar con muchas estaciones
+        
+        Las ventanas se arman por estación (sin cruzar de una serie a otra) y
+        solo se copia el lote en curso, por lo que sirve para series que no
+        caben en memoria como tensor (n, sequence_length, variables).
+        aplanar=True entrega lotes 2D para modelos sklearn con partial_fit.
+        """
+        try:
+            columnas = list(dict.fromkeys(variables + [variable_objetivo]))
+            scaler = MinMaxScaler()
+            scaler.fit(datos[columnas].values)
+            indice_objetivo = columnas.index(variable_objetivo)
+            
+            if columna_estacion is not None:
+                grupos = [grupo for _, grupo in datos.groupby(columna_estacion, sort=False)]
+            else:
+                grupos = [datos]
+            
+            segmentos, objetivos = [], []
+            for grupo in grupos:
+                normalizado = scaler.transform(grupo[columnas].values).astype(np.float32)
+                segmentos.append(normalizado[:, [columnas.index(v) for v in variables]])
+                objetivos.append(normalizado[:, indice_objetivo:indice_objetivo + 1])
+            
+            self.scalers[f"secuencias_{variable_objetivo}"] = scaler
+            
+            generador = GeneradorVentanas(segmentos, sequence_length, objetivo=objetivos,
+                                          tamano_lote=tamano_lote, paso=paso,
+                                          barajar=barajar, aplanar=aplanar, semilla=42)
+            print(f"✅ Generador preparado para {variable_objetivo}: {generador.n_muestras} ventanas "
+                  f"en {len(segmentos)} series, {len(generador)} lotes")
+            return generador
+        
+        except Exception as e:
+            print(f"Error preparando generador: {e}")
+            return None
+    
     def crear_modelo_lstm(self, input_shape: Tuple[int, int], variable: str) -> Model:
         """Crear modelo LSTM avanzado"""
         try:
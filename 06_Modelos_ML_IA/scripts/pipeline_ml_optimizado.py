@@ -6,22 +6,124 @@ Sistema completo de ML con validación cruzada y métricas robustas
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import (train_test_split, cross_val_score, GridSearchCV, KFold,
+                                     ParameterGrid, ParameterSampler)
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.svm import SVR
 from sklearn.neighbors import KNeighborsRegressor
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score, get_scorer
 from sklearn.pipeline import Pipeline
 import joblib
 import warnings
 from datetime import datetime
 from typing import Dict, List, Tuple, Any
+from concurrent.futures import ProcessPoolExecutor
 import os
+import tempfile
+import time
 
 warnings.filterwarnings('ignore')
 
+def _evaluar_candidato(estimador, parametros: Dict, X: np.ndarray, y: np.ndarray,
+                       folds: List[Tuple[np.ndarray, np.ndarray]], scorer, filas: int = None) -> Tuple[float, float]:
+    """
+    Puntuación CV de un candidato usando los folds cacheados
+    
+    Args:
+        filas (int): Usar solo las primeras `filas` del train de cada fold (ya barajado)
+    
+    Returns:
+        Tuple: media y desviación de la puntuación entre folds
+    """
+    puntuaciones = []
+    for indices_train, indices_val in folds:
+        if filas is not None:
+            indices_train = indices_train[:filas]
+        modelo = clone(estimador).set_params(**parametros)
+        modelo.fit(X[indices_train], y[indices_train])
+        puntuaciones.append(scorer(modelo, X[indices_val], y[indices_val]))
+    return float(np.mean(puntuaciones)), float(np.std(puntuaciones))
+
+
+def _buscar_familia(nombre_modelo: str, estimador, espacio: Dict, ruta_datos: str,
+                    config: Dict, limite_tiempo: float) -> Dict:
+    """
+    Búsqueda de hiperparámetros de una familia de modelos (se ejecuta en un proceso del pool)
+    
+    Los datos escalados y los folds se leen del caché compartido en disco (memmap).
+    'halving' evalúa todos los candidatos con pocas filas y promueve el mejor
+    1/factor a la siguiente ronda con factor veces más filas; 'aleatoria' evalúa
+    candidatos muestreados con todas las filas. Ambas se detienen al vencer
+    limite_tiempo, conservando el mejor candidato evaluado.
+    
+    Returns:
+        Dict: modelo reentrenado con todo el train, mejores parámetros y puntuación CV
+    """
+    inicio = time.time()
+    datos = joblib.load(ruta_datos, mmap_mode='r')
+    X, y, folds = datos['X'], datos['y'], datos['folds']
+    scorer = get_scorer(config['scoring'])
+    semilla = config['random_state']
+    
+    if not espacio:
+        candidatos = [{}]
+    elif config['modo_busqueda'] == 'aleatoria':
+        total = len(ParameterGrid(espacio))
+        candidatos = list(ParameterSampler(espacio, n_iter=min(config['n_iter_aleatoria'], total),
+                                           random_state=semilla))
+    else:
+        candidatos = list(ParameterGrid(espacio))
+    
+    filas_max = min(len(indices_train) for indices_train, _ in folds)
+    if config['modo_busqueda'] == 'halving' and len(candidatos) > 1:
+        factor = config['factor_halving']
+        rondas = int(np.ceil(np.log(len(candidatos)) / np.log(factor)))
+        filas = max(min(config['min_filas_halving'], filas_max), filas_max // factor ** rondas)
+    else:
+        filas = filas_max
+    
+    # (filas, media, desviación, candidato): gana más filas y luego mejor puntuación
+    mejor = None
+    evaluados = 0
+    agotado = False
+    while True:
+        puntuados = []
+        for candidato in candidatos:
+            if mejor is not None and time.time() > limite_tiempo:
+                agotado = True
+                break
+            media, desviacion = _evaluar_candidato(estimador, candidato, X, y, folds, scorer, filas)
+            evaluados += 1
+            puntuados.append((media, desviacion, candidato))
+            if mejor is None or (filas, media) > (mejor[0], mejor[1]):
+                mejor = (filas, media, desviacion, candidato)
+        
+        if agotado or filas >= filas_max:
+            break
+        puntuados.sort(key=lambda p: p[0], reverse=True)
+        candidatos = [p[2] for p in puntuados[:max(1, len(puntuados) // config['factor_halving'])]]
+        # El último candidato se evalúa directamente con todas las filas
+        filas = filas_max if len(candidatos) == 1 else min(filas_max, filas * config['factor_halving'])
+    
+    _, media, desviacion, parametros = mejor
+    modelo = clone(estimador).set_params(**parametros)
+    modelo.fit(X, y)
+    
+    return {
+        'nombre': nombre_modelo,
+        'modelo': modelo,
+        'mejores_parametros': {f'modelo__{k}': v for k, v in parametros.items()},
+        'mejor_score_cv': media,
+        'cv_std': desviacion,
+        'candidatos_evaluados': evaluados,
+        'presupuesto_agotado': agotado,
+        'tiempo_busqueda': time.time() - inicio
+    }
+
+
 class PipelineMLOptimizado:
     """
     Pipeline de Machine Learning optimizado para predicciones meteorológicas
@@ -34,7 +136,7 @@ class PipelineMLOptimizado:
         Args:
             config (Dict): Configuración del pipeline
         """
-        self.config = config or self._configuracion_default()
+        self.config = {**self._configuracion_default(), **(config or {})}
         self.modelos = {}
         self.mejores_modelos = {}
         self.scalers = {}
@@ -94,7 +196,20 @@ class PipelineMLOptimizado:
             'cv_folds': 5,
             'scoring': 'neg_mean_squared_error',
             'n_jobs': -1,
-            'verbose': 1
+            'verbose': 1,
+            # 'grid' (GridSearchCV exhaustivo), 'halving' o 'aleatoria' (paralelas con presupuesto)
+            'modo_busqueda': 'grid',
+            'presupuesto_segundos': 300,
+            'n_iter_aleatoria': 10,
+            'factor_halving': 3,
+            'min_filas_halving': 200,
+            'max_procesos': None,
+            # Modelos omitidos en los modos con presupuesto si el train supera estas filas
+            'max_filas_modelo': {
+                'SVR': 20000,
+                'KNeighbors': 500000,
+                'GradientBoosting': 2000000
+            }
         }
     
     def preparar_datos(self, datos: pd.DataFrame, variable_objetivo: str) -> Tuple:
@@ -211,6 +326,98 @@ class PipelineMLOptimizado:
             'nombre': nombre_modelo
         }
     
+    
+    def _cachear_folds(self, X_train: pd.DataFrame, y_train: pd.Series, directorio: str) -> Tuple:
+        """
+        Escalar una vez y guardar X, y y los folds en disco para compartirlos entre procesos
+        
+        Los índices de train de cada fold se barajan, de modo que sus primeras n
+        filas son una submuestra aleatoria (usada por successive halving).
+        
+        Returns:
+            Tuple: scaler ajustado y ruta del caché
+        """
+        scaler = StandardScaler()
+        X = np.ascontiguousarray(scaler.fit_transform(X_train), dtype=np.float64)
+        y = np.ascontiguousarray(y_train, dtype=np.float64)
+        
+        rng = np.random.default_rng(self.config['random_state'])
+        kfold = KFold(n_splits=self.config['cv_folds'], shuffle=True, random_state=self.config['random_state'])
+        folds = [(rng.permutation(indices_train), indices_val) for indices_train, indices_val in kfold.split(X)]
+        
+        ruta = os.path.join(directorio, 'folds_escalados.joblib')
+        joblib.dump({'X': X, 'y': y, 'folds': folds}, ruta)
+        return scaler, ruta
+    
+    def _modelos_aplicables(self, n_filas: int) -> List[str]:
+        """
+        Modelos cuya complejidad es razonable para el tamaño del dataset
+        """
+        limites = self.config.get('max_filas_modelo', {})
+        aplicables = []
+        for nombre_modelo in self.modelos_disponibles:
+            limite = limites.get(nombre_modelo)
+            if limite is not None and n_filas > limite:
+                print(f"   ⏭️ {nombre_modelo} omitido: {n_filas} filas > límite {limite}")
+                continue
+            aplicables.append(nombre_modelo)
+        return aplicables
+    
+    def buscar_modelos_paralelo(self, X_train: pd.DataFrame, y_train: pd.Series) -> Dict[str, Dict]:
+        """
+        Búsqueda de hiperparámetros de todas las familias en un pool de procesos
+        
+        Todas las familias comparten el mismo escalado y los mismos folds, y cada
+        una se detiene al agotar el presupuesto de tiempo (presupuesto_segundos).
+        
+        Args:
+            X_train (pd.DataFrame): Datos de entrenamiento
+            y_train (pd.Series): Variable objetivo de entrenamiento
+        
+        Returns:
+            Dict: Información de cada modelo entrenado (mismo formato que entrenar_modelo)
+        """
+        config = self.config
+        nombres = self._modelos_aplicables(len(X_train))
+        limite_tiempo = time.time() + config['presupuesto_segundos']
+        max_procesos = min(len(nombres), config['max_procesos'] or os.cpu_count() or 1)
+        
+        resultados = {}
+        with tempfile.TemporaryDirectory() as directorio:
+            scaler, ruta_datos = self._cachear_folds(X_train, y_train, directorio)
+            argumentos = {
+                nombre: (nombre, self.modelos_disponibles[nombre], self.parametros_grid.get(nombre, {}),
+                         ruta_datos, config, limite_tiempo)
+                for nombre in nombres
+            }
+            
+            busquedas = {}
+            if max_procesos <= 1:
+                for nombre, args in argumentos.items():
+                    try:
+                        busquedas[nombre] = _buscar_familia(*args)
+                    except Exception as e:
+                        print(f"   ❌ Error buscando {nombre}: {e}")
+            else:
+                # Un proceso por familia; cada búsqueda es secuencial para no sobresuscribir núcleos
+                with ProcessPoolExecutor(max_workers=max_procesos) as pool:
+                    futuros = {nombre: pool.submit(_buscar_familia, *args) for nombre, args in argumentos.items()}
+                    for nombre, futuro in futuros.items():
+                        try:
+                            busquedas[nombre] = futuro.result()
+                        except Exception as e:
+                            print(f"   ❌ Error buscando {nombre}: {e}")
+        
+        for nombre, info_modelo in busquedas.items():
+            # Pipeline con el scaler ya ajustado: predice sobre datos sin escalar
+            info_modelo['modelo'] = Pipeline([('scaler', scaler), ('modelo', info_modelo['modelo'])])
+            self.modelos[nombre] = info_modelo['modelo']
+            resultados[nombre] = info_modelo
+            print(f"   🔎 {nombre}: {info_modelo['candidatos_evaluados']} candidatos en "
+                  f"{info_modelo['tiempo_busqueda']:.1f}s")
+        
+        return resultados
+    
     def evaluar_modelo(self, modelo, X_test: pd.DataFrame, y_test: pd.Series) -> Dict:
         """
         Evaluar modelo con métricas completas
@@ -265,13 +472,27 @@ class PipelineMLOptimizado:
             'total_modelos': 0
         }
         
+        # Búsqueda paralela con presupuesto de tiempo (modos 'halving' y 'aleatoria')
+        modo_busqueda = self.config['modo_busqueda']
+        if modo_busqueda != 'grid':
+            print(f"\n⚡ Búsqueda '{modo_busqueda}' en paralelo "
+                  f"(presupuesto {self.config['presupuesto_segundos']}s)")
+            modelos_entrenados = self.buscar_modelos_paralelo(X_train, y_train)
+            nombres_modelos = list(modelos_entrenados.keys())
+        else:
+            modelos_entrenados = None
+            nombres_modelos = list(self.modelos_disponibles.keys())
+        
         # Entrenar cada modelo
-        for nombre_modelo in self.modelos_disponibles.keys():
+        for nombre_modelo in nombres_modelos:
             try:
                 print(f"\n🔄 Entrenando {nombre_modelo}...")
                 
                 # Entrenar modelo
-                info_modelo = self.entrenar_modelo(X_train, y_train, nombre_modelo)
+                if modelos_entrenados is not None:
+                    info_modelo = modelos_entrenados[nombre_modelo]
+                else:
+                    info_modelo = self.entrenar_modelo(X_train, y_train, nombre_modelo)
                 
                 # Evaluar modelo
                 metricas = self.evaluar_modelo(info_modelo['modelo'], X_test, y_test)
@@ -282,7 +503,7 @@ class PipelineMLOptimizado:
                     'metricas': metricas,
                     'mejores_parametros': info_modelo['mejores_parametros'],
                     'cv_mean': info_modelo['mejor_score_cv'],
-                    'cv_std': 0  # Se podría calcular con más detalle
+                    'cv_std': info_modelo.get('cv_std', 0)
                 }
                 
                 # Actualizar mejores métricas
@@ -0,0 +1,58 @@
+"""
+PROYECCIÓN VECTORIZADA - METGO 3D QUILLOTA
+Utilidades para proyectar todo el horizonte con una sola matriz de características
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor, StackingRegressor, VotingRegressor
+
+
+def fechas_horizonte(fecha_inicio: datetime, horizonte_dias: int) -> pd.DatetimeIndex:
+    """Fechas diarias del horizonte a partir de fecha_inicio (incluida)"""
+    return pd.date_range(fecha_inicio, periods=horizonte_dias, freq='D')
+
+
+def calendario_horizonte(fechas: pd.DatetimeIndex) -> Dict[str, np.ndarray]:
+    """Componentes de calendario de todas las fechas como arreglos"""
+    return {
+        'año': fechas.year.to_numpy(),
+        'mes': fechas.month.to_numpy(),
+        'dia': fechas.day.to_numpy(),
+        'dia_semana': fechas.dayofweek.to_numpy(),
+        'dia_año': fechas.dayofyear.to_numpy(),
+        'trimestre': fechas.quarter.to_numpy()
+    }
+
+
+def predecir_con_miembros(modelo, X: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Predicción central del horizonte y predicciones de cada miembro del ensemble
+
+    Para VotingRegressor las predicciones de los miembros salen de un único
+    transform y la central es su promedio ponderado, sin volver a llamar a
+    predict. Para bosques se predice una vez por árbol sobre todo el
+    horizonte. Otros modelos devuelven miembros None.
+
+    Returns:
+        Tuple: (predicción (n,), miembros (n_miembros, n) o None)
+    """
+    if isinstance(modelo, VotingRegressor):
+        miembros = modelo.transform(X).T
+        pesos = None
+        if modelo.weights is not None:
+            pesos = [peso for (_, estimador), peso in zip(modelo.estimators, modelo.weights) if estimador != 'drop']
+        return np.average(miembros, axis=0, weights=pesos), miembros
+
+    if isinstance(modelo, StackingRegressor):
+        # Predicciones base (más X si passthrough=True): entrada del estimador final
+        base = modelo.transform(X)
+        return modelo.final_estimator_.predict(base), base[:, :len(modelo.estimators_)].T
+
+    if isinstance(modelo, (RandomForestRegressor, ExtraTreesRegressor)):
+        miembros = np.stack([arbol.predict(X) for arbol in modelo.estimators_])
+        return miembros.mean(axis=0), miembros
+
+    return modelo.predict(X), None
@@ -24,6 +24,7 @@ import os
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
+from proyeccion_vectorizada import calendario_horizonte, fechas_horizonte, predecir_con_miembros
 
 warnings.filterwarnings('ignore')
 
@@ -621,51 +622,40 @@ class SistemaModelosDinamicos:
             modelo = modelo_info['modelo']
             variable_objetivo = modelo_info['variable_objetivo']
             
-            # Generar proyecciones
+            # Matriz de características de todo el horizonte y una sola predicción
+            fechas = fechas_horizonte(datetime.now(), horizonte_dias)
+            X_pred = self._preparar_caracteristicas_proyeccion_horizonte(fechas, variable_objetivo)
+            valores_proyectados, _ = predecir_con_miembros(modelo, X_pred)
+            
+            # Calcular intervalos de confianza (simplificado)
+            dias = np.arange(horizonte_dias)
+            if incluir_intervalos:
+                # Usar métricas del modelo para estimar incertidumbre
+                rmse = modelo_info['metricas']['rmse']
+                intervalo = rmse * 1.96  # 95% de confianza
+                confianzas = np.maximum(0.1, 1.0 - (dias / horizonte_dias) * 0.5)
+                intervalos_inf = valores_proyectados - intervalo * confianzas
+                intervalos_sup = valores_proyectados + intervalo * confianzas
+            else:
+                confianzas = np.ones(horizonte_dias)
+            
             proyecciones = []
-            fecha_actual = datetime.now()
-            
-            for i in range(horizonte_dias):
-                fecha_proyeccion = fecha_actual + timedelta(days=i)
-                
-                # Preparar características para predicción
-                X_pred = self._preparar_caracteristicas_proyeccion(
-                    fecha_proyeccion, variable_objetivo
-                )
-                
-                # Realizar predicción
-                valor_proyectado = modelo.predict(X_pred.reshape(1, -1))[0]
-                
-                # Calcular intervalos de confianza (simplificado)
-                if incluir_intervalos:
-                    # Usar métricas del modelo para estimar incertidumbre
-                    rmse = modelo_info['metricas']['rmse']
-                    intervalo = rmse * 1.96  # 95% de confianza
-                    confianza = max(0.1, 1.0 - (i / horizonte_dias) * 0.5)
-                    
-                    intervalo_inf = valor_proyectado - intervalo * confianza
-                    intervalo_sup = valor_proyectado + intervalo * confianza
-                else:
-                    intervalo_inf = intervalo_sup = None
-                    confianza = 1.0
-                
-                proyeccion = {
+            for i, fecha_proyeccion in enumerate(fechas):
+                intervalo_inf = intervalos_inf[i] if incluir_intervalos else None
+                intervalo_sup = intervalos_sup[i] if incluir_intervalos else None
+                proyecciones.append({
                     'fecha': fecha_proyeccion.strftime('%Y-%m-%d'),
                     'dias_futuro': i + 1,
                     'variable': variable_objetivo,
-                    'valor_proyectado': round(valor_proyectado, 2),
-                    'intervalo_confianza_inferior': round(intervalo_inf, 2) if intervalo_inf else None,
-                    'intervalo_confianza_superior': round(intervalo_sup, 2) if intervalo_sup else None,
-                    'confianza': round(confianza, 3),
+                    'valor_proyectado': round(float(valores_proyectados[i]), 2),
+                    'intervalo_confianza_inferior': round(float(intervalo_inf), 2) if intervalo_inf else None,
+                    'intervalo_confianza_superior': round(float(intervalo_sup), 2) if intervalo_sup else None,
+                    'confianza': round(float(confianzas[i]), 3),
                     'modelo_usado': nombre_modelo
-                }
-                
-                proyecciones.append(proyeccion)
-                
-                # Guardar proyección en base de datos
-                self._guardar_proyeccion_en_bd(
-                    modelo_info['modelo_id'], proyeccion
-                )
+                })
+            
+            # Guardar todas las proyecciones en una sola transacción
+            self._guardar_proyecciones_en_bd(modelo_info['modelo_id'], proyecciones)
             
             print(f"[OK] {len(proyecciones)} proyecciones generadas")
             return proyecciones
@@ -676,14 +666,20 @@ class SistemaModelosDinamicos:
     
     def _preparar_caracteristicas_proyeccion(self, fecha: datetime, variable_objetivo: str) -> np.ndarray:
         """Preparar características para proyección futura"""
+        X = self._preparar_caracteristicas_proyeccion_horizonte(pd.DatetimeIndex([fecha]), variable_objetivo)
+        return X[0] if len(X) else np.array([])
+    
+    def _preparar_caracteristicas_proyeccion_horizonte(self, fechas: pd.DatetimeIndex,
+                                                       variable_objetivo: str) -> np.ndarray:
+        """Preparar la matriz de características (una fila por fecha) para todo el horizonte"""
         try:
+            n = len(fechas)
+            
             # Características temporales
-            año = fecha.year
-            mes = fecha.month
-            dia = fecha.day
-            dia_semana = fecha.weekday()
-            dia_año = fecha.timetuple().tm_yday
-            trimestre = (mes - 1) // 3 + 1
+            calendario = calendario_horizonte(fechas)
+            año = calendario['año']
+            mes = calendario['mes']
+            dia_año = calendario['dia_año']
             
             # Características cíclicas
             mes_sin = np.sin(2 * np.pi * mes / 12)
@@ -695,14 +691,14 @@ class SistemaModelosDinamicos:
             año_normalizado = (año - 2021) / 3  # Normalizar para 3 años
             
             # Simular características meteorológicas (en producción vendrían de modelos de pronóstico)
-            temp_max = 20 + 5 * np.sin(2 * np.pi * mes / 12) + np.random.normal(0, 2)
-            temp_min = 15 + 5 * np.sin(2 * np.pi * mes / 12) + np.random.normal(0, 1.5)
-            humedad = 70 - (temp_max - 15) * 1.5 + np.random.normal(0, 5)
-            viento = 10 + np.random.normal(0, 3)
-            precipitacion = 0 if np.random.random() > 0.1 else np.random.exponential(2)
-            presion = 1013 + np.random.normal(0, 5)
-            nubosidad = min(100, humedad * 0.8 + precipitacion * 5)
-            radiacion = max(0, 800 - nubosidad * 3)
+            temp_max = 20 + 5 * mes_sin + np.random.normal(0, 2, n)
+            temp_min = 15 + 5 * mes_sin + np.random.normal(0, 1.5, n)
+            humedad = 70 - (temp_max - 15) * 1.5 + np.random.normal(0, 5, n)
+            viento = 10 + np.random.normal(0, 3, n)
+            precipitacion = np.where(np.random.random(n) > 0.1, 0.0, np.random.exponential(2, n))
+            presion = 1013 + np.random.normal(0, 5, n)
+            nubosidad = np.minimum(100, humedad * 0.8 + precipitacion * 5)
+            radiacion = np.maximum(0, 800 - nubosidad * 3)
             
             # Características derivadas
             amplitud_termica = temp_max - temp_min
@@ -710,15 +706,15 @@ class SistemaModelosDinamicos:
             punto_rocio = (temp_max + temp_min) / 2 - (100 - humedad) / 5
             indice_calor = (temp_max + temp_min) / 2 + (humedad - 50) * 0.08
             indice_frio = (temp_max + temp_min) / 2 - np.sqrt(viento) * 0.7
-            calidad_aire = 50 + np.random.normal(0, 10)
-            uv_index = 8 - nubosidad / 15 + np.random.normal(0, 1)
+            calidad_aire = 50 + np.random.normal(0, 10, n)
+            uv_index = 8 - nubosidad / 15 + np.random.normal(0, 1, n)
             
             # Características básicas
-            caracteristicas = [
-                temp_max, temp_min, humedad, viento, 0, precipitacion,  # direccion_viento = 0
+            columnas = [
+                temp_max, temp_min, humedad, viento, np.zeros(n), precipitacion,  # direccion_viento = 0
                 presion, nubosidad, radiacion, punto_rocio, indice_calor, indice_frio,
                 calidad_aire, uv_index,
-                año, mes, dia, dia_semana, dia_año, trimestre,
+                año, mes, calendario['dia'], calendario['dia_semana'], dia_año, calendario['trimestre'],
                 mes_sin, mes_cos, dia_año_sin, dia_año_cos,
                 año_normalizado, amplitud_termica, presion_normalizada
             ]
@@ -726,14 +722,14 @@ class SistemaModelosDinamicos:
             # Agregar codificación de estación (usar quillota_centro por defecto)
             estaciones = ['quillota_centro', 'la_cruz', 'nogueira', 'colliguay', 'san_isidro', 'hijuelas']
             for est in estaciones:
-                caracteristicas.append(1 if est == 'quillota_centro' else 0)
-            
-            return np.array(caracteristicas)
+                columnas.append(np.full(n, 1 if est == 'quillota_centro' else 0))
             
+            return np.column_stack(columnas).astype(float)
+        
         except Exception as e:
             self.logger.error(f"Error preparando características de proyección: {e}")
             return np.array([])
-    
+
     def listar_modelos_activos(self) -> List[Dict]:
         """Listar todos los modelos activos"""
         try:
@@ -807,17 +803,21 @@ class SistemaModelosDinamicos:
     
     def _guardar_proyeccion_en_bd(self, modelo_id: int, proyeccion: Dict):
         """Guardar proyección en base de datos"""
+        self._guardar_proyecciones_en_bd(modelo_id, [proyeccion])
+    
+    def _guardar_proyecciones_en_bd(self, modelo_id: int, proyecciones: List[Dict]):
+        """Guardar proyecciones en base de datos con una conexión y un executemany"""
         try:
             conn = sqlite3.connect(self.base_datos)
             cursor = conn.cursor()
             
-            cursor.execute('''
+            cursor.executemany('''
                 INSERT INTO proyecciones_modelos 
                 (modelo_id, fecha_proyeccion, variable, valor_proyectado, 
                  intervalo_confianza_inferior, intervalo_confianza_superior, 
                  confianza, horizonte_dias)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            ''', [(
                 modelo_id,
                 proyeccion['fecha'],
                 proyeccion['variable'],
@@ -826,13 +826,13 @@ class SistemaModelosDinamicos:
                 proyeccion['intervalo_confianza_superior'],
                 proyeccion['confianza'],
                 proyeccion['dias_futuro']
-            ))
+            ) for proyeccion in proyecciones])
             
             conn.commit()
             conn.close()
             
         except Exception as e:
-            self.logger.error(f"Error guardando proyección: {e}")
+            self.logger.error(f"Error guardando proyecciones: {e}")
 
 def main():
     """Función principal para demostración"""
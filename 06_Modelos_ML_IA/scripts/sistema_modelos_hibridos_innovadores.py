@@ -29,6 +29,7 @@ from scipy import stats
 from scipy.optimize import minimize
 import concurrent.futures
 from functools import partial
+from proyeccion_vectorizada import calendario_horizonte, fechas_horizonte, predecir_con_miembros
 
 warnings.filterwarnings('ignore')
 
@@ -702,51 +703,47 @@ class SistemaModelosHibridosInnovadores:
             preprocessor = modelo_info['preprocessor']
             variable_objetivo = modelo_info['variable_objetivo']
             
-            # Generar proyecciones
-            proyecciones = []
-            fecha_actual = datetime.now()
+            # Características de todo el horizonte, preprocesadas con un solo transform
+            fechas = fechas_horizonte(datetime.now(), horizonte_dias)
+            X_pred = self._preparar_caracteristicas_proyeccion_hibrida_horizonte(
+                fechas, variable_objetivo, preprocessor
+            )
             
-            for i in range(horizonte_dias):
-                fecha_proyeccion = fecha_actual + timedelta(days=i)
-                
-                # Preparar características para predicción
-                X_pred = self._preparar_caracteristicas_proyeccion_hibrida(
-                    fecha_proyeccion, variable_objetivo, preprocessor
-                )
-                
-                # Realizar predicción
-                valor_proyectado = modelo.predict(X_pred.reshape(1, -1))[0]
-                
-                # Análisis de incertidumbre
-                if incluir_incertidumbre:
-                    incertidumbre = self._calcular_incertidumbre_prediccion(
-                        modelo, X_pred, i, horizonte_dias
-                    )
+            # Predicción central y de cada miembro del ensemble en una pasada
+            valores_proyectados, miembros = predecir_con_miembros(modelo, X_pred)
+            
+            # Análisis de incertidumbre
+            if incluir_incertidumbre:
+                incertidumbre = self._calcular_incertidumbre_horizonte(valores_proyectados, miembros)
+            else:
+                incertidumbre = None
+            
+            proyecciones = []
+            for i, fecha_proyeccion in enumerate(fechas):
+                if incertidumbre is not None:
+                    intervalo_inferior = float(incertidumbre['intervalo_inferior'][i])
+                    intervalo_superior = float(incertidumbre['intervalo_superior'][i])
+                    confianza = float(incertidumbre['confianza'][i])
+                    epistemica = float(incertidumbre['incertidumbre_epistemica'][i])
+                    aleatoria = float(incertidumbre['incertidumbre_aleatoria'][i])
                 else:
-                    incertidumbre = {
-                        'intervalo_inferior': None,
-                        'intervalo_superior': None,
-                        'confianza': 1.0,
-                        'incertidumbre_epistemica': 0.0,
-                        'incertidumbre_aleatoria': 0.0
-                    }
+                    intervalo_inferior = intervalo_superior = None
+                    confianza, epistemica, aleatoria = 1.0, 0.0, 0.0
                 
-                proyeccion = {
+                proyecciones.append({
                     'fecha': fecha_proyeccion.strftime('%Y-%m-%d'),
                     'dias_futuro': i + 1,
                     'variable': variable_objetivo,
-                    'valor_proyectado': round(valor_proyectado, 4),
-                    'intervalo_inferior': round(incertidumbre['intervalo_inferior'], 4) if incertidumbre['intervalo_inferior'] else None,
-                    'intervalo_superior': round(incertidumbre['intervalo_superior'], 4) if incertidumbre['intervalo_superior'] else None,
-                    'confianza': round(incertidumbre['confianza'], 4),
-                    'incertidumbre_epistemica': round(incertidumbre['incertidumbre_epistemica'], 4),
-                    'incertidumbre_aleatoria': round(incertidumbre['incertidumbre_aleatoria'], 4),
+                    'valor_proyectado': round(float(valores_proyectados[i]), 4),
+                    'intervalo_inferior': round(intervalo_inferior, 4) if intervalo_inferior else None,
+                    'intervalo_superior': round(intervalo_superior, 4) if intervalo_superior else None,
+                    'confianza': round(confianza, 4),
+                    'incertidumbre_epistemica': round(epistemica, 4),
+                    'incertidumbre_aleatoria': round(aleatoria, 4),
                     'modelo_usado': nombre_modelo,
                     'tipo_hibrido': modelo_info['tipo_hibrido']
-                }
-                
-                proyecciones.append(proyeccion)
-            
+                })
+
             print(f"[OK] {len(proyecciones)} proyecciones híbridas generadas")
             return proyecciones
             
@@ -754,78 +751,69 @@ class SistemaModelosHibridosInnovadores:
             print(f"[ERROR] Error generando proyecciones híbridas: {e}")
             return []
     
-    def _calcular_incertidumbre_prediccion(self, modelo, X_pred: np.ndarray, 
-                                         dia_actual: int, horizonte_total: int) -> Dict:
-        """Calcular incertidumbre de predicción usando múltiples técnicas"""
-        try:
-            # Incertidumbre por horizonte temporal
-            confianza_temporal = max(0.1, 1.0 - (dia_actual / horizonte_total) * 0.6)
-            
-            # Incertidumbre epistemica (del modelo)
-            if hasattr(modelo, 'estimators_'):
-                # Para ensembles, usar varianza entre modelos
-                predicciones_modelos = []
-                for _, modelo_base in modelo.estimators_:
-                    pred = modelo_base.predict(X_pred.reshape(1, -1))[0]
-                    predicciones_modelos.append(pred)
-                
-                incertidumbre_epistemica = np.std(predicciones_modelos)
-            else:
-                # Para modelos individuales, usar métricas del modelo
-                incertidumbre_epistemica = 0.1  # Valor por defecto
-            
-            # Incertidumbre aleatoria (ruido inherente)
-            incertidumbre_aleatoria = 0.05 * confianza_temporal
-            
-            # Intervalo de confianza total
-            incertidumbre_total = incertidumbre_epistemica + incertidumbre_aleatoria
-            
-            prediccion_central = modelo.predict(X_pred.reshape(1, -1))[0]
-            
-            return {
-                'intervalo_inferior': prediccion_central - 1.96 * incertidumbre_total,
-                'intervalo_superior': prediccion_central + 1.96 * incertidumbre_total,
-                'confianza': confianza_temporal,
-                'incertidumbre_epistemica': incertidumbre_epistemica,
-                'incertidumbre_aleatoria': incertidumbre_aleatoria
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Error calculando incertidumbre: {e}")
-            return {
-                'intervalo_inferior': None,
-                'intervalo_superior': None,
-                'confianza': 0.5,
-                'incertidumbre_epistemica': 0.0,
-                'incertidumbre_aleatoria': 0.0
-            }
-    
+    def _calcular_incertidumbre_horizonte(self, prediccion_central: np.ndarray,
+                                          predicciones_miembros: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+        """Calcular incertidumbre de predicción para todos los días del horizonte"""
+        horizonte_total = len(prediccion_central)
+        
+        # Incertidumbre por horizonte temporal
+        confianza_temporal = np.maximum(0.1, 1.0 - (np.arange(horizonte_total) / horizonte_total) * 0.6)
+        
+        # Incertidumbre epistemica (del modelo)
+        if predicciones_miembros is not None:
+            # Para ensembles, usar varianza entre modelos
+            incertidumbre_epistemica = predicciones_miembros.std(axis=0)
+        else:
+            # Para modelos individuales, usar métricas del modelo
+            incertidumbre_epistemica = np.full(horizonte_total, 0.1)  # Valor por defecto
+        
+        # Incertidumbre aleatoria (ruido inherente)
+        incertidumbre_aleatoria = 0.05 * confianza_temporal
+        
+        # Intervalo de confianza total
+        incertidumbre_total = incertidumbre_epistemica + incertidumbre_aleatoria
+        
+        return {
+            'intervalo_inferior': prediccion_central - 1.96 * incertidumbre_total,
+            'intervalo_superior': prediccion_central + 1.96 * incertidumbre_total,
+            'confianza': confianza_temporal,
+            'incertidumbre_epistemica': incertidumbre_epistemica,
+            'incertidumbre_aleatoria': incertidumbre_aleatoria
+        }
+
     def _preparar_caracteristicas_proyeccion_hibrida(self, fecha: datetime, variable_objetivo: str, 
                                                    preprocessor) -> np.ndarray:
         """Preparar características para proyección con modelo híbrido"""
+        X = self._preparar_caracteristicas_proyeccion_hibrida_horizonte(
+            pd.DatetimeIndex([fecha]), variable_objetivo, preprocessor
+        )
+        return X[0] if len(X) else np.array([])
+    
+    def _preparar_caracteristicas_proyeccion_hibrida_horizonte(self, fechas: pd.DatetimeIndex,
+                                                             variable_objetivo: str, preprocessor) -> np.ndarray:
+        """Preparar características preprocesadas de todo el horizonte (una fila por fecha)"""
         try:
+            n = len(fechas)
+            calendario = calendario_horizonte(fechas)
+            mes_sin = np.sin(2 * np.pi * calendario['mes'] / 12)
+            
             # Crear DataFrame temporal con características básicas
             df_temp = pd.DataFrame({
-                'fecha': [fecha],
-                'temperatura_max': [20 + 5 * np.sin(2 * np.pi * fecha.month / 12) + np.random.normal(0, 2)],
-                'temperatura_min': [15 + 5 * np.sin(2 * np.pi * fecha.month / 12) + np.random.normal(0, 1.5)],
-                'temperatura_promedio': [17.5 + 5 * np.sin(2 * np.pi * fecha.month / 12) + np.random.normal(0, 1.5)],
-                'humedad_relativa': [70 - (fecha.month - 6) * 2 + np.random.normal(0, 5)],
-                'velocidad_viento': [10 + np.random.normal(0, 3)],
-                'direccion_viento': [np.random.uniform(0, 360)],
-                'precipitacion': [0 if np.random.random() > 0.1 else np.random.exponential(2)],
-                'presion_atmosferica': [1013 + np.random.normal(0, 5)],
-                'nubosidad': [50 + np.random.normal(0, 15)],
-                'radiacion_solar': [800 + np.random.normal(0, 50)],
-                'punto_rocio': [15 + np.random.normal(0, 2)],
-                'indice_calor': [18 + np.random.normal(0, 2)],
-                'indice_frio': [16 + np.random.normal(0, 2)],
-                'año': [fecha.year],
-                'mes': [fecha.month],
-                'dia': [fecha.day],
-                'dia_semana': [fecha.weekday()],
-                'dia_año': [fecha.timetuple().tm_yday],
-                'trimestre': [(fecha.month - 1) // 3 + 1]
+                'fecha': fechas,
+                'temperatura_max': 20 + 5 * mes_sin + np.random.normal(0, 2, n),
+                'temperatura_min': 15 + 5 * mes_sin + np.random.normal(0, 1.5, n),
+                'temperatura_promedio': 17.5 + 5 * mes_sin + np.random.normal(0, 1.5, n),
+                'humedad_relativa': 70 - (calendario['mes'] - 6) * 2 + np.random.normal(0, 5, n),
+                'velocidad_viento': 10 + np.random.normal(0, 3, n),
+                'direccion_viento': np.random.uniform(0, 360, n),
+                'precipitacion': np.where(np.random.random(n) > 0.1, 0.0, np.random.exponential(2, n)),
+                'presion_atmosferica': 1013 + np.random.normal(0, 5, n),
+                'nubosidad': 50 + np.random.normal(0, 15, n),
+                'radiacion_solar': 800 + np.random.normal(0, 50, n),
+                'punto_rocio': 15 + np.random.normal(0, 2, n),
+                'indice_calor': 18 + np.random.normal(0, 2, n),
+                'indice_frio': 16 + np.random.normal(0, 2, n),
+                **calendario
             })
             
             # Agregar características derivadas
@@ -872,10 +860,8 @@ class SistemaModelosHibridosInnovadores:
             
             X_temp = df_temp[caracteristicas_disponibles].fillna(0)
             
-            # Aplicar preprocesamiento
-            X_processed = preprocessor.transform(X_temp)
-            
-            return X_processed[0]  # Retornar primera fila como array
+            # Aplicar preprocesamiento a todo el horizonte
+            return preprocessor.transform(X_temp)
             
         except Exception as e:
             self.logger.error(f"Error preparando características de proyección híbrida: {e}")
@@ -21,6 +21,7 @@ from typing import Dict, List, Tuple, Optional, Any
 import os
 import gc  # Para liberar memoria
 import psutil  # Para monitorear memoria
+from proyeccion_vectorizada import calendario_horizonte, fechas_horizonte, predecir_con_miembros
 
 warnings.filterwarnings('ignore')
 
@@ -388,24 +389,20 @@ class SistemaModelosUltraOptimizado:
             modelo = modelo_info['modelo']
             variable_objetivo = modelo_info['variable_objetivo']
             
-            # Generar proyecciones
+            # Características simplificadas de todo el horizonte y una sola predicción
+            fechas = fechas_horizonte(datetime.now(), horizonte_dias)
+            X_pred = self._preparar_caracteristicas_proyeccion_simple_horizonte(fechas)
+            valores_proyectados, _ = predecir_con_miembros(modelo, X_pred)
+            
+            # Intervalo de confianza simplificado
+            rmse = modelo_info['metricas']['rmse']
+            confianzas = np.maximum(0.1, 1.0 - (np.arange(horizonte_dias) / horizonte_dias) * 0.5)
+            
             proyecciones = []
-            fecha_actual = datetime.now()
-            
-            for i in range(horizonte_dias):
-                fecha_proyeccion = fecha_actual + timedelta(days=i)
-                
-                # Preparar características simplificadas
-                X_pred = self._preparar_caracteristicas_proyeccion_simple(fecha_proyeccion)
-                
-                # Realizar predicción
-                valor_proyectado = modelo.predict(X_pred.reshape(1, -1))[0]
-                
-                # Intervalo de confianza simplificado
-                rmse = modelo_info['metricas']['rmse']
-                confianza = max(0.1, 1.0 - (i / horizonte_dias) * 0.5)
-                
-                proyeccion = {
+            for i, fecha_proyeccion in enumerate(fechas):
+                valor_proyectado = float(valores_proyectados[i])
+                confianza = float(confianzas[i])
+                proyecciones.append({
                     'fecha': fecha_proyeccion.strftime('%Y-%m-%d'),
                     'dias_futuro': i + 1,
                     'variable': variable_objetivo,
@@ -414,9 +411,7 @@ class SistemaModelosUltraOptimizado:
                     'intervalo_superior': round(valor_proyectado + rmse * confianza, 4),
                     'confianza': round(confianza, 3),
                     'modelo_usado': nombre_modelo
-                }
-                
-                proyecciones.append(proyeccion)
+                })
             
             print(f"[OK] {len(proyecciones)} proyecciones ultra-rápidas generadas")
             return proyecciones
@@ -427,37 +422,46 @@ class SistemaModelosUltraOptimizado:
     
     def _preparar_caracteristicas_proyeccion_simple(self, fecha: datetime) -> np.ndarray:
         """Preparar características simplificadas para proyección"""
+        X = self._preparar_caracteristicas_proyeccion_simple_horizonte(pd.DatetimeIndex([fecha]))
+        return X[0] if len(X) else np.array([])
+    
+    def _preparar_caracteristicas_proyeccion_simple_horizonte(self, fechas: pd.DatetimeIndex) -> np.ndarray:
+        """Matriz de características simplificadas, una fila por fecha del horizonte"""
         try:
+            n = len(fechas)
+            calendario = calendario_horizonte(fechas)
+            mes_sin = np.sin(2 * np.pi * calendario['mes'] / 12)
+            
             # Características básicas (debe coincidir con el entrenamiento)
-            caracteristicas = [
-                20 + 5 * np.sin(2 * np.pi * fecha.month / 12) + np.random.normal(0, 2),  # temp_max
-                15 + 5 * np.sin(2 * np.pi * fecha.month / 12) + np.random.normal(0, 1.5),  # temp_min
-                17.5 + 5 * np.sin(2 * np.pi * fecha.month / 12) + np.random.normal(0, 1.5),  # temp_promedio
-                70 + np.random.normal(0, 5),  # humedad_relativa
-                10 + np.random.normal(0, 3),  # velocidad_viento
-                0 if np.random.random() > 0.1 else np.random.exponential(2),  # precipitacion
-                1013 + np.random.normal(0, 5),  # presion_atmosferica
-                50 + np.random.normal(0, 15),  # nubosidad
-                800 + np.random.normal(0, 50),  # radiacion_solar
-                fecha.year,  # año
-                fecha.month,  # mes
-                fecha.day,  # dia
-                fecha.weekday(),  # dia_semana
-                np.sin(2 * np.pi * fecha.month / 12),  # mes_sin
-                np.cos(2 * np.pi * fecha.month / 12),  # mes_cos
-                5 + np.random.normal(0, 2),  # amplitud_termica
-                1,  # estacion_quillota_centro
-                0,  # estacion_la_cruz
-                0,  # característica adicional para llegar a 20
-                0   # característica adicional para llegar a 20
+            columnas = [
+                20 + 5 * mes_sin + np.random.normal(0, 2, n),  # temp_max
+                15 + 5 * mes_sin + np.random.normal(0, 1.5, n),  # temp_min
+                17.5 + 5 * mes_sin + np.random.normal(0, 1.5, n),  # temp_promedio
+                70 + np.random.normal(0, 5, n),  # humedad_relativa
+                10 + np.random.normal(0, 3, n),  # velocidad_viento
+                np.where(np.random.random(n) > 0.1, 0.0, np.random.exponential(2, n)),  # precipitacion
+                1013 + np.random.normal(0, 5, n),  # presion_atmosferica
+                50 + np.random.normal(0, 15, n),  # nubosidad
+                800 + np.random.normal(0, 50, n),  # radiacion_solar
+                calendario['año'],  # año
+                calendario['mes'],  # mes
+                calendario['dia'],  # dia
+                calendario['dia_semana'],  # dia_semana
+                mes_sin,  # mes_sin
+                np.cos(2 * np.pi * calendario['mes'] / 12),  # mes_cos
+                5 + np.random.normal(0, 2, n),  # amplitud_termica
+                np.ones(n),  # estacion_quillota_centro
+                np.zeros(n),  # estacion_la_cruz
+                np.zeros(n),  # característica adicional para llegar a 20
+                np.zeros(n)   # característica adicional para llegar a 20
             ]
             
-            return np.array(caracteristicas)
-            
+            return np.column_stack(columnas).astype(float)
+        
         except Exception as e:
             self.logger.error(f"Error preparando características simples: {e}")
             return np.array([])
-    
+
     def listar_modelos_ultra_optimizados(self) -> List[Dict]:
         """Listar modelos ultra-optimizados activos"""
         try:
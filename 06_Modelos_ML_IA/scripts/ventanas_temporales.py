@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🪟 VENTANAS TEMPORALES - METGO 3D
+Sistema Meteorológico Agrícola Quillota - Secuencias para LSTM/Transformer sin copiar ventanas
+"""
+
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from tensorflow.keras.utils import Sequence as _SecuenciaKeras
+    TENSORFLOW_AVAILABLE = True
+except ImportError:
+    _SecuenciaKeras = object
+    TENSORFLOW_AVAILABLE = False
+
+
+def crear_secuencias(datos: np.ndarray, longitud: int, objetivo: Optional[np.ndarray] = None,
+                     paso: int = 1, desfase: int = 0) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Ventanas (n_ventanas, longitud, n_caracteristicas) como vista, sin copiar datos
+
+    La ventana k cubre datos[k*paso : k*paso + longitud] y su objetivo es
+    objetivo[k*paso + longitud + desfase]; con paso=1 y desfase=0 equivale al
+    bucle `for i in range(longitud, len(datos)): datos[i-longitud:i], objetivo[i]`.
+    Las vistas son de solo lectura; copiar (np.array) solo lo que se necesite.
+
+    Returns:
+        Tuple: (X vista, y vista o None)
+    """
+    datos = np.asarray(datos)
+    if datos.ndim == 1:
+        datos = datos[:, np.newaxis]
+    n_ventanas = len(datos) - longitud - desfase
+    if n_ventanas <= 0:
+        vacio = np.empty((0, longitud, datos.shape[1]), dtype=datos.dtype)
+        return vacio, (None if objetivo is None else np.asarray(objetivo)[:0])
+
+    # sliding_window_view entrega (n, caracteristicas, longitud): se reordena como vista
+    ventanas = sliding_window_view(datos, longitud, axis=0).swapaxes(1, 2)
+    X = ventanas[:n_ventanas:paso]
+    y = None
+    if objetivo is not None:
+        y = np.asarray(objetivo)[longitud + desfase:longitud + desfase + n_ventanas:paso]
+    return X, y
+
+
+class GeneradorVentanas(_SecuenciaKeras):
+    """Lotes de ventanas generados bajo demanda a partir de una o varias series
+
+    Cada segmento (p.ej. una estación) se ventanea por separado, de modo que
+    ninguna ventana cruza de una serie a otra. Solo se materializa el lote
+    pedido, por lo que la memoria es O(tamano_lote × longitud) y no
+    O(n × longitud). Es un keras.utils.Sequence cuando TensorFlow está
+    disponible (model.fit / evaluate / predict) y un iterable de lotes para
+    sklearn (partial_fit) con aplanar=True.
+    """
+
+    def __init__(self, datos: Union[np.ndarray, Sequence[np.ndarray]], longitud: int,
+                 objetivo: Union[np.ndarray, Sequence[np.ndarray], None] = None,
+                 tamano_lote: int = 256, paso: int = 1, desfase: int = 0,
+                 barajar: bool = False, aplanar: bool = False, semilla: Optional[int] = None):
+        if TENSORFLOW_AVAILABLE:
+            super().__init__()
+        segmentos = list(datos) if isinstance(datos, (list, tuple)) else [datos]
+        if objetivo is None:
+            objetivos = [None] * len(segmentos)
+        else:
+            objetivos = list(objetivo) if isinstance(objetivo, (list, tuple)) else [objetivo]
+
+        self.vistas: List[Tuple[np.ndarray, Optional[np.ndarray]]] = [
+            crear_secuencias(segmento, longitud, obj, paso, desfase)
+            for segmento, obj in zip(segmentos, objetivos)
+        ]
+        conteos = np.array([len(X) for X, _ in self.vistas], dtype=np.int64)
+        self._inicios = np.concatenate([[0], np.cumsum(conteos)])
+        self.n_muestras = int(self._inicios[-1])
+        self.tamano_lote = tamano_lote
+        self.barajar = barajar
+        self.aplanar = aplanar
+        self.con_objetivo = objetivo is not None
+        self._rng = np.random.default_rng(semilla)
+        self._orden = np.arange(self.n_muestras)
+        if barajar:
+            self._rng.shuffle(self._orden)
+
+    def __len__(self) -> int:
+        return -(-self.n_muestras // self.tamano_lote)
+
+    def _reunir(self, indices: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Copiar solo las ventanas de los índices globales pedidos"""
+        segmentos = np.searchsorted(self._inicios, indices, side='right') - 1
+        partes_X, partes_y, posiciones = [], [], []
+        for segmento in np.unique(segmentos):
+            seleccion = np.nonzero(segmentos == segmento)[0]
+            locales = indices[seleccion] - self._inicios[segmento]
+            X, y = self.vistas[segmento]
+            partes_X.append(X[locales])
+            if y is not None:
+                partes_y.append(y[locales])
+            posiciones.append(seleccion)
+
+        X_lote = np.concatenate(partes_X) if len(partes_X) > 1 else partes_X[0]
+        y_lote = None
+        if partes_y:
+            y_lote = np.concatenate(partes_y) if len(partes_y) > 1 else partes_y[0]
+        if len(posiciones) > 1:
+            # Restaurar el orden pedido tras agrupar por segmento
+            orden = np.argsort(np.concatenate(posiciones), kind='stable')
+            X_lote = X_lote[orden]
+            y_lote = y_lote[orden] if y_lote is not None else None
+        if self.aplanar:
+            X_lote = X_lote.reshape(len(X_lote), -1)
+        return X_lote, y_lote
+
+    def __getitem__(self, indice: int):
+        if indice < 0 or indice >= len(self):
+            raise IndexError(indice)
+        indices = self._orden[indice * self.tamano_lote:(indice + 1) * self.tamano_lote]
+        X_lote, y_lote = self._reunir(indices)
+        return (X_lote, y_lote) if self.con_objetivo else X_lote
+
+    def __iter__(self) -> Iterator:
+        for indice in range(len(self)):
+            yield self[indice]
+
+    def on_epoch_end(self):
+        if self.barajar:
+            self._rng.shuffle(self._orden)
+
+    def objetivos(self) -> Optional[np.ndarray]:
+        """Objetivos de todas las ventanas en el orden sin barajar (p.ej. para métricas)"""
+        if not self.con_objetivo:
+            return None
+        return np.concatenate([y for _, y in self.vistas])
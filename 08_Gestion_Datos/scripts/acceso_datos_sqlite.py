@@ -0,0 +1,291 @@
+"""
+CAPA COMPARTIDA DE ACCESO A SQLITE - METGO 3D QUILLOTA
+Conexiones reutilizadas por hilo, modo WAL, pragmas ajustados y reintentos
+ante 'database is locked' para todos los subsistemas que usan SQLite
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+# Pragmas aplicados a cada conexión nueva
+PRAGMAS_POR_DEFECTO = {
+    'journal_mode': 'WAL',        # lectores y escritor concurrentes
+    'synchronous': 'NORMAL',      # seguro con WAL y mucho más rápido que FULL
+    'cache_size': -64000,         # 64 MB de caché de páginas
+    'mmap_size': 268435456,       # 256 MB mapeados en memoria
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000          # ms que SQLite espera un bloqueo antes de fallar
+}
+
+MENSAJES_BLOQUEO = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def es_error_bloqueo(error: Exception) -> bool:
+    """Indicar si un OperationalError corresponde a un bloqueo reintentable"""
+    return isinstance(error, sqlite3.OperationalError) and any(
+        mensaje in str(error).lower() for mensaje in MENSAJES_BLOQUEO
+    )
+
+
+class PoolConexionesSQLite:
+    """Pool de conexiones SQLite con una conexión persistente por hilo
+
+    Cada hilo reutiliza su propia conexión (y con ella la caché de sentencias
+    preparadas de sqlite3), de modo que las llamadas repetidas no pagan la
+    apertura del archivo ni la recompilación del SQL.
+    """
+
+    def __init__(self, ruta: str,
+                 pragmas: Optional[Dict[str, Any]] = None,
+                 reintentos: int = 5,
+                 espera_inicial: float = 0.05,
+                 sentencias_en_cache: int = 256):
+        self.ruta = ruta
+        self.pragmas = dict(PRAGMAS_POR_DEFECTO)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        self.reintentos = reintentos
+        self.espera_inicial = espera_inicial
+        self.sentencias_en_cache = sentencias_en_cache
+        self.logger = logging.getLogger(__name__)
+
+        self._local = threading.local()
+        self._conexiones: Dict[int, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+
+    def _abrir_conexion(self) -> sqlite3.Connection:
+        """Abrir una conexión nueva y aplicar los pragmas configurados"""
+        directorio = os.path.dirname(self.ruta)
+        if directorio and self.ruta != ':memory:':
+            os.makedirs(directorio, exist_ok=True)
+
+        conn = sqlite3.connect(
+            self.ruta,
+            timeout=self.pragmas.get('busy_timeout', 5000) / 1000,
+            check_same_thread=False,
+            cached_statements=self.sentencias_en_cache
+        )
+        for pragma, valor in self.pragmas.items():
+            self.ejecutar_con_reintento(lambda c: c.execute(f"PRAGMA {pragma}={valor}"), conn=conn)
+        return conn
+
+    def _podar_hilos_terminados(self):
+        """Cerrar conexiones de hilos que ya no existen"""
+        vivos = {hilo.ident for hilo in threading.enumerate()}
+        for ident in [i for i in self._conexiones if i not in vivos]:
+            try:
+                self._conexiones.pop(ident).close()
+            except sqlite3.Error:
+                pass
+
+    def conexion(self) -> sqlite3.Connection:
+        """Obtener la conexión del hilo actual, creándola si hace falta"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            try:
+                conn.total_changes  # falla si la conexión fue cerrada
+                return conn
+            except sqlite3.ProgrammingError:
+                conn = None
+
+        conn = self._abrir_conexion()
+        self._local.conn = conn
+        with self._lock:
+            self._podar_hilos_terminados()
+            self._conexiones[threading.get_ident()] = conn
+        return conn
+
+    def ejecutar_con_reintento(self, funcion: Callable[[sqlite3.Connection], Any],
+                               conn: Optional[sqlite3.Connection] = None) -> Any:
+        """Ejecutar funcion(conn) reintentando con espera exponencial si la base está bloqueada"""
+        if conn is None:
+            conn = self.conexion()
+        espera = self.espera_inicial
+        for intento in range(self.reintentos + 1):
+            try:
+                return funcion(conn)
+            except sqlite3.OperationalError as e:
+                if not es_error_bloqueo(e) or intento == self.reintentos:
+                    raise
+                if conn.in_transaction:
+                    conn.rollback()
+                self.logger.warning(f"Base de datos bloqueada ({self.ruta}), reintento {intento + 1}")
+                time.sleep(espera)
+                espera *= 2
+
+    @contextmanager
+    def transaccion(self):
+        """Transacción de escritura: BEGIN IMMEDIATE con reintento, commit o rollback al salir
+
+        Tomar el bloqueo de escritura al inicio concentra la contención en el
+        BEGIN, que es el único punto que necesita reintento. Una transaccion()
+        anidada usa un SAVEPOINT: su rollback deshace solo su parte y el commit
+        queda a cargo de la transacción externa. Dentro de la transacción no
+        se debe llamar a conn.commit() ni a DataFrame.to_sql (confirma por su
+        cuenta); para DataFrames usar escribir_dataframe.
+        """
+        conn = self.conexion()
+        profundidad = getattr(self._local, 'profundidad', 0)
+
+        if profundidad:
+            punto = f"punto_{profundidad}"
+            conn.execute(f"SAVEPOINT {punto}")
+            self._local.profundidad = profundidad + 1
+            try:
+                yield conn
+                conn.execute(f"RELEASE {punto}")
+            except Exception:
+                conn.execute(f"ROLLBACK TO {punto}")
+                conn.execute(f"RELEASE {punto}")
+                raise
+            finally:
+                self._local.profundidad = profundidad
+            return
+
+        if conn.in_transaction:
+            raise sqlite3.ProgrammingError(
+                "La conexión tiene una transacción abierta fuera de transaccion(); "
+                "confirmarla o revertirla antes de iniciar otra"
+            )
+        self.ejecutar_con_reintento(lambda c: c.execute("BEGIN IMMEDIATE"), conn=conn)
+        self._local.profundidad = 1
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.profundidad = 0
+
+    def ejecutar(self, sql: str, parametros: Sequence = ()) -> sqlite3.Cursor:
+        """Ejecutar una sentencia y confirmar, con reintento ante bloqueos"""
+        def _ejecutar(conn):
+            cursor = conn.execute(sql, parametros)
+            conn.commit()
+            return cursor
+        return self.ejecutar_con_reintento(_ejecutar)
+
+    def ejecutar_muchos(self, sql: str, filas: Iterable[Sequence]) -> int:
+        """Ejecutar una sentencia preparada sobre muchas filas en una sola transacción"""
+        filas = list(filas)
+        with self.transaccion() as conn:
+            conn.executemany(sql, filas)
+        return len(filas)
+
+    def consultar(self, sql: str, parametros: Sequence = ()) -> List[tuple]:
+        """Ejecutar una consulta y devolver todas las filas"""
+        return self.ejecutar_con_reintento(lambda conn: conn.execute(sql, parametros).fetchall())
+
+    def leer_dataframe(self, sql: str, parametros: Sequence = (), **kwargs) -> pd.DataFrame:
+        """Ejecutar una consulta y devolver un DataFrame (kwargs van a pd.read_sql_query)"""
+        return self.ejecutar_con_reintento(
+            lambda conn: pd.read_sql_query(sql, conn, params=parametros, **kwargs)
+        )
+
+    def cerrar(self):
+        """Cerrar todas las conexiones del pool"""
+        with self._lock:
+            for conn in self._conexiones.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._conexiones.clear()
+        self._local = threading.local()
+
+
+def _tipo_sqlite(serie: pd.Series) -> str:
+    """Tipo de columna SQLite para una columna de DataFrame (misma afinidad que to_sql)"""
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(serie):
+        return 'REAL'
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return 'TIMESTAMP'
+    return 'TEXT'
+
+
+def escribir_dataframe(conn: sqlite3.Connection, tabla: str, df: pd.DataFrame,
+                       reemplazar: bool = False, tamano_bloque: int = 5000) -> int:
+    """Insertar un DataFrame con executemany sin confirmar la transacción
+
+    Pensado para usarse dentro de PoolConexionesSQLite.transaccion(), de modo
+    que la escritura forma parte de la misma unidad de trabajo (a diferencia
+    de DataFrame.to_sql, que confirma por su cuenta). Crea la tabla si no
+    existe. Con reemplazar=True vacía la tabla conservando su esquema e
+    índices; si la tabla no admite todas las columnas, la recrea.
+
+    Returns:
+        int: Filas insertadas
+    """
+    columnas = [str(c) for c in df.columns]
+    existentes = [fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})")]
+
+    if existentes and reemplazar:
+        if set(columnas) <= set(existentes):
+            conn.execute(f"DELETE FROM {tabla}")
+        else:
+            conn.execute(f"DROP TABLE {tabla}")
+            existentes = []
+    elif existentes and not set(columnas) <= set(existentes):
+        faltantes = sorted(set(columnas) - set(existentes))
+        raise ValueError(f"La tabla {tabla} no tiene las columnas {faltantes}")
+
+    if not existentes:
+        definicion = ', '.join(f'"{c}" {_tipo_sqlite(df[c])}' for c in df.columns)
+        conn.execute(f"CREATE TABLE {tabla} ({definicion})")
+
+    if df.empty:
+        return 0
+
+    # Fechas como texto 'YYYY-MM-DD HH:MM:SS' (igual que to_sql) y NaN/NaT como NULL
+    df_bd = df.copy()
+    for columna in df_bd.columns:
+        if pd.api.types.is_datetime64_any_dtype(df_bd[columna]):
+            df_bd[columna] = df_bd[columna].dt.strftime('%Y-%m-%d %H:%M:%S')
+    df_bd = df_bd.astype(object)
+    df_bd = df_bd.where(pd.notna(df_bd), None)
+
+    nombres = ', '.join(f'"{c}"' for c in columnas)
+    sql = f"INSERT INTO {tabla} ({nombres}) VALUES ({', '.join('?' for _ in columnas)})"
+    filas = list(df_bd.itertuples(index=False, name=None))
+    for inicio in range(0, len(filas), tamano_bloque):
+        conn.executemany(sql, filas[inicio:inicio + tamano_bloque])
+    return len(filas)
+
+
+_pools: Dict[str, PoolConexionesSQLite] = {}
+_pools_lock = threading.Lock()
+
+
+def obtener_pool(ruta: str, **kwargs) -> PoolConexionesSQLite:
+    """Obtener el pool compartido de una base de datos (uno por ruta absoluta)
+
+    Los argumentos adicionales solo se usan al crear el pool por primera vez.
+    """
+    clave = ruta if ruta == ':memory:' else os.path.abspath(ruta)
+    with _pools_lock:
+        pool = _pools.get(clave)
+        if pool is None:
+            pool = PoolConexionesSQLite(ruta, **kwargs)
+            _pools[clave] = pool
+        return pool
+
+
+@atexit.register
+def cerrar_pools():
+    """Cerrar todas las conexiones abiertas por los pools compartidos"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.cerrar()
+        _pools.clear()
@@ -0,0 +1,206 @@
+"""
+ANÁLISIS CLIMATOLÓGICO VECTORIZADO - METGO 3D QUILLOTA
+Climatologías agrupadas y detección de eventos extremos con umbrales por cuantiles
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Iterable, Optional, Sequence
+
+# Ventanas de calendario disponibles para el modo climatológico
+VENTANAS_CALENDARIO = {
+    'mes': lambda fechas: fechas.dt.month,
+    'semana': lambda fechas: fechas.dt.isocalendar().week.astype('int64'),
+    'estacion_año': lambda fechas: (fechas.dt.month % 12) // 3
+}
+
+# Reglas de impacto por variable: (condición sobre el valor, impacto)
+REGLAS_IMPACTO = {
+    'temperatura_max': [(lambda v: v > 35, 'estres_termico')],
+    'temperatura_min': [(lambda v: v < 0, 'riesgo_helada')],
+    'precipitacion': [(lambda v: v > 50, 'inundacion'), (lambda v: v == 0, 'sequia')],
+    'velocidad_viento': [(lambda v: v > 60, 'danos_mecanicos')],
+    'humedad_relativa': [(lambda v: v < 30, 'estres_hidrico')]
+}
+
+ESTADISTICOS_CLIMATOLOGIA = {
+    'promedio': 'mean',
+    'mediana': 'median',
+    'desviacion_estandar': 'std',
+    'minimo': 'min',
+    'maximo': 'max'
+}
+
+COLUMNAS_EVENTOS = [
+    'fecha_evento', 'estacion', 'tipo_evento', 'variable_afectada', 'valor_medido',
+    'valor_normal', 'desviacion', 'severidad', 'impacto'
+]
+
+
+def _clave_ventana(fechas: pd.Series, ventana: str) -> pd.Series:
+    """Calcular la clave de ventana de calendario para cada fecha"""
+    if ventana not in VENTANAS_CALENDARIO:
+        raise ValueError(f"Ventana climatológica no soportada: {ventana}. "
+                         f"Opciones: {list(VENTANAS_CALENDARIO)}")
+    return VENTANAS_CALENDARIO[ventana](pd.to_datetime(fechas))
+
+
+def evaluar_impacto_eventos(variables: np.ndarray, valores: np.ndarray) -> np.ndarray:
+    """Asignar el impacto de cada evento con búsquedas vectorizadas por variable"""
+    impacto = np.full(len(valores), 'normal', dtype=object)
+    for variable, reglas in REGLAS_IMPACTO.items():
+        es_variable = variables == variable
+        if not es_variable.any():
+            continue
+        # La primera regla que se cumple gana, igual que la cadena if/elif original
+        pendiente = es_variable.copy()
+        for condicion, etiqueta in reglas:
+            cumple = pendiente & condicion(valores)
+            impacto[cumple] = etiqueta
+            pendiente &= ~cumple
+    return impacto
+
+
+def detectar_eventos_extremos(df: pd.DataFrame,
+                              variables: Iterable[str],
+                              cuantil_bajo: float = 0.05,
+                              cuantil_alto: float = 0.95,
+                              ventana_climatologica: Optional[str] = None,
+                              filas_objetivo: Optional[pd.Series] = None) -> pd.DataFrame:
+    """Detectar eventos extremos para todas las estaciones y variables en una sola pasada
+
+    Los umbrales (cuantiles), la media y la desviación estándar se calculan con
+    un único groupby sobre (estacion, variable) y los eventos se seleccionan con
+    máscaras booleanas. Con ventana_climatologica ('mes', 'semana' o
+    'estacion_año') los umbrales se calculan por ventana de calendario en lugar
+    de sobre todo el registro. Si se indica filas_objetivo (máscara alineada con
+    df) los umbrales usan todo df pero solo se emiten eventos para esas filas.
+    """
+    variables = [v for v in variables if v in df.columns]
+    if df.empty or not variables:
+        return pd.DataFrame(columns=COLUMNAS_EVENTOS)
+
+    claves = ['estacion', 'variable']
+    largo = df[['fecha', 'estacion'] + variables].copy()
+    largo['_fila'] = np.arange(len(df))
+    if filas_objetivo is not None:
+        largo['_objetivo'] = np.asarray(filas_objetivo.loc[df.index], dtype=bool)
+    if ventana_climatologica:
+        largo['_ventana'] = _clave_ventana(largo['fecha'], ventana_climatologica).to_numpy()
+        claves.append('_ventana')
+
+    largo = largo.melt(
+        id_vars=[c for c in largo.columns if c not in variables],
+        value_vars=variables, var_name='variable', value_name='valor'
+    )
+    largo['valor'] = pd.to_numeric(largo['valor'], errors='coerce')
+    largo = largo.dropna(subset=['valor'])
+
+    # Una sola pasada agrupada para umbrales y estadísticos
+    grupos = largo.groupby(claves, sort=False)['valor']
+    estadisticos = grupos.quantile([cuantil_bajo, cuantil_alto]).unstack()
+    estadisticos.columns = ['_umbral_bajo', '_umbral_alto']
+    estadisticos['_media'] = grupos.mean()
+    estadisticos['_std'] = grupos.std()
+    largo = largo.join(estadisticos, on=claves)
+
+    valor = largo['valor']
+    es_bajo = valor <= largo['_umbral_bajo']
+    mascara = es_bajo | (valor >= largo['_umbral_alto'])
+    if filas_objetivo is not None:
+        mascara &= largo['_objetivo']
+
+    eventos = largo[mascara]
+    es_bajo = es_bajo[mascara].to_numpy()
+    media = eventos['_media'].to_numpy(dtype=np.float64)
+    valores = eventos['valor'].to_numpy(dtype=np.float64)
+    variables_evento = eventos['variable'].to_numpy(dtype=object)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        desviacion = np.abs(valores - media) / eventos['_std'].to_numpy(dtype=np.float64)
+
+    resultado = pd.DataFrame({
+        'fecha_evento': eventos['fecha'].to_numpy(),
+        'estacion': eventos['estacion'].to_numpy(),
+        'tipo_evento': variables_evento + np.where(es_bajo, '_extremo_bajo', '_extremo_alto').astype(object),
+        'variable_afectada': variables_evento,
+        'valor_medido': np.round(valores, 3),
+        'valor_normal': np.round(media, 3),
+        'desviacion': np.round(desviacion, 3),
+        'severidad': np.select([desviacion > 3, desviacion > 2], ['alta', 'moderada'], default='baja'),
+        'impacto': evaluar_impacto_eventos(variables_evento, valores)
+    })
+
+    # Mismo orden que el recorrido estación -> variable -> fila
+    orden_estacion = {e: i for i, e in enumerate(pd.unique(df['estacion']))}
+    orden_variable = {v: i for i, v in enumerate(variables)}
+    orden = np.lexsort((
+        eventos['_fila'].to_numpy(),
+        eventos['variable'].map(orden_variable).to_numpy(),
+        eventos['estacion'].map(orden_estacion).to_numpy()
+    ))
+    return resultado.iloc[orden].reset_index(drop=True)
+
+
+def agregar_climatologia(df: pd.DataFrame,
+                         variables: Iterable[str],
+                         claves: Sequence[str] = ('estacion',),
+                         periodo: Optional[str] = 'mes',
+                         percentiles: Sequence[float] = (0.25, 0.75),
+                         decimales: Optional[int] = 3) -> pd.DataFrame:
+    """Calcular estadísticos climatológicos con un único groupby/aggregate
+
+    Agrupa df por claves + periodo y devuelve una fila por grupo y variable con
+    promedio, mediana, desviación estándar, mínimo, máximo y los percentiles
+    pedidos (columnas percentil_25, percentil_75, ...). periodo puede ser una
+    ventana de calendario ('mes', 'semana', 'estacion_año'), el nombre de una
+    columna existente (por ejemplo una etapa fenológica) o None para agrupar
+    solo por claves.
+    """
+    variables = [v for v in variables if v in df.columns]
+    claves = list(claves)
+    columnas_percentil = [f"percentil_{int(round(p * 100))}" for p in percentiles]
+    if df.empty or not variables:
+        return pd.DataFrame(columns=claves + ([periodo] if periodo else []) + ['variable']
+                            + list(ESTADISTICOS_CLIMATOLOGIA) + columnas_percentil)
+
+    datos = df[claves].copy()
+    for variable in variables:
+        datos[variable] = pd.to_numeric(df[variable], errors='coerce')
+
+    grupo = list(claves)
+    if periodo:
+        if periodo in VENTANAS_CALENDARIO:
+            datos[periodo] = _clave_ventana(df['fecha'], periodo).to_numpy()
+        elif periodo in df.columns:
+            datos[periodo] = df[periodo].to_numpy()
+        else:
+            raise ValueError(f"Periodo no soportado: {periodo}. Use una ventana de calendario "
+                             f"{list(VENTANAS_CALENDARIO)} o una columna existente")
+        grupo.append(periodo)
+
+    grupos = datos.groupby(grupo, sort=True)[variables]
+
+    # Estadísticos básicos: columnas (variable, estadístico) -> filas por variable
+    resumen = grupos.agg(list(ESTADISTICOS_CLIMATOLOGIA.values()))
+    resumen.columns = pd.MultiIndex.from_tuples(
+        [(variable, nombre) for variable, nombre in resumen.columns], names=['variable', None]
+    )
+    resumen = resumen.stack(level='variable', future_stack=True)
+    resumen.columns = list(ESTADISTICOS_CLIMATOLOGIA)
+
+    # Percentiles en una sola llamada para todas las variables
+    if percentiles:
+        cuantiles = grupos.quantile(list(percentiles))
+        cuantiles.index = cuantiles.index.set_names('_cuantil', level=-1)
+        cuantiles = cuantiles.stack(future_stack=True).unstack('_cuantil')
+        cuantiles.index = cuantiles.index.set_names('variable', level=-1)
+        cuantiles.columns = columnas_percentil
+        resumen = resumen.join(cuantiles)
+
+    resultado = resumen.reset_index()
+    if decimales is not None:
+        columnas_valor = list(ESTADISTICOS_CLIMATOLOGIA) + columnas_percentil
+        resultado[columnas_valor] = resultado[columnas_valor].round(decimales)
+
+    return resultado
@@ -0,0 +1,165 @@
+"""
+ARCHIVO COLUMNAR HISTÓRICO - METGO 3D QUILLOTA
+Archivo Parquet particionado por estación y año con consultas que filtran
+por rango de fechas, estación y columnas sin leer el archivo completo
+"""
+
+import os
+import shutil
+import pandas as pd
+from datetime import datetime
+from typing import Iterable, List, Optional, Union
+
+# pyarrow es opcional: sin él el sistema histórico sigue usando solo SQLite
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+COLUMNAS_PARTICION = ['estacion', 'anio']
+
+Fecha = Union[str, datetime, pd.Timestamp]
+
+
+class ArchivoColumnarHistorico:
+    """Archivo Parquet de datos meteorológicos históricos particionado estacion=/anio="""
+
+    def __init__(self, directorio: str = os.path.join('datos_historicos_5_anios', 'parquet'),
+                 compresion: str = 'zstd'):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow no está instalado: pip install pyarrow")
+        self.directorio = directorio
+        self.compresion = compresion
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def _preparar_tabla(self, df: pd.DataFrame) -> 'pa.Table':
+        """Convertir df a tabla Arrow agregando la columna de partición anio"""
+        datos = df.copy()
+        datos['fecha'] = pd.to_datetime(datos['fecha'])
+        datos['estacion'] = datos['estacion'].astype(str)
+        datos['anio'] = datos['fecha'].dt.year.astype('int32')
+        return pa.Table.from_pandas(datos, preserve_index=False)
+
+    def _escribir_tabla(self, tabla: 'pa.Table'):
+        """Escribir la tabla reemplazando solo las particiones (estación, año) que contiene"""
+        pq.write_to_dataset(
+            tabla, self.directorio,
+            partition_cols=COLUMNAS_PARTICION,
+            existing_data_behavior='delete_matching',
+            compression=self.compresion,
+            basename_template='parte-{i}.parquet'
+        )
+
+    def escribir(self, df: pd.DataFrame, reemplazar: bool = True):
+        """Escribir el registro completo; con reemplazar=True se descarta el archivo anterior"""
+        if df.empty:
+            return
+        if reemplazar and os.path.exists(self.directorio):
+            shutil.rmtree(self.directorio)
+            os.makedirs(self.directorio, exist_ok=True)
+        self._escribir_tabla(self._preparar_tabla(df))
+
+    def agregar(self, df_nuevo: pd.DataFrame):
+        """Agregar filas nuevas reescribiendo solo las particiones (estación, año) afectadas
+
+        Las filas existentes con la misma (estacion, fecha) se reemplazan por las nuevas.
+        """
+        if df_nuevo.empty:
+            return
+        nuevo = df_nuevo.copy()
+        nuevo['fecha'] = pd.to_datetime(nuevo['fecha'])
+        particiones = sorted(set(zip(nuevo['estacion'].astype(str), nuevo['fecha'].dt.year)))
+
+        existentes = []
+        for estacion, anio in particiones:
+            ruta = os.path.join(self.directorio, f"estacion={estacion}", f"anio={anio}")
+            if os.path.isdir(ruta):
+                existentes.append(pq.read_table(ruta).to_pandas().assign(estacion=estacion))
+
+        combinado = pd.concat(existentes + [nuevo], ignore_index=True) if existentes else nuevo
+        combinado['fecha'] = pd.to_datetime(combinado['fecha'])
+        combinado = combinado.drop(columns=['anio'], errors='ignore')
+        combinado = combinado.drop_duplicates(subset=['estacion', 'fecha'], keep='last')
+        self._escribir_tabla(self._preparar_tabla(combinado.sort_values(['estacion', 'fecha'])))
+
+    def _dataset(self) -> 'ds.Dataset':
+        """Abrir el dataset con particionado hive (estacion=..., anio=...)"""
+        return ds.dataset(self.directorio, format='parquet', partitioning='hive')
+
+    def existe(self) -> bool:
+        """Indicar si el archivo contiene al menos una partición"""
+        return os.path.isdir(self.directorio) and any(
+            nombre.startswith('estacion=') for nombre in os.listdir(self.directorio)
+        )
+
+    def _filtro(self, estaciones: Optional[Iterable[str]] = None,
+                fecha_inicio: Optional[Fecha] = None,
+                fecha_fin: Optional[Fecha] = None) -> Optional['ds.Expression']:
+        """Construir la expresión de filtro; estacion y anio podan particiones completas"""
+        condiciones = []
+        if estaciones is not None:
+            if isinstance(estaciones, str):
+                estaciones = [estaciones]
+            condiciones.append(ds.field('estacion').isin(list(estaciones)))
+        if fecha_inicio is not None:
+            inicio = pd.Timestamp(fecha_inicio)
+            condiciones.append(ds.field('anio') >= inicio.year)
+            condiciones.append(ds.field('fecha') >= inicio.to_pydatetime())
+        if fecha_fin is not None:
+            fin = pd.Timestamp(fecha_fin)
+            condiciones.append(ds.field('anio') <= fin.year)
+            condiciones.append(ds.field('fecha') <= fin.to_pydatetime())
+
+        filtro = None
+        for condicion in condiciones:
+            filtro = condicion if filtro is None else filtro & condicion
+        return filtro
+
+    def consultar_tabla(self, estaciones: Optional[Iterable[str]] = None,
+                        fecha_inicio: Optional[Fecha] = None,
+                        fecha_fin: Optional[Fecha] = None,
+                        columnas: Optional[List[str]] = None) -> 'pa.Table':
+        """Leer solo las particiones, filas y columnas pedidas como tabla Arrow
+
+        Las columnas fecha y estacion se incluyen siempre para identificar cada fila.
+        El resultado se ordena por fecha y estación, igual que las exportaciones SQL.
+        """
+        dataset = self._dataset()
+        disponibles = [c for c in dataset.schema.names if c not in ('fecha', 'estacion', 'anio')]
+        if columnas is not None:
+            disponibles = [c for c in columnas if c in disponibles]
+        columnas = ['fecha', 'estacion'] + disponibles
+
+        tabla = dataset.to_table(columns=columnas,
+                                 filter=self._filtro(estaciones, fecha_inicio, fecha_fin))
+        if pa.types.is_dictionary(tabla.schema.field('estacion').type):
+            indice = tabla.schema.get_field_index('estacion')
+            tabla = tabla.set_column(indice, 'estacion', pc.cast(tabla['estacion'], pa.string()))
+        return tabla.sort_by([('fecha', 'ascending'), ('estacion', 'ascending')])
+
+    def consultar(self, estaciones: Optional[Iterable[str]] = None,
+                  fecha_inicio: Optional[Fecha] = None,
+                  fecha_fin: Optional[Fecha] = None,
+                  columnas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Consultar el archivo y devolver un DataFrame con las filas y columnas filtradas"""
+        return self.consultar_tabla(estaciones, fecha_inicio, fecha_fin, columnas).to_pandas()
+
+    def exportar(self, ruta: str, formato: str = 'parquet', **filtros) -> str:
+        """Exportar un corte del archivo directamente desde Arrow, sin pasar por pandas
+
+        formato puede ser 'parquet' o 'csv'; filtros acepta los argumentos de consultar_tabla.
+        """
+        tabla = self.consultar_tabla(**filtros)
+        formato = formato.lower()
+        if formato == 'parquet':
+            pq.write_table(tabla, ruta, compression=self.compresion)
+        elif formato == 'csv':
+            pa_csv.write_csv(tabla, ruta)
+        else:
+            raise ValueError(f"Formato no soportado por el archivo columnar: {formato}")
+        return ruta
@@ -0,0 +1,127 @@
+"""
+MOTOR VECTORIZADO DE ÍNDICES AGROMETEOROLÓGICOS - METGO 3D QUILLOTA
+Cálculo columnar (NumPy) de índices de sequía, helada, estrés hídrico,
+crecimiento, rendimiento y grados-día sobre cualquier DataFrame
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+COLUMNAS_INDICES = [
+    'indice_sequia',
+    'indice_helada',
+    'indice_estres_hidrico',
+    'indice_crecimiento',
+    'indice_rendimiento',
+    'grado_dias_calor',
+    'grado_dias_frio'
+]
+
+
+def _como_array(valores) -> np.ndarray:
+    """Convertir una serie o lista a array float64"""
+    return np.asarray(valores, dtype=np.float64)
+
+
+def _max_cero(x: np.ndarray) -> np.ndarray:
+    """Equivalente vectorizado de max(0, x); NaN se convierte en 0 como en Python"""
+    return np.where(x > 0, x, 0.0)
+
+
+def _min_uno(x: np.ndarray) -> np.ndarray:
+    """Equivalente vectorizado de min(1, x); NaN se convierte en 1 como en Python"""
+    return np.where(x < 1, x, 1.0)
+
+
+def indice_sequia(precipitacion) -> np.ndarray:
+    """Índice de sequía (SPI simplificado) por tramos de precipitación"""
+    p = _como_array(precipitacion)
+    condiciones = [p == 0, p < 1, p < 5, p < 10, p < 20, p < 40]
+    valores = [-2.0, -1.5, -1.0, -0.5, 0.0, 0.5]
+    return np.select(condiciones, valores, default=1.0)
+
+
+def indice_helada(temperatura_min) -> np.ndarray:
+    """Índice de helada: 1.0 severa, 0.7 moderada, 0.3 ligera, 0.0 sin helada"""
+    t = _como_array(temperatura_min)
+    return np.select([t <= -2, t <= 0, t <= 2], [1.0, 0.7, 0.3], default=0.0)
+
+
+def indice_estres_hidrico(temperatura, humedad, viento) -> np.ndarray:
+    """Índice de estrés hídrico combinando temperatura, humedad y viento"""
+    estres_temp = (_como_array(temperatura) - 20) / 20
+    estres_humedad = (50 - _como_array(humedad)) / 50
+    estres_viento = _como_array(viento) / 50
+    indice = (estres_temp + estres_humedad + estres_viento) / 3
+    return _max_cero(_min_uno(indice))
+
+
+def indice_crecimiento(temperatura, radiacion, precipitacion) -> np.ndarray:
+    """Índice de crecimiento de cultivos (óptimo 20°C, radiación 1000, 12.5 mm)"""
+    temp_optima = _max_cero(1 - np.abs(_como_array(temperatura) - 20) / 10)
+    radiacion_norm = _max_cero(_min_uno(_como_array(radiacion) / 1000))
+    prec_optima = _max_cero(1 - np.abs(_como_array(precipitacion) - 12.5) / 12.5)
+    return (temp_optima + radiacion_norm + prec_optima) / 3
+
+
+def indice_rendimiento(temperatura, precipitacion, radiacion) -> np.ndarray:
+    """Índice de rendimiento agrícola ponderado (0.4 temp, 0.4 radiación, 0.2 lluvia)"""
+    temp_optima = _max_cero(1 - np.abs(_como_array(temperatura) - 22) / 12)
+    radiacion_norm = _max_cero(_min_uno(_como_array(radiacion) / 900))
+    prec_optima = _max_cero(1 - np.abs(_como_array(precipitacion) - 10) / 15)
+    return temp_optima * 0.4 + radiacion_norm * 0.4 + prec_optima * 0.2
+
+
+def grados_dia_calor(temperatura, temp_base: float = 10.0) -> np.ndarray:
+    """Grados-día de calor sobre la temperatura base"""
+    return _max_cero(_como_array(temperatura) - temp_base)
+
+
+def grados_dia_frio(temperatura, temp_base: float = 10.0) -> np.ndarray:
+    """Grados-día de frío bajo la temperatura base"""
+    return _max_cero(temp_base - _como_array(temperatura))
+
+
+def calcular_indices_agrometeorologicos(df: pd.DataFrame,
+                                        temp_base: float = 10.0,
+                                        redondear: bool = True,
+                                        columnas_id: Optional[list] = None) -> pd.DataFrame:
+    """Calcular todos los índices agrometeorológicos de un DataFrame en una sola pasada
+
+    Requiere las columnas precipitacion, temperatura_min, temperatura_promedio,
+    humedad_relativa, velocidad_viento y radiacion_solar. Devuelve un DataFrame
+    alineado con df que conserva las columnas identificadoras (por defecto
+    fecha y estacion, si existen) seguidas de los índices. Los resultados son
+    idénticos a las funciones escalares de SistemaBaseDatosHistorica5Anios,
+    incluido el tratamiento de valores faltantes.
+    """
+    if columnas_id is None:
+        columnas_id = [c for c in ('fecha', 'estacion') if c in df.columns]
+
+    temperatura = df['temperatura_promedio']
+    precipitacion = df['precipitacion']
+    radiacion = df['radiacion_solar']
+
+    indices = {
+        'indice_sequia': indice_sequia(precipitacion),
+        'indice_helada': indice_helada(df['temperatura_min']),
+        'indice_estres_hidrico': indice_estres_hidrico(
+            temperatura, df['humedad_relativa'], df['velocidad_viento']
+        ),
+        'indice_crecimiento': indice_crecimiento(temperatura, radiacion, precipitacion),
+        'indice_rendimiento': indice_rendimiento(temperatura, precipitacion, radiacion),
+        'grado_dias_calor': grados_dia_calor(temperatura, temp_base),
+        'grado_dias_frio': grados_dia_frio(temperatura, temp_base)
+    }
+
+    if redondear:
+        for nombre in COLUMNAS_INDICES:
+            decimales = 2 if nombre.startswith('grado_dias') else 3
+            indices[nombre] = np.round(indices[nombre], decimales)
+
+    df_indices = pd.DataFrame(indices, index=df.index)
+    if columnas_id:
+        df_indices = pd.concat([df[columnas_id], df_indices], axis=1)
+
+    return df_indices
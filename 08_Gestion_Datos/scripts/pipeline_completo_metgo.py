@@ -22,8 +22,9 @@ import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import queue
 import sqlite3
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from enum import Enum
+from operator import attrgetter
 
 # Configuración
 warnings.filterwarnings('ignore')
@@ -82,6 +83,98 @@ class Alerta:
     mensaje: str
     activa: bool = True
 
+CAMPOS_METEOROLOGICOS = tuple(campo.name for campo in fields(DatosMeteorologicos))
+
+# Índices que procesar_datos_meteorologicos agrega a cada registro
+INDICES_PROCESADOS = ('grados_dia', 'confort_termico')
+
+# Reglas de alerta: (columna, condición, tipo, nivel, plantilla del mensaje)
+REGLAS_ALERTAS = [
+    ('temperatura', lambda t: t < 0, 'heladas', 'critica', "Temperatura crítica: {:.1f}°C"),
+    ('temperatura', lambda t: t > 35, 'calor_extremo', 'alta', "Temperatura extrema: {:.1f}°C"),
+    ('humedad', lambda h: h > 90, 'humedad_excesiva', 'media', "Humedad excesiva: {:.1f}%"),
+    ('viento_velocidad', lambda v: v > 20, 'viento_fuerte', 'alta', "Viento fuerte: {:.1f} m/s")
+]
+
+class LoteMeteorologico:
+    """Lote columnar de datos meteorológicos respaldado por un DataFrame
+    
+    Las etapas del pipeline trabajan con máscaras vectorizadas sobre las
+    columnas; iterar o indexar el lote entrega vistas DatosMeteorologicos
+    (con grados_dia y confort_termico si el lote ya fue procesado).
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True)
+    
+    @classmethod
+    def desde_datos(cls, datos) -> 'LoteMeteorologico':
+        """Crear un lote desde una lista de DatosMeteorologicos (o devolver el mismo lote)"""
+        if isinstance(datos, cls):
+            return datos
+        
+        columnas = list(CAMPOS_METEOROLOGICOS)
+        if datos and all(hasattr(datos[0], indice) for indice in INDICES_PROCESADOS):
+            columnas += list(INDICES_PROCESADOS)
+        
+        filas = list(map(attrgetter(*columnas), datos))
+        df = pd.DataFrame.from_records(filas, columns=columnas)
+        if not df.empty:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return cls(df)
+    
+    def __len__(self) -> int:
+        return len(self.df)
+    
+    def __iter__(self):
+        columnas = list(self.df.columns)
+        extras = [c for c in columnas if c not in CAMPOS_METEOROLOGICOS]
+        for fila in self.filas(columnas):
+            registro = dict(zip(columnas, fila))
+            valores_extra = {c: registro.pop(c) for c in extras}
+            dato = DatosMeteorologicos(**registro)
+            for nombre, valor in valores_extra.items():
+                setattr(dato, nombre, valor)
+            yield dato
+    
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return LoteMeteorologico(self.df.iloc[indice])
+        return LoteMeteorologico(self.df.iloc[[indice]]).a_datos()[0]
+    
+    def columna(self, nombre: str) -> np.ndarray:
+        """Columna numérica como array float64"""
+        return self.df[nombre].to_numpy(dtype=np.float64)
+    
+    def filtrar(self, mascara: np.ndarray) -> 'LoteMeteorologico':
+        """Nuevo lote con las filas donde la máscara es verdadera"""
+        return LoteMeteorologico(self.df[mascara])
+    
+    def filas(self, columnas) -> List[tuple]:
+        """Tuplas de valores Python nativos (datetime, float, str) listas para sqlite3"""
+        valores = []
+        for columna in columnas:
+            serie = self.df[columna]
+            if pd.api.types.is_datetime64_any_dtype(serie):
+                valores.append(list(serie.dt.to_pydatetime()))
+            else:
+                valores.append(serie.tolist())
+        return list(zip(*valores))
+    
+    def a_datos(self) -> List[DatosMeteorologicos]:
+        """Materializar el lote como lista de dataclasses"""
+        return list(self)
+
+# Columnas insertadas por tabla, en el orden de los atributos de cada dataclass
+COLUMNAS_TABLAS_BD = {
+    'datos_meteorologicos': ('timestamp', 'temperatura', 'precipitacion', 'viento_velocidad',
+                             'viento_direccion', 'humedad', 'presion', 'radiacion_solar',
+                             'punto_rocio', 'fuente', 'calidad'),
+    'datos_iot': ('sensor_id', 'timestamp', 'tipo', 'valor', 'unidad', 'bateria', 'senal', 'ubicacion'),
+    'predicciones_ml': ('timestamp', 'modelo', 'variable', 'prediccion', 'confianza', 'horizonte'),
+    'alertas': ('timestamp', 'tipo', 'nivel', 'mensaje', 'activa')
+}
+
 class PipelineCompletoMETGO:
     """Pipeline completo de procesamiento de datos para METGO 3D"""
     
@@ -110,7 +203,10 @@ class PipelineCompletoMETGO:
             'habilitar_paralelismo': True,
             'habilitar_cache': True,
             'habilitar_validacion': True,
-            'habilitar_limpieza': True
+            'habilitar_limpieza': True,
+            'tamano_bloque_bd': 5000,  # filas por executemany
+            'escritura_bd_segundo_plano': False,  # persistir mientras se procesa el siguiente lote
+            'max_lotes_pendientes_bd': 8
         }
         
         # Estado del pipeline
@@ -127,8 +223,11 @@ class PipelineCompletoMETGO:
         self.cola_datos_procesados = queue.Queue()
         self.cola_alertas = queue.Queue()
         self.cola_predicciones = queue.Queue()
+        self.cola_escritura_bd = queue.Queue(maxsize=self.configuracion_pipeline['max_lotes_pendientes_bd'])
         
-        # Base de datos
+        # Base de datos (conexión compartida con el escritor en segundo plano)
+        self.lock_bd = threading.Lock()
+        self.hilo_escritor_bd = None
         self._inicializar_base_datos()
         
         # Cache de datos
@@ -287,7 +386,7 @@ class PipelineCompletoMETGO:
                 timestamp = timestamp_base + timedelta(hours=i)
                 
                 # Generar datos realistas
-                temperatura = 15 + 10 * np.sin(2 * np.pi * timestamp.dayofyear / 365) + np.random.normal(0, 3)
+                temperatura = 15 + 10 * np.sin(2 * np.pi * timestamp.timetuple().tm_yday / 365) + np.random.normal(0, 3)
                 precipitacion = np.random.exponential(0.5) if np.random.random() > 0.9 else 0
                 viento_velocidad = np.random.gamma(2, 2)
                 viento_direccion = np.random.uniform(0, 360)
@@ -342,7 +441,7 @@ class PipelineCompletoMETGO:
                 for sensor in sensores:
                     # Generar valor según el tipo de sensor
                     if sensor['tipo'] == 'temperatura':
-                        valor = 15 + 10 * np.sin(2 * np.pi * timestamp.dayofyear / 365) + np.random.normal(0, 2)
+                        valor = 15 + 10 * np.sin(2 * np.pi * timestamp.timetuple().tm_yday / 365) + np.random.normal(0, 2)
                     elif sensor['tipo'] == 'humedad':
                         valor = 60 + 20 * np.sin(2 * np.pi * timestamp.hour / 24) + np.random.normal(0, 5)
                         valor = max(0, min(100, valor))
@@ -375,12 +474,16 @@ class PipelineCompletoMETGO:
             self.logger.error(f"Error generando datos IoT sintéticos: {e}")
             return []
     
-    def validar_datos_meteorologicos(self, datos: List[DatosMeteorologicos]) -> List[DatosMeteorologicos]:
-        """Validar datos meteorológicos"""
+    def validar_datos_meteorologicos(self, datos):
+        """Validar datos meteorológicos con máscaras vectorizadas sobre el lote
+        
+        Acepta una lista de DatosMeteorologicos o un LoteMeteorologico y
+        devuelve el mismo tipo que recibe.
+        """
         try:
             self.logger.info("Validando datos meteorológicos...")
             
-            datos_validos = []
+            lote = LoteMeteorologico.desde_datos(datos)
             umbrales = {
                 'temperatura': {'min': -5, 'max': 40},
                 'precipitacion': {'min': 0, 'max': 100},
@@ -389,65 +492,53 @@ class PipelineCompletoMETGO:
                 'presion': {'min': 950, 'max': 1050},
                 'radiacion_solar': {'min': 0, 'max': 1200}
             }
+            penalizaciones = [('temperatura', 0.2), ('precipitacion', 0.1), ('humedad', 0.1), ('presion', 0.1)]
             
-            for dato in datos:
-                valido = True
-                calidad = 1.0
-                
-                # Validar temperatura
-                if not (umbrales['temperatura']['min'] <= dato.temperatura <= umbrales['temperatura']['max']):
-                    valido = False
-                    calidad -= 0.2
-                
-                # Validar precipitación
-                if not (umbrales['precipitacion']['min'] <= dato.precipitacion <= umbrales['precipitacion']['max']):
-                    valido = False
-                    calidad -= 0.1
-                
-                # Validar humedad
-                if not (umbrales['humedad']['min'] <= dato.humedad <= umbrales['humedad']['max']):
-                    valido = False
-                    calidad -= 0.1
-                
-                # Validar presión
-                if not (umbrales['presion']['min'] <= dato.presion <= umbrales['presion']['max']):
-                    valido = False
-                    calidad -= 0.1
-                
-                # Actualizar calidad
-                dato.calidad = max(0.0, calidad)
-                
-                if valido or calidad > 0.5:  # Aceptar datos con calidad > 50%
-                    datos_validos.append(dato)
+            valido = np.ones(len(lote), dtype=bool)
+            calidad = np.ones(len(lote), dtype=np.float64)
+            for campo, penalizacion in penalizaciones:
+                valores = lote.columna(campo)
+                en_rango = (valores >= umbrales[campo]['min']) & (valores <= umbrales[campo]['max'])
+                valido &= en_rango
+                calidad = calidad - np.where(en_rango, 0.0, penalizacion)
+            
+            # Actualizar calidad
+            df = lote.df.copy()
+            df['calidad'] = np.maximum(calidad, 0.0)
             
-            self.logger.info(f"✅ {len(datos_validos)}/{len(datos)} datos válidos")
-            return datos_validos
+            # Aceptar datos con calidad > 50%
+            lote_valido = LoteMeteorologico(df).filtrar(valido | (calidad > 0.5))
+            
+            self.logger.info(f"✅ {len(lote_valido)}/{len(lote)} datos válidos")
+            return lote_valido if isinstance(datos, LoteMeteorologico) else lote_valido.a_datos()
             
         except Exception as e:
             self.logger.error(f"Error validando datos meteorológicos: {e}")
             return []
     
-    def procesar_datos_meteorologicos(self, datos: List[DatosMeteorologicos]) -> List[DatosMeteorologicos]:
-        """Procesar datos meteorológicos"""
+    def procesar_datos_meteorologicos(self, datos):
+        """Procesar datos meteorológicos calculando índices agrícolas por columnas"""
         try:
             self.logger.info("Procesando datos meteorológicos...")
             
-            datos_procesados = []
+            lote = LoteMeteorologico.desde_datos(datos)
+            temperatura = lote.columna('temperatura')
+            humedad = lote.columna('humedad')
             
-            for dato in datos:
-                # Calcular índices agrícolas
-                grados_dia = max(0, dato.temperatura - 10)
-                confort_termico = 1 - abs(dato.temperatura - 20) / 20 - abs(dato.humedad - 60) / 60
-                confort_termico = max(0, min(1, confort_termico))
-                
-                # Agregar índices al dato (extender la estructura)
-                dato.grados_dia = grados_dia
-                dato.confort_termico = confort_termico
-                
-                datos_procesados.append(dato)
+            # Calcular índices agrícolas (NaN se trata igual que max/min de Python)
+            exceso = temperatura - 10
+            grados_dia = np.where(exceso > 0, exceso, 0.0)
+            confort_termico = 1 - np.abs(temperatura - 20) / 20 - np.abs(humedad - 60) / 60
+            confort_termico = np.where(confort_termico < 1, confort_termico, 1.0)
+            confort_termico = np.where(confort_termico > 0, confort_termico, 0.0)
+            
+            df = lote.df.copy()
+            df['grados_dia'] = grados_dia
+            df['confort_termico'] = confort_termico
+            lote_procesado = LoteMeteorologico(df)
             
-            self.logger.info(f"✅ {len(datos_procesados)} datos procesados")
-            return datos_procesados
+            self.logger.info(f"✅ {len(lote_procesado)} datos procesados")
+            return lote_procesado if isinstance(datos, LoteMeteorologico) else lote_procesado.a_datos()
             
         except Exception as e:
             self.logger.error(f"Error procesando datos meteorológicos: {e}")
@@ -503,53 +594,39 @@ class PipelineCompletoMETGO:
             self.logger.error(f"Error generando predicciones ML: {e}")
             return []
     
-    def evaluar_alertas(self, datos: List[DatosMeteorologicos]) -> List[Alerta]:
-        """Evaluar y generar alertas"""
+    def evaluar_alertas(self, datos) -> List[Alerta]:
+        """Evaluar y generar alertas con máscaras de umbral por columna"""
         try:
             self.logger.info("Evaluando alertas...")
             
+            lote = LoteMeteorologico.desde_datos(datos)
             alertas = []
             
-            for dato in datos:
-                # Alerta de heladas
-                if dato.temperatura < 0:
-                    alerta = Alerta(
-                        timestamp=dato.timestamp,
-                        tipo="heladas",
-                        nivel="critica",
-                        mensaje=f"Temperatura crítica: {dato.temperatura:.1f}°C"
-                    )
-                    alertas.append(alerta)
+            if len(lote):
+                filas, reglas = [], []
+                for numero, (columna, condicion, _, _, _) in enumerate(REGLAS_ALERTAS):
+                    indices = np.flatnonzero(condicion(lote.columna(columna)))
+                    filas.append(indices)
+                    reglas.append(np.full(len(indices), numero))
+                filas = np.concatenate(filas)
+                reglas = np.concatenate(reglas)
                 
-                # Alerta de calor extremo
-                elif dato.temperatura > 35:
-                    alerta = Alerta(
-                        timestamp=dato.timestamp,
-                        tipo="calor_extremo",
-                        nivel="alta",
-                        mensaje=f"Temperatura extrema: {dato.temperatura:.1f}°C"
-                    )
-                    alertas.append(alerta)
+                # Mismo orden que el recorrido registro a registro
+                orden = np.lexsort((reglas, filas))
+                filas, reglas = filas[orden], reglas[orden]
                 
-                # Alerta de humedad excesiva
-                if dato.humedad > 90:
-                    alerta = Alerta(
-                        timestamp=dato.timestamp,
-                        tipo="humedad_excesiva",
-                        nivel="media",
-                        mensaje=f"Humedad excesiva: {dato.humedad:.1f}%"
-                    )
-                    alertas.append(alerta)
+                valores = np.empty(len(filas))
+                for numero, (columna, *_) in enumerate(REGLAS_ALERTAS):
+                    es_regla = reglas == numero
+                    valores[es_regla] = lote.columna(columna)[filas[es_regla]]
+                timestamps = LoteMeteorologico(lote.df[['timestamp']].iloc[filas]).filas(['timestamp'])
                 
-                # Alerta de viento fuerte
-                if dato.viento_velocidad > 20:
-                    alerta = Alerta(
-                        timestamp=dato.timestamp,
-                        tipo="viento_fuerte",
-                        nivel="alta",
-                        mensaje=f"Viento fuerte: {dato.viento_velocidad:.1f} m/s"
+                alertas = [
+                    Alerta(timestamp=timestamp, tipo=regla[2], nivel=regla[3], mensaje=regla[4].format(valor))
+                    for (timestamp,), regla, valor in zip(
+                        timestamps, [REGLAS_ALERTAS[numero] for numero in reglas.tolist()], valores.tolist()
                     )
-                    alertas.append(alerta)
+                ]
             
             self.logger.info(f"✅ {len(alertas)} alertas generadas")
             return alertas
@@ -558,59 +635,44 @@ class PipelineCompletoMETGO:
             self.logger.error(f"Error evaluando alertas: {e}")
             return []
     
+    def _filas_para_tabla(self, datos: List, tabla: str) -> List[tuple]:
+        """Convertir una lista de dataclasses en tuplas de columnas en una sola pasada"""
+        columnas = COLUMNAS_TABLAS_BD[tabla]
+        if isinstance(datos, LoteMeteorologico):
+            return datos.filas(columnas)
+        
+        filas = list(map(attrgetter(*columnas), datos))
+        
+        if tabla == 'datos_iot':
+            posicion = columnas.index('ubicacion')
+            filas = [fila[:posicion] + (json.dumps(fila[posicion]),) + fila[posicion + 1:] for fila in filas]
+        
+        return filas
+    
     def guardar_datos_bd(self, datos: List, tabla: str) -> bool:
-        """Guardar datos en la base de datos"""
+        """Guardar datos en la base de datos con executemany por bloques en una sola transacción"""
         try:
-            if not datos:
+            if not len(datos):
                 return True
             
-            if tabla == 'datos_meteorologicos':
-                for dato in datos:
-                    self.cursor_bd.execute('''
-                        INSERT INTO datos_meteorologicos 
-                        (timestamp, temperatura, precipitacion, viento_velocidad, viento_direccion,
-                         humedad, presion, radiacion_solar, punto_rocio, fuente, calidad)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        dato.timestamp, dato.temperatura, dato.precipitacion,
-                        dato.viento_velocidad, dato.viento_direccion, dato.humedad,
-                        dato.presion, dato.radiacion_solar, dato.punto_rocio,
-                        dato.fuente, dato.calidad
-                    ))
-            
-            elif tabla == 'datos_iot':
-                for dato in datos:
-                    self.cursor_bd.execute('''
-                        INSERT INTO datos_iot 
-                        (sensor_id, timestamp, tipo, valor, unidad, bateria, senal, ubicacion)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        dato.sensor_id, dato.timestamp, dato.tipo, dato.valor,
-                        dato.unidad, dato.bateria, dato.senal, json.dumps(dato.ubicacion)
-                    ))
-            
-            elif tabla == 'predicciones_ml':
-                for dato in datos:
-                    self.cursor_bd.execute('''
-                        INSERT INTO predicciones_ml 
-                        (timestamp, modelo, variable, prediccion, confianza, horizonte)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        dato.timestamp, dato.modelo, dato.variable,
-                        dato.prediccion, dato.confianza, dato.horizonte
-                    ))
-            
-            elif tabla == 'alertas':
-                for dato in datos:
-                    self.cursor_bd.execute('''
-                        INSERT INTO alertas 
-                        (timestamp, tipo, nivel, mensaje, activa)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (
-                        dato.timestamp, dato.tipo, dato.nivel, dato.mensaje, dato.activa
-                    ))
+            if tabla not in COLUMNAS_TABLAS_BD:
+                raise ValueError(f"Tabla no soportada: {tabla}")
+            
+            columnas = COLUMNAS_TABLAS_BD[tabla]
+            sql = (f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+                   f"VALUES ({', '.join('?' for _ in columnas)})")
+            filas = self._filas_para_tabla(datos, tabla)
+            tamano_bloque = self.configuracion_pipeline['tamano_bloque_bd']
+            
+            with self.lock_bd:
+                try:
+                    for inicio in range(0, len(filas), tamano_bloque):
+                        self.cursor_bd.executemany(sql, filas[inicio:inicio + tamano_bloque])
+                    self.conexion_bd.commit()
+                except Exception:
+                    self.conexion_bd.rollback()
+                    raise
             
-            self.conexion_bd.commit()
             self.logger.info(f"✅ {len(datos)} registros guardados en {tabla}")
             return True
             
@@ -618,6 +680,63 @@ class PipelineCompletoMETGO:
             self.logger.error(f"Error guardando datos en {tabla}: {e}")
             return False
     
+    def iniciar_escritor_bd(self):
+        """Iniciar el hilo que persiste en segundo plano los lotes encolados"""
+        if self.hilo_escritor_bd is not None and self.hilo_escritor_bd.is_alive():
+            return
+        
+        self.hilo_escritor_bd = threading.Thread(
+            target=self._bucle_escritor_bd, name='escritor_bd_pipeline', daemon=True
+        )
+        self.hilo_escritor_bd.start()
+        self.hilos_activos.append(self.hilo_escritor_bd)
+        self.logger.info("Escritor de base de datos en segundo plano iniciado")
+    
+    def _bucle_escritor_bd(self):
+        """Consumir la cola de escritura hasta recibir la señal de término"""
+        while True:
+            lote = self.cola_escritura_bd.get()
+            try:
+                if lote is None:
+                    return
+                datos, tabla = lote
+                if not self.guardar_datos_bd(datos, tabla):
+                    self.estado_pipeline['errores'].append({
+                        'timestamp': datetime.now().isoformat(),
+                        'error': f"Escritura en segundo plano fallida en {tabla}"
+                    })
+            finally:
+                self.cola_escritura_bd.task_done()
+    
+    def guardar_datos_bd_async(self, datos: List, tabla: str) -> bool:
+        """Encolar un lote para el escritor en segundo plano
+        
+        La cola es acotada: si el escritor va atrasado, esta llamada espera en
+        lugar de acumular lotes sin límite en memoria.
+        """
+        if not len(datos):
+            return True
+        
+        self.iniciar_escritor_bd()
+        self.cola_escritura_bd.put((datos, tabla))
+        return True
+    
+    def esperar_escrituras_bd(self):
+        """Bloquear hasta que el escritor en segundo plano vacíe la cola"""
+        if self.hilo_escritor_bd is not None and self.hilo_escritor_bd.is_alive():
+            self.cola_escritura_bd.join()
+    
+    def detener_escritor_bd(self):
+        """Persistir los lotes pendientes y detener el hilo escritor"""
+        if self.hilo_escritor_bd is None or not self.hilo_escritor_bd.is_alive():
+            return
+        
+        self.cola_escritura_bd.put(None)
+        self.hilo_escritor_bd.join()
+        self.hilos_activos.remove(self.hilo_escritor_bd)
+        self.hilo_escritor_bd = None
+        self.logger.info("Escritor de base de datos en segundo plano detenido")
+    
     def ejecutar_pipeline_completo(self) -> Dict:
         """Ejecutar pipeline completo de procesamiento"""
         try:
@@ -655,7 +774,9 @@ class PipelineCompletoMETGO:
             self.logger.info("🔍 Etapa 2: Validando datos...")
             inicio_etapa = datetime.now()
             
-            datos_validos = self.validar_datos_meteorologicos(datos_meteorologicos)
+            # Lote columnar para validación, procesamiento, alertas y guardado
+            lote_meteorologico = LoteMeteorologico.desde_datos(datos_meteorologicos)
+            datos_validos = self.validar_datos_meteorologicos(lote_meteorologico)
             
             fin_etapa = datetime.now()
             duracion_etapa = (fin_etapa - inicio_etapa).total_seconds()
@@ -716,10 +837,13 @@ class PipelineCompletoMETGO:
             self.logger.info("💾 Etapa 6: Guardando en base de datos...")
             inicio_etapa = datetime.now()
             
-            guardado_meteorologicos = self.guardar_datos_bd(datos_procesados, 'datos_meteorologicos')
-            guardado_iot = self.guardar_datos_bd(datos_iot, 'datos_iot')
-            guardado_predicciones = self.guardar_datos_bd(predicciones, 'predicciones_ml')
-            guardado_alertas = self.guardar_datos_bd(alertas, 'alertas')
+            segundo_plano = self.configuracion_pipeline['escritura_bd_segundo_plano']
+            guardar = self.guardar_datos_bd_async if segundo_plano else self.guardar_datos_bd
+            
+            guardado_meteorologicos = guardar(datos_procesados, 'datos_meteorologicos')
+            guardado_iot = guardar(datos_iot, 'datos_iot')
+            guardado_predicciones = guardar(predicciones, 'predicciones_ml')
+            guardado_alertas = guardar(alertas, 'alertas')
             
             fin_etapa = datetime.now()
             duracion_etapa = (fin_etapa - inicio_etapa).total_seconds()
@@ -727,6 +851,7 @@ class PipelineCompletoMETGO:
             resultados['etapas']['guardado_bd'] = {
                 'estado': EstadoProcesamiento.COMPLETADO.value,
                 'duracion_segundos': duracion_etapa,
+                'segundo_plano': segundo_plano,
                 'meteorologicos_guardados': guardado_meteorologicos,
                 'iot_guardados': guardado_iot,
                 'predicciones_guardadas': guardado_predicciones,
@@ -767,26 +892,30 @@ class PipelineCompletoMETGO:
     def obtener_metricas_pipeline(self) -> Dict:
         """Obtener métricas del pipeline"""
         try:
-            # Consultar métricas de la base de datos
-            self.cursor_bd.execute('''
-                SELECT COUNT(*) as total_datos FROM datos_meteorologicos
-            ''')
-            total_datos = self.cursor_bd.fetchone()[0]
+            # Contar también los lotes que el escritor aún tiene en cola
+            self.esperar_escrituras_bd()
             
-            self.cursor_bd.execute('''
-                SELECT COUNT(*) as total_iot FROM datos_iot
-            ''')
-            total_iot = self.cursor_bd.fetchone()[0]
-            
-            self.cursor_bd.execute('''
-                SELECT COUNT(*) as total_predicciones FROM predicciones_ml
-            ''')
-            total_predicciones = self.cursor_bd.fetchone()[0]
-            
-            self.cursor_bd.execute('''
-                SELECT COUNT(*) as total_alertas FROM alertas WHERE activa = 1
-            ''')
-            total_alertas = self.cursor_bd.fetchone()[0]
+            # Consultar métricas de la base de datos
+            with self.lock_bd:
+                self.cursor_bd.execute('''
+                    SELECT COUNT(*) as total_datos FROM datos_meteorologicos
+                ''')
+                total_datos = self.cursor_bd.fetchone()[0]
+                
+                self.cursor_bd.execute('''
+                    SELECT COUNT(*) as total_iot FROM datos_iot
+                ''')
+                total_iot = self.cursor_bd.fetchone()[0]
+                
+                self.cursor_bd.execute('''
+                    SELECT COUNT(*) as total_predicciones FROM predicciones_ml
+                ''')
+                total_predicciones = self.cursor_bd.fetchone()[0]
+                
+                self.cursor_bd.execute('''
+                    SELECT COUNT(*) as total_alertas FROM alertas WHERE activa = 1
+                ''')
+                total_alertas = self.cursor_bd.fetchone()[0]
             
             return {
                 'timestamp': datetime.now().isoformat(),
@@ -852,7 +981,8 @@ class PipelineCompletoMETGO:
         try:
             self.logger.info("🛑 Cerrando pipeline...")
             
-            # Detener hilos
+            # Persistir lotes pendientes y detener hilos
+            self.detener_escritor_bd()
             self.detener_hilos.set()
             
             # Cerrar base de datos
@@ -10,6 +10,7 @@ import json
 import logging
 from datetime import datetime, timedelta
 import os
+import sys
 import requests
 import sqlalchemy
 from sqlalchemy import create_engine, text
@@ -24,16 +25,28 @@ from sklearn.decomposition import PCA
 import warnings
 warnings.filterwarnings('ignore')
 
+from indices_agrometeorologicos import calcular_indices_agrometeorologicos
+from analisis_climatologico import agregar_climatologia, detectar_eventos_extremos
+from archivo_columnar_historico import ArchivoColumnarHistorico, PYARROW_AVAILABLE
+from acceso_datos_sqlite import escribir_dataframe, obtener_pool
+
 class SistemaBaseDatosHistorica5Anios:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.base_datos = "base_datos_historica_5_anios.db"
+        self.pool = obtener_pool(self.base_datos)
         self.datos_dir = "datos_historicos_5_anios"
         self.analisis_dir = "analisis_historicos"
         self.modelos_dir = "modelos_historicos"
         self._crear_directorios()
         self._inicializar_base_datos()
         
+        # Archivo Parquet particionado por estación/año (opcional, requiere pyarrow)
+        self.archivo_columnar = (
+            ArchivoColumnarHistorico(os.path.join(self.datos_dir, 'parquet'))
+            if PYARROW_AVAILABLE else None
+        )
+        
         # Configuración de estaciones meteorológicas
         self.estaciones_meteorologicas = {
             'quillota_centro': {
@@ -122,7 +135,7 @@ class SistemaBaseDatosHistorica5Anios:
     def _inicializar_base_datos(self):
         """Inicializar base de datos histórica con esquema optimizado"""
         try:
-            conn = sqlite3.connect(self.base_datos)
+            conn = self.pool.conexion()
             cursor = conn.cursor()
             
             # Tabla principal de datos meteorológicos históricos
@@ -237,6 +250,15 @@ class SistemaBaseDatosHistorica5Anios:
                 )
             ''')
             
+            # Marca de agua por estación para actualizaciones incrementales
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS marcas_agua_historicas (
+                    estacion TEXT PRIMARY KEY,
+                    ultima_fecha DATE NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
             # Crear índices para optimizar consultas
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_fecha_estacion ON datos_meteorologicos_historicos(fecha, estacion)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_fecha ON datos_meteorologicos_historicos(fecha)')
@@ -245,14 +267,20 @@ class SistemaBaseDatosHistorica5Anios:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_tipo_evento ON eventos_extremos(tipo_evento)')
             
             conn.commit()
-            conn.close()
             self.logger.info("Base de datos histórica de 5 años inicializada")
             
         except Exception as e:
             self.logger.error(f"Error inicializando base de datos: {e}")
     
-    def generar_datos_historicos_5_anios(self) -> pd.DataFrame:
-        """Obtener datos históricos reales para 5 años desde APIs meteorológicas"""
+    def generar_datos_historicos_5_anios(self, incremental: bool = False) -> pd.DataFrame:
+        """Obtener datos históricos reales para 5 años desde APIs meteorológicas
+        
+        Con incremental=True solo se descarga el rango posterior a la marca de agua
+        de cada estación y se actualizan las particiones derivadas afectadas.
+        """
+        if incremental:
+            return self.actualizar_datos_historicos_incremental()
+        
         try:
             print("[OBTENIENDO] Datos históricos reales de 5 años desde APIs...")
             
@@ -330,6 +358,188 @@ class SistemaBaseDatosHistorica5Anios:
             print(f"[ERROR] Error obteniendo datos históricos reales: {e}")
             return self._generar_datos_fallback()
     
+    def actualizar_datos_historicos_incremental(self) -> pd.DataFrame:
+        """Descargar solo los días nuevos de cada estación y actualizar las particiones afectadas
+        
+        Usa la marca de agua por estación (marcas_agua_historicas) para pedir a
+        OpenMeteo únicamente el rango faltante, agrega las filas nuevas a
+        datos_meteorologicos_historicos e indices_meteorologicos y recalcula
+        patrones (estación, mes), eventos extremos (estación, año), tendencias y
+        calidad solo para las estaciones que recibieron datos. Todo se escribe
+        en una transacción junto con la marca de agua, y las (estación, fecha)
+        ya almacenadas se descartan, por lo que repetir la actualización no
+        duplica filas.
+        """
+        try:
+            print("[INCREMENTAL] Actualizando base de datos histórica...")
+            
+            marcas = self.pool.ejecutar_con_reintento(self._obtener_marcas_agua)
+            
+            if not marcas:
+                print("[INCREMENTAL] Sin marcas de agua, se realiza la carga completa")
+                return self.generar_datos_historicos_5_anios()
+            
+            fecha_fin = datetime.now()
+            fecha_inicio_defecto = fecha_fin - timedelta(days=5 * 365)
+            
+            datos = []
+            for estacion, info_estacion in self.estaciones_meteorologicas.items():
+                ultima_fecha = marcas.get(estacion)
+                fecha_inicio = ultima_fecha + timedelta(days=1) if ultima_fecha else fecha_inicio_defecto
+                
+                if fecha_inicio.date() > fecha_fin.date():
+                    print(f"[INCREMENTAL] {estacion} al día")
+                    continue
+                
+                print(f"[INCREMENTAL] {estacion}: {fecha_inicio.strftime('%Y-%m-%d')} a {fecha_fin.strftime('%Y-%m-%d')}")
+                datos.extend(self._obtener_datos_historicos_openmeteo(
+                    info_estacion['latitud'], info_estacion['longitud'],
+                    fecha_inicio, fecha_fin, estacion
+                ))
+            
+            df_nuevo = pd.DataFrame(datos)
+            if df_nuevo.empty:
+                print("[INCREMENTAL] No hay datos nuevos")
+                return df_nuevo
+            
+            # El archivo de OpenMeteo publica con días de retraso: descartar días sin mediciones
+            variables_medidas = [v for v in ('temperatura_max', 'temperatura_min', 'precipitacion')
+                                 if v in df_nuevo.columns]
+            df_nuevo = df_nuevo.dropna(subset=variables_medidas, how='all')
+            if df_nuevo.empty:
+                print("[INCREMENTAL] No hay datos nuevos publicados")
+                return df_nuevo
+            
+            df_nuevo['fecha'] = pd.to_datetime(df_nuevo['fecha'])
+            df_nuevo = self._aplicar_actualizacion_incremental(df_nuevo)
+            
+            print(f"[OK] Actualización incremental completada: {len(df_nuevo)} registros nuevos")
+            return df_nuevo
+        
+        except Exception as e:
+            print(f"[ERROR] Error en actualización incremental: {e}")
+            return pd.DataFrame()
+    
+    def _obtener_marcas_agua(self, conn: sqlite3.Connection) -> Dict[str, datetime]:
+        """Leer la última fecha almacenada por estación, inicializándola desde los datos si falta"""
+        marcas = {
+            estacion: datetime.strptime(str(fecha)[:10], '%Y-%m-%d')
+            for estacion, fecha in conn.execute("SELECT estacion, ultima_fecha FROM marcas_agua_historicas")
+        }
+        
+        if not marcas:
+            # Bases creadas antes de existir la tabla de marcas de agua
+            filas = conn.execute("""
+                SELECT estacion, MAX(fecha) FROM datos_meteorologicos_historicos
+                GROUP BY estacion
+            """).fetchall()
+            for estacion, fecha in filas:
+                if fecha:
+                    marcas[estacion] = datetime.strptime(str(fecha)[:10], '%Y-%m-%d')
+        
+        return marcas
+    
+    def _actualizar_marcas_agua(self, conn: sqlite3.Connection, df: pd.DataFrame):
+        """Avanzar la marca de agua de cada estación presente en df"""
+        ultimas = pd.to_datetime(df['fecha']).groupby(df['estacion']).max()
+        conn.executemany("""
+            INSERT INTO marcas_agua_historicas (estacion, ultima_fecha, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(estacion) DO UPDATE SET
+                ultima_fecha = MAX(ultima_fecha, excluded.ultima_fecha),
+                updated_at = excluded.updated_at
+        """, [(estacion, fecha.strftime('%Y-%m-%d')) for estacion, fecha in ultimas.items()])
+    
+    def _aplicar_actualizacion_incremental(self, df_recibido: pd.DataFrame) -> pd.DataFrame:
+        """Agregar las filas nuevas y recalcular solo las particiones derivadas que tocan
+        
+        Los derivados se calculan antes de escribir, sobre lo almacenado más las
+        filas nuevas. Luego filas, índices, particiones derivadas y marca de agua
+        se escriben en una sola transacción: si algo falla no queda nada a medias
+        y la marca de agua no avanza, así que la próxima ejecución reintenta los
+        mismos días.
+        
+        Returns:
+            pd.DataFrame: Filas efectivamente agregadas
+        """
+        estaciones = sorted(df_recibido['estacion'].unique())
+        marcadores = ','.join('?' for _ in estaciones)
+        df_existente = self.pool.leer_dataframe(
+            f"SELECT * FROM datos_meteorologicos_historicos WHERE estacion IN ({marcadores})",
+            estaciones
+        )
+        df_existente['fecha'] = pd.to_datetime(df_existente['fecha'])
+        
+        # Descartar (estación, día) ya almacenados: la tabla no tiene clave única
+        almacenados = pd.MultiIndex.from_arrays([df_existente['estacion'], df_existente['fecha'].dt.normalize()])
+        claves_nuevas = pd.MultiIndex.from_arrays([df_recibido['estacion'], df_recibido['fecha'].dt.normalize()])
+        df_nuevo = df_recibido[~claves_nuevas.isin(almacenados) & ~claves_nuevas.duplicated(keep='last')]
+        
+        if df_nuevo.empty:
+            # Los días ya estaban guardados: solo alinear la marca de agua
+            with self.pool.transaccion() as conn:
+                self._actualizar_marcas_agua(conn, df_recibido)
+            return df_nuevo
+        
+        df_estaciones = pd.concat([df_existente, df_nuevo], ignore_index=True)
+        claves_mes = set(zip(df_nuevo['estacion'], df_nuevo['fecha'].dt.month))
+        claves_año = set(zip(df_nuevo['estacion'], df_nuevo['fecha'].dt.year))
+        
+        # Patrones estacionales: particiones (estación, mes) con datos nuevos
+        mascara_mes = pd.Series(
+            list(zip(df_estaciones['estacion'], df_estaciones['fecha'].dt.month)),
+            index=df_estaciones.index
+        ).isin(claves_mes)
+        df_patrones = self._construir_patrones_estacionales(df_estaciones[mascara_mes])
+        
+        # Eventos extremos: umbrales de toda la estación, eventos solo en (estación, año) nuevos
+        mascara_año = pd.Series(
+            list(zip(df_estaciones['estacion'], df_estaciones['fecha'].dt.year)),
+            index=df_estaciones.index
+        ).isin(claves_año)
+        df_eventos = self._construir_eventos_extremos(df_estaciones, filas_objetivo=mascara_año)
+        
+        # Tendencias y calidad dependen del registro completo de cada estación
+        df_tendencias = self._construir_tendencias_climaticas(df_estaciones)
+        df_calidad = self._construir_calidad_datos(df_estaciones)
+        
+        with self.pool.transaccion() as conn:
+            escribir_dataframe(conn, 'datos_meteorologicos_historicos', df_nuevo)
+            escribir_dataframe(conn, 'indices_meteorologicos', calcular_indices_agrometeorologicos(df_nuevo))
+            
+            conn.executemany(
+                "DELETE FROM patrones_estacionales WHERE estacion_meteorologica = ? AND mes = ?",
+                [(estacion, int(mes)) for estacion, mes in claves_mes]
+            )
+            conn.executemany(
+                "DELETE FROM eventos_extremos WHERE estacion = ? AND strftime('%Y', fecha_evento) = ?",
+                [(estacion, str(año)) for estacion, año in claves_año]
+            )
+            conn.executemany(
+                "DELETE FROM tendencias_climaticas WHERE estacion_meteorologica = ?",
+                [(estacion,) for estacion in estaciones]
+            )
+            conn.executemany(
+                "DELETE FROM calidad_datos WHERE estacion = ?",
+                [(estacion,) for estacion in estaciones]
+            )
+            for tabla, df_tabla in [('patrones_estacionales', df_patrones),
+                                    ('eventos_extremos', df_eventos),
+                                    ('tendencias_climaticas', df_tendencias),
+                                    ('calidad_datos', df_calidad)]:
+                if not df_tabla.empty:
+                    escribir_dataframe(conn, tabla, df_tabla)
+            
+            # La marca de agua avanza en la misma transacción que los datos y sus derivados
+            self._actualizar_marcas_agua(conn, df_nuevo)
+        
+        if self.archivo_columnar is not None:
+            self.archivo_columnar.agregar(df_nuevo)
+        
+        print(f"[OK] Particiones actualizadas: {len(claves_mes)} (estación, mes), "
+              f"{len(claves_año)} (estación, año), {len(estaciones)} estaciones")
+        return df_nuevo
+    
     def _obtener_datos_historicos_openmeteo(self, lat: float, lon: float, 
                                           fecha_inicio: datetime, fecha_fin: datetime, 
                                           estacion: str) -> List[Dict]:
@@ -582,13 +792,16 @@ class SistemaBaseDatosHistorica5Anios:
         try:
             print("[GUARDANDO] Datos históricos en base de datos...")
             
-            conn = sqlite3.connect(self.base_datos)
-            
-            # Usar pandas para insertar datos de manera eficiente
-            df.to_sql('datos_meteorologicos_historicos', conn, if_exists='replace', index=False)
+            with self.pool.transaccion() as conn:
+                escribir_dataframe(conn, 'datos_meteorologicos_historicos', df, reemplazar=True)
+                
+                # Reiniciar marcas de agua a partir de los datos recién cargados
+                conn.execute("DELETE FROM marcas_agua_historicas")
+                self._actualizar_marcas_agua(conn, df)
             
-            conn.commit()
-            conn.close()
+            # Copia columnar para consultas y exportaciones por estación/año
+            if self.archivo_columnar is not None:
+                self.archivo_columnar.escribir(df, reemplazar=True)
             
             print("[OK] Datos históricos guardados exitosamente")
             
@@ -600,54 +813,11 @@ class SistemaBaseDatosHistorica5Anios:
         try:
             print("[CALCULANDO] Índices meteorológicos...")
             
-            indices = []
+            # Cálculo columnar de todos los índices en una sola pasada
+            df_indices = calcular_indices_agrometeorologicos(df)
             
-            for _, row in df.iterrows():
-                # Índice de sequía (SPI simplificado)
-                indice_sequia = self._calcular_indice_sequia(row['precipitacion'])
-                
-                # Índice de helada
-                indice_helada = self._calcular_indice_helada(row['temperatura_min'])
-                
-                # Índice de estrés hídrico
-                indice_estres_hidrico = self._calcular_indice_estres_hidrico(
-                    row['temperatura_promedio'], row['humedad_relativa'], row['velocidad_viento']
-                )
-                
-                # Índice de crecimiento
-                indice_crecimiento = self._calcular_indice_crecimiento(
-                    row['temperatura_promedio'], row['radiacion_solar'], row['precipitacion']
-                )
-                
-                # Índice de rendimiento
-                indice_rendimiento = self._calcular_indice_rendimiento(
-                    row['temperatura_promedio'], row['precipitacion'], row['radiacion_solar']
-                )
-                
-                # Grados-día de calor
-                grado_dias_calor = max(0, row['temperatura_promedio'] - 10)
-                
-                # Grados-día de frío
-                grado_dias_frio = max(0, 10 - row['temperatura_promedio'])
-                
-                indices.append({
-                    'fecha': row['fecha'],
-                    'estacion': row['estacion'],
-                    'indice_sequia': round(indice_sequia, 3),
-                    'indice_helada': round(indice_helada, 3),
-                    'indice_estres_hidrico': round(indice_estres_hidrico, 3),
-                    'indice_crecimiento': round(indice_crecimiento, 3),
-                    'indice_rendimiento': round(indice_rendimiento, 3),
-                    'grado_dias_calor': round(grado_dias_calor, 2),
-                    'grado_dias_frio': round(grado_dias_frio, 2)
-                })
-            
-            df_indices = pd.DataFrame(indices)
-            
-            conn = sqlite3.connect(self.base_datos)
-            df_indices.to_sql('indices_meteorologicos', conn, if_exists='replace', index=False)
-            conn.commit()
-            conn.close()
+            with self.pool.transaccion() as conn:
+                escribir_dataframe(conn, 'indices_meteorologicos', df_indices, reemplazar=True)
             
             print("[OK] Índices meteorológicos calculados")
             
@@ -728,235 +898,220 @@ class SistemaBaseDatosHistorica5Anios:
         try:
             print("[CALCULANDO] Patrones estacionales...")
             
-            patrones = []
+            df_patrones = self._construir_patrones_estacionales(df)
             
-            for estacion in df['estacion'].unique():
-                df_estacion = df[df['estacion'] == estacion].copy()
-                
-                for variable in self.variables_meteorologicas.keys():
-                    if variable in df_estacion.columns:
-                        for mes in range(1, 13):
-                            datos_mes = df_estacion[df_estacion['fecha'].dt.month == mes][variable]
-                            
-                            if len(datos_mes) > 0:
-                                patron = {
-                                    'estacion_meteorologica': estacion,
-                                    'mes': mes,
-                                    'variable': variable,
-                                    'promedio': round(datos_mes.mean(), 3),
-                                    'mediana': round(datos_mes.median(), 3),
-                                    'desviacion_estandar': round(datos_mes.std(), 3),
-                                    'minimo': round(datos_mes.min(), 3),
-                                    'maximo': round(datos_mes.max(), 3),
-                                    'percentil_25': round(datos_mes.quantile(0.25), 3),
-                                    'percentil_75': round(datos_mes.quantile(0.75), 3),
-                                    'año_calculo': datetime.now().year
-                                }
-                                patrones.append(patron)
-            
-            df_patrones = pd.DataFrame(patrones)
-            
-            conn = sqlite3.connect(self.base_datos)
-            df_patrones.to_sql('patrones_estacionales', conn, if_exists='replace', index=False)
-            conn.commit()
-            conn.close()
+            with self.pool.transaccion() as conn:
+                escribir_dataframe(conn, 'patrones_estacionales', df_patrones, reemplazar=True)
             
             print("[OK] Patrones estacionales calculados")
             
         except Exception as e:
             print(f"[ERROR] Error calculando patrones estacionales: {e}")
     
+    def _construir_patrones_estacionales(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Construir patrones estacionales por estación, variable y mes"""
+        variables = [v for v in self.variables_meteorologicas.keys() if v in df.columns]
+        df_patrones = agregar_climatologia(df, variables, claves=['estacion'], periodo='mes')
+        if df_patrones.empty:
+            return pd.DataFrame()
+        
+        # Mismo orden que el recorrido estación -> variable -> mes
+        orden_estacion = {e: i for i, e in enumerate(pd.unique(df['estacion']))}
+        orden_variable = {v: i for i, v in enumerate(variables)}
+        df_patrones = df_patrones.iloc[np.lexsort((
+            df_patrones['mes'].to_numpy(),
+            df_patrones['variable'].map(orden_variable).to_numpy(),
+            df_patrones['estacion'].map(orden_estacion).to_numpy()
+        ))].reset_index(drop=True)
+        
+        df_patrones = df_patrones.rename(columns={'estacion': 'estacion_meteorologica'})
+        df_patrones['año_calculo'] = datetime.now().year
+        return df_patrones
+    
+    def obtener_climatologia(self, periodo: str = 'mes', variables: Optional[List[str]] = None,
+                             estacion: Optional[str] = None) -> pd.DataFrame:
+        """Obtener climatología desde la base histórica agrupando por estación y periodo
+        
+        periodo acepta 'mes', 'semana', 'estacion_año' o una columna existente de
+        la tabla histórica; pensado para dashboards que necesitan climatologías
+        distintas de las mensuales precalculadas en patrones_estacionales.
+        """
+        try:
+            variables = variables or list(self.variables_meteorologicas.keys())
+            columnas_tabla = {fila[1] for fila in self.pool.consultar("PRAGMA table_info(datos_meteorologicos_historicos)")}
+            columnas = ['fecha', 'estacion'] + [v for v in variables if v in columnas_tabla]
+            if periodo in columnas_tabla and periodo not in columnas:
+                columnas.append(periodo)
+            
+            query = f"SELECT {', '.join(columnas)} FROM datos_meteorologicos_historicos"
+            params = []
+            if estacion:
+                query += " WHERE estacion = ?"
+                params.append(estacion)
+            
+            df = self.pool.leer_dataframe(query, params, parse_dates=['fecha'])
+            
+            return agregar_climatologia(df, variables, claves=['estacion'], periodo=periodo)
+            
+        except Exception as e:
+            print(f"[ERROR] Error obteniendo climatología: {e}")
+            return pd.DataFrame()
+    
     def _calcular_tendencias_climaticas(self, df: pd.DataFrame):
         """Calcular tendencias climáticas a largo plazo"""
         try:
             print("[CALCULANDO] Tendencias climáticas...")
             
-            tendencias = []
+            df_tendencias = self._construir_tendencias_climaticas(df)
             
-            for estacion in df['estacion'].unique():
-                df_estacion = df[df['estacion'] == estacion].copy()
-                
-                for variable in ['temperatura_promedio', 'precipitacion', 'humedad_relativa']:
-                    if variable in df_estacion.columns:
-                        # Calcular promedio anual
-                        df_anual = df_estacion.groupby(df_estacion['fecha'].dt.year)[variable].mean().reset_index()
-                        df_anual.columns = ['año', 'valor']
-                        
-                        if len(df_anual) >= 3:  # Mínimo 3 años para calcular tendencia
-                            # Regresión lineal simple
-                            X = df_anual['año'].values.reshape(-1, 1)
-                            y = df_anual['valor'].values
-                            
-                            # Calcular pendiente (tendencia anual)
-                            pendiente = np.corrcoef(df_anual['año'], df_anual['valor'])[0, 1]
-                            if not np.isnan(pendiente):
-                                tendencia_anual = pendiente
-                                r_cuadrado = pendiente ** 2
-                                cambio_total = (df_anual['valor'].iloc[-1] - df_anual['valor'].iloc[0])
-                                significancia = 0.8 if abs(pendiente) > 0.1 else 0.3
-                                
-                                tendencia = {
-                                    'estacion_meteorologica': estacion,
-                                    'variable': variable,
-                                    'periodo_inicio': f"{df_anual['año'].min()}-01-01",
-                                    'periodo_fin': f"{df_anual['año'].max()}-12-31",
-                                    'tendencia_anual': round(tendencia_anual, 4),
-                                    'significancia': round(significancia, 3),
-                                    'r_cuadrado': round(r_cuadrado, 3),
-                                    'cambio_total': round(cambio_total, 3)
-                                }
-                                tendencias.append(tendencia)
-            
-            df_tendencias = pd.DataFrame(tendencias)
-            
-            conn = sqlite3.connect(self.base_datos)
-            df_tendencias.to_sql('tendencias_climaticas', conn, if_exists='replace', index=False)
-            conn.commit()
-            conn.close()
+            with self.pool.transaccion() as conn:
+                escribir_dataframe(conn, 'tendencias_climaticas', df_tendencias, reemplazar=True)
             
             print("[OK] Tendencias climáticas calculadas")
             
         except Exception as e:
             print(f"[ERROR] Error calculando tendencias climáticas: {e}")
     
-    def _detectar_eventos_extremos(self, df: pd.DataFrame):
+    def _construir_tendencias_climaticas(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Construir tendencias climáticas anuales por estación y variable"""
+        tendencias = []
+        
+        for estacion in df['estacion'].unique():
+            df_estacion = df[df['estacion'] == estacion].copy()
+            
+            for variable in ['temperatura_promedio', 'precipitacion', 'humedad_relativa']:
+                if variable in df_estacion.columns:
+                    # Calcular promedio anual
+                    df_anual = df_estacion.groupby(df_estacion['fecha'].dt.year)[variable].mean().reset_index()
+                    df_anual.columns = ['año', 'valor']
+                    
+                    if len(df_anual) >= 3:  # Mínimo 3 años para calcular tendencia
+                        # Regresión lineal simple
+                        X = df_anual['año'].values.reshape(-1, 1)
+                        y = df_anual['valor'].values
+                        
+                        # Calcular pendiente (tendencia anual)
+                        pendiente = np.corrcoef(df_anual['año'], df_anual['valor'])[0, 1]
+                        if not np.isnan(pendiente):
+                            tendencia_anual = pendiente
+                            r_cuadrado = pendiente ** 2
+                            cambio_total = (df_anual['valor'].iloc[-1] - df_anual['valor'].iloc[0])
+                            significancia = 0.8 if abs(pendiente) > 0.1 else 0.3
+                            
+                            tendencia = {
+                                'estacion_meteorologica': estacion,
+                                'variable': variable,
+                                'periodo_inicio': f"{df_anual['año'].min()}-01-01",
+                                'periodo_fin': f"{df_anual['año'].max()}-12-31",
+                                'tendencia_anual': round(tendencia_anual, 4),
+                                'significancia': round(significancia, 3),
+                                'r_cuadrado': round(r_cuadrado, 3),
+                                'cambio_total': round(cambio_total, 3)
+                            }
+                            tendencias.append(tendencia)
+        
+        return pd.DataFrame(tendencias)
+    
+    def _detectar_eventos_extremos(self, df: pd.DataFrame, ventana_climatologica: Optional[str] = None):
         """Detectar eventos meteorológicos extremos"""
         try:
             print("[DETECTANDO] Eventos extremos...")
             
-            eventos = []
+            df_eventos = self._construir_eventos_extremos(df, ventana_climatologica=ventana_climatologica)
             
-            for estacion in df['estacion'].unique():
-                df_estacion = df[df['estacion'] == estacion].copy()
-                
-                for variable in self.variables_meteorologicas.keys():
-                    if variable in df_estacion.columns:
-                        valores = df_estacion[variable].dropna()
-                        if len(valores) > 0:
-                            # Calcular umbrales extremos (percentiles 5 y 95)
-                            umbral_bajo = valores.quantile(0.05)
-                            umbral_alto = valores.quantile(0.95)
-                            
-                            # Detectar eventos extremos
-                            for _, row in df_estacion.iterrows():
-                                valor = row[variable]
-                                if pd.notna(valor):
-                                    if valor <= umbral_bajo or valor >= umbral_alto:
-                                        desviacion = abs(valor - valores.mean()) / valores.std()
-                                        
-                                        severidad = 'alta' if desviacion > 3 else 'moderada' if desviacion > 2 else 'baja'
-                                        
-                                        tipo_evento = f"{variable}_extremo"
-                                        if valor <= umbral_bajo:
-                                            tipo_evento += "_bajo"
-                                        else:
-                                            tipo_evento += "_alto"
-                                        
-                                        impacto = self._evaluar_impacto_evento(variable, valor, estacion)
-                                        
-                                        evento = {
-                                            'fecha_evento': row['fecha'],
-                                            'estacion': estacion,
-                                            'tipo_evento': tipo_evento,
-                                            'variable_afectada': variable,
-                                            'valor_medido': round(valor, 3),
-                                            'valor_normal': round(valores.mean(), 3),
-                                            'desviacion': round(desviacion, 3),
-                                            'severidad': severidad,
-                                            'impacto': impacto
-                                        }
-                                        eventos.append(evento)
-            
-            df_eventos = pd.DataFrame(eventos)
-            
-            conn = sqlite3.connect(self.base_datos)
-            df_eventos.to_sql('eventos_extremos', conn, if_exists='replace', index=False)
-            conn.commit()
-            conn.close()
+            with self.pool.transaccion() as conn:
+                escribir_dataframe(conn, 'eventos_extremos', df_eventos, reemplazar=True)
             
             print("[OK] Eventos extremos detectados")
             
         except Exception as e:
             print(f"[ERROR] Error detectando eventos extremos: {e}")
     
-    def _evaluar_impacto_evento(self, variable: str, valor: float, estacion: str) -> str:
-        """Evaluar impacto de evento extremo"""
-        impactos = {
-            'temperatura_max': 'estres_termico' if valor > 35 else 'normal',
-            'temperatura_min': 'riesgo_helada' if valor < 0 else 'normal',
-            'precipitacion': 'inundacion' if valor > 50 else 'sequia' if valor == 0 else 'normal',
-            'velocidad_viento': 'danos_mecanicos' if valor > 60 else 'normal',
-            'humedad_relativa': 'estres_hidrico' if valor < 30 else 'normal'
-        }
-        return impactos.get(variable, 'normal')
+    def _construir_eventos_extremos(self, df: pd.DataFrame,
+                                    filas_objetivo: Optional[pd.Series] = None,
+                                    ventana_climatologica: Optional[str] = None) -> pd.DataFrame:
+        """Construir tabla de eventos extremos por estación y variable
+        
+        Los umbrales se calculan sobre todo df (o por ventana de calendario si se
+        indica ventana_climatologica: 'mes', 'semana' o 'estacion_año'); si se
+        indica filas_objetivo (máscara booleana alineada con df) solo se emiten
+        eventos para esas filas.
+        """
+        return detectar_eventos_extremos(
+            df, self.variables_meteorologicas.keys(),
+            ventana_climatologica=ventana_climatologica,
+            filas_objetivo=filas_objetivo
+        )
     
     def _evaluar_calidad_datos(self, df: pd.DataFrame):
         """Evaluar calidad de los datos históricos"""
         try:
             print("[EVALUANDO] Calidad de datos...")
             
-            evaluaciones = []
+            df_evaluaciones = self._construir_calidad_datos(df)
             
-            for estacion in df['estacion'].unique():
-                df_estacion = df[df['estacion'] == estacion].copy()
-                
-                for variable in self.variables_meteorologicas.keys():
-                    if variable in df_estacion.columns:
-                        valores = df_estacion[variable]
-                        registros_totales = len(valores)
-                        registros_validos = valores.notna().sum()
-                        registros_faltantes = valores.isna().sum()
-                        
-                        # Detectar valores anómalos (fuera de rango)
-                        rango = self.variables_meteorologicas[variable]
-                        valores_normales = valores[
-                            (valores >= rango['rango_min']) & 
-                            (valores <= rango['rango_max'])
-                        ]
-                        registros_anomalos = registros_totales - len(valores_normales)
-                        
-                        porcentaje_completitud = (registros_validos / registros_totales) * 100
-                        
-                        if porcentaje_completitud >= 95:
-                            calidad = 'excelente'
-                        elif porcentaje_completitud >= 90:
-                            calidad = 'buena'
-                        elif porcentaje_completitud >= 80:
-                            calidad = 'aceptable'
-                        else:
-                            calidad = 'deficiente'
-                        
-                        evaluacion = {
-                            'fecha_evaluacion': datetime.now().date(),
-                            'estacion': estacion,
-                            'variable': variable,
-                            'registros_totales': registros_totales,
-                            'registros_validos': registros_validos,
-                            'registros_faltantes': registros_faltantes,
-                            'registros_anomalos': registros_anomalos,
-                            'porcentaje_completitud': round(porcentaje_completitud, 2),
-                            'calidad_general': calidad
-                        }
-                        evaluaciones.append(evaluacion)
-            
-            df_evaluaciones = pd.DataFrame(evaluaciones)
-            
-            conn = sqlite3.connect(self.base_datos)
-            df_evaluaciones.to_sql('calidad_datos', conn, if_exists='replace', index=False)
-            conn.commit()
-            conn.close()
+            with self.pool.transaccion() as conn:
+                escribir_dataframe(conn, 'calidad_datos', df_evaluaciones, reemplazar=True)
             
             print("[OK] Calidad de datos evaluada")
             
         except Exception as e:
             print(f"[ERROR] Error evaluando calidad de datos: {e}")
     
+    def _construir_calidad_datos(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Construir evaluación de calidad por estación y variable"""
+        evaluaciones = []
+        
+        for estacion in df['estacion'].unique():
+            df_estacion = df[df['estacion'] == estacion].copy()
+            
+            for variable in self.variables_meteorologicas.keys():
+                if variable in df_estacion.columns:
+                    valores = df_estacion[variable]
+                    registros_totales = len(valores)
+                    registros_validos = valores.notna().sum()
+                    registros_faltantes = valores.isna().sum()
+                    
+                    # Detectar valores anómalos (fuera de rango)
+                    rango = self.variables_meteorologicas[variable]
+                    valores_normales = valores[
+                        (valores >= rango['rango_min']) & 
+                        (valores <= rango['rango_max'])
+                    ]
+                    registros_anomalos = registros_totales - len(valores_normales)
+                    
+                    porcentaje_completitud = (registros_validos / registros_totales) * 100
+                    
+                    if porcentaje_completitud >= 95:
+                        calidad = 'excelente'
+                    elif porcentaje_completitud >= 90:
+                        calidad = 'buena'
+                    elif porcentaje_completitud >= 80:
+                        calidad = 'aceptable'
+                    else:
+                        calidad = 'deficiente'
+                    
+                    evaluacion = {
+                        'fecha_evaluacion': datetime.now().date(),
+                        'estacion': estacion,
+                        'variable': variable,
+                        'registros_totales': registros_totales,
+                        'registros_validos': registros_validos,
+                        'registros_faltantes': registros_faltantes,
+                        'registros_anomalos': registros_anomalos,
+                        'porcentaje_completitud': round(porcentaje_completitud, 2),
+                        'calidad_general': calidad
+                    }
+                    evaluaciones.append(evaluacion)
+        
+        return pd.DataFrame(evaluaciones)
+    
     def generar_reporte_historico_completo(self) -> Dict[str, Any]:
         """Generar reporte completo de análisis histórico"""
         try:
             print("[GENERANDO] Reporte histórico completo...")
             
-            conn = sqlite3.connect(self.base_datos)
+            conn = self.pool.conexion()
             
             # Estadísticas generales
             query_stats = '''
@@ -1022,8 +1177,6 @@ class SistemaBaseDatosHistorica5Anios:
             '''
             calidad_datos = pd.read_sql_query(query_calidad, conn)
             
-            conn.close()
-            
             # Crear reporte
             reporte = {
                 'fecha_generacion': datetime.now().isoformat(),
@@ -1056,41 +1209,109 @@ class SistemaBaseDatosHistorica5Anios:
             print(f"[ERROR] Error generando reporte histórico: {e}")
             return {}
     
-    def exportar_datos_historicos(self, formato: str = 'csv', estacion: str = None) -> str:
-        """Exportar datos históricos en diferentes formatos"""
+    def consultar_datos_historicos(self, estaciones: Optional[List[str]] = None,
+                                   fecha_inicio: Optional[str] = None,
+                                   fecha_fin: Optional[str] = None,
+                                   columnas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Consultar datos históricos filtrando por estación, rango de fechas y columnas
+        
+        Con el archivo Parquet disponible solo se leen las particiones
+        (estación, año) y columnas pedidas; si no, se filtra en SQLite.
+        """
+        if isinstance(estaciones, str):
+            estaciones = [estaciones]
+        
+        if self.archivo_columnar is not None and self.archivo_columnar.existe():
+            return self.archivo_columnar.consultar(estaciones, fecha_inicio, fecha_fin, columnas)
+        
+        existentes = [fila[1] for fila in self.pool.consultar("PRAGMA table_info(datos_meteorologicos_historicos)")]
+        if columnas is not None:
+            seleccion = ['fecha', 'estacion'] + [c for c in columnas
+                                                 if c in existentes and c not in ('fecha', 'estacion')]
+        else:
+            seleccion = existentes
+        
+        condiciones, params = [], []
+        if estaciones:
+            condiciones.append(f"estacion IN ({','.join('?' for _ in estaciones)})")
+            params.extend(estaciones)
+        if fecha_inicio is not None:
+            condiciones.append("fecha >= ?")
+            params.append(pd.Timestamp(fecha_inicio).strftime('%Y-%m-%d %H:%M:%S'))
+        if fecha_fin is not None:
+            condiciones.append("fecha <= ?")
+            params.append(pd.Timestamp(fecha_fin).strftime('%Y-%m-%d %H:%M:%S'))
+        
+        query = f"SELECT {', '.join(seleccion)} FROM datos_meteorologicos_historicos"
+        if condiciones:
+            query += " WHERE " + " AND ".join(condiciones)
+        query += " ORDER BY fecha, estacion"
+        
+        return self.pool.leer_dataframe(query, params, parse_dates=['fecha'])
+    
+    def sincronizar_archivo_columnar(self) -> bool:
+        """Reconstruir el archivo Parquet desde SQLite (bases creadas antes del archivo)"""
+        if self.archivo_columnar is None:
+            print("[ADVERTENCIA] pyarrow no disponible, archivo columnar deshabilitado")
+            return False
+        
         try:
-            print(f"[EXPORTANDO] Datos históricos en formato {formato.upper()}...")
+            df = self.pool.leer_dataframe("SELECT * FROM datos_meteorologicos_historicos")
             
-            conn = sqlite3.connect(self.base_datos)
+            self.archivo_columnar.escribir(df.drop(columns=['id'], errors='ignore'), reemplazar=True)
+            print(f"[OK] Archivo columnar sincronizado: {len(df)} registros")
+            return True
             
-            # Construir query
-            query = "SELECT * FROM datos_meteorologicos_historicos"
-            if estacion:
-                query += f" WHERE estacion = '{estacion}'"
-            query += " ORDER BY fecha, estacion"
+        except Exception as e:
+            print(f"[ERROR] Error sincronizando archivo columnar: {e}")
+            return False
+    
+    def exportar_datos_historicos(self, formato: str = 'csv', estacion: str = None,
+                                  fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None,
+                                  columnas: Optional[List[str]] = None) -> str:
+        """Exportar datos históricos en diferentes formatos
+        
+        CSV y Parquet se escriben directamente desde el corte del archivo
+        columnar cuando está disponible; Excel y JSON pasan por pandas.
+        """
+        try:
+            print(f"[EXPORTANDO] Datos históricos en formato {formato.upper()}...")
             
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            formato = formato.lower()
+            extensiones = {'csv': 'csv', 'excel': 'xlsx', 'json': 'json', 'parquet': 'parquet'}
+            if formato not in extensiones:
+                raise ValueError(f"Formato no soportado: {formato}")
             
             # Generar nombre de archivo
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             sufijo_estacion = f"_{estacion}" if estacion else "_todas"
+            archivo = f"datos_historicos_5_anios{sufijo_estacion}_{timestamp}.{extensiones[formato]}"
+            ruta = os.path.join('exportaciones', archivo)
+            
+            estaciones = [estacion] if estacion else None
+            
+            if formato in ('csv', 'parquet') and self.archivo_columnar is not None and self.archivo_columnar.existe():
+                self.archivo_columnar.exportar(
+                    ruta, formato, estaciones=estaciones,
+                    fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, columnas=columnas
+                )
+                print(f"[OK] Datos exportados: {ruta}")
+                return ruta
             
-            if formato.lower() == 'csv':
-                archivo = f"datos_historicos_5_anios{sufijo_estacion}_{timestamp}.csv"
-                ruta = os.path.join('exportaciones', archivo)
+            df = self.consultar_datos_historicos(estaciones, fecha_inicio, fecha_fin, columnas)
+            
+            if formato == 'csv':
                 df.to_csv(ruta, index=False, encoding='utf-8')
                 
-            elif formato.lower() == 'excel':
-                archivo = f"datos_historicos_5_anios{sufijo_estacion}_{timestamp}.xlsx"
-                ruta = os.path.join('exportaciones', archivo)
+            elif formato == 'excel':
                 df.to_excel(ruta, index=False, engine='openpyxl')
                 
-            elif formato.lower() == 'json':
-                archivo = f"datos_historicos_5_anios{sufijo_estacion}_{timestamp}.json"
-                ruta = os.path.join('exportaciones', archivo)
+            elif formato == 'json':
                 df.to_json(ruta, orient='records', date_format='iso', indent=2)
             
+            elif formato == 'parquet':
+                df.to_parquet(ruta, index=False)
+            
             print(f"[OK] Datos exportados: {ruta}")
             return ruta
             
@@ -1107,6 +1328,13 @@ def main():
     # Inicializar sistema
     sistema = SistemaBaseDatosHistorica5Anios()
     
+    # Actualización nocturna: solo días nuevos desde la marca de agua
+    if '--incremental' in sys.argv[1:]:
+        print("\n[1] ACTUALIZACIÓN INCREMENTAL...")
+        df = sistema.generar_datos_historicos_5_anios(incremental=True)
+        print(f"    - Registros nuevos: {len(df):,}")
+        return
+    
     # Generar datos históricos de 5 años
     print("\n[1] GENERANDO DATOS HISTÓRICOS DE 5 AÑOS...")
     df = sistema.generar_datos_historicos_5_anios()
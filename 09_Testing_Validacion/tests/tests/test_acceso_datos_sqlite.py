@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - ACCESO A DATOS SQLITE METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing del pool de conexiones compartido
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sqlite3
+import threading
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio de gestión de datos al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '08_Gestion_Datos' / 'scripts'))
+
+try:
+    from acceso_datos_sqlite import PoolConexionesSQLite, escribir_dataframe, obtener_pool
+    ACCESO_AVAILABLE = True
+except ImportError:
+    ACCESO_AVAILABLE = False
+
+
+class TestPoolConexionesSQLite(unittest.TestCase):
+    """Tests unitarios para el pool de conexiones SQLite"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not ACCESO_AVAILABLE:
+            self.skipTest("Módulo de acceso a datos no disponible")
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.temp_dir, 'prueba.db')
+        self.pool = PoolConexionesSQLite(self.ruta, reintentos=3, espera_inicial=0.01)
+        self.pool.ejecutar("CREATE TABLE lecturas (id INTEGER PRIMARY KEY, valor REAL)")
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        if hasattr(self, 'pool'):
+            self.pool.cerrar()
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_pragmas_y_reutilizacion(self):
+        """Test de modo WAL y conexión persistente por hilo"""
+        conn = self.pool.conexion()
+
+        self.assertIs(self.pool.conexion(), conn)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+
+        conexiones = []
+        hilo = threading.Thread(target=lambda: conexiones.append(self.pool.conexion()))
+        hilo.start()
+        hilo.join()
+        self.assertIsNot(conexiones[0], conn)
+
+    def test_escrituras_concurrentes(self):
+        """Test de escritores en varios hilos sin errores de bloqueo"""
+        errores = []
+
+        def escribir(inicio):
+            try:
+                for i in range(inicio, inicio + 50):
+                    with self.pool.transaccion() as conn:
+                        conn.execute("INSERT INTO lecturas VALUES (?, ?)", (i, i * 0.5))
+            except Exception as e:
+                errores.append(e)
+
+        hilos = [threading.Thread(target=escribir, args=(n * 50,)) for n in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(self.pool.consultar("SELECT COUNT(*) FROM lecturas")[0][0], 200)
+
+    def test_reintento_ante_bloqueo(self):
+        """Test de reintento cuando otra conexión mantiene el bloqueo de escritura"""
+        bloqueo = sqlite3.connect(self.ruta, isolation_level=None, check_same_thread=False)
+        bloqueo.execute("BEGIN IMMEDIATE")
+        pool = PoolConexionesSQLite(self.ruta, pragmas={'busy_timeout': 0}, reintentos=5, espera_inicial=0.02)
+        temporizador = threading.Timer(0.05, lambda: bloqueo.execute("COMMIT"))
+        temporizador.start()
+        try:
+            pool.ejecutar_muchos("INSERT INTO lecturas VALUES (?, ?)", [(1, 1.0), (2, 2.0)])
+        finally:
+            temporizador.join()
+            bloqueo.close()
+            pool.cerrar()
+
+        self.assertEqual(self.pool.consultar("SELECT COUNT(*) FROM lecturas")[0][0], 2)
+
+    def test_transaccion_anidada_con_savepoint(self):
+        """Test de que una transacción anidada revierte solo su parte"""
+        with self.pool.transaccion() as conn:
+            conn.execute("INSERT INTO lecturas VALUES (1, 1.0)")
+            with self.assertRaises(RuntimeError):
+                with self.pool.transaccion() as interna:
+                    interna.execute("INSERT INTO lecturas VALUES (2, 2.0)")
+                    raise RuntimeError("falla interna")
+            self.assertTrue(conn.in_transaction)
+            with self.pool.transaccion() as interna:
+                interna.execute("INSERT INTO lecturas VALUES (3, 3.0)")
+
+        self.assertEqual(self.pool.consultar("SELECT id FROM lecturas ORDER BY id"), [(1,), (3,)])
+
+        # Una falla externa revierte también lo confirmado por las anidadas
+        with self.assertRaises(RuntimeError):
+            with self.pool.transaccion() as conn:
+                with self.pool.transaccion() as interna:
+                    interna.execute("INSERT INTO lecturas VALUES (4, 4.0)")
+                raise RuntimeError("falla externa")
+        self.assertEqual(self.pool.consultar("SELECT COUNT(*) FROM lecturas")[0][0], 2)
+
+    def test_transaccion_ajena_abierta(self):
+        """Test de que no se confirma en silencio una transacción abierta por otro código"""
+        conn = self.pool.conexion()
+        conn.execute("INSERT INTO lecturas VALUES (1, 1.0)")
+        self.assertTrue(conn.in_transaction)
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            with self.pool.transaccion():
+                pass
+        conn.rollback()
+        self.assertEqual(self.pool.consultar("SELECT COUNT(*) FROM lecturas")[0][0], 0)
+
+    def test_escribir_dataframe_atomico(self):
+        """Test de escritura de DataFrames dentro de la transacción"""
+        df = pd.DataFrame({
+            'id': [1, 2],
+            'valor': [0.5, float('nan')]
+        })
+        with self.assertRaises(RuntimeError):
+            with self.pool.transaccion() as conn:
+                escribir_dataframe(conn, 'lecturas', df)
+                raise RuntimeError("falla después de escribir")
+        self.assertEqual(self.pool.consultar("SELECT COUNT(*) FROM lecturas")[0][0], 0)
+
+        with self.pool.transaccion() as conn:
+            self.assertEqual(escribir_dataframe(conn, 'lecturas', df), 2)
+        self.assertEqual(self.pool.consultar("SELECT id, valor FROM lecturas ORDER BY id"), [(1, 0.5), (2, None)])
+
+        # Reemplazar conserva el esquema (clave primaria) de la tabla existente
+        with self.pool.transaccion() as conn:
+            escribir_dataframe(conn, 'lecturas', df.iloc[:1], reemplazar=True)
+        self.assertEqual(self.pool.consultar("SELECT COUNT(*) FROM lecturas")[0][0], 1)
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.pool.transaccion() as conn:
+                escribir_dataframe(conn, 'lecturas', df.iloc[:1])
+
+        # Tabla nueva con fechas como texto
+        fechas = pd.DataFrame({'fecha': pd.to_datetime(['2024-01-01', '2024-01-02']), 'estacion': ['a', 'b']})
+        with self.pool.transaccion() as conn:
+            escribir_dataframe(conn, 'eventos', fechas)
+        self.assertEqual(self.pool.consultar("SELECT fecha FROM eventos ORDER BY fecha")[0][0], '2024-01-01 00:00:00')
+
+    def test_pool_compartido_por_ruta(self):
+        """Test de un único pool por ruta absoluta"""
+        self.assertIs(obtener_pool(self.ruta), obtener_pool(os.path.join(self.temp_dir, '.', 'prueba.db')))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - ACUMULADORES TÉRMICOS METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de grados-día y horas de frío por sumas prefijo
+"""
+
+import unittest
+import tempfile
+import os
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio del sistema agrícola al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '02_Sistema_Agricola' / 'scripts'))
+
+try:
+    from acumuladores_termicos import AcumuladoresTermicos, estimar_horas_frio
+    ACUMULADORES_AVAILABLE = True
+except ImportError:
+    ACUMULADORES_AVAILABLE = False
+
+
+class TestAcumuladoresTermicos(unittest.TestCase):
+    """Tests unitarios para los acumuladores térmicos por temporada"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not ACUMULADORES_AVAILABLE:
+            self.skipTest("Acumuladores térmicos no disponibles")
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.acumuladores = AcumuladoresTermicos(os.path.join(self.temp_dir.name, 'acumulados.db'))
+
+        rng = np.random.default_rng(7)
+        self.fechas = pd.date_range('2024-05-20 06:00', '2024-08-31 06:00', freq='D')
+        self.t_min = rng.uniform(-2, 12, len(self.fechas))
+        self.t_max = self.t_min + rng.uniform(4, 16, len(self.fechas))
+        self.t_prom = (self.t_min + self.t_max) / 2
+
+    def tearDown(self):
+        """Limpiar directorio temporal"""
+        self.temp_dir.cleanup()
+
+    def _esperado(self, hasta: pd.Timestamp) -> float:
+        """Grados-día sumados directamente desde el 1 de junio"""
+        dias = self.fechas.normalize()
+        seleccion = (dias >= pd.Timestamp('2024-06-01')) & (dias <= hasta)
+        return float(np.maximum(self.t_prom[seleccion] - 10, 0).sum())
+
+    def test_horas_frio_diarias(self):
+        """Test de la estimación lineal de horas bajo el umbral"""
+        np.testing.assert_allclose(estimar_horas_frio([0, 10, 2, 3], [14, 20, 2, 12]), [12, 0, 24, 24 * 4 / 9])
+
+    def test_sumas_prefijo_por_temporada(self):
+        """Test de acumulados iguales a la suma directa, con reinicio de temporada y días sin datos"""
+        self.acumuladores.registrar_dias('EST1', self.fechas, self.t_min, self.t_max, self.t_prom)
+
+        consultas = pd.DatetimeIndex([pd.Timestamp('2024-05-31'), pd.Timestamp('2024-06-01'),
+                                     pd.Timestamp('2024-07-15 18:00'), pd.Timestamp('2024-12-01')])
+        acumulados = self.acumuladores.acumulados_en_fechas('EST1', consultas)['grado_dias_acumulados']
+
+        self.assertGreater(acumulados.iloc[0], 0)
+        self.assertAlmostEqual(acumulados.iloc[1], self._esperado(pd.Timestamp('2024-06-01')))
+        self.assertAlmostEqual(acumulados.iloc[2], self._esperado(pd.Timestamp('2024-07-15')))
+        # Después del último dato se mantiene el último acumulado de la temporada
+        self.assertAlmostEqual(acumulados.iloc[3], self._esperado(pd.Timestamp('2024-08-31')))
+        self.assertEqual(self.acumuladores.acumulado('EST2', pd.Timestamp('2024-07-01'))['horas_frio_acumuladas'], 0)
+
+    def test_actualizacion_incremental(self):
+        """Test de que agregar días (también atrasados) deja los mismos acumulados que cargar todo"""
+        medio = 40
+        self.acumuladores.registrar_dias('EST1', self.fechas[medio:], self.t_min[medio:],
+                                         self.t_max[medio:], self.t_prom[medio:])
+        self.acumuladores.acumulado('EST1', self.fechas[-1])
+        self.acumuladores.registrar_dias('EST1', self.fechas[:medio], self.t_min[:medio],
+                                         self.t_max[:medio], self.t_prom[:medio])
+
+        completo = AcumuladoresTermicos(os.path.join(self.temp_dir.name, 'completo.db'))
+        completo.registrar_dias('EST1', self.fechas, self.t_min, self.t_max, self.t_prom)
+
+        pd.testing.assert_frame_equal(self.acumuladores.acumulados_en_fechas('EST1', self.fechas),
+                                      completo.acumulados_en_fechas('EST1', self.fechas))
+
+    def test_datos_horarios_reemplazan_estimacion(self):
+        """Test de que las lecturas horarias reemplazan la estimación diaria y se suman por lotes"""
+        self.acumuladores.registrar_dias('EST1', self.fechas, self.t_min, self.t_max, self.t_prom)
+        dia = pd.Timestamp('2024-06-10')
+        previo = self.acumuladores.acumulado('EST1', dia - pd.Timedelta(days=1))
+
+        self.acumuladores.registrar_horas('EST1', pd.date_range(dia, periods=12, freq='h'), np.full(12, 4.0))
+        self.acumuladores.registrar_horas('EST1', pd.date_range(dia + pd.Timedelta(hours=12), periods=12, freq='h'),
+                                          np.full(12, 22.0))
+        self.acumuladores.registrar_dias('EST1', [dia], [0.0], [30.0], [15.0])
+
+        actual = self.acumuladores.acumulado('EST1', dia)
+        self.assertAlmostEqual(actual['horas_frio_acumuladas'] - previo['horas_frio_acumuladas'], 12)
+        self.assertAlmostEqual(actual['grado_dias_acumulados'] - previo['grado_dias_acumulados'], 6)
+
+    def test_horas_repetidas_no_se_suman_dos_veces(self):
+        """Test de que reenviar horas ya registradas reemplaza su aporte"""
+        dia = pd.Timestamp('2024-06-10')
+        horas = pd.date_range(dia, periods=24, freq='h')
+        temperaturas = np.where(np.arange(24) < 12, 4.0, 22.0)
+
+        self.acumuladores.registrar_horas('EST1', horas[:18], temperaturas[:18])
+        # Reintento con solape: las horas 12 a 17 llegan otra vez junto con las restantes
+        self.acumuladores.registrar_horas('EST1', horas[12:], temperaturas[12:])
+        self.acumuladores.registrar_horas('EST1', horas[12:], temperaturas[12:])
+
+        actual = self.acumuladores.acumulado('EST1', dia)
+        self.assertAlmostEqual(actual['horas_frio_acumuladas'], 12)
+        self.assertAlmostEqual(actual['grado_dias_acumulados'], 6)
+        self.assertAlmostEqual(actual['temperatura_activa_acumulada'], 11)
+
+        # Una hora corregida reemplaza el valor anterior
+        self.acumuladores.registrar_horas('EST1', horas[:1], [22.0])
+        actual = self.acumuladores.acumulado('EST1', dia)
+        self.assertAlmostEqual(actual['horas_frio_acumuladas'], 11)
+        self.assertAlmostEqual(actual['grado_dias_acumulados'], 6.5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - ALMACENAMIENTO IDEMPOTENTE METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de UPSERT, compactación y clave única
+"""
+
+import unittest
+import sqlite3
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio del sistema meteorológico al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '01_Sistema_Meteorologico' / 'scripts'))
+
+try:
+    from almacenamiento_datos_meteorologicos import (asegurar_clave_unica, compactar_duplicados,
+                                                     upsert_dataframe)
+    ALMACENAMIENTO_AVAILABLE = True
+except ImportError:
+    ALMACENAMIENTO_AVAILABLE = False
+
+
+class TestAlmacenamientoDatosMeteorologicos(unittest.TestCase):
+    """Tests unitarios para la capa de persistencia idempotente"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not ALMACENAMIENTO_AVAILABLE:
+            self.skipTest("Almacenamiento de datos meteorológicos no disponible")
+
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('''
+            CREATE TABLE datos_meteorologicos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                estacion TEXT,
+                fecha TIMESTAMP,
+                fuente_api TEXT,
+                temperatura REAL,
+                humedad REAL
+            )
+        ''')
+        self.df = pd.DataFrame({
+            'estacion': ['quillota', 'quillota', 'la_cruz', 'la_cruz'],
+            'fecha': pd.to_datetime(['2025-01-01 00:00', '2025-01-01 01:00',
+                                     '2025-01-01 00:00', '2025-01-01 01:00']),
+            'fuente_api': 'openmeteo',
+            'temperatura': [18.0, 17.5, 19.0, 18.2],
+            'humedad': [70.0, 72.0, 65.0, None]
+        })
+
+    def tearDown(self):
+        """Cerrar conexión"""
+        if hasattr(self, 'conn'):
+            self.conn.close()
+
+    def _filas(self):
+        return self.conn.execute(
+            'SELECT estacion, fecha, fuente_api, temperatura, humedad FROM datos_meteorologicos '
+            'ORDER BY estacion, fecha'
+        ).fetchall()
+
+    def test_upsert_idempotente(self):
+        """Test de que repetir o solapar un UPSERT no cambia el número de filas"""
+        asegurar_clave_unica(self.conn)
+        self.assertEqual(upsert_dataframe(self.conn, self.df), 4)
+        primera = self._filas()
+
+        upsert_dataframe(self.conn, self.df)
+        self.assertEqual(self._filas(), primera)
+
+        # Ventana solapada: actualiza la fila existente y agrega solo la nueva
+        solapada = pd.DataFrame({
+            'estacion': ['quillota', 'quillota'],
+            'fecha': pd.to_datetime(['2025-01-01 01:00', '2025-01-01 02:00']),
+            'fuente_api': 'openmeteo',
+            'temperatura': [16.9, 16.0],
+            'columna_ajena': ['x', 'y']
+        })
+        self.assertEqual(upsert_dataframe(self.conn, solapada), 2)
+        filas = self._filas()
+        self.assertEqual(len(filas), 5)
+        self.assertIn(('quillota', '2025-01-01 01:00:00', 'openmeteo', 16.9, 72.0), filas)
+        self.assertIsNone(dict(((f[0], f[1]), f[4]) for f in filas)[('la_cruz', '2025-01-01 01:00:00')])
+
+        with self.assertRaises(ValueError):
+            upsert_dataframe(self.conn, self.df.drop(columns=['fuente_api']))
+
+    def test_compactar_conserva_mayor_rowid(self):
+        """Test de que la compactación conserva la última fila insertada de cada clave"""
+        filas = [
+            ('quillota', '2025-01-01 00:00:00', 'openmeteo', 18.0),
+            ('quillota', '2025-01-01 00:00:00', 'openmeteo', 18.4),
+            ('la_cruz', '2025-01-01 00:00:00', 'openmeteo', 19.0),
+            ('quillota', '2025-01-01 00:00:00', 'openmeteo', 18.9),
+            ('quillota', '2025-01-01 00:00:00', 'meteochile', 17.0)
+        ]
+        self.conn.executemany(
+            'INSERT INTO datos_meteorologicos (estacion, fecha, fuente_api, temperatura) VALUES (?, ?, ?, ?)', filas
+        )
+        self.conn.commit()
+
+        self.assertEqual(compactar_duplicados(self.conn), 2)
+        restantes = self.conn.execute(
+            'SELECT id, estacion, fuente_api, temperatura FROM datos_meteorologicos ORDER BY id'
+        ).fetchall()
+        self.assertEqual(restantes, [(3, 'la_cruz', 'openmeteo', 19.0),
+                                     (4, 'quillota', 'openmeteo', 18.9),
+                                     (5, 'quillota', 'meteochile', 17.0)])
+        self.assertEqual(compactar_duplicados(self.conn), 0)
+
+    def test_asegurar_clave_unica(self):
+        """Test de creación del índice único sobre una tabla con duplicados"""
+        self.conn.executemany(
+            'INSERT INTO datos_meteorologicos (estacion, fecha, fuente_api, temperatura) VALUES (?, ?, ?, ?)',
+            [('quillota', '2025-01-01 00:00:00', 'openmeteo', 18.0)] * 3
+        )
+        self.conn.commit()
+
+        asegurar_clave_unica(self.conn)
+        asegurar_clave_unica(self.conn)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM datos_meteorologicos').fetchone()[0], 1)
+        indices = [fila for fila in self.conn.execute('PRAGMA index_list(datos_meteorologicos)') if fila[2]]
+        self.assertEqual(len(indices), 1)
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.conn.execute(
+                'INSERT INTO datos_meteorologicos (estacion, fecha, fuente_api) VALUES (?, ?, ?)',
+                ('quillota', '2025-01-01 00:00:00', 'openmeteo')
+            )
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
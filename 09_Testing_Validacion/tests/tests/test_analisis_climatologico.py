@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - ANÁLISIS CLIMATOLÓGICO METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de climatologías y eventos extremos vectorizados
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio de gestión de datos al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '08_Gestion_Datos' / 'scripts'))
+
+try:
+    from analisis_climatologico import agregar_climatologia, detectar_eventos_extremos, evaluar_impacto_eventos
+    CLIMATOLOGIA_AVAILABLE = True
+except ImportError:
+    CLIMATOLOGIA_AVAILABLE = False
+
+
+class TestEventosExtremos(unittest.TestCase):
+    """Tests unitarios para el detector vectorizado de eventos extremos"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not CLIMATOLOGIA_AVAILABLE:
+            self.skipTest("Módulo de análisis climatológico no disponible")
+
+        rng = np.random.default_rng(7)
+        n = 730
+        self.variables = ['temperatura_max', 'precipitacion']
+        self.df = pd.concat([
+            pd.DataFrame({
+                'fecha': pd.date_range('2022-01-01', periods=n, freq='D'),
+                'estacion': estacion,
+                'temperatura_max': rng.normal(25, 6, n),
+                'precipitacion': np.where(rng.random(n) < 0.7, 0.0, rng.exponential(20, n))
+            })
+            for estacion in ['quillota_centro', 'la_cruz']
+        ], ignore_index=True)
+
+    def test_umbrales_por_estacion(self):
+        """Test de que los eventos caen fuera de los percentiles de su estación"""
+        eventos = detectar_eventos_extremos(self.df, self.variables)
+
+        for (estacion, variable), grupo in eventos.groupby(['estacion', 'variable_afectada']):
+            valores = self.df.loc[self.df['estacion'] == estacion, variable]
+            bajo, alto = valores.quantile(0.05), valores.quantile(0.95)
+            medidos = grupo['valor_medido']
+            self.assertTrue(((medidos <= round(bajo, 3)) | (medidos >= round(alto, 3))).all())
+
+        esperados = sum(
+            ((v <= v.quantile(0.05)) | (v >= v.quantile(0.95))).sum()
+            for _, g in self.df.groupby('estacion')
+            for v in (g[var] for var in self.variables)
+        )
+        self.assertEqual(len(eventos), esperados)
+
+    def test_filas_objetivo(self):
+        """Test de emisión de eventos solo para las filas indicadas"""
+        mascara = self.df['fecha'].dt.year == 2023
+        eventos = detectar_eventos_extremos(self.df, self.variables, filas_objetivo=mascara)
+
+        self.assertGreater(len(eventos), 0)
+        self.assertTrue((pd.to_datetime(eventos['fecha_evento']).dt.year == 2023).all())
+
+    def test_ventana_climatologica(self):
+        """Test del modo climatológico por mes"""
+        eventos = detectar_eventos_extremos(self.df, self.variables, ventana_climatologica='mes')
+
+        self.assertGreater(len(eventos), 0)
+        with self.assertRaises(ValueError):
+            detectar_eventos_extremos(self.df, self.variables, ventana_climatologica='quincena')
+
+    def test_impacto_eventos(self):
+        """Test de la asignación vectorizada de impactos"""
+        variables = np.array(['precipitacion', 'precipitacion', 'temperatura_min', 'nubosidad'], dtype=object)
+        valores = np.array([60.0, 0.0, -1.0, 100.0])
+
+        impactos = evaluar_impacto_eventos(variables, valores)
+
+        self.assertEqual(list(impactos), ['inundacion', 'sequia', 'riesgo_helada', 'normal'])
+
+
+class TestAgregarClimatologia(unittest.TestCase):
+    """Tests unitarios para el motor de climatologías agrupadas"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not CLIMATOLOGIA_AVAILABLE:
+            self.skipTest("Módulo de análisis climatológico no disponible")
+
+        rng = np.random.default_rng(11)
+        n = 400
+        self.df = pd.DataFrame({
+            'fecha': pd.date_range('2023-01-01', periods=n, freq='D'),
+            'estacion': 'quillota_centro',
+            'temperatura_max': rng.normal(25, 6, n),
+            'etapa_fenologica': np.where(np.arange(n) < 200, 'floracion', 'cosecha')
+        })
+
+    def test_estadisticos_mensuales(self):
+        """Test de estadísticos mensuales contra el cálculo por rebanadas"""
+        resultado = agregar_climatologia(self.df, ['temperatura_max'])
+
+        self.assertEqual(len(resultado), 12)
+        enero = self.df.loc[self.df['fecha'].dt.month == 1, 'temperatura_max']
+        fila = resultado[resultado['mes'] == 1].iloc[0]
+        self.assertAlmostEqual(fila['promedio'], round(enero.mean(), 3))
+        self.assertAlmostEqual(fila['desviacion_estandar'], round(enero.std(), 3))
+        self.assertAlmostEqual(fila['percentil_75'], round(enero.quantile(0.75), 3))
+
+    def test_periodo_columna_existente(self):
+        """Test de agrupación por una columna arbitraria"""
+        resultado = agregar_climatologia(self.df, ['temperatura_max'], periodo='etapa_fenologica')
+
+        self.assertEqual(sorted(resultado['etapa_fenologica']), ['cosecha', 'floracion'])
+        with self.assertRaises(ValueError):
+            agregar_climatologia(self.df, ['temperatura_max'], periodo='inexistente')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
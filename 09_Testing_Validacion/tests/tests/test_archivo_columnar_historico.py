@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - ARCHIVO COLUMNAR HISTÓRICO METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing del archivo Parquet particionado
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio de gestión de datos al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '08_Gestion_Datos' / 'scripts'))
+
+try:
+    from archivo_columnar_historico import ArchivoColumnarHistorico, PYARROW_AVAILABLE
+    ARCHIVO_AVAILABLE = PYARROW_AVAILABLE
+except ImportError:
+    ARCHIVO_AVAILABLE = False
+
+
+class TestArchivoColumnarHistorico(unittest.TestCase):
+    """Tests unitarios para el archivo Parquet particionado por estación y año"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not ARCHIVO_AVAILABLE:
+            self.skipTest("pyarrow no disponible")
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.archivo = ArchivoColumnarHistorico(os.path.join(self.temp_dir, 'parquet'))
+
+        rng = np.random.default_rng(3)
+        self.df = pd.concat([
+            pd.DataFrame({
+                'fecha': pd.date_range('2021-01-01', '2023-12-31', freq='D'),
+                'estacion': estacion
+            })
+            for estacion in ['quillota_centro', 'la_cruz']
+        ], ignore_index=True)
+        self.df['temperatura_max'] = rng.normal(25, 5, len(self.df))
+        self.df['precipitacion'] = rng.exponential(5, len(self.df))
+        self.archivo.escribir(self.df)
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        if hasattr(self, 'temp_dir'):
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_particiones(self):
+        """Test de la estructura estacion=/anio= en disco"""
+        ruta = os.path.join(self.archivo.directorio, 'estacion=la_cruz')
+
+        self.assertEqual(sorted(os.listdir(ruta)), ['anio=2021', 'anio=2022', 'anio=2023'])
+
+    def test_consulta_filtrada(self):
+        """Test de filtros de estación, fechas y columnas"""
+        resultado = self.archivo.consultar(['la_cruz'], '2022-03-01', '2022-03-31', ['precipitacion'])
+
+        esperado = self.df[(self.df['estacion'] == 'la_cruz')
+                           & self.df['fecha'].between('2022-03-01', '2022-03-31')]
+        self.assertEqual(list(resultado.columns), ['fecha', 'estacion', 'precipitacion'])
+        self.assertEqual(len(resultado), 31)
+        np.testing.assert_allclose(resultado['precipitacion'], esperado['precipitacion'])
+
+    def test_agregar_reemplaza_duplicados(self):
+        """Test de agregado incremental sobre particiones existentes"""
+        nuevo = pd.DataFrame({
+            'fecha': pd.date_range('2023-12-30', '2024-01-02', freq='D'),
+            'estacion': 'la_cruz',
+            'temperatura_max': 99.0,
+            'precipitacion': 0.0
+        })
+        self.archivo.agregar(nuevo)
+
+        resultado = self.archivo.consultar('la_cruz', fecha_inicio='2023-12-01')
+        self.assertEqual(len(resultado), 33)
+        self.assertEqual(resultado['temperatura_max'].tolist()[-4:], [99.0] * 4)
+        self.assertEqual(len(self.archivo.consultar()), len(self.df) + 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - CONECTOR DE APIs METEOROLÓGICAS METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de peticiones OpenMeteo por lote
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from pathlib import Path
+
+# Agregar el directorio del sistema meteorológico al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '01_Sistema_Meteorologico' / 'scripts'))
+
+try:
+    from conector_apis_meteorologicas_reales import ConectorAPIsMeteorologicas
+    CONECTOR_AVAILABLE = True
+except ImportError:
+    CONECTOR_AVAILABLE = False
+
+
+class RespuestaOpenMeteo:
+    """Respuesta HTTP mínima con el cuerpo JSON de OpenMeteo"""
+
+    def __init__(self, cuerpo):
+        self.cuerpo = cuerpo
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.cuerpo
+
+
+class SesionOpenMeteo:
+    """Sesión que responde una ubicación por coordenada, marcada con lat + lon
+
+    Con omitir_en_lotes, las peticiones de varias coordenadas devuelven una
+    ubicación menos (como cuando OpenMeteo descarta una coordenada).
+    """
+
+    def __init__(self, variables, omitir_en_lotes=False):
+        self.variables = variables
+        self.omitir_en_lotes = omitir_en_lotes
+        self.peticiones = []
+
+    def _ubicacion(self, lat, lon):
+        daily = {'time': ['2025-01-01', '2025-01-02']}
+        for variable in self.variables:
+            daily[variable] = [lat + lon] * 2
+        return {'latitude': lat, 'longitude': lon, 'daily': daily}
+
+    def get(self, url, params=None, timeout=None):
+        self.peticiones.append(params)
+        latitudes = [float(v) for v in str(params['latitude']).split(',')]
+        longitudes = [float(v) for v in str(params['longitude']).split(',')]
+        ubicaciones = [self._ubicacion(lat, lon) for lat, lon in zip(latitudes, longitudes)]
+        if len(ubicaciones) == 1:
+            return RespuestaOpenMeteo(ubicaciones[0])
+        if self.omitir_en_lotes:
+            ubicaciones = ubicaciones[1:]
+        return RespuestaOpenMeteo(ubicaciones)
+
+
+class TestConectorOpenMeteoLote(unittest.TestCase):
+    """Tests unitarios para obtener_datos_openmeteo_lote"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not CONECTOR_AVAILABLE:
+            self.skipTest("Conector de APIs meteorológicas no disponible")
+
+        self.directorio_original = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+        self.conector = ConectorAPIsMeteorologicas()
+        self.estaciones = list(self.conector.estaciones_quillota)
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        if hasattr(self, 'conector'):
+            self.conector.pool.cerrar()
+            os.chdir(self.directorio_original)
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _marca(self, estacion_id):
+        estacion = self.conector.estaciones_quillota[estacion_id]
+        return estacion['lat'] + estacion['lon']
+
+    def _verificar_resultados(self, resultados, estaciones):
+        self.assertEqual(list(resultados), estaciones)
+        for estacion_id, resultado in resultados.items():
+            self.assertEqual(resultado['estacion'], estacion_id)
+            self.assertEqual(set(resultado['datos']['estacion']), {estacion_id})
+            self.assertAlmostEqual(resultado['datos']['temperatura_max'].iloc[0], self._marca(estacion_id))
+
+    def test_lote_en_una_peticion(self):
+        """Test de una petición por lote con cada respuesta asignada a su estación"""
+        sesion = SesionOpenMeteo(self.conector.VARIABLES_DIARIAS_OPENMETEO)
+        self.conector.session = sesion
+
+        resultados = self.conector.obtener_datos_openmeteo_lote(self.estaciones, dias=2, tamano_lote=4)
+
+        self.assertEqual(len(sesion.peticiones), -(-len(self.estaciones) // 4))
+        self._verificar_resultados(resultados, self.estaciones)
+
+    def test_respuesta_incompleta_consulta_por_estacion(self):
+        """Test de que un lote con menos ubicaciones que estaciones se pide estación por estación"""
+        sesion = SesionOpenMeteo(self.conector.VARIABLES_DIARIAS_OPENMETEO, omitir_en_lotes=True)
+        self.conector.session = sesion
+
+        resultados = self.conector.obtener_datos_openmeteo_lote(self.estaciones, dias=2)
+
+        # Una petición por lote y luego una por estación
+        self.assertEqual(len(sesion.peticiones), 1 + len(self.estaciones))
+        self._verificar_resultados(resultados, self.estaciones)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
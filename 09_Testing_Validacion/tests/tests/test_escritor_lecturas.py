@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - ESCRITOR DE LECTURAS DE SENSORES METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de persistencia por lotes de lecturas de riego
+"""
+
+import unittest
+import tempfile
+import sqlite3
+import os
+import sys
+from pathlib import Path
+
+# Agregar el directorio del sistema agrícola al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '02_Sistema_Agricola' / 'scripts'))
+
+try:
+    from escritor_lecturas_sensores import EscritorLecturasSensores
+    ESCRITOR_AVAILABLE = True
+except ImportError:
+    ESCRITOR_AVAILABLE = False
+
+try:
+    from riego_automatizado_metgo import RiegoAutomatizadoMETGO
+    RIEGO_AVAILABLE = True
+except ImportError:
+    RIEGO_AVAILABLE = False
+
+
+class TestEscritorLecturasSensores(unittest.TestCase):
+    """Tests unitarios para el escritor de lecturas por lotes"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not ESCRITOR_AVAILABLE:
+            self.skipTest("Escritor de lecturas no disponible")
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_datos = os.path.join(self.temp_dir.name, 'lecturas.db')
+        self._crear_tabla()
+
+    def tearDown(self):
+        """Limpiar directorio temporal"""
+        self.temp_dir.cleanup()
+
+    def _crear_tabla(self):
+        conn = sqlite3.connect(self.base_datos)
+        conn.execute('CREATE TABLE IF NOT EXISTS lecturas (sensor_id TEXT, valor REAL)')
+        conn.commit()
+        conn.close()
+
+    def _filas(self) -> int:
+        conn = sqlite3.connect(self.base_datos)
+        filas = conn.execute('SELECT COUNT(*) FROM lecturas').fetchone()[0]
+        conn.close()
+        return filas
+
+    def _escritor(self, **kwargs):
+        parametros = {'tamano_lote': 10, 'intervalo_vaciado': 3600, **kwargs}
+        escritor = EscritorLecturasSensores(self.base_datos, 'lecturas', ['sensor_id', 'valor'], **parametros)
+        self.addCleanup(escritor.cerrar)
+        return escritor
+
+    def test_vaciado_por_tamano(self):
+        """Test de que se escribe un lote completo en una transacción"""
+        escritor = self._escritor()
+        for i in range(9):
+            self.assertEqual(escritor.agregar((f"S{i}", float(i))), 0)
+        self.assertEqual(self._filas(), 0)
+
+        self.assertEqual(escritor.agregar(('S9', 9.0)), 10)
+        self.assertEqual(self._filas(), 10)
+        self.assertEqual(escritor.contadores['lotes'], 1)
+
+    def test_vaciado_por_tiempo_y_cierre(self):
+        """Test de vaciado por intervalo vencido y de cierre durable"""
+        escritor = self._escritor(intervalo_vaciado=0)
+        self.assertEqual(escritor.agregar(('S1', 1.0)), 1)
+
+        escritor.intervalo_vaciado = 3600
+        escritor.agregar_lote([('S2', 2.0), ('S3', 3.0)])
+        self.assertEqual(len(escritor), 2)
+        escritor.cerrar()
+        self.assertEqual(self._filas(), 3)
+
+    def test_reintento_tras_error(self):
+        """Test de que un lote fallido queda pendiente, acotado, y se escribe después"""
+        conn = sqlite3.connect(self.base_datos)
+        conn.execute('DROP TABLE lecturas')
+        conn.commit()
+        conn.close()
+
+        escritor = self._escritor(tamano_lote=5, max_pendientes=8)
+        escritor.agregar_lote([(f"S{i}", float(i)) for i in range(6)])
+        escritor.agregar_lote([(f"S{i}", float(i)) for i in range(6, 10)])
+        self.assertEqual(escritor.contadores['errores'], 2)
+        self.assertEqual(escritor.contadores['descartadas'], 2)
+        self.assertEqual(len(escritor), 8)
+
+        self._crear_tabla()
+        self.assertEqual(escritor.vaciar(), 8)
+        conn = sqlite3.connect(self.base_datos)
+        sensores = [fila[0] for fila in conn.execute('SELECT sensor_id FROM lecturas ORDER BY rowid')]
+        conn.close()
+        self.assertEqual(sensores, [f"S{i}" for i in range(2, 10)])
+
+    def test_riego_automatizado_sin_commit_por_lectura(self):
+        """Test de que leer_sensores deja las lecturas pendientes hasta el lote o el cierre"""
+        if not RIEGO_AVAILABLE:
+            self.skipTest("Riego automatizado no disponible")
+
+        directorio_original = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        try:
+            riego = RiegoAutomatizadoMETGO()
+            hilo_vaciado = riego.escritor_lecturas._hilo_vaciado
+            self.assertTrue(hilo_vaciado.is_alive())
+            lecturas = riego.leer_sensores()
+            pendientes = len(riego.escritor_lecturas)
+            riego.cerrar()
+            self.assertFalse(hilo_vaciado.is_alive())
+
+            conn = sqlite3.connect(riego.archivo_bd)
+            escritas = conn.execute('SELECT COUNT(*) FROM lecturas_sensores').fetchone()[0]
+            conn.close()
+        finally:
+            os.chdir(directorio_original)
+
+        self.assertGreater(len(lecturas), 0)
+        self.assertEqual(pendientes, len(lecturas))
+        self.assertEqual(escritas, len(lecturas))
+
+    def test_riego_automatizado_sin_base_datos(self):
+        """Test de que una falla al abrir la base de datos no impide crear el sistema"""
+        if not RIEGO_AVAILABLE:
+            self.skipTest("Riego automatizado no disponible")
+
+        directorio_original = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        try:
+            # Un directorio con el nombre del archivo hace fallar sqlite3.connect
+            Path('data/riego/riego.db').mkdir(parents=True)
+            riego = RiegoAutomatizadoMETGO()
+            riego.cerrar()
+        finally:
+            os.chdir(directorio_original)
+
+        self.assertEqual(riego.archivo_bd, 'data/riego/riego.db')
+        self.assertFalse(hasattr(riego, 'conexion_bd'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
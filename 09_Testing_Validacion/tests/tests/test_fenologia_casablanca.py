@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - MOTOR FENOLÓGICO CASABLANCA METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de análisis fenológicos por temporada e incrementales
+"""
+
+import unittest
+import tempfile
+import sqlite3
+import os
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio del sistema agrícola al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '02_Sistema_Agricola' / 'scripts'))
+
+try:
+    from expansion_regional_casablanca_metgo import ExpansionRegionalCasablancaMetgo
+    CASABLANCA_AVAILABLE = True
+except ImportError:
+    CASABLANCA_AVAILABLE = False
+
+
+class TestFenologiaCasablanca(unittest.TestCase):
+    """Tests unitarios para el motor fenológico de Casablanca"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not CASABLANCA_AVAILABLE:
+            self.skipTest("Expansión regional Casablanca no disponible")
+
+        # El sistema crea su base de datos y directorios en el directorio actual
+        self.directorio_original = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+        self.sistema = ExpansionRegionalCasablancaMetgo()
+        self.estacion_id = next(iter(self.sistema.estaciones_casablanca))
+        self.sistema.estaciones_casablanca = {self.estacion_id: self.sistema.estaciones_casablanca[self.estacion_id]}
+
+    def tearDown(self):
+        """Restaurar directorio de trabajo"""
+        os.chdir(self.directorio_original)
+        self.temp_dir.cleanup()
+
+    def _guardar_dias(self, fechas):
+        rng = np.random.default_rng(len(fechas))
+        datos = []
+        for fecha in fechas:
+            t_min = rng.uniform(-3, 12)
+            t_max = t_min + rng.uniform(5, 15)
+            datos.append({
+                'estacion_id': self.estacion_id, 'fecha': fecha,
+                'temperatura_max': t_max, 'temperatura_min': t_min,
+                'temperatura_promedio': (t_max + t_min) / 2, 'humedad_relativa': rng.uniform(40, 90),
+                'precipitacion': rng.uniform(0, 10), 'velocidad_viento': 5, 'direccion_viento': 200,
+                'presion_atmosferica': 1013, 'radiacion_solar': 500, 'temperatura_mar': 14,
+                'humedad_marina': 80, 'velocidad_brisa': 10, 'direccion_brisa': 220, 'intensidad_brisa': 'Media'
+            })
+        self.sistema._guardar_datos_estacion(self.estacion_id, datos)
+
+    def _analisis(self):
+        conn = sqlite3.connect(self.sistema.base_datos)
+        analisis = pd.read_sql_query('SELECT * FROM analisis_fenologicos ORDER BY fecha_analisis', conn)
+        conn.close()
+        return analisis
+
+    def test_acumulados_por_temporada(self):
+        """Test de acumulados crecientes que se reinician al comenzar la temporada"""
+        fechas = pd.date_range('2024-05-01 08:00', '2024-07-31 08:00', freq='D')
+        self._guardar_dias(fechas)
+
+        self.assertEqual(self.sistema._generar_analisis_fenologicos(fechas), len(fechas))
+        analisis = self._analisis()
+        dias = pd.to_datetime(analisis['fecha_analisis'])
+
+        for columna in ('grado_dias_crecimiento', 'horas_frio_acumuladas', 'temperatura_acumulada'):
+            mayo = analisis.loc[dias.dt.month == 5, columna]
+            invierno = analisis.loc[dias.dt.month >= 6, columna]
+            self.assertTrue(mayo.is_monotonic_increasing)
+            self.assertTrue(invierno.is_monotonic_increasing)
+            self.assertLessEqual(invierno.iloc[0], 24 if columna == 'horas_frio_acumuladas' else 40)
+
+        self.assertEqual(analisis.loc[dias.dt.month == 7, 'fase_fenologica'].unique().tolist(), ['reposo_invernal'])
+
+    def test_solo_dias_nuevos(self):
+        """Test de que repetir el análisis solo procesa los días agregados"""
+        self._guardar_dias(pd.date_range('2024-06-01 08:00', periods=30, freq='D'))
+        self.assertEqual(self.sistema.actualizar_analisis_fenologicos(), 30)
+        self.assertEqual(self.sistema.actualizar_analisis_fenologicos(), 0)
+
+        self._guardar_dias(pd.date_range('2024-07-01 08:00', periods=5, freq='D'))
+        self.assertEqual(self.sistema.actualizar_analisis_fenologicos(), 5)
+
+        analisis = self._analisis()
+        self.assertEqual(len(analisis), 35)
+        # Los acumulados de los días nuevos continúan la temporada ya analizada
+        self.assertTrue(analisis['grado_dias_crecimiento'].is_monotonic_increasing)
+
+    def test_sincroniza_dias_atrasados(self):
+        """Test de que la sincronización incluye días faltantes anteriores al último acumulado"""
+        conn = sqlite3.connect(self.sistema.base_datos)
+        insertar = lambda fechas: conn.executemany('''
+            INSERT INTO datos_meteorologicos_casablanca
+            (estacion_id, fecha, temperatura_max, temperatura_min, temperatura_promedio)
+            VALUES (?, ?, 20.0, 4.0, 12.0)
+        ''', [(self.estacion_id, self.sistema._formatear_fecha(fecha)) for fecha in fechas])
+
+        # Guardados por otra vía, sin pasar por los acumuladores
+        insertar(pd.date_range('2024-06-11 08:00', periods=5, freq='D'))
+        conn.commit()
+        self.sistema._sincronizar_acumuladores(conn, self.estacion_id)
+        insertar(pd.date_range('2024-06-01 08:00', periods=10, freq='D'))
+        conn.commit()
+        self.sistema._sincronizar_acumuladores(conn, self.estacion_id)
+
+        dias = conn.execute('SELECT COUNT(*) FROM acumulados_termicos WHERE estacion_id = ?',
+                            (self.estacion_id,)).fetchone()[0]
+        conn.close()
+        self.assertEqual(dias, 15)
+        acumulado = self.sistema.acumuladores_termicos.acumulado(self.estacion_id, pd.Timestamp('2024-06-15'))
+        self.assertAlmostEqual(acumulado['grado_dias_acumulados'], 15 * 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - GUARDADO MASIVO DEL PIPELINE METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de executemany por bloques y del escritor en segundo plano
+"""
+
+import unittest
+import tempfile
+import shutil
+import sqlite3
+import os
+import logging
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio de gestión de datos al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '08_Gestion_Datos' / 'scripts'))
+
+try:
+    from pipeline_completo_metgo import PipelineCompletoMETGO, DatosMeteorologicos, LoteMeteorologico
+    PIPELINE_AVAILABLE = True
+except ImportError:
+    PIPELINE_AVAILABLE = False
+
+
+class TestGuardadoPipelineMETGO(unittest.TestCase):
+    """Tests unitarios para el guardado masivo del pipeline"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not PIPELINE_AVAILABLE:
+            self.skipTest("Pipeline completo no disponible")
+
+        self.directorio_original = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+        self.pipeline = PipelineCompletoMETGO()
+        self.pipeline.configuracion_pipeline['tamano_bloque_bd'] = 2
+        logging.disable(logging.INFO)
+
+        inicio = datetime(2025, 1, 1)
+        self.datos = [
+            DatosMeteorologicos(inicio + timedelta(hours=i), 15.0 + i, 0.0, 5.0, 180.0, 60.0, 1013.0, 500.0, 10.0)
+            for i in range(5)
+        ]
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        if hasattr(self, 'pipeline'):
+            logging.disable(logging.NOTSET)
+            self.pipeline.cerrar_pipeline()
+            os.chdir(self.directorio_original)
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _total_meteorologicos(self) -> int:
+        return self.pipeline.obtener_metricas_pipeline()['metricas_bd']['total_datos_meteorologicos']
+
+    def test_guardado_por_bloques_atomico(self):
+        """Test de guardado en varios bloques y rollback completo si falla uno"""
+        self.assertTrue(self.pipeline.guardar_datos_bd(self.datos, 'datos_meteorologicos'))
+        self.assertEqual(self._total_meteorologicos(), 5)
+
+        # La fila inválida está en el segundo bloque: el primero tampoco queda guardado
+        invalidos = self.datos[:3] + [DatosMeteorologicos(None, 20.0, 0.0, 5.0, 180.0, 60.0, 1013.0, 500.0, 10.0)]
+        self.assertFalse(self.pipeline.guardar_datos_bd(invalidos, 'datos_meteorologicos'))
+        self.assertEqual(self._total_meteorologicos(), 5)
+
+        self.assertFalse(self.pipeline.guardar_datos_bd(self.datos, 'tabla_inexistente'))
+        self.assertTrue(self.pipeline.guardar_datos_bd([], 'datos_meteorologicos'))
+
+        # El lote columnar se guarda con las mismas columnas
+        self.assertTrue(self.pipeline.guardar_datos_bd(LoteMeteorologico.desde_datos(self.datos),
+                                                       'datos_meteorologicos'))
+        self.assertEqual(self._total_meteorologicos(), 10)
+
+    def test_escritor_en_segundo_plano(self):
+        """Test del escritor en segundo plano: métricas esperan la cola y los errores se registran"""
+        for inicio in range(0, 5, 2):
+            self.assertTrue(self.pipeline.guardar_datos_bd_async(self.datos[inicio:inicio + 2],
+                                                                 'datos_meteorologicos'))
+        self.assertTrue(self.pipeline.hilo_escritor_bd.is_alive())
+        self.assertEqual(self._total_meteorologicos(), 5)
+
+        self.pipeline.guardar_datos_bd_async(self.datos, 'tabla_inexistente')
+        self.pipeline.esperar_escrituras_bd()
+        self.assertEqual(len(self.pipeline.estado_pipeline['errores']), 1)
+
+    def test_cierre_persiste_pendientes(self):
+        """Test de que cerrar el pipeline escribe los lotes encolados y detiene el hilo"""
+        for dato in self.datos:
+            self.pipeline.guardar_datos_bd_async([dato], 'datos_meteorologicos')
+        hilo = self.pipeline.hilo_escritor_bd
+
+        self.pipeline.cerrar_pipeline()
+
+        self.assertFalse(hilo.is_alive())
+        self.assertIsNone(self.pipeline.hilo_escritor_bd)
+        archivo_bd = f"{self.pipeline.configuracion['directorio_datos']}/pipeline_metgo3d.db"
+        conn = sqlite3.connect(archivo_bd)
+        try:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM datos_meteorologicos').fetchone()[0], 5)
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - ACTUALIZACIÓN INCREMENTAL HISTÓRICA METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de marcas de agua y particiones derivadas
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import numpy as np
+import pandas as pd
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio de gestión de datos al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '08_Gestion_Datos' / 'scripts'))
+
+try:
+    from sistema_base_datos_historica_5_anios import SistemaBaseDatosHistorica5Anios
+    HISTORICO_AVAILABLE = True
+except ImportError:
+    HISTORICO_AVAILABLE = False
+
+
+def datos_sinteticos(estacion: str, inicio: datetime, fin: datetime) -> list:
+    """Registros diarios con las columnas que entrega OpenMeteo"""
+    fechas = pd.date_range(inicio.date(), fin.date(), freq='D')
+    rng = np.random.default_rng(abs(hash(estacion)) % 1000)
+    return [
+        {
+            'fecha': fecha.to_pydatetime(),
+            'estacion': estacion,
+            'temperatura_max': 24 + 6 * np.sin(fecha.dayofyear / 58) + rng.normal(),
+            'temperatura_min': 9 + 4 * np.sin(fecha.dayofyear / 58) + rng.normal(),
+            'temperatura_promedio': 16 + 5 * np.sin(fecha.dayofyear / 58),
+            'humedad_relativa': 65 + rng.normal(0, 8),
+            'velocidad_viento': abs(rng.normal(10, 3)),
+            'direccion_viento': 200.0,
+            'precipitacion': max(0.0, rng.normal(0, 4)),
+            'presion_atmosferica': 1013 + rng.normal(),
+            'nubosidad': 40.0,
+            'radiacion_solar': 18.0,
+            'punto_rocio': 8.0,
+            'uv_index': 6.0,
+            'indice_calor': None,
+            'indice_frio': None,
+            'calidad_aire': None
+        }
+        for fecha in fechas
+    ]
+
+
+class TestActualizacionIncrementalHistorica(unittest.TestCase):
+    """Tests unitarios para actualizar_datos_historicos_incremental"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not HISTORICO_AVAILABLE:
+            self.skipTest("Sistema de base de datos histórica no disponible")
+
+        self.directorio_original = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+
+        self.sistema = SistemaBaseDatosHistorica5Anios()
+        self.sistema.archivo_columnar = None
+        self.sistema.estaciones_meteorologicas = {
+            clave: info for clave, info in list(self.sistema.estaciones_meteorologicas.items())[:2]
+        }
+        self.estaciones = list(self.sistema.estaciones_meteorologicas)
+        self.consultas = []
+
+        def obtener(lat, lon, inicio, fin, estacion):
+            self.consultas.append((estacion, inicio.date()))
+            return datos_sinteticos(estacion, inicio, fin)
+
+        self.sistema._obtener_datos_historicos_openmeteo = obtener
+
+        # Carga completa inicial hasta hace 30 días
+        self.hoy = datetime.now()
+        self.ultima_carga = self.hoy - timedelta(days=30)
+        df = pd.DataFrame([
+            registro for estacion in self.estaciones
+            for registro in datos_sinteticos(estacion, self.hoy - timedelta(days=400), self.ultima_carga)
+        ])
+        self.sistema._guardar_datos_historicos(df)
+        self.sistema._calcular_indices_meteorologicos(df)
+        self.sistema._calcular_patrones_estacionales(df)
+        self.sistema._calcular_tendencias_climaticas(df)
+        self.sistema._detectar_eventos_extremos(df)
+        self.sistema._evaluar_calidad_datos(df)
+        self.filas_iniciales = len(df)
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        if hasattr(self, 'sistema'):
+            self.sistema.pool.cerrar()
+            os.chdir(self.directorio_original)
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _contar(self, tabla: str) -> int:
+        return self.sistema.pool.consultar(f"SELECT COUNT(*) FROM {tabla}")[0][0]
+
+    def _marcas(self) -> dict:
+        return dict(self.sistema.pool.consultar("SELECT estacion, ultima_fecha FROM marcas_agua_historicas"))
+
+    def test_marca_de_agua_e_idempotencia(self):
+        """Test de que la marca avanza y repetir la actualización no duplica filas"""
+        self.assertEqual(set(self._marcas().values()), {self.ultima_carga.strftime('%Y-%m-%d')})
+
+        df_nuevo = self.sistema.actualizar_datos_historicos_incremental()
+
+        dias_nuevos = (self.hoy.date() - self.ultima_carga.date()).days
+        self.assertEqual(len(df_nuevo), dias_nuevos * len(self.estaciones))
+        self.assertEqual(set(self._marcas().values()), {self.hoy.strftime('%Y-%m-%d')})
+        self.assertEqual(self._contar('datos_meteorologicos_historicos'), self.filas_iniciales + len(df_nuevo))
+        self.assertEqual(self._contar('indices_meteorologicos'), self.filas_iniciales + len(df_nuevo))
+        self.assertEqual(
+            sorted(self.consultas),
+            sorted((estacion, (self.ultima_carga + timedelta(days=1)).date()) for estacion in self.estaciones)
+        )
+
+        # Segunda ejecución: todo al día, sin consultas ni filas nuevas
+        self.consultas.clear()
+        self.assertTrue(self.sistema.actualizar_datos_historicos_incremental().empty)
+        self.assertEqual(self.consultas, [])
+
+        # Marca atrasada: los días vueltos a descargar ya existen y no se duplican
+        atrasada = (self.hoy - timedelta(days=10)).strftime('%Y-%m-%d')
+        self.sistema.pool.ejecutar("UPDATE marcas_agua_historicas SET ultima_fecha = ?", [atrasada])
+        self.assertTrue(self.sistema.actualizar_datos_historicos_incremental().empty)
+        self.assertEqual(len(self.consultas), len(self.estaciones))
+        self.assertEqual(self._contar('datos_meteorologicos_historicos'), self.filas_iniciales + len(df_nuevo))
+        self.assertEqual(set(self._marcas().values()), {self.hoy.strftime('%Y-%m-%d')})
+
+    def test_solo_particiones_tocadas(self):
+        """Test de que solo se recalculan las particiones (estación, mes) y (estación, año) nuevas"""
+        patrones_antes = dict(((e, m, v), r) for r, e, m, v in self.sistema.pool.consultar(
+            "SELECT rowid, estacion_meteorologica, mes, variable FROM patrones_estacionales"))
+        eventos_antes = self.sistema.pool.consultar(
+            "SELECT rowid, estacion, strftime('%Y', fecha_evento) FROM eventos_extremos")
+
+        df_nuevo = self.sistema.actualizar_datos_historicos_incremental()
+        meses = set(zip(df_nuevo['estacion'], df_nuevo['fecha'].dt.month))
+        años = {(estacion, str(año)) for estacion, año in zip(df_nuevo['estacion'], df_nuevo['fecha'].dt.year)}
+
+        patrones_despues = dict(((e, m, v), r) for r, e, m, v in self.sistema.pool.consultar(
+            "SELECT rowid, estacion_meteorologica, mes, variable FROM patrones_estacionales"))
+        self.assertEqual(set(patrones_despues), set(patrones_antes) | set(patrones_despues))
+        for clave, rowid in patrones_antes.items():
+            if (clave[0], clave[1]) in meses:
+                self.assertNotEqual(patrones_despues[clave], rowid)
+            else:
+                self.assertEqual(patrones_despues[clave], rowid)
+
+        eventos_despues = set(self.sistema.pool.consultar(
+            "SELECT rowid, estacion, strftime('%Y', fecha_evento) FROM eventos_extremos"))
+        intactos = [fila for fila in eventos_antes if (fila[1], fila[2]) not in años]
+        self.assertTrue(intactos)
+        self.assertTrue(set(intactos) <= eventos_despues)
+
+    def test_falla_no_avanza_marca(self):
+        """Test de que una falla a mitad de la escritura no deja datos ni marca a medias"""
+        patrones_antes = self._contar('patrones_estacionales')
+
+        def fallar(conn, df):
+            raise RuntimeError("falla al escribir la marca de agua")
+
+        self.sistema._actualizar_marcas_agua = fallar
+        self.assertTrue(self.sistema.actualizar_datos_historicos_incremental().empty)
+
+        self.assertEqual(self._contar('datos_meteorologicos_historicos'), self.filas_iniciales)
+        self.assertEqual(self._contar('indices_meteorologicos'), self.filas_iniciales)
+        self.assertEqual(self._contar('patrones_estacionales'), patrones_antes)
+        self.assertEqual(set(self._marcas().values()), {self.ultima_carga.strftime('%Y-%m-%d')})
+
+        # La ejecución siguiente reintenta los mismos días
+        del self.sistema._actualizar_marcas_agua
+        df_nuevo = self.sistema.actualizar_datos_historicos_incremental()
+        self.assertFalse(df_nuevo.empty)
+        self.assertEqual(self._contar('datos_meteorologicos_historicos'), self.filas_iniciales + len(df_nuevo))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - ÍNDICES AGROMETEOROLÓGICOS METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing del motor vectorizado de índices
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio de gestión de datos al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '08_Gestion_Datos' / 'scripts'))
+
+try:
+    from indices_agrometeorologicos import calcular_indices_agrometeorologicos, COLUMNAS_INDICES
+    INDICES_AVAILABLE = True
+except ImportError:
+    INDICES_AVAILABLE = False
+
+try:
+    from sistema_base_datos_historica_5_anios import SistemaBaseDatosHistorica5Anios
+    HISTORICO_AVAILABLE = True
+except ImportError:
+    HISTORICO_AVAILABLE = False
+
+
+class TestIndicesAgrometeorologicos(unittest.TestCase):
+    """Tests unitarios para el motor vectorizado de índices"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not INDICES_AVAILABLE:
+            self.skipTest("Módulo de índices no disponible")
+
+        rng = np.random.default_rng(42)
+        n = 500
+        self.df = pd.DataFrame({
+            'fecha': pd.date_range('2020-01-01', periods=n, freq='D'),
+            'estacion': 'quillota_centro',
+            'precipitacion': np.where(rng.random(n) < 0.5, 0.0, rng.exponential(10, n)),
+            'temperatura_min': rng.normal(3, 4, n),
+            'temperatura_promedio': rng.normal(15, 8, n),
+            'humedad_relativa': rng.uniform(10, 100, n),
+            'velocidad_viento': rng.exponential(10, n),
+            'radiacion_solar': rng.uniform(0, 1200, n)
+        })
+        self.df.loc[::37, 'temperatura_promedio'] = np.nan
+        self.df.loc[::41, 'precipitacion'] = np.nan
+
+    def test_columnas_resultado(self):
+        """Test de esquema del resultado"""
+        resultado = calcular_indices_agrometeorologicos(self.df)
+
+        self.assertEqual(list(resultado.columns), ['fecha', 'estacion'] + COLUMNAS_INDICES)
+        self.assertEqual(len(resultado), len(self.df))
+
+    def test_valores_conocidos(self):
+        """Test de valores puntuales de los índices"""
+        df = pd.DataFrame({
+            'precipitacion': [0.0, 12.5],
+            'temperatura_min': [-3.0, 5.0],
+            'temperatura_promedio': [20.0, 5.0],
+            'humedad_relativa': [50.0, 80.0],
+            'velocidad_viento': [0.0, 10.0],
+            'radiacion_solar': [1000.0, 0.0]
+        })
+        resultado = calcular_indices_agrometeorologicos(df)
+
+        self.assertEqual(resultado['indice_sequia'].tolist(), [-2.0, 0.0])
+        self.assertEqual(resultado['indice_helada'].tolist(), [1.0, 0.0])
+        self.assertEqual(resultado['grado_dias_calor'].tolist(), [10.0, 0.0])
+        self.assertEqual(resultado['grado_dias_frio'].tolist(), [0.0, 5.0])
+        self.assertAlmostEqual(resultado['indice_crecimiento'].iloc[0], 0.667)
+
+    def test_equivalencia_con_funciones_escalares(self):
+        """Test de resultados idénticos a la implementación fila a fila"""
+        if not HISTORICO_AVAILABLE:
+            self.skipTest("Módulo de base de datos histórica no disponible")
+
+        sistema = SistemaBaseDatosHistorica5Anios.__new__(SistemaBaseDatosHistorica5Anios)
+        resultado = calcular_indices_agrometeorologicos(self.df)
+
+        for i, row in self.df.iterrows():
+            esperado = {
+                'indice_sequia': round(sistema._calcular_indice_sequia(row['precipitacion']), 3),
+                'indice_helada': round(sistema._calcular_indice_helada(row['temperatura_min']), 3),
+                'indice_estres_hidrico': round(sistema._calcular_indice_estres_hidrico(
+                    row['temperatura_promedio'], row['humedad_relativa'], row['velocidad_viento']), 3),
+                'indice_crecimiento': round(sistema._calcular_indice_crecimiento(
+                    row['temperatura_promedio'], row['radiacion_solar'], row['precipitacion']), 3),
+                'indice_rendimiento': round(sistema._calcular_indice_rendimiento(
+                    row['temperatura_promedio'], row['precipitacion'], row['radiacion_solar']), 3),
+                'grado_dias_calor': round(max(0, row['temperatura_promedio'] - 10), 2),
+                'grado_dias_frio': round(max(0, 10 - row['temperatura_promedio']), 2)
+            }
+            for columna, valor in esperado.items():
+                self.assertAlmostEqual(resultado.at[i, columna], valor, places=9,
+                                       msg=f"{columna} en fila {i}")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
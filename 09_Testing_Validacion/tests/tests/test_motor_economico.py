@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - MOTOR ECONÓMICO AGRÍCOLA METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de VAN, TIR y Monte Carlo vectorizados
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio del sistema agrícola al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '02_Sistema_Agricola' / 'scripts'))
+
+try:
+    from motor_economico_agricola import MotorEconomicoAgricola, calcular_payback, calcular_tir, calcular_van
+    MOTOR_ECONOMICO_AVAILABLE = True
+except ImportError:
+    MOTOR_ECONOMICO_AVAILABLE = False
+
+
+class TestMotorEconomicoAgricola(unittest.TestCase):
+    """Tests unitarios para el motor económico vectorizado"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not MOTOR_ECONOMICO_AVAILABLE:
+            self.skipTest("Motor económico no disponible")
+
+        self.configuracion = {
+            'palto': {
+                'precio_kg': 2500, 'rendimiento_hectarea': 8000, 'costo_produccion_hectarea': 4500000,
+                'costo_plantacion': 8000000, 'tiempo_inicio_produccion': 3,
+                'costo_mantenimiento_anual': 1200000, 'incremento_rendimiento_anual': 0.15,
+                'estabilizacion_rendimiento': 10
+            },
+            'uva': {
+                'precio_kg': 800, 'rendimiento_hectarea': 25000, 'costo_produccion_hectarea': 12000000,
+                'costo_plantacion': 15000000, 'tiempo_inicio_produccion': 2,
+                'costo_mantenimiento_anual': 2500000, 'incremento_rendimiento_anual': 0.20,
+                'estabilizacion_rendimiento': 5
+            }
+        }
+        self.motor = MotorEconomicoAgricola(self.configuracion)
+
+    def _flujos_bucle(self, config, area, horizonte):
+        """Flujos calculados año a año como en calcular_roi_cultivo"""
+        flujos = []
+        for año in range(1, horizonte + 1):
+            if año <= config['tiempo_inicio_produccion']:
+                flujo = -(config['costo_plantacion'] * area / config['tiempo_inicio_produccion'] +
+                          config['costo_mantenimiento_anual'] * area)
+            else:
+                año_produccion = min(año - config['tiempo_inicio_produccion'], config['estabilizacion_rendimiento'])
+                rendimiento = config['rendimiento_hectarea'] * (1 + config['incremento_rendimiento_anual'] * año_produccion)
+                flujo = rendimiento * config['precio_kg'] * area - config['costo_produccion_hectarea'] * area
+            flujos.append(flujo)
+        return np.array(flujos)
+
+    def test_flujos_coinciden_con_bucle(self):
+        """Test de la matriz de flujos contra el cálculo año a año"""
+        _, _, flujos = self.motor.flujos_caja(['palto', 'uva', 'palto'], [3.0, 2.0, 1.5], 20)
+
+        self.assertEqual(flujos.shape, (3, 20))
+        np.testing.assert_allclose(flujos[0], self._flujos_bucle(self.configuracion['palto'], 3.0, 20))
+        np.testing.assert_allclose(flujos[1], self._flujos_bucle(self.configuracion['uva'], 2.0, 20))
+        np.testing.assert_allclose(flujos[2], self._flujos_bucle(self.configuracion['palto'], 1.5, 20))
+
+    def test_tir_vectorizada(self):
+        """Test de TIR que anula el VAN y NaN cuando no existe"""
+        flujos = np.array([
+            [-100.0, 110.0, 0.0],
+            [-100.0, 0.0, 121.0],
+            [-100.0, -50.0, -10.0],
+            [-1000.0, 200.0, 1500.0]
+        ])
+        tir = calcular_tir(flujos)
+
+        np.testing.assert_allclose(tir[:2], [0.1, 0.1], atol=1e-9)
+        self.assertTrue(np.isnan(tir[2]))
+        np.testing.assert_allclose(calcular_van(flujos[[0, 1, 3]], tir[[0, 1, 3]]), 0.0, atol=1e-6)
+        np.testing.assert_array_equal(calcular_payback(flujos), [2, 3, 3, 3])
+
+    def test_evaluar_miles_de_escenarios(self):
+        """Test de escenarios de cultivo, área y precio en una sola llamada"""
+        rng = np.random.default_rng(0)
+        escenarios = pd.DataFrame({
+            'cultivo_id': rng.choice(['palto', 'uva'], 5000),
+            'area_hectareas': rng.uniform(1, 50, 5000),
+            'factor_precio': rng.uniform(0.3, 1.5, 5000)
+        })
+        resultado = self.motor.evaluar_escenarios(escenarios, horizonte_anos=15)
+
+        self.assertEqual(len(resultado), 5000)
+        fila = resultado.iloc[7]
+        _, _, flujos = self.motor.flujos_caja([fila['cultivo_id']], fila['area_hectareas'], 15,
+                                              [fila['factor_precio']])
+        self.assertAlmostEqual(fila['van'], calcular_van(flujos, 0.08)[0], delta=1e-3)
+
+        # La TIR de cada escenario anula su VAN (relativo a los costos)
+        validas = resultado[resultado['tir'].notna()]
+        _, _, flujos = self.motor.flujos_caja(validas['cultivo_id'].tolist(), validas['area_hectareas'].to_numpy(),
+                                              15, validas['factor_precio'].to_numpy())
+        residuo = calcular_van(flujos, validas['tir'].to_numpy()) / validas['costos_totales'].to_numpy()
+        np.testing.assert_allclose(residuo, 0.0, atol=1e-8)
+
+        with self.assertRaises(ValueError):
+            self.motor.parametros(['kiwi'])
+
+    def test_montecarlo_percentiles(self):
+        """Test de distribución de VAN y TIR por Monte Carlo"""
+        resultado = self.motor.simular_montecarlo('uva', 3.0, horizonte_anos=12, n_simulaciones=4000, semilla=1)
+        repetido = self.motor.simular_montecarlo('uva', 3.0, horizonte_anos=12, n_simulaciones=4000, semilla=1)
+
+        self.assertEqual(resultado['van'], repetido['van'])
+        self.assertLess(resultado['van']['p5'], resultado['van']['p50'])
+        self.assertLess(resultado['van']['p50'], resultado['van']['p95'])
+        self.assertLess(resultado['tir']['p5'], resultado['tir']['p95'])
+        self.assertTrue(0.0 <= resultado['probabilidad_van_negativo'] <= 1.0)
+
+        # Sin volatilidad todas las simulaciones coinciden con el escenario base
+        determinista = self.motor.simular_montecarlo('uva', 3.0, horizonte_anos=12, n_simulaciones=10,
+                                                     volatilidad_precio=0.0, volatilidad_rendimiento=0.0)
+        base = self.motor.evaluar_escenarios(pd.DataFrame({'cultivo_id': ['uva'], 'area_hectareas': [3.0]}), 12)
+        self.assertAlmostEqual(determinista['van']['p50'], base['van'].iloc[0], delta=1e-3)
+        self.assertAlmostEqual(determinista['van']['desviacion'], 0.0, delta=1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
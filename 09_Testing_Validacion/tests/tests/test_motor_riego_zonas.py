@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - MOTOR DE RIEGO MULTIZONA METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de evaluación y programación de riego por zonas
+"""
+
+import unittest
+import tempfile
+import os
+import time
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio del sistema agrícola al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '02_Sistema_Agricola' / 'scripts'))
+
+try:
+    from motor_riego_zonas import MotorRiegoZonas
+    MOTOR_AVAILABLE = True
+except ImportError:
+    MOTOR_AVAILABLE = False
+
+try:
+    from riego_automatizado_metgo import RiegoAutomatizadoMETGO
+    RIEGO_AVAILABLE = True
+except ImportError:
+    RIEGO_AVAILABLE = False
+
+try:
+    from sistema_riego_inteligente_metgo import SistemaRiegoInteligente, TipoCultivo
+    RIEGO_INTELIGENTE_AVAILABLE = True
+except ImportError:
+    RIEGO_INTELIGENTE_AVAILABLE = False
+
+
+class TestMotorRiegoZonas(unittest.TestCase):
+    """Tests unitarios para el motor de riego multizona"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not MOTOR_AVAILABLE:
+            self.skipTest("Motor de riego multizona no disponible")
+
+        self.motor = MotorRiegoZonas(limite_valvulas_simultaneas=2, caudal_maximo_litros_minuto=50.0,
+                                     presion_disponible=2.0)
+        self.zonas = pd.DataFrame({
+            'zona_id': ['z1', 'z2', 'z3', 'z4', 'z5'],
+            'humedad_suelo': [15.0, 25.0, 45.0, 70.0, 25.0],
+            'temperatura': [32.0, 20.0, 20.0, 20.0, 20.0],
+            'temperatura_optima_max': 30.0,
+            'caudal_litros_minuto': [20.0, 20.0, 20.0, 20.0, 20.0],
+            'presion_trabajo': [1.5, 1.5, 1.5, 1.5, 2.5]
+        })
+
+    def test_evaluacion_vectorizada(self):
+        """Test de necesidad, urgencia y duración por zona"""
+        evaluacion = self.motor.evaluar(self.zonas)
+
+        self.assertEqual(evaluacion['necesita_riego'].tolist(), [True, True, False, False, True])
+        self.assertEqual(evaluacion['urgencia'].tolist(), ['critica', 'alta', 'normal', 'baja', 'alta'])
+        # int(int(30 × 1.5) × 1.1) (sobre temperatura óptima) y 30 × 1.2
+        self.assertEqual(evaluacion['duracion_minutos'].tolist(), [49, 36, 0, 0, 36])
+        self.assertEqual(evaluacion['volumen_litros'].iloc[0], 980.0)
+
+    def test_suspension_por_clima(self):
+        """Test de suspensión por lluvia y del viento solo en aspersión"""
+        lluvia = self.motor.evaluar(self.zonas, {'precipitacion': 8.0})
+        self.assertFalse(lluvia['necesita_riego'].any())
+        self.assertEqual(lluvia['motivo'].iloc[0], 'precipitacion')
+
+        zonas = self.zonas.assign(tipo_riego=['aspersion', 'goteo', 'goteo', 'goteo', 'goteo'])
+        viento = self.motor.evaluar(zonas, {'viento': 20.0})
+        self.assertEqual(viento['motivo'].iloc[0], 'viento')
+        self.assertTrue(viento['necesita_riego'].iloc[1])
+
+    def test_programa_respeta_limites(self):
+        """Test de válvulas simultáneas, caudal y presión en el programa"""
+        zonas = pd.concat([self.zonas] * 20, ignore_index=True)
+        zonas['zona_id'] = [f'z{i}' for i in range(len(zonas))]
+        zonas.loc[::7, 'caudal_litros_minuto'] = 35.0
+        programa = self.motor.programar(self.motor.evaluar(zonas))
+
+        self.assertTrue((programa.loc[programa['presion_trabajo'] > 2.0, 'estado'] == 'sin_presion').all())
+        programadas = programa[programa['estado'] == 'programada']
+        self.assertEqual(len(programadas), 40)
+
+        # En cada inicio, las válvulas abiertas y su caudal no superan los límites
+        for instante in programadas['inicio_minuto'].unique():
+            abiertas = programadas[(programadas['inicio_minuto'] <= instante) &
+                                   (programadas['fin_minuto'] > instante)]
+            self.assertLessEqual(len(abiertas), 2)
+            self.assertLessEqual(abiertas['caudal_litros_minuto'].sum(), 50.0)
+
+        # Las zonas críticas parten antes que las de urgencia alta
+        criticas = programadas[programadas['urgencia'] == 'critica']['inicio_minuto']
+        altas = programadas[programadas['urgencia'] == 'alta']['inicio_minuto']
+        self.assertLessEqual(criticas.max(), altas.min())
+
+    def test_valvulas_ocupadas(self):
+        """Test de que las válvulas abiertas ocupan cupo y caudal y no se reprograman"""
+        evaluacion = self.motor.evaluar(self.zonas)
+        programa = self.motor.programar(evaluacion, ocupadas={'z2': 10.0}).set_index('zona_id')
+
+        self.assertEqual(programa.loc['z2', 'estado'], 'en_curso')
+        self.assertTrue(np.isnan(programa.loc['z2', 'inicio_minuto']))
+        # z1 parte de inmediato junto a z2; z5 supera la presión disponible
+        self.assertEqual(programa.loc['z1', 'inicio_minuto'], 0.0)
+        self.assertEqual(programa.loc['z5', 'estado'], 'sin_presion')
+
+        # Con dos válvulas abiertas, la primera zona espera a que termine la más corta
+        zonas = self.zonas.assign(presion_trabajo=1.5)
+        programa = self.motor.programar(self.motor.evaluar(zonas), ocupadas={'z3': 5.0, 'z4': 12.0})
+        programa = programa.set_index('zona_id')
+        self.assertEqual(programa.loc['z1', 'inicio_minuto'], 5.0)
+        self.assertEqual(programa.loc['z2', 'inicio_minuto'], 12.0)
+
+    def test_cientos_de_zonas(self):
+        """Test de planificación de cientos de zonas en pocos milisegundos"""
+        rng = np.random.default_rng(0)
+        zonas = pd.DataFrame({
+            'zona_id': [f'valvula_{i}' for i in range(500)],
+            'humedad_suelo': rng.uniform(10, 70, 500),
+            'coeficiente_cultivo': rng.uniform(0.6, 1.1, 500)
+        })
+        motor = MotorRiegoZonas(limite_valvulas_simultaneas=10)
+
+        inicio = time.perf_counter()
+        plan = motor.planificar(zonas, {'et0': 6.0}, ventana_minutos=720)
+        duracion = time.perf_counter() - inicio
+
+        self.assertLess(duracion, 0.5)
+        self.assertEqual(plan['resumen']['zonas'], 500)
+        self.assertEqual(plan['resumen']['programadas'] + plan['resumen']['no_programadas'],
+                         plan['resumen']['requieren_riego'])
+        self.assertEqual(len(plan['controladores']), plan['resumen']['programadas'])
+
+    def test_riego_automatizado_multizona(self):
+        """Test de integración con el sistema de riego automatizado"""
+        if not RIEGO_AVAILABLE:
+            self.skipTest("Sistema de riego automatizado no disponible")
+
+        directorio_original = os.getcwd()
+        with tempfile.TemporaryDirectory() as directorio:
+            os.chdir(directorio)
+            try:
+                sistema = RiegoAutomatizadoMETGO()
+                zonas = sistema._construir_matriz_zonas().assign(humedad_suelo=12.0)
+                plan = sistema.evaluar_zonas_riego(zonas, {'precipitacion': 0.0, 'viento': 5.0})
+                sistema.cerrar()
+            finally:
+                os.chdir(directorio_original)
+
+        self.assertEqual(plan['resumen']['zonas'], 2)
+        self.assertEqual(set(plan['programa']['controlador_id']), {'controlador_1', 'controlador_2'})
+
+    def test_ciclo_automatico_replanifica_turnos(self):
+        """Test de válvulas abiertas como ocupadas y cancelación de turnos al replanificar"""
+        if not RIEGO_INTELIGENTE_AVAILABLE:
+            self.skipTest("Sistema de riego inteligente no disponible")
+
+        directorio_original = os.getcwd()
+        with tempfile.TemporaryDirectory() as directorio:
+            os.chdir(directorio)
+            try:
+                sistema = SistemaRiegoInteligente()
+                sistema.ejecutar_riego_inteligente = lambda ubicacion, duracion, motivo='automatico': True
+                for sensor in sistema.sensores_humedad.values():
+                    sensor.leer_humedad = lambda: 5.0
+                actuador = sistema.actuadores_riego['sector_a']
+                actuador.estado = True
+                actuador.tiempo_activacion = time.time()
+                actuador.duracion_segundos = 600
+
+                programa = sistema.planificar_riego({
+                    'sector_a': TipoCultivo.PALTO, 'sector_b': TipoCultivo.UVA, 'sector_c': TipoCultivo.CITRICOS
+                })['programa'].set_index('zona_id')
+                self.assertEqual(programa.loc['sector_a', 'estado'], 'en_curso')
+                self.assertEqual(programa['inicio_minuto'].min(), 0.0)
+                self.assertGreater(programa['inicio_minuto'].max(), 0.0)
+
+                sistema.ejecutar_ciclo_riego_automatico()
+                primeros = dict(sistema._turnos_programados)
+                self.assertTrue(primeros)
+                self.assertNotIn('sector_a', primeros)
+
+                sistema.ejecutar_ciclo_riego_automatico()
+                self.assertTrue(all(turno.finished.is_set() for turno in primeros.values()))
+                self.assertEqual(set(sistema._turnos_programados), set(primeros))
+
+                sistema.cerrar()
+                self.assertEqual(sistema._turnos_programados, {})
+            finally:
+                os.chdir(directorio_original)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - PIPELINE COMPLETO METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing del lote columnar de validación, procesamiento y alertas
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import logging
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio de gestión de datos al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '08_Gestion_Datos' / 'scripts'))
+
+try:
+    from pipeline_completo_metgo import (PipelineCompletoMETGO, DatosMeteorologicos,
+                                         LoteMeteorologico)
+    PIPELINE_AVAILABLE = True
+except ImportError:
+    PIPELINE_AVAILABLE = False
+
+
+class TestPipelineCompletoMETGO(unittest.TestCase):
+    """Tests unitarios para las etapas columnares del pipeline"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not PIPELINE_AVAILABLE:
+            self.skipTest("Pipeline completo no disponible")
+
+        self.directorio_original = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+        self.pipeline = PipelineCompletoMETGO()
+        logging.disable(logging.INFO)
+
+        inicio = datetime(2025, 1, 1)
+        valores = [
+            # temperatura, precipitacion, viento, humedad, presion
+            (20.0, 0.0, 5.0, 60.0, 1013.0),    # válido, sin alertas
+            (-3.0, 0.0, 25.0, 95.0, 1013.0),   # heladas, humedad y viento
+            (38.0, 150.0, 5.0, 50.0, 1013.0),  # calor extremo, precipitación fuera de rango
+            (50.0, 150.0, 5.0, 120.0, 900.0),  # todo fuera de rango: calidad mínima
+        ]
+        self.datos = [
+            DatosMeteorologicos(inicio + timedelta(hours=i), t, p, v, 180.0, h, pr, 500.0, 10.0)
+            for i, (t, p, v, h, pr) in enumerate(valores)
+        ]
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        if hasattr(self, 'pipeline'):
+            logging.disable(logging.NOTSET)
+            self.pipeline.cerrar_pipeline()
+            os.chdir(self.directorio_original)
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_validacion_y_procesamiento(self):
+        """Test de calidad, filtrado e índices sobre el lote"""
+        lote = LoteMeteorologico.desde_datos(self.datos)
+        procesados = self.pipeline.procesar_datos_meteorologicos(
+            self.pipeline.validar_datos_meteorologicos(lote)
+        )
+
+        self.assertIsInstance(procesados, LoteMeteorologico)
+        self.assertEqual(len(procesados), 4)
+        self.assertEqual(procesados.df['calidad'].round(2).tolist(), [1.0, 1.0, 0.9, 0.5])
+        self.assertEqual(procesados.df['grados_dia'].tolist(), [10.0, 0.0, 28.0, 40.0])
+        self.assertEqual(procesados[0].confort_termico, 1.0)
+
+    def test_api_de_lista_se_conserva(self):
+        """Test de que las listas de dataclasses siguen funcionando como entrada y salida"""
+        procesados = self.pipeline.procesar_datos_meteorologicos(
+            self.pipeline.validar_datos_meteorologicos(self.datos)
+        )
+
+        self.assertIsInstance(procesados, list)
+        self.assertIsInstance(procesados[1], DatosMeteorologicos)
+        self.assertEqual(procesados[1].grados_dia, 0.0)
+        self.assertIsInstance(procesados[1].timestamp, datetime)
+
+    def test_alertas_en_orden(self):
+        """Test de alertas vectorizadas en el orden del recorrido original"""
+        alertas = self.pipeline.evaluar_alertas(LoteMeteorologico.desde_datos(self.datos[:3]))
+
+        self.assertEqual([a.tipo for a in alertas],
+                         ['heladas', 'humedad_excesiva', 'viento_fuerte', 'calor_extremo'])
+        self.assertEqual(alertas[0].mensaje, "Temperatura crítica: -3.0°C")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - BÚSQUEDA DE HIPERPARÁMETROS METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de successive halving y búsqueda con presupuesto
+"""
+
+import unittest
+import tempfile
+import os
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Agregar el directorio de modelos ML al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '06_Modelos_ML_IA' / 'scripts'))
+
+try:
+    from pipeline_ml_optimizado import PipelineMLOptimizado
+    PIPELINE_ML_AVAILABLE = True
+except ImportError:
+    PIPELINE_ML_AVAILABLE = False
+
+
+class TestBusquedaHiperparametros(unittest.TestCase):
+    """Tests unitarios para la búsqueda paralela con presupuesto"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not PIPELINE_ML_AVAILABLE:
+            self.skipTest("Pipeline ML optimizado no disponible")
+
+        # El pipeline crea su directorio de modelos en el directorio actual
+        self.directorio_original = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+        rng = np.random.default_rng(42)
+        n = 600
+        self.datos = pd.DataFrame({
+            'fecha': pd.date_range('2023-01-01', periods=n, freq='D'),
+            'temperatura_min': rng.normal(10, 4, n),
+            'humedad_relativa': rng.normal(70, 15, n),
+            'radiacion_solar': rng.normal(18, 6, n),
+            'nubosidad': rng.integers(0, 100, n)
+        })
+        self.datos['temperatura_max'] = (self.datos['temperatura_min'] + 0.6 * self.datos['radiacion_solar']
+                                         + rng.normal(0, 1, n))
+
+    def tearDown(self):
+        """Restaurar directorio de trabajo"""
+        os.chdir(self.directorio_original)
+        self.temp_dir.cleanup()
+
+    def _pipeline(self, **config):
+        pipeline = PipelineMLOptimizado({'max_procesos': 1, 'min_filas_halving': 50, **config})
+        # Espacio reducido para que el test sea rápido
+        pipeline.modelos_disponibles = {nombre: pipeline.modelos_disponibles[nombre]
+                                        for nombre in ('Ridge', 'KNeighbors', 'SVR', 'LinearRegression')}
+        return pipeline
+
+    def test_halving_entrena_y_predice(self):
+        """Test de que successive halving elige parámetros y deja modelos que predicen sin escalar"""
+        pipeline = self._pipeline(modo_busqueda='halving', max_filas_modelo={'SVR': 100})
+        resultados = pipeline.entrenar_todos_modelos(self.datos, 'temperatura_max')
+
+        self.assertNotIn('SVR', resultados['modelos'])
+        self.assertEqual(set(resultados['modelos']), {'Ridge', 'KNeighbors', 'LinearRegression'})
+        self.assertIn('modelo__n_neighbors', resultados['modelos']['KNeighbors']['mejores_parametros'])
+        self.assertGreater(resultados['mejor_score'], 0.8)
+
+        predicciones = pipeline.predecir(self.datos.head(5), 'temperatura_max')
+        self.assertEqual(predicciones.shape, (5,))
+        self.assertTrue(os.path.exists(pipeline.directorio_modelos))
+
+    def test_presupuesto_agotado(self):
+        """Test de que sin presupuesto cada familia evalúa un solo candidato"""
+        pipeline = self._pipeline(modo_busqueda='aleatoria', presupuesto_segundos=0, n_iter_aleatoria=5)
+        X_train, _, y_train, _, _ = pipeline.preparar_datos(self.datos, 'temperatura_max')
+
+        busquedas = pipeline.buscar_modelos_paralelo(X_train, y_train)
+
+        self.assertEqual(busquedas['KNeighbors']['candidatos_evaluados'], 1)
+        self.assertTrue(busquedas['KNeighbors']['presupuesto_agotado'])
+        self.assertEqual(busquedas['LinearRegression']['mejores_parametros'], {})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - PROYECCIÓN VECTORIZADA METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de proyecciones de horizonte completo
+"""
+
+import unittest
+import tempfile
+import sqlite3
+import os
+import numpy as np
+import sys
+from pathlib import Path
+
+# Agregar el directorio de modelos ML al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '06_Modelos_ML_IA' / 'scripts'))
+
+try:
+    from sklearn.ensemble import RandomForestRegressor, StackingRegressor, VotingRegressor
+    from sklearn.linear_model import Ridge
+    from proyeccion_vectorizada import predecir_con_miembros
+    from sistema_modelos_dinamicos import SistemaModelosDinamicos
+    PROYECCION_AVAILABLE = True
+except ImportError:
+    PROYECCION_AVAILABLE = False
+
+
+class TestProyeccionVectorizada(unittest.TestCase):
+    """Tests unitarios para la proyección de todo el horizonte en lote"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not PROYECCION_AVAILABLE:
+            self.skipTest("Proyección vectorizada no disponible")
+
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(150, 33))
+        self.y = 2 * self.X[:, 0] + rng.normal(size=150)
+
+    def test_miembros_coinciden_con_predict(self):
+        """Test de que la predicción central por miembros es igual a predict"""
+        bosque = RandomForestRegressor(n_estimators=8, random_state=0)
+        modelos = [
+            VotingRegressor([('ridge', Ridge()), ('bosque', bosque)], weights=[3, 1]),
+            StackingRegressor([('ridge', Ridge()), ('bosque', bosque)], final_estimator=Ridge(), cv=3),
+            RandomForestRegressor(n_estimators=8, random_state=0),
+            Ridge()
+        ]
+        miembros_esperados = [2, 2, 8, None]
+
+        for modelo, n_miembros in zip(modelos, miembros_esperados):
+            modelo.fit(self.X, self.y)
+            prediccion, miembros = predecir_con_miembros(modelo, self.X[:30])
+            np.testing.assert_allclose(prediccion, modelo.predict(self.X[:30]))
+            if n_miembros is None:
+                self.assertIsNone(miembros)
+            else:
+                self.assertEqual(miembros.shape, (n_miembros, 30))
+
+    def test_proyecciones_en_lote(self):
+        """Test de proyección del horizonte con un predict y una inserción masiva"""
+        directorio_original = os.getcwd()
+        with tempfile.TemporaryDirectory() as directorio:
+            os.chdir(directorio)
+            try:
+                sistema = SistemaModelosDinamicos()
+                modelo = Ridge().fit(self.X, self.y)
+                llamadas = []
+                predict_original = modelo.predict
+                modelo.predict = lambda X: llamadas.append(len(X)) or predict_original(X)
+                sistema.modelos_activos['ridge'] = {
+                    'modelo': modelo, 'variable_objetivo': 'temperatura_max',
+                    'metricas': {'rmse': 1.5}, 'modelo_id': 3
+                }
+
+                proyecciones = sistema.generar_proyecciones('ridge', horizonte_dias=30)
+
+                conn = sqlite3.connect(sistema.base_datos)
+                filas = conn.execute(
+                    'SELECT COUNT(*) FROM proyecciones_modelos WHERE modelo_id = 3'
+                ).fetchone()[0]
+                conn.close()
+            finally:
+                os.chdir(directorio_original)
+
+        self.assertEqual(llamadas, [30])
+        self.assertEqual(len(proyecciones), 30)
+        self.assertEqual(filas, 30)
+        self.assertEqual([p['dias_futuro'] for p in proyecciones], list(range(1, 31)))
+        self.assertEqual(proyecciones[0]['confianza'], 1.0)
+        self.assertLess(proyecciones[-1]['confianza'], proyecciones[0]['confianza'])
+        self.assertLess(proyecciones[0]['intervalo_confianza_inferior'], proyecciones[0]['valor_proyectado'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
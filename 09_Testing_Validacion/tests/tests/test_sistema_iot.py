@@ -12,6 +12,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 import sys
 import os
+import tempfile
 from pathlib import Path
 import json
 
@@ -213,8 +214,20 @@ class TestSistemaIoTMETGO(unittest.TestCase):
         if not IOT_AVAILABLE:
             raise unittest.SkipTest("Módulo IoT no disponible")
         
+        # Datos y reportes del sistema en un directorio temporal
+        cls.directorio_original = os.getcwd()
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(cls.temp_dir.name)
+        
         cls.sistema_iot = SistemaIoTMETGO()
     
+    @classmethod
+    def tearDownClass(cls):
+        """Limpiar directorio temporal"""
+        cls.sistema_iot.agregador_iot.cerrar()
+        os.chdir(cls.directorio_original)
+        cls.temp_dir.cleanup()
+    
     def test_inicializacion_sistema(self):
         """Test de inicialización del sistema IoT"""
         self.assertIsNotNone(self.sistema_iot)
@@ -386,8 +399,20 @@ class TestSistemaIoTIntegracion(unittest.TestCase):
         if not IOT_AVAILABLE:
             raise unittest.SkipTest("Módulo IoT no disponible")
         
+        # Datos y reportes del sistema en un directorio temporal
+        cls.directorio_original = os.getcwd()
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(cls.temp_dir.name)
+        
         cls.sistema_iot = SistemaIoTMETGO()
     
+    @classmethod
+    def tearDownClass(cls):
+        """Limpiar directorio temporal"""
+        cls.sistema_iot.agregador_iot.cerrar()
+        os.chdir(cls.directorio_original)
+        cls.temp_dir.cleanup()
+    
     def test_pipeline_completo_iot(self):
         """Test del pipeline completo del sistema IoT"""
         # 1. Crear red de sensores
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - MOTOR DE SONDEO ASÍNCRONO IoT METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de sondeo concurrente con latencias simuladas
+"""
+
+import unittest
+import asyncio
+import time
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Agregar el directorio IoT al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '03_Sistema_IoT_Drones' / 'scripts'))
+
+try:
+    from motor_sondeo_iot import MotorSondeoIoT
+    from sistema_iot_metgo import GatewayIoT, SensorIoT
+    SONDEO_AVAILABLE = True
+except ImportError:
+    SONDEO_AVAILABLE = False
+
+
+class TestMotorSondeoIoT(unittest.TestCase):
+    """Tests unitarios para el motor de sondeo asíncrono"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not SONDEO_AVAILABLE:
+            self.skipTest("Motor de sondeo IoT no disponible")
+
+    def _gateway(self, configuraciones):
+        """Gateway con un sensor simulado por configuración"""
+        gateway = GatewayIoT('gateway_test', {})
+        for i, configuracion in enumerate(configuraciones):
+            gateway.agregar_sensor(SensorIoT(f"sensor_{i}", 'temperatura', {}, configuracion))
+        return gateway
+
+    def test_sensor_lento_no_bloquea(self):
+        """Test de que un sensor que excede su timeout no retrasa a los demás"""
+        gateway = self._gateway([
+            {'frecuencia': 0.05, 'latencia': (0.001, 0.01)},
+            {'frecuencia': 0.05, 'latencia': (0.001, 0.01)},
+            {'frecuencia': 0.05, 'latencia': 5.0, 'timeout': 0.05}
+        ])
+        lecturas = []
+        motor = MotorSondeoIoT([gateway], jitter=0.05)
+
+        metricas = asyncio.run(motor.ejecutar(duracion=0.6, consumidor=lecturas.extend))
+
+        self.assertGreater(metricas['timeouts'], 0)
+        self.assertEqual(metricas['lecturas'], len(lecturas))
+        sensores = {lectura['sensor_id'] for lectura in lecturas}
+        self.assertEqual(sensores, {'sensor_0', 'sensor_1'})
+        self.assertGreaterEqual(sum(l['sensor_id'] == 'sensor_0' for l in lecturas), 6)
+
+    def test_periodo_por_sensor(self):
+        """Test de que cada sensor respeta su propio periodo de muestreo"""
+        gateway = self._gateway([
+            {'frecuencia': 0.04, 'latencia': (0.0, 0.005)},
+            {'frecuencia': 0.2, 'latencia': (0.0, 0.005)}
+        ])
+        lecturas = []
+        motor = MotorSondeoIoT([gateway], jitter=0.05)
+
+        asyncio.run(motor.ejecutar(duracion=1.0, consumidor=lecturas.extend))
+
+        rapido = sum(l['sensor_id'] == 'sensor_0' for l in lecturas)
+        lento = sum(l['sensor_id'] == 'sensor_1' for l in lecturas)
+        self.assertGreater(rapido, 3 * lento)
+        self.assertLessEqual(lento, 7)
+
+    def test_jitter_no_se_acumula(self):
+        """Test de que el jitter de cada ciclo no desplaza la grilla de los siguientes"""
+        instantes = []
+
+        class SensorCronometrado:
+            sensor_id = 'sensor_cronometrado'
+            configuracion = {'frecuencia': 0.05}
+
+            async def leer_sensor_async(self):
+                instantes.append(time.monotonic())
+                return {'sensor_id': self.sensor_id}
+
+        gateway = self._gateway([])
+        gateway.sensores['sensor_cronometrado'] = SensorCronometrado()
+        motor = MotorSondeoIoT([gateway], jitter=0.4)
+
+        # Jitter siempre máximo: acumulado, cada ciclo se alargaría a 0.07 s
+        with mock.patch('motor_sondeo_iot.random.uniform', side_effect=lambda a, b: b):
+            asyncio.run(motor.ejecutar(duracion=1.0, consumidor=lambda lote: None))
+
+        intervalos = sorted(b - a for a, b in zip(instantes, instantes[1:]))
+        self.assertGreaterEqual(len(instantes), 15)
+        self.assertLess(intervalos[len(intervalos) // 2], 0.06)
+
+    def test_contrapresion_cola_acotada(self):
+        """Test de que sin consumidor la cola llena detiene a los sensores"""
+        gateway = self._gateway([{'frecuencia': 0.01} for _ in range(4)])
+        motor = MotorSondeoIoT([gateway], capacidad_cola=5)
+
+        metricas = asyncio.run(motor.ejecutar(duracion=0.3))
+
+        self.assertEqual(motor.cola.qsize(), 5)
+        self.assertEqual(metricas['lecturas'], 5)
+        self.assertGreater(metricas['esperas_cola_llena'], 0)
+
+    def test_lectura_gateway_concurrente(self):
+        """Test de lectura paralela de todos los sensores de un gateway"""
+        gateway = self._gateway([{'latencia': 0.1} for _ in range(10)])
+
+        inicio = time.perf_counter()
+        lecturas = asyncio.run(gateway.leer_todos_los_sensores_async())
+
+        self.assertEqual(len(lecturas), 10)
+        self.assertLess(time.perf_counter() - inicio, 0.5)
+        self.assertIsNotNone(gateway.ultima_comunicacion)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - AGREGADOR STREAMING IoT METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de agregados incrementales y micro-lotes
+"""
+
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio IoT al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '03_Sistema_IoT_Drones' / 'scripts'))
+
+try:
+    from agregador_streaming_iot import AgregadorStreamingIoT, EstadisticaWelford
+    AGREGADOR_AVAILABLE = True
+except ImportError:
+    AGREGADOR_AVAILABLE = False
+
+
+class TestAgregadorStreamingIoT(unittest.TestCase):
+    """Tests unitarios para el agregador streaming IoT"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not AGREGADOR_AVAILABLE:
+            self.skipTest("Agregador streaming IoT no disponible")
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(3)
+        inicio = datetime(2025, 1, 1)
+        self.lecturas = [
+            {
+                'sensor_id': f"sensor_{i % 4}",
+                'tipo': 'temperatura' if i % 2 == 0 else 'humedad',
+                'timestamp': (inicio + timedelta(minutes=i)).isoformat(),
+                'valor': float(rng.normal(20, 5)),
+                'unidad': '°C',
+                'bateria': 90.0,
+                'senal': -60.0,
+                'estado': 'activo'
+            }
+            for i in range(500)
+        ]
+
+    def tearDown(self):
+        """Limpiar directorio temporal"""
+        self.temp_dir.cleanup()
+
+    def test_welford_igual_a_pandas(self):
+        """Test de media, desviación y extremos contra pandas"""
+        valores = pd.Series([lectura['valor'] for lectura in self.lecturas])
+        estadistica = EstadisticaWelford()
+        for valor in valores:
+            estadistica.actualizar(valor)
+
+        self.assertEqual(estadistica.count, len(valores))
+        self.assertAlmostEqual(estadistica.media, valores.mean(), places=9)
+        self.assertAlmostEqual(estadistica.varianza, valores.var(), places=9)
+        self.assertEqual(estadistica.a_dict()['max'], round(valores.max(), 2))
+
+    def test_estadisticas_por_tipo_y_buffer_acotado(self):
+        """Test del resumen por tipo y de la capacidad del buffer circular"""
+        agregador = AgregadorStreamingIoT(self.temp_dir.name, capacidad_buffer=100)
+        agregador.agregar_lote(self.lecturas)
+
+        df = pd.DataFrame(self.lecturas)
+        resumen = agregador.estadisticas()
+        temperatura = df.loc[df['tipo'] == 'temperatura', 'valor']
+        self.assertEqual(resumen['total_lecturas'], 500)
+        self.assertEqual(resumen['sensores_activos'], 4)
+        self.assertEqual(resumen['estadisticas_por_tipo']['temperatura']['std'], round(temperatura.std(), 2))
+        self.assertEqual(resumen['rango_temporal']['fin'], self.lecturas[-1]['timestamp'])
+        self.assertEqual(len(agregador.recientes), 100)
+        self.assertEqual(agregador.recientes[-1], self.lecturas[-1])
+
+    def test_persistencia_por_micro_lotes(self):
+        """Test de que los micro-lotes se anexan a un único archivo rodante"""
+        agregador = AgregadorStreamingIoT(self.temp_dir.name, intervalo_persistencia=3600,
+                                          tamano_micro_lote=200)
+        for lectura in self.lecturas:
+            agregador.agregar(lectura)
+            agregador.persistir_si_corresponde()
+
+        self.assertEqual(agregador.total_persistidas, 400)
+        agregador.cerrar()
+
+        archivos = list(Path(self.temp_dir.name).glob('datos_iot_stream_*.csv'))
+        self.assertEqual(len(archivos), 1)
+        persistido = pd.read_csv(archivos[0])
+        self.assertEqual(len(persistido), 500)
+        self.assertEqual(list(persistido['sensor_id'][:4]), ['sensor_0', 'sensor_1', 'sensor_2', 'sensor_3'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
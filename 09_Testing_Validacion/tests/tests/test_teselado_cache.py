@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - CACHÉ DE ESCENAS SATELITALES METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de resultados por checksum y catálogo incremental
+"""
+
+import unittest
+import tempfile
+import json
+import os
+import numpy as np
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Agregar el directorio IoT y drones al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '03_Sistema_IoT_Drones' / 'scripts'))
+
+try:
+    from cache_escenas_satelitales import CacheEscenasSatelitales, miniatura
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+
+try:
+    from motor_indices_espectrales import (INDICES_RGB, DefinicionIndice, MotorIndicesEspectrales,
+                                           _diferencia_normalizada)
+    MOTOR_AVAILABLE = True
+except ImportError:
+    MOTOR_AVAILABLE = False
+
+try:
+    from conector_iot_satelital import ConectorDatosSatelitales
+    CONECTOR_AVAILABLE = True
+except ImportError:
+    CONECTOR_AVAILABLE = False
+
+
+class TestCacheEscenasSatelitales(unittest.TestCase):
+    """Tests unitarios para la caché de escenas satelitales"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not CACHE_AVAILABLE:
+            self.skipTest("Caché de escenas satelitales no disponible")
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.imagenes = self.base / 'imagenes'
+        self.metadatos = self.base / 'metadatos'
+        self.imagenes.mkdir()
+        self.metadatos.mkdir()
+        for i in range(3):
+            (self.imagenes / f"escena_{i}.png").write_bytes(bytes([i]) * 100)
+            (self.metadatos / f"escena_{i}_metadata.json").write_text(json.dumps({'id': i}))
+
+    def tearDown(self):
+        """Limpiar directorio temporal"""
+        self.temp_dir.cleanup()
+
+    def _cache(self, version='v1'):
+        return CacheEscenasSatelitales(str(self.base / 'cache'), version_parametros=version)
+
+    def _escanear(self, cache):
+        def cargar(archivo):
+            with open(self.metadatos / f"{archivo.stem}_metadata.json", 'r') as f:
+                return json.load(f)
+        return cache.escanear(self.imagenes, '*.png', cargar,
+                              dependencias=lambda archivo: [self.metadatos / f"{archivo.stem}_metadata.json"])
+
+    def test_resultado_por_hash_y_version(self):
+        """Test de reutilización por contenido e invalidación por versión de parámetros"""
+        cache = self._cache()
+        ruta = self.imagenes / 'escena_0.png'
+        hash_imagen = cache.hash_archivo(ruta)
+        self.assertIsNone(cache.obtener_resultado(hash_imagen))
+
+        vista = miniatura([np.arange(300 * 200, dtype=np.uint8).reshape(300, 200)] * 3, lado_maximo=64)
+        cache.guardar_resultado(hash_imagen, {'indices': {'ndvi': {'media': 0.4}}}, vista)
+        cache.cerrar()
+
+        # Copia con otro nombre: mismo contenido, mismo resultado, tras reabrir la caché
+        copia = self.imagenes / 'copia.png'
+        copia.write_bytes(ruta.read_bytes())
+        reabierta = self._cache()
+        self.assertEqual(reabierta.obtener_resultado(reabierta.hash_archivo(copia))['indices']['ndvi']['media'], 0.4)
+        np.testing.assert_array_equal(reabierta.obtener_miniatura(hash_imagen), vista)
+        self.assertEqual(vista.shape, (60, 40, 3))
+
+        self.assertIsNone(self._cache('v2').obtener_resultado(hash_imagen))
+
+    def test_hash_solo_si_cambia_firma(self):
+        """Test de que el hash se recalcula solo al cambiar mtime o tamaño"""
+        cache = self._cache()
+        ruta = self.imagenes / 'escena_1.png'
+        primero = cache.hash_archivo(ruta)
+        cache.hash_archivo(ruta)
+        self.assertEqual(cache.contadores['hashes_calculados'], 1)
+
+        ruta.write_bytes(b'otra imagen')
+        self.assertNotEqual(cache.hash_archivo(ruta), primero)
+        self.assertEqual(cache.contadores['hashes_calculados'], 2)
+
+    def test_catalogo_incremental(self):
+        """Test de que el catálogo solo relee entradas nuevas, modificadas o con metadatos cambiados"""
+        cache = self._cache()
+        self.assertEqual(sorted(e['id'] for e in self._escanear(cache)), [0, 1, 2])
+        self.assertEqual(len(self._escanear(cache)), 3)
+        self.assertEqual(cache.contadores['entradas_releidas'], 3)
+
+        metadatos = self.metadatos / 'escena_2_metadata.json'
+        metadatos.write_text(json.dumps({'id': 20}))
+        os.utime(metadatos, ns=(0, 10 ** 9))
+        (self.imagenes / 'escena_0.png').unlink()
+
+        reabierta = self._cache()
+        self.assertEqual(sorted(e['id'] for e in self._escanear(reabierta)), [1, 20])
+        self.assertEqual(reabierta.contadores['entradas_releidas'], 1)
+
+    def test_version_incluye_parametros_de_kernel(self):
+        """Test de que cambiar constantes de un kernel cambia la versión de parámetros"""
+        if not MOTOR_AVAILABLE:
+            self.skipTest("Motor de índices espectrales no disponible")
+
+        base = MotorIndicesEspectrales(INDICES_RGB).version_parametros()
+        self.assertEqual(MotorIndicesEspectrales(dict(INDICES_RGB)).version_parametros(), base)
+
+        for parametros in ({'suma': 1.0, 'escala': 1.5}, {'suma': 0.5, 'escala': 2.0},
+                           {'suma': 0.5, 'escala': 1.5, 'epsilon': 1e-6}):
+            definiciones = dict(INDICES_RGB)
+            definiciones['savi'] = DefinicionIndice(('r', 'b'), _diferencia_normalizada('r', 'b', **parametros))
+            self.assertNotEqual(MotorIndicesEspectrales(definiciones).version_parametros(), base)
+
+    def test_conector_imagen_inexistente_y_acierto(self):
+        """Test de imagen inexistente por ruta y timestamp fresco en aciertos de caché"""
+        if not CONECTOR_AVAILABLE:
+            self.skipTest("Conector satelital no disponible")
+
+        directorio_original = os.getcwd()
+        os.chdir(self.base)
+        try:
+            conector = ConectorDatosSatelitales()
+            ruta = str(self.imagenes / 'escena_0.png')
+            guardado = {'procesado': True, 'indices': {'ndvi': {'media': 0.4}}, 'resumen': {}}
+            conector.cache_escenas.guardar_resultado(conector.cache_escenas.hash_archivo(ruta), guardado)
+
+            faltante = str(self.imagenes / 'no_existe.png')
+            self.assertEqual(conector.procesar_imagen_satelital(faltante),
+                             {'error': 'No se pudo cargar la imagen'})
+
+            resultados = conector.procesar_imagenes_satelitales([faltante, ruta])
+            self.assertEqual(resultados[0], {'error': 'No se pudo cargar la imagen'})
+            self.assertEqual(resultados[1]['indices'], guardado['indices'])
+
+            antes = datetime.now().isoformat()
+            primero = conector.procesar_imagen_satelital(ruta)['timestamp_procesamiento']
+            segundo = conector.procesar_imagen_satelital(ruta)['timestamp_procesamiento']
+            self.assertLessEqual(antes, primero)
+            self.assertLessEqual(primero, segundo)
+            conector.cache_escenas.cerrar()
+        finally:
+            os.chdir(directorio_original)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
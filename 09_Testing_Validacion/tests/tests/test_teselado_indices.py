@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - MOTOR DE ÍNDICES ESPECTRALES METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing del cálculo de índices por teselas
+"""
+
+import unittest
+import tempfile
+import numpy as np
+import sys
+from pathlib import Path
+
+# Agregar el directorio IoT y drones al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '03_Sistema_IoT_Drones' / 'scripts'))
+
+try:
+    from motor_indices_espectrales import (CLASES_NDVI, INDICES_MULTIESPECTRALES, INDICES_RGB,
+                                           MotorIndicesEspectrales)
+    from almacen_raster_satelital import AlmacenRasterSatelital
+    MOTOR_AVAILABLE = True
+except ImportError:
+    MOTOR_AVAILABLE = False
+
+
+class TestMotorIndicesEspectrales(unittest.TestCase):
+    """Tests unitarios para el motor de índices espectrales por teselas"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not MOTOR_AVAILABLE:
+            self.skipTest("Motor de índices espectrales no disponible")
+
+        rng = np.random.default_rng(11)
+        # Imagen BGR uint8 de tamaño no múltiplo de la tesela
+        self.imagen = rng.integers(0, 256, (230, 175, 3), dtype=np.uint8)
+        self.bandas = {'r': self.imagen[:, :, 2], 'g': self.imagen[:, :, 1], 'b': self.imagen[:, :, 0]}
+
+    def test_equivalencia_indices_rgb(self):
+        """Test de igualdad con el cálculo de escena completa con np.where"""
+        r, g, b = (self.bandas[k].astype(np.float32) for k in ('r', 'g', 'b'))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            referencia = {
+                'ndvi': np.where((r + b) != 0, (r - b) / (r + b), 0),
+                'gndvi': np.where((g + b) != 0, (g - b) / (g + b), 0),
+                'savi': np.where((r + b + 0.5) != 0, (r - b) / (r + b + 0.5) * 1.5, 0),
+                'evi': np.where((r + 6*b - 7.5*g + 1) != 0, 2.5 * (r - b) / (r + 6*b - 7.5*g + 1), 0)
+            }
+
+        motor = MotorIndicesEspectrales(INDICES_RGB, tamano_tesela=64, max_hilos=4,
+                                        clases={'ndvi': CLASES_NDVI})
+        resultado = motor.procesar_arreglos(self.bandas)
+
+        for nombre, valores in referencia.items():
+            estadisticas = resultado['indices'][nombre]
+            self.assertAlmostEqual(estadisticas['media'], float(np.mean(valores, dtype=np.float64)), places=6)
+            self.assertAlmostEqual(estadisticas['desviacion'], float(np.std(valores, dtype=np.float64)), places=5)
+            self.assertEqual(estadisticas['min'], float(np.min(valores)))
+            self.assertEqual(estadisticas['max'], float(np.max(valores)))
+
+        ndvi = referencia['ndvi']
+        self.assertEqual(resultado['clases']['vegetacion_saludable'], float(np.mean(ndvi > 0.3)))
+        self.assertEqual(resultado['clases']['vegetacion_moderada'], float(np.mean((ndvi > 0.1) & (ndvi <= 0.3))))
+        self.assertEqual(resultado['clases']['vegetacion_baja'], float(np.mean(ndvi <= 0.1)))
+
+    def test_lote_igual_a_escenas_individuales(self):
+        """Test de que el lote multi-escena da lo mismo que cada escena por separado"""
+        motor = MotorIndicesEspectrales(INDICES_RGB, tamano_tesela=64, max_hilos=4)
+        otra = {k: v[::-1].copy() for k, v in self.bandas.items()}
+
+        lote = motor.procesar_lote([self.bandas, otra], indices=['ndvi', 'evi'])
+
+        self.assertEqual(len(lote), 2)
+        self.assertEqual(set(lote[0]['indices']), {'ndvi', 'evi'})
+        individual = motor.procesar_arreglos(otra, indices=['ndvi', 'evi'])
+        self.assertAlmostEqual(lote[1]['indices']['evi']['media'], individual['indices']['evi']['media'], places=10)
+        with self.assertRaises(ValueError):
+            motor.procesar_arreglos(self.bandas, indices=['NDRE'])
+
+    def test_escena_desde_almacen(self):
+        """Test de índices multiespectrales leídos tesela a tesela desde el almacén"""
+        rng = np.random.default_rng(3)
+        bandas = {k: (rng.random((150, 200)) * 0.8 + 0.1).astype(np.float32) for k in ('nir', 'r', 'g', 'b')}
+
+        with tempfile.TemporaryDirectory() as directorio:
+            almacen = AlmacenRasterSatelital(directorio, tamano_tesela=64)
+            almacen.guardar_escena('escena_ms', bandas)
+            # Buffers del motor menores que la tesela del almacén: deben agrandarse
+            motor = MotorIndicesEspectrales(INDICES_MULTIESPECTRALES, tamano_tesela=32)
+            resultado = motor.procesar_escena_almacen(almacen, 'escena_ms', indices=['NDVI', 'DVI'])
+
+        nir, r = bandas['nir'].astype(np.float64), bandas['r'].astype(np.float64)
+        self.assertAlmostEqual(resultado['indices']['NDVI']['media'], float(np.mean((nir - r) / (nir + r + 1e-8))), places=5)
+        self.assertAlmostEqual(resultado['indices']['DVI']['max'], float(np.max(nir - r)), places=6)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - ALMACÉN RASTER SATELITAL METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de bandas teseladas y lecturas por ventana
+"""
+
+import unittest
+import tempfile
+import numpy as np
+import sys
+from pathlib import Path
+
+# Agregar el directorio IoT y drones al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '03_Sistema_IoT_Drones' / 'scripts'))
+
+try:
+    from almacen_raster_satelital import AlmacenRasterSatelital
+    ALMACEN_AVAILABLE = True
+except ImportError:
+    ALMACEN_AVAILABLE = False
+
+
+class TestAlmacenRasterSatelital(unittest.TestCase):
+    """Tests unitarios para el almacén raster teselado"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not ALMACEN_AVAILABLE:
+            self.skipTest("Almacén raster satelital no disponible")
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.almacen = AlmacenRasterSatelital(self.temp_dir.name, tamano_tesela=64)
+        rng = np.random.default_rng(5)
+        # Tamaño no múltiplo de la tesela para cubrir los bordes
+        self.nir = rng.random((150, 200), dtype=np.float32)
+        self.rojo = rng.random((150, 200), dtype=np.float32)
+        self.bbox = [-71.3, -32.95, -71.1, -32.80]
+        self.almacen.guardar_escena('escena_1', {'nir': self.nir, 'rojo': self.rojo},
+                                    bbox=self.bbox, tipo='multiespectral')
+
+    def tearDown(self):
+        """Limpiar directorio temporal"""
+        self.temp_dir.cleanup()
+
+    def test_escena_completa_y_catalogo(self):
+        """Test de ida y vuelta de la escena y persistencia del catálogo"""
+        escena = self.almacen.leer_escena('escena_1')
+        np.testing.assert_array_equal(escena['nir'], self.nir)
+        np.testing.assert_array_equal(escena['rojo'], self.rojo)
+
+        reabierto = AlmacenRasterSatelital(self.temp_dir.name)
+        meta = reabierto.metadatos('escena_1')
+        self.assertEqual(reabierto.escenas(), ['escena_1'])
+        self.assertEqual((meta['alto'], meta['ancho'], meta['teselas']), (150, 200, [3, 4]))
+        self.assertEqual(reabierto.abrir_banda('escena_1', 'nir').shape, (3, 4, 64, 64))
+
+    def test_ventana_y_teselas(self):
+        """Test de lecturas por ventana que cruzan varias teselas"""
+        ventana = self.almacen.leer_ventana('escena_1', (30, 140, 50, 199), bandas=['nir'])
+        np.testing.assert_array_equal(ventana['nir'], self.nir[30:140, 50:199])
+
+        tesela = self.almacen.leer_tesela('escena_1', 'rojo', 2, 3)
+        np.testing.assert_array_equal(tesela, self.rojo[128:150, 192:200])
+        self.assertEqual(len(list(self.almacen.iterar_teselas('escena_1'))), 12)
+
+    def test_lectura_por_bbox(self):
+        """Test de conversión de bbox geográfico a ventana de píxeles"""
+        # Cuadrante noroeste de la escena
+        bbox = [-71.3, -32.875, -71.2, -32.80]
+        self.assertEqual(self.almacen.ventana_bbox('escena_1', bbox), (0, 75, 0, 100))
+
+        datos = self.almacen.leer_bbox('escena_1', bbox, bandas=['nir'])
+        np.testing.assert_array_equal(datos['nir'], self.nir[:75, :100])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
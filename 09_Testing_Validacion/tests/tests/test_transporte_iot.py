@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - TRANSPORTE DE LECTURAS IoT METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing del canal acotado y del formato binario de lecturas
+"""
+
+import unittest
+import json
+import os
+import tempfile
+import threading
+import numpy as np
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Agregar el directorio IoT al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '03_Sistema_IoT_Drones' / 'scripts'))
+
+try:
+    from canal_lecturas_iot import CanalLecturasIoT
+    CANAL_AVAILABLE = True
+except ImportError:
+    CANAL_AVAILABLE = False
+
+try:
+    from formato_binario_iot import (DTYPE_REGISTRO, ESQUEMA_CONECTOR, ESQUEMA_SISTEMA, RegistroIncompleto,
+                                     RegistroIoT, codificar_lote, decodificar_lote, decodificar_registros)
+    FORMATO_AVAILABLE = True
+except ImportError:
+    FORMATO_AVAILABLE = False
+
+try:
+    from conector_iot_satelital import ConectorSensoresIoT
+    CONECTOR_AVAILABLE = True
+except ImportError:
+    CONECTOR_AVAILABLE = False
+
+try:
+    from sistema_iot_metgo import SistemaIoTMETGO
+    SISTEMA_IOT_AVAILABLE = True
+except ImportError:
+    SISTEMA_IOT_AVAILABLE = False
+
+
+def _lectura(i):
+    return {'estacion_id': f"IOT_00{i % 2}", 'sensor': 'temperatura', 'valor': float(i),
+            'bateria': 80, 'senal': 90, 'timestamp': f"2025-01-01T00:{i % 60:02d}:00"}
+
+
+class TestCanalLecturasIoT(unittest.TestCase):
+    """Tests unitarios para el canal acotado de lecturas IoT"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not CANAL_AVAILABLE:
+            self.skipTest("Canal de lecturas IoT no disponible")
+
+    def test_descartar_antiguo(self):
+        """Test de que el canal conserva las lecturas más recientes"""
+        canal = CanalLecturasIoT(capacidad=10)
+        canal.publicar_lote([_lectura(i) for i in range(25)])
+
+        self.assertEqual(len(canal), 10)
+        self.assertEqual(canal.estadisticas()['reemplazadas'], 15)
+        self.assertEqual([r['valor'] for r in canal.drenar_registros()], [float(i) for i in range(15, 25)])
+
+    def test_muestrear(self):
+        """Test de que en desborde solo entra una de cada paso_muestreo lecturas"""
+        canal = CanalLecturasIoT(capacidad=10, politica='muestrear', paso_muestreo=5)
+        aceptadas = canal.publicar_lote([_lectura(i) for i in range(60)])
+
+        self.assertEqual(aceptadas, 10 + 10)
+        self.assertEqual(len(canal), 10)
+        self.assertEqual(canal.estadisticas()['descartadas'], 40)
+        self.assertEqual(canal.instantanea()[-1]['valor'], 59.0)
+
+    def test_bloquear(self):
+        """Test de que el productor espera espacio y descarta al vencer el timeout"""
+        canal = CanalLecturasIoT(capacidad=2, politica='bloquear', timeout_bloqueo=0.05)
+        canal.publicar_lote([_lectura(0), _lectura(1)])
+        self.assertFalse(canal.publicar(_lectura(2)))
+
+        canal.timeout_bloqueo = 2.0
+        consumidor = threading.Timer(0.05, canal.drenar_registros, args=(1,))
+        consumidor.start()
+        self.assertTrue(canal.publicar(_lectura(3)))
+        consumidor.join()
+        self.assertEqual([r['valor'] for r in canal.instantanea()], [1.0, 3.0])
+
+    def test_drenar_columnar(self):
+        """Test del drenado por lotes como arreglos por columna"""
+        canal = CanalLecturasIoT(capacidad=100)
+        canal.publicar_lote([_lectura(i) for i in range(30)])
+
+        columnas = canal.drenar(20, columnas=['valor', 'estacion_id'])
+
+        self.assertEqual(columnas['valor'].dtype, np.float64)
+        np.testing.assert_array_equal(columnas['valor'], np.arange(20, dtype=float))
+        self.assertEqual(columnas['estacion_id'][1], 'IOT_001')
+        self.assertEqual(len(canal), 10)
+        self.assertEqual(canal.estadisticas()['drenadas'], 20)
+
+    def test_estadisticas_conector_no_destructivas(self):
+        """Test de que las estadísticas del conector no consumen lecturas"""
+        if not CONECTOR_AVAILABLE:
+            self.skipTest("Conector IoT no disponible")
+
+        conector = ConectorSensoresIoT(capacidad_canal=50)
+        conector.datos_sensores.publicar_lote([_lectura(i) for i in range(20)])
+
+        estadisticas = conector.obtener_estadisticas_iot()
+
+        self.assertEqual(estadisticas['total_lecturas'], 20)
+        self.assertEqual(estadisticas['estaciones']['IOT_000']['lecturas'], 10)
+        self.assertEqual(len(conector.obtener_datos_iot(100)), 20)
+
+
+class TestFormatoBinarioIoT(unittest.TestCase):
+    """Tests unitarios para el formato binario compacto de lecturas"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not FORMATO_AVAILABLE:
+            self.skipTest("Formato binario IoT no disponible")
+
+        self.lecturas = [
+            {
+                'timestamp': f"2025-03-01T10:{i % 60:02d}:15.250000",
+                'estacion_id': f"IOT_00{1 + i % 4}",
+                'estacion_nombre': f"Estacion {1 + i % 4} Quillota",
+                'sensor': ['temperatura', 'humedad', 'presion'][i % 3],
+                'valor': round(10 + i * 0.7, 1),
+                'unidad': ['°C', '%', 'hPa'][i % 3],
+                'coordenadas': {'lat': -32.88, 'lon': -71.25},
+                'elevacion': 120,
+                'calidad': ['excelente', 'buena', 'regular'][i % 3],
+                'bateria': 20 + i % 80,
+                'senal': 60 + i % 40
+            }
+            for i in range(120)
+        ]
+
+    def test_ida_y_vuelta(self):
+        """Test de que el suscriptor reconstruye las lecturas con el registro publicado"""
+        publicador = RegistroIoT()
+        payload = codificar_lote(self.lecturas, publicador, ESQUEMA_CONECTOR)
+
+        suscriptor = RegistroIoT.desde_json(publicador.a_json())
+        decodificadas = decodificar_lote(payload, suscriptor, ESQUEMA_CONECTOR)
+
+        self.assertEqual(len(decodificadas), len(self.lecturas))
+        for original, decodificada in zip(self.lecturas, decodificadas):
+            self.assertEqual(decodificada, original)
+
+    def test_tamano_y_version_registro(self):
+        """Test del tamaño por lectura frente a JSON y del versionado del registro"""
+        registro = RegistroIoT()
+        payload = codificar_lote(self.lecturas, registro, ESQUEMA_CONECTOR)
+        self.assertEqual(registro.version, 1)
+
+        codificar_lote(self.lecturas[:10], registro, ESQUEMA_CONECTOR)
+        self.assertEqual(registro.version, 1)
+
+        tamano_json = sum(len(json.dumps(lectura)) for lectura in self.lecturas)
+        self.assertEqual(len(decodificar_registros(payload)), 120)
+        self.assertLess(len(payload), 120 * DTYPE_REGISTRO.itemsize + 16)
+        self.assertLess(len(payload) * 10, tamano_json)
+
+    def test_version_por_cambio_de_metadatos(self):
+        """Test de que cambiar metadatos de una clave existente versiona el registro"""
+        registro = RegistroIoT()
+        codificar_lote(self.lecturas, registro, ESQUEMA_CONECTOR)
+        self.assertEqual(registro.version, 1)
+
+        cambiadas = [dict(lectura, unidad='K') if lectura['sensor'] == 'temperatura' else lectura
+                     for lectura in self.lecturas[:6]]
+        payload = codificar_lote(cambiadas, registro, ESQUEMA_CONECTOR)
+        self.assertEqual(registro.version, 2)
+        codificar_lote(cambiadas, registro, ESQUEMA_CONECTOR)
+        self.assertEqual(registro.version, 2)
+
+        suscriptor = RegistroIoT.desde_json(registro.a_json())
+        decodificadas = decodificar_lote(payload, suscriptor, ESQUEMA_CONECTOR)
+        self.assertEqual(decodificadas[0]['unidad'], 'K')
+
+    def test_lote_antes_del_registro(self):
+        """Test de que un lote con ids desconocidos se rechaza sin decodificar a medias"""
+        publicador = RegistroIoT()
+        codificar_lote(self.lecturas[:3], publicador, ESQUEMA_CONECTOR)
+        suscriptor = RegistroIoT.desde_json(publicador.a_json())
+        payload = codificar_lote(self.lecturas, publicador, ESQUEMA_CONECTOR)
+
+        with self.assertRaises(RegistroIncompleto):
+            decodificar_lote(payload, RegistroIoT(), ESQUEMA_CONECTOR)
+        with self.assertRaises(RegistroIncompleto):
+            decodificar_lote(payload, suscriptor, ESQUEMA_CONECTOR)
+
+        suscriptor.actualizar_desde_json(publicador.a_json())
+        self.assertEqual(len(decodificar_lote(payload, suscriptor, ESQUEMA_CONECTOR)), 120)
+
+    def test_mensaje_truncado(self):
+        """Test de rechazo de mensajes truncados o ajenos"""
+        payload = codificar_lote(self.lecturas, RegistroIoT(), ESQUEMA_CONECTOR)
+
+        with self.assertRaises(ValueError):
+            decodificar_registros(payload[:-3])
+        with self.assertRaises(ValueError):
+            decodificar_registros(b'XX' + payload[2:])
+
+
+class TestSuscriptorBinarioIoT(unittest.TestCase):
+    """Tests unitarios para la recepción MQTT de lotes binarios en SistemaIoTMETGO"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not (FORMATO_AVAILABLE and SISTEMA_IOT_AVAILABLE):
+            self.skipTest("Sistema IoT no disponible")
+
+        self.directorio_original = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+        self.sistema = SistemaIoTMETGO()
+        self.topic = self.sistema.configuracion_red['mqtt_topic']
+        self.lecturas = [
+            {'sensor_id': f"sensor_{i % 3}", 'tipo': 'temperatura', 'unidad': '°C',
+             'ubicacion': {'nombre': 'Quillota'}, 'estado': 'activo', 'valor': 20.0 + i,
+             'bateria': 90, 'senal': 70, 'timestamp': f"2025-01-01T00:{i:02d}:00"}
+            for i in range(6)
+        ]
+
+    def tearDown(self):
+        """Limpiar directorio temporal"""
+        self.sistema.agregador_iot.cerrar()
+        os.chdir(self.directorio_original)
+        self.temp_dir.cleanup()
+
+    def _mensaje(self, subtopic, payload):
+        return SimpleNamespace(topic=f"{self.topic}/{subtopic}", payload=payload)
+
+    def test_lotes_en_espera_del_registro(self):
+        """Test de que los lotes previos al registro se procesan cuando este llega"""
+        publicador = RegistroIoT()
+        primero = codificar_lote(self.lecturas[:3], publicador, ESQUEMA_SISTEMA)
+        segundo = codificar_lote(self.lecturas[3:], publicador, ESQUEMA_SISTEMA)
+
+        self.sistema._on_mqtt_message(None, None, self._mensaje('lotes', primero))
+        self.sistema._on_mqtt_message(None, None, self._mensaje('lotes', segundo))
+        self.assertEqual(self.sistema.agregador_iot.total_lecturas, 0)
+        self.assertEqual(len(self.sistema._lotes_sin_registro), 2)
+
+        self.sistema._on_mqtt_message(None, None, self._mensaje('registro', publicador.a_json().encode()))
+        self.assertEqual(self.sistema.agregador_iot.total_lecturas, 6)
+        self.assertEqual(len(self.sistema._lotes_sin_registro), 0)
+        self.assertEqual([lectura['valor'] for lectura in self.sistema.datos_iot],
+                         [lectura['valor'] for lectura in self.lecturas])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTS UNITARIOS - VENTANAS TEMPORALES METGO 3D
+Sistema Meteorológico Agrícola Quillota - Testing de secuencias sin copia y generador de lotes
+"""
+
+import unittest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Agregar el directorio de modelos ML al path
+sys.path.append(str(Path(__file__).resolve().parents[3] / '06_Modelos_ML_IA' / 'scripts'))
+
+try:
+    from ventanas_temporales import GeneradorVentanas, crear_secuencias
+    VENTANAS_AVAILABLE = True
+except ImportError:
+    VENTANAS_AVAILABLE = False
+
+
+class TestVentanasTemporales(unittest.TestCase):
+    """Tests unitarios para las ventanas deslizantes"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        if not VENTANAS_AVAILABLE:
+            self.skipTest("Ventanas temporales no disponibles")
+
+        self.datos = np.arange(100 * 3, dtype=np.float32).reshape(100, 3)
+        self.objetivo = np.arange(100, dtype=np.float32)
+
+    def test_equivalente_a_bucle_y_sin_copia(self):
+        """Test de que las ventanas coinciden con el bucle original y son vistas"""
+        X, y = crear_secuencias(self.datos, 24, objetivo=self.objetivo)
+
+        X_bucle = np.array([self.datos[i - 24:i] for i in range(24, 100)])
+        np.testing.assert_array_equal(X, X_bucle)
+        np.testing.assert_array_equal(y, self.objetivo[24:])
+        self.assertTrue(np.shares_memory(X, self.datos))
+        self.assertFalse(X.flags.writeable)
+
+    def test_paso_y_desfase(self):
+        """Test de ventanas con paso y horizonte de predicción"""
+        X, y = crear_secuencias(self.datos, 10, objetivo=self.objetivo, paso=5, desfase=2)
+
+        self.assertEqual(len(X), len(range(0, 100 - 12, 5)))
+        np.testing.assert_array_equal(X[3], self.datos[15:25])
+        self.assertEqual(y[3], self.objetivo[27])
+
+        vacio, _ = crear_secuencias(self.datos[:5], 10, objetivo=self.objetivo[:5])
+        self.assertEqual(vacio.shape, (0, 10, 3))
+
+    def test_generador_por_segmentos(self):
+        """Test de lotes que no cruzan estaciones y cubren todas las ventanas"""
+        segmentos = [self.datos[:40], self.datos[40:]]
+        objetivos = [self.objetivo[:40], self.objetivo[40:]]
+        generador = GeneradorVentanas(segmentos, 8, objetivo=objetivos, tamano_lote=16,
+                                      barajar=True, semilla=0)
+
+        self.assertEqual(generador.n_muestras, 32 + 52)
+        self.assertEqual(len(generador), 6)
+
+        vistos = []
+        for X_lote, y_lote in generador:
+            self.assertLessEqual(len(X_lote), 16)
+            # Cada ventana es contigua en el tiempo y su objetivo es el registro siguiente
+            np.testing.assert_array_equal(X_lote[:, -1, 0] / 3 + 1, y_lote)
+            np.testing.assert_array_equal(np.diff(X_lote[:, :, 0], axis=1), 3)
+            vistos.extend(y_lote.tolist())
+
+        self.assertEqual(sorted(vistos), sorted(generador.objetivos().tolist()))
+        # Ninguna ventana cruza el límite entre segmentos (registros 40..47 no son objetivo)
+        self.assertFalse(any(40 <= v < 48 for v in vistos))
+
+    def test_generador_aplanado_sin_barajar(self):
+        """Test de lotes 2D para sklearn en orden temporal"""
+        generador = GeneradorVentanas(self.datos, 4, tamano_lote=10, paso=2, aplanar=True)
+        primer_lote = generador[0]
+
+        self.assertEqual(primer_lote.shape, (10, 12))
+        np.testing.assert_array_equal(primer_lote[1], self.datos[2:6].ravel())
+        with self.assertRaises(IndexError):
+            generador[len(generador)]
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)